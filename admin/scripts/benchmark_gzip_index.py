@@ -0,0 +1,94 @@
+"""
+Benchmarks random member reads in a tar.gz with and without the gzip checkpoint index.
+
+Plugins read the members they need in search order, not in archive order, so a
+tar.gz opened by tarfile in 'r:gz' mode decompresses again from the start of
+the archive for every member that lies before the current position. This
+script reads the same random sample of members (in random order) through
+tarfile's gzip stream and through scripts/gzip_index.py, and prints the time
+taken by each method next to the number of bytes actually needed.
+
+If no archive is given, a synthetic one of --generate megabytes of
+incompressible files is created in a temporary directory.
+
+Usage:
+    python admin/scripts/benchmark_gzip_index.py [archive.tar.gz] [--members 20] [--generate 512]
+"""
+import argparse
+import os
+import random
+import sys
+import tarfile
+import tempfile
+
+from time import perf_counter
+
+# Get the root directory of the repository (2 directories above the script)
+REPO_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.gzip_index import open_gzip_index  # noqa: E402  pylint: disable=wrong-import-position
+
+READ_SIZE = 1024 * 1024
+FILE_SIZE = 4 * 1024 * 1024
+
+
+def generate_archive(directory, size_mb):
+    '''Creates a tar.gz of size_mb megabytes of incompressible files, returns its path'''
+    path = os.path.join(directory, 'benchmark.tar.gz')
+    with tarfile.open(path, 'w:gz', compresslevel=1) as archive:
+        for position in range(max(1, size_mb * 1024 * 1024 // FILE_SIZE)):
+            member_path = os.path.join(directory, 'member.bin')
+            with open(member_path, 'wb') as file:
+                file.write(os.urandom(FILE_SIZE))
+            archive.add(member_path, arcname=f'private/var/mobile/file_{position:06}.bin')
+            os.remove(member_path)
+    return path
+
+
+def read_members(tar_file, members):
+    '''Reads the content of members in the given order, returns the elapsed time'''
+    start = perf_counter()
+    for member in members:
+        member_file = tar_file.extractfile(member)
+        while member_file.read(READ_SIZE):
+            pass
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark random member reads in a tar.gz archive.')
+    parser.add_argument('archive', nargs='?', help='Path of the tar.gz archive to read')
+    parser.add_argument('--members', type=int, default=20, help='Number of random members to read')
+    parser.add_argument('--generate', type=int, default=512,
+                        help='Size in MB of the synthetic archive created when no archive is given')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random member sample')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = args.archive or generate_archive(temp_dir, args.generate)
+        print(f'Archive: {archive_path} ({os.path.getsize(archive_path) / 1048576:.0f} MB compressed)')
+
+        start = perf_counter()
+        gzip_file = open_gzip_index(archive_path)
+        indexed = tarfile.open(archive_path, 'r:', fileobj=gzip_file)
+        members = [member for member in indexed.getmembers() if member.isfile()]
+        print(f'Listing and index: {len(members)} files in {perf_counter() - start:.2f}s '
+              f'({type(gzip_file).__name__})')
+
+        sample = random.Random(args.seed).sample(members, min(args.members, len(members)))
+        needed = sum(member.size for member in sample)
+        print(f'Reading {len(sample)} random files, {needed / 1048576:.1f} MB needed')
+
+        print(f'  checkpoint index: {read_members(indexed, sample):.2f}s')
+        indexed.close()
+        gzip_file.close()
+
+        with tarfile.open(archive_path, 'r:gz') as streamed:
+            streamed.getmembers()
+            print(f'  tarfile r:gz:     {read_members(streamed, sample):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmarks the memory used by the file listing of a file system extraction.
+
+FileSeekerDir kept the listing as a list of full path strings. It is now a
+CompactListing (scripts/compact_listing.py): interned directories, and a
+directory id and a name offset per entry in arrays over a single UTF-8
+buffer. This script measures with tracemalloc, for the same paths:
+- the list of path strings,
+- the CompactListing,
+- the PathIndex built over the CompactListing,
+and the time taken to iterate the list and the CompactListing.
+
+If no directory is given, --entries synthetic paths are generated, with the
+depth and name lengths of an iOS full file system extraction.
+
+Usage:
+    python admin/scripts/benchmark_listing_memory.py [directory] [--entries 1000000]
+"""
+import argparse
+import os
+import random
+import sys
+import tracemalloc
+
+from time import perf_counter
+
+# Get the root directory of the repository (2 directories above the script)
+REPO_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.compact_listing import CompactListing  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.directory_walker import DirectoryWalker  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_index import PathIndex  # noqa: E402  pylint: disable=wrong-import-position
+
+DIRECTORY_NAMES = ('Library', 'Caches', 'Application Support', 'Containers', 'Data', 'Documents', 'tmp')
+EXTENSIONS = ('.db', '.db-wal', '.plist', '.sqlite', '.jpg', '.heic', '')
+
+
+def generate_paths(count):
+    '''Returns count paths below /private/var/mobile, about one in twelve being a directory'''
+    generator = random.Random(0)
+    directories = ['/mnt/extraction/filesystem1/private/var/mobile']
+    paths = []
+    while len(paths) < count:
+        parent = generator.choice(directories)
+        if generator.random() < 0.08:
+            directory = f'{parent}/{generator.choice(DIRECTORY_NAMES)}-{generator.getrandbits(32):08X}'
+            directories.append(directory)
+            paths.append(directory)
+        else:
+            paths.append(f'{parent}/{generator.getrandbits(48):012x}{generator.choice(EXTENSIONS)}')
+    return paths
+
+
+def measured(function):
+    '''Returns (result of function, bytes allocated by function and still in use)'''
+    before = tracemalloc.get_traced_memory()[0]
+    result = function()
+    return result, tracemalloc.get_traced_memory()[0] - before
+
+
+def iteration_time(paths):
+    '''Returns the time taken to iterate paths'''
+    start = perf_counter()
+    for _ in paths:
+        pass
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the memory used by the file listing.')
+    parser.add_argument('directory', nargs='?', help='Path of a file system extraction to list')
+    parser.add_argument('--entries', type=int, default=1000000,
+                        help='Number of synthetic paths when no directory is given')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    # The path strings are created while measuring, so that they are counted with the list
+    if args.directory:
+        paths, list_size = measured(lambda: list(DirectoryWalker().walk(args.directory)[0]))
+    else:
+        paths, list_size = measured(lambda: generate_paths(args.entries))
+    count = max(1, len(paths))
+    listing, listing_size = measured(lambda: CompactListing(paths))
+    _, index_size = measured(lambda: PathIndex(listing))
+    tracemalloc.stop()
+    print(f'{len(paths)} entries, {len(listing.directories)} directories, '
+          f'average path length {sum(map(len, paths)) / count:.0f}')
+    print(f'  list of paths:   {list_size / 1048576:8.1f} MB ({list_size / count:.0f} bytes per entry)')
+    print(f'  CompactListing:  {listing_size / 1048576:8.1f} MB ({listing_size / count:.0f} bytes per entry), '
+          f'{list_size / max(1, listing_size):.1f}x smaller')
+    print(f'  PathIndex:       {index_size / 1048576:8.1f} MB ({index_size / count:.0f} bytes per entry)')
+    print(f'  iteration: list {iteration_time(paths):.2f}s, CompactListing {iteration_time(listing):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
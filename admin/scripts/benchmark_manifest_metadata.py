@@ -0,0 +1,88 @@
+"""
+Benchmarks the decoding of the file metadata of an iTunes backup Manifest.db.
+
+When an encrypted backup was opened, the NSKeyedArchiver metadata of every
+row of the Files table was deserialized with get_plist_content to find the
+encryption key and size of the files. The metadata is now stored raw and
+decoded only for the matched files, with the reader of scripts/itunes_manifest.py.
+This script prints, for the same rows, the time taken by:
+- the previous startup (get_plist_content on every row),
+- the current startup (raw blobs stored in ManifestMetadata),
+- decoding every row with read_mbfile_metadata (worst case, every file matched).
+
+If no Manifest.db is given (an unencrypted or already decrypted one), --rows
+synthetic rows are generated.
+
+Usage:
+    python admin/scripts/benchmark_manifest_metadata.py [Manifest.db] [--rows 300000]
+"""
+import argparse
+import os
+import plistlib
+import random
+import sqlite3
+import sys
+
+from time import perf_counter
+
+# Get the root directory of the repository (2 directories above the script)
+REPO_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.ilapfuncs import get_plist_content  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.itunes_manifest import ManifestMetadata, read_mbfile_metadata  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def generate_rows(count):
+    '''Returns (fileID, file) rows with the layout of the MBFile metadata of encrypted backups'''
+    generator = random.Random(0)
+    rows = []
+    for position in range(count):
+        mbfile = {'$class': plistlib.UID(3), 'EncryptionKey': plistlib.UID(2), 'Size': generator.randrange(1 << 30),
+                  'Birth': 1600000000 + position, 'LastModified': 1600000100 + position, 'ProtectionClass': 3,
+                  'Mode': 33188, 'UserID': 501, 'GroupID': 501, 'InodeNumber': position, 'Flags': 0,
+                  'LastStatusChange': 1600000200 + position, 'RelativePath': plistlib.UID(5)}
+        blob = plistlib.dumps({
+            '$archiver': 'NSKeyedArchiver', '$version': 100000, '$top': {'root': plistlib.UID(1)},
+            '$objects': ['$null', mbfile,
+                         {'$class': plistlib.UID(4), 'NS.data': b'\x03\x00\x00\x00' + generator.randbytes(40)},
+                         {'$classname': 'MBFile', '$classes': ['MBFile', 'NSObject']},
+                         {'$classname': 'NSMutableData', '$classes': ['NSMutableData', 'NSData', 'NSObject']},
+                         f'Library/file_{position}']}, fmt=plistlib.PlistFormat.FMT_BINARY)
+        rows.append((f'{position:040x}', blob))
+    return rows
+
+
+def timed(function, rows):
+    '''Calls function on every (fileID, file) row, returns the elapsed time'''
+    start = perf_counter()
+    for row in rows:
+        function(*row)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the decoding of Manifest.db file metadata.')
+    parser.add_argument('manifest', nargs='?', help='Path of a decrypted Manifest.db')
+    parser.add_argument('--rows', type=int, default=300000, help='Number of synthetic rows without a Manifest.db')
+    args = parser.parse_args()
+
+    if args.manifest:
+        db = sqlite3.connect(f'file:{args.manifest}?mode=ro', uri=True)
+        rows = db.execute('SELECT fileID, file FROM Files WHERE flags=1').fetchall()
+        db.close()
+    else:
+        rows = generate_rows(args.rows)
+    print(f'{len(rows)} rows')
+
+    previous = timed(lambda file_id, blob: get_plist_content(blob)['EncryptionKey'], rows)
+    print(f'  previous startup (get_plist_content per row): {previous:.2f}s')
+    metadata = ManifestMetadata()
+    print(f'  current startup (raw blobs):                  {timed(metadata.add, rows):.2f}s')
+    print(f'  read_mbfile_metadata of every row:            '
+          f'{timed(lambda file_id, blob: read_mbfile_metadata(blob), rows):.2f}s')
+
+
+if __name__ == '__main__':
+    main()
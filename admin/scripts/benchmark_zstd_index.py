@@ -0,0 +1,115 @@
+"""
+Benchmarks member reads in a multi-frame tar.zst with one and several decompression threads.
+
+scripts/zstd_index.py decompresses the frames following the one being read on a
+pool of threads. This script reads all the members of the archive in archive
+order, then a random sample of members in random order, through a reader with a
+single thread and through a reader with --workers threads, and prints the time
+taken by each.
+
+If no archive is given, a synthetic one of --generate megabytes of compressible
+files is created in a temporary directory, in frames of --frame_size megabytes
+(compressed with the zstandard package, or else the zstd command).
+
+Usage:
+    python admin/scripts/benchmark_zstd_index.py [archive.tar.zst] [--workers 4] [--members 20] [--generate 512]
+"""
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tarfile
+import tempfile
+
+from time import perf_counter
+
+# Get the root directory of the repository (2 directories above the script)
+REPO_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, REPO_ROOT)
+
+from scripts.zstd_index import open_zstd_index, zstandard  # noqa: E402  pylint: disable=wrong-import-position
+
+READ_SIZE = 1024 * 1024
+FILE_SIZE = 4 * 1024 * 1024
+
+
+def compress_frame(data):
+    '''Returns data compressed as a single zstd frame'''
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    if shutil.which('zstd') is None:
+        sys.exit('Generating an archive requires the zstandard package or the zstd command')
+    # The content size is only written in the frame header if the size of the input is given
+    return subprocess.run(['zstd', '-q', '-3', '-c', f'--stream-size={len(data)}'], input=data,
+                          stdout=subprocess.PIPE, check=True).stdout
+
+
+def generate_archive(directory, size_mb, frame_size_mb):
+    '''Creates a tar.zst of size_mb megabytes of compressible files in frames of frame_size_mb, returns its path'''
+    tar_path = os.path.join(directory, 'benchmark.tar')
+    with tarfile.open(tar_path, 'w') as archive:
+        for position in range(max(1, size_mb * 1024 * 1024 // FILE_SIZE)):
+            member_path = os.path.join(directory, 'member.bin')
+            with open(member_path, 'wb') as file:
+                # Half random, half repeated: about 2:1 compression
+                for _ in range(FILE_SIZE // 8192):
+                    file.write(os.urandom(4096) + b'\0' * 4096)
+            archive.add(member_path, arcname=f'private/var/mobile/file_{position:06}.bin')
+            os.remove(member_path)
+    path = tar_path + '.zst'
+    with open(tar_path, 'rb') as tar_file, open(path, 'wb') as output:
+        while True:
+            data = tar_file.read(frame_size_mb * 1024 * 1024)
+            if not data:
+                break
+            output.write(compress_frame(data))
+    os.remove(tar_path)
+    return path
+
+
+def read_members(tar_file, members):
+    '''Reads the content of members in the given order, returns the elapsed time'''
+    start = perf_counter()
+    for member in members:
+        member_file = tar_file.extractfile(member)
+        while member_file.read(READ_SIZE):
+            pass
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark member reads in a multi-frame tar.zst archive.')
+    parser.add_argument('archive', nargs='?', help='Path of the tar.zst archive to read')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Number of decompression threads')
+    parser.add_argument('--members', type=int, default=20, help='Number of random members to read')
+    parser.add_argument('--generate', type=int, default=512,
+                        help='Size in MB of the synthetic archive created when no archive is given')
+    parser.add_argument('--frame_size', type=int, default=4, help='Size in MB of the frames of the synthetic archive')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the random member sample')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        archive_path = args.archive or generate_archive(temp_dir, args.generate, args.frame_size)
+        print(f'Archive: {archive_path} ({os.path.getsize(archive_path) / 1048576:.0f} MB compressed)')
+
+        for workers in sorted({1, args.workers}):
+            start = perf_counter()
+            zstd_file = open_zstd_index(archive_path, workers)
+            tar_file = tarfile.open(archive_path, 'r:', fileobj=zstd_file)
+            members = [member for member in tar_file.getmembers() if member.isfile()]
+            listing_time = perf_counter() - start
+            sample = random.Random(args.seed).sample(members, min(args.members, len(members)))
+            frame_count = len(zstd_file.raw.frames)  # pylint: disable=no-member
+            print(f'{workers} thread(s), {frame_count} frames:')
+            print(f'  listing: {listing_time:.2f}s')
+            print(f'  {len(members)} files in archive order: {read_members(tar_file, members):.2f}s')
+            print(f'  {len(sample)} random files: {read_members(tar_file, sample):.2f}s')
+            tar_file.close()
+            zstd_file.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""PluginSpecs of stand-in artifacts, for the tests of how the artifacts of a run are scheduled and recorded."""
+import pathlib
+import sys
+
+from functools import wraps
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.plugin_loader import PluginSpec  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def processed(func):
+    '''Returns func wrapped like the functions declared with @artifact_processor, without their output'''
+    @wraps(func)
+    def wrapper(*args):
+        return func(*args)
+    return wrapper
+
+
+@processed
+def get_artifact(files_found, report_folder, seeker, wrap_text, timezone_offset):  # pylint: disable=unused-argument
+    '''Stands for an artifact function, returning no rows'''
+    return (), [], ''
+
+
+def make_plugin(name, search='*/file', module_name=None, category='Messages', method=get_artifact,
+                **artifact_info):
+    '''Returns the PluginSpec of an artifact, artifact_info completing its default requirements'''
+    return PluginSpec(name, module_name or name, category, search, method,
+                      dict({'requirements': 'none'}, **artifact_info))
@@ -0,0 +1,73 @@
+"""Check that the artifact timings are kept from run to run, and that the cost model orders and estimates the artifacts."""
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.artifact_timings import MAX_RUNS_PER_ARTIFACT, ArtifactTimings, CostModel  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+MB = 1048576
+
+
+class TestArtifactTimings(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.timings_path = os.path.join(self.temp_dir.name, 'LEAPP', 'artifact_timings.db')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def store(self, plugin, wall_seconds, input_bytes, runs=1):
+        '''Stores runs timings of plugin'''
+        for _ in range(runs):
+            timings = ArtifactTimings(self.timings_path)
+            timings.rows.append((plugin.name, plugin.module_name, wall_seconds, wall_seconds, input_bytes))
+            timings.save()
+
+    def test_measure(self):
+        timings = ArtifactTimings(self.timings_path)
+        self.assertTrue(timings.measure(make_plugin('photos'), 5 * MB, lambda: True))
+        self.assertFalse(timings.measure(make_plugin('failing'), MB, lambda: False))
+        self.assertEqual([row[0] for row in timings.rows], ['photos'])
+        timings.save()
+        self.assertIn('photos', CostModel(self.timings_path).mean_seconds)
+
+    def test_estimates(self):
+        photos, sms, lava_source = make_plugin('photos'), make_plugin('sms'), make_plugin('lavaSource', None)
+        self.store(photos, 20.0, 10 * MB)
+        self.store(photos, 10.0, 10 * MB, MAX_RUNS_PER_ARTIFACT)
+        self.store(sms, 1.0, 4 * MB)
+        self.store(lava_source, 3.0, None)
+        model = CostModel(self.timings_path)
+        # Only the last runs are kept
+        self.assertAlmostEqual(model.seconds_per_mb['photos'], 1.0)
+        self.assertAlmostEqual(model.estimate(photos, 30 * MB), 30.0)
+        self.assertAlmostEqual(model.estimate(sms, 8 * MB), 2.0)
+        self.assertAlmostEqual(model.estimate(lava_source, None), 3.0)
+        # Never run, the median seconds per MB of the other artifacts
+        self.assertAlmostEqual(model.estimate(make_plugin('notes'), 2 * MB), 1.25)
+        self.assertEqual(model.total_seconds({'photos': 30.0, 'sms': 2.0, 'notes': 2.0}), 34.0)
+        self.assertEqual(model.total_seconds({'photos': 30.0, 'sms': 2.0, 'notes': 2.0}, 2), 30.0)
+
+    def test_order(self):
+        plugins = [make_plugin('last_build'), make_plugin('sms'), make_plugin('logarchive'),
+                   make_plugin('photos'), make_plugin('lavaSource', None), make_plugin('notes'),
+                   make_plugin('unifiedLogs', requirements='logarchive module must be executed first')]
+        estimates = {'last_build': 0.1, 'sms': 2.0, 'logarchive': 1.0, 'photos': 30.0, 'lavaSource': 50.0,
+                     'notes': 5.0, 'unifiedLogs': 40.0}
+        self.assertEqual([plugin.name for plugin in CostModel.order(plugins, estimates)],
+                         ['last_build', 'photos', 'logarchive', 'notes', 'lavaSource', 'sms', 'unifiedLogs'])
+
+    def test_no_timings(self):
+        model = CostModel(self.timings_path)
+        self.assertEqual(model.mean_seconds, {})
+        self.assertFalse(os.path.exists(self.timings_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Check that an interrupted run is resumed with the state of its completed artifacts and without partial output."""
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+import scripts.lavafuncs as lavafuncs  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.checkpoints import RunCheckpoints  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import icons, identifiers  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.lavafuncs import initialize_lava, lava_get_run_info  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+
+class TestRunCheckpoints(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.output_folder = self.temp_dir.name
+        os.makedirs(os.path.join(self.output_folder, '_HTML', '_Script_Logs'))
+        os.makedirs(os.path.join(self.output_folder, 'data'))
+        initialize_lava('input', self.output_folder, 'fs')
+
+    def tearDown(self):
+        lavafuncs.lava_db.close()
+        icons.clear()
+        identifiers.clear()
+        self.temp_dir.cleanup()
+
+    def path(self, *parts):
+        '''Returns the path of a file of the report folder'''
+        return os.path.join(self.output_folder, *parts)
+
+    def write(self, text, *parts, mode='a'):
+        '''Writes text to a file of the report folder'''
+        with open(self.path(*parts), mode, encoding='utf-8') as report_file:
+            report_file.write(text)
+
+    def add_timeline_row(self, activity):
+        '''Adds a row to the timeline database, as timeline() does'''
+        os.makedirs(self.path('_Timeline'), exist_ok=True)
+        db = sqlite3.connect(self.path('_Timeline', 'tl.db'))
+        db.execute('CREATE TABLE IF NOT EXISTS data(key TEXT, activity TEXT, datalist TEXT)')
+        db.execute('INSERT INTO data VALUES (?, ?, ?)', ('2024-01-01', activity, '{}'))
+        db.commit()
+        db.close()
+
+    def run_artifact(self, plugin):
+        '''Writes the output of an artifact of plugin'''
+        lavafuncs.lava_data['artifacts'].setdefault(plugin.category, []).append(
+            {'name': plugin.name, 'tablename': plugin.name, 'module': plugin.module_name})
+        lavafuncs.lava_db.execute(f'CREATE TABLE {plugin.name} (value TEXT)')
+        lavafuncs.lava_db.commit()
+        icons.setdefault(plugin.category, {}).update({plugin.name: 'message-square'})
+        os.makedirs(self.path('_HTML', plugin.category), exist_ok=True)
+        os.makedirs(self.path('_TSV Exports'), exist_ok=True)
+        self.write('<table></table>', '_HTML', plugin.category, f'{plugin.name}.temphtml', mode='w')
+        self.write(f'{plugin.name}\n', '_TSV Exports', 'Messages.tsv')
+        self.add_timeline_row(plugin.name)
+
+    def test_resume(self):
+        sms, calls, notes = make_plugin('sms'), make_plugin('calls'), make_plugin('notes', category='Notes')
+        self.write('<br>', '_HTML', '_Script_Logs', 'DeviceInfo.html')
+        checkpoints = RunCheckpoints(self.output_folder)
+        checkpoints.start({'input_path': 'input', 'plugins': ['sms', 'calls', 'notes']})
+        self.run_artifact(sms)
+        identifiers['Device Information'] = {'Model': {'value': 'iPhone', 'artifact': 'sms'}}
+        checkpoints.record(sms, True, seeker_stats=[('sms', 'sms', None, 1, 3000, 3000, 0.1, 0.2)])
+        self.run_artifact(calls)
+        checkpoints.record(calls, False)
+        # Interrupted while notes was writing its output
+        self.run_artifact(notes)
+        lavafuncs.lava_db.close()
+
+        # The state of the resumed run
+        initialize_lava('input', self.output_folder, 'fs', resume=True)
+        icons.clear()
+        identifiers.clear()
+        checkpoints = RunCheckpoints(self.output_folder)
+        checkpoints.resume()
+        self.assertEqual(checkpoints.completed, {'sms': True, 'calls': False})
+        self.assertEqual([plugin.name for plugin in checkpoints.remaining([sms, calls, notes])], ['notes'])
+        self.assertEqual([artifact['name'] for artifact in lavafuncs.lava_data['artifacts']['Messages']],
+                         ['sms', 'calls'])
+        self.assertNotIn('Notes', lavafuncs.lava_data['artifacts'])
+        self.assertEqual(icons, {'Messages': {'sms': 'message-square', 'calls': 'message-square'}})
+        self.assertEqual(identifiers['Device Information']['Model']['value'], 'iPhone')
+        self.assertEqual(lava_get_run_info(self.output_folder)['plugins'], ['sms', 'calls', 'notes'])
+        self.assertEqual(checkpoints.seeker_stats, [('sms', 'sms', None, 1, 3000, 3000, 0.1, 0.2)])
+
+        # The output of notes is removed
+        self.assertFalse(os.path.exists(self.path('_HTML', 'Notes')))
+        self.assertTrue(os.path.exists(self.path('_HTML', '_Script_Logs', 'DeviceInfo.html')))
+        self.assertTrue(os.path.exists(self.path('_HTML', 'Messages', 'calls.temphtml')))
+        with open(self.path('_TSV Exports', 'Messages.tsv'), encoding='utf-8') as tsv_file:
+            self.assertEqual(tsv_file.read(), 'sms\ncalls\n')
+        db = sqlite3.connect(self.path('_Timeline', 'tl.db'))
+        self.assertEqual(db.execute('SELECT activity FROM data').fetchall(), [('sms',), ('calls',)])
+        db.close()
+        tables = {row[0] for row in lavafuncs.lava_db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertIn('calls', tables)
+        self.assertNotIn('notes', tables)
+
+        # The next checkpoints only hold what the resumed artifacts add
+        self.run_artifact(notes)
+        checkpoints.record(notes, True)
+        state = lavafuncs.lava_get_checkpoints()[-1][3]
+        self.assertEqual(list(state['artifacts']), ['Notes'])
+        self.assertEqual(state['tables'], ['notes'])
+
+    def test_no_checkpoints(self):
+        checkpoints = RunCheckpoints(self.output_folder)
+        checkpoints.start({'input_path': 'input', 'plugins': ['sms']})
+        os.makedirs(self.path('_HTML', 'Messages'))
+        self.write('partial', '_HTML', 'Messages', 'sms.temphtml', mode='w')
+        checkpoints = RunCheckpoints(self.output_folder)
+        checkpoints.resume()
+        self.assertEqual(checkpoints.completed, {})
+        self.assertFalse(os.path.exists(self.path('_HTML', 'Messages')))
+        checkpoints.complete()
+        self.assertTrue(lava_get_run_info(self.output_folder)['complete'])
+
+
+if __name__ == '__main__':
+    unittest.main()
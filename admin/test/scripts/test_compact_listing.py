@@ -0,0 +1,65 @@
+"""Check that the compact listing returns the paths appended, and that searches over it are unchanged."""
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.compact_listing import CompactListing  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_index import PathIndex, match_patterns  # noqa: E402  pylint: disable=wrong-import-position
+
+PATHS = [
+    '/extraction/private/var/mobile/Library/SMS/sms.db',
+    '/extraction/private/var/mobile/Library/SMS/sms.db-wal',
+    '/extraction/private/var/mobile/Library/SMS/Attachments',
+    '/extraction/private/var/mobile/Library/Notes/NoteStore.sqlite',
+    '/extraction/private/var/mobile/Library/SMS/Attachments/IMG_0001.HEIC',
+    '/extraction/private/var/mobile/Library/SMS/sms.db',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0001.JPG',
+    'Manifest.db',
+    '/extraction/private/var/mobile/Library/Café/\udcffété.plist',
+]
+PATTERNS = ('*/Library/SMS/sms.db', '*/IMG_*', '*/Library/SMS/*', '*.plist', '*/Attach*', '*Manifest.db')
+
+
+class TestCompactListing(unittest.TestCase):
+    def test_paths_are_unchanged(self):
+        listing = CompactListing(PATHS)
+        self.assertEqual(len(listing), len(PATHS))
+        self.assertEqual(list(listing), PATHS)
+        self.assertEqual([listing[position] for position in range(len(PATHS))], PATHS)
+        self.assertEqual(listing[-1], PATHS[-1])
+        self.assertEqual(listing[2:5], PATHS[2:5])
+        self.assertIn(PATHS[3], listing)
+        self.assertEqual(listing.index(PATHS[5]), 0)
+        self.assertEqual(len(listing.directories), 6)
+        self.assertEqual(list(listing.normcased()), [os.path.normcase(path) for path in PATHS])
+
+    def test_index_matches_list(self):
+        listing = CompactListing(PATHS)
+        keys = [os.path.normcase(path) for path in PATHS]
+        self.assertEqual(match_patterns(PATTERNS, listing.normcased(), PathIndex(listing.normcased()), 'root/'),
+                         match_patterns(PATTERNS, keys, None, 'root/'))
+
+    def test_directory_seeker(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            input_dir = os.path.join(temp_dir, 'input')
+            for path in PATHS[:5]:
+                full_path = os.path.join(input_dir, path.replace('/extraction/', ''))
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                if not full_path.endswith('Attachments'):
+                    with open(full_path, 'wb') as file:
+                        file.write(b'data')
+            seeker = FileSeekerDir(input_dir, os.path.join(temp_dir, 'data'))
+            self.assertIsInstance(seeker.listing_entries(), CompactListing)
+            found = seeker.search('*/Library/SMS/sms.db*')
+            self.assertEqual(sorted(os.path.basename(path) for path in found), ['sms.db', 'sms.db-wal'])
+            self.assertEqual(len(seeker.search('*/Attachments/*.HEIC')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
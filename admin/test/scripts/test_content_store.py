@@ -0,0 +1,82 @@
+"""Check that identical files extracted through a content store are stored once and linked at their paths."""
+import hashlib
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.content_store import CONTENT_STORE_SPOOL_SIZE, ContentStore  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+
+CONTENTS = {
+    'Library/Caches/a/small.bin': b'small content',
+    'Library/Caches/b/small.bin': b'small content',
+    'Library/Caches/a/large.bin': b'x' * (CONTENT_STORE_SPOOL_SIZE + 10),
+    'Library/Caches/b/large.bin': b'x' * (CONTENT_STORE_SPOOL_SIZE + 10),
+    'Library/Caches/c/other.bin': b'other content',
+    'Library/Caches/c/empty.bin': b'',
+}
+
+
+class TestContentStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for name, content in CONTENTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.input_dir, name)), exist_ok=True)
+            with open(os.path.join(self.input_dir, name), 'wb') as file:
+                file.write(content)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_store(self, store, data_folder):
+        for name, content in CONTENTS.items():
+            path = os.path.join(data_folder, name)
+            with open(path, 'rb') as file:
+                self.assertEqual(file.read(), content)
+            digest = hashlib.sha256(content).hexdigest()
+            self.assertEqual(store.get_digest(path), digest)
+            if content:
+                self.assertTrue(os.path.samefile(path, store.object_path(digest)))
+        self.assertEqual(len(os.listdir(os.path.join(store.root, 'tmp'))), 0)
+        self.assertEqual(store.stored_bytes, sum(len(content) for content in set(CONTENTS.values())))
+        self.assertEqual(store.duplicate_bytes, sum(len(content) for content in CONTENTS.values()) - store.stored_bytes)
+
+    def test_directory_copy(self):
+        data_folder = os.path.join(self.temp_dir.name, 'data')
+        store = ContentStore(data_folder)
+        seeker = FileSeekerDir(self.input_dir, data_folder, content_store=store)
+        self.assertEqual(len(seeker.search('*/Library/Caches/*/*.bin')), len(CONTENTS))
+        self.check_store(store, data_folder)
+
+    def test_tar_extraction(self):
+        tar_path = os.path.join(self.temp_dir.name, 'input.tar')
+        with tarfile.open(tar_path, 'w') as archive:
+            archive.add(self.input_dir, 'root')
+        data_folder = os.path.join(self.temp_dir.name, 'data')
+        store = ContentStore(data_folder)
+        seeker = FileSeekerTar(tar_path, data_folder, content_store=store)
+        self.assertEqual(len(seeker.search('*/Library/Caches/*/*.bin')), len(CONTENTS))
+        seeker.cleanup()
+        self.check_store(store, os.path.join(data_folder, 'root'))
+
+    def test_failed_write_stores_nothing(self):
+        store = ContentStore(os.path.join(self.temp_dir.name, 'data'))
+        path = os.path.join(self.temp_dir.name, 'data', 'file.bin')
+        with self.assertRaises(ValueError):
+            with store.open(path) as output:
+                output.write(b'y' * (CONTENT_STORE_SPOOL_SIZE + 1))
+                raise ValueError('interrupted')
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(os.listdir(os.path.join(store.root, 'tmp')), [])
+        self.assertIsNone(store.get_digest(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
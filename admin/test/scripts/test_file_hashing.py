@@ -0,0 +1,103 @@
+"""Check that the files found are hashed while they are copied, and not hashed again by the next runs."""
+import hashlib
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.content_store import ContentStore  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.file_hashing import FileHasher  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.listing_cache import ListingCache  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerTar, FileSeekerZip  # noqa: E402  pylint: disable=wrong-import-position
+
+ALGORITHMS = ('md5', 'sha256')
+CONTENTS = {
+    'private/var/mobile/Library/SMS/sms.db': os.urandom(3 * 1024 * 1024),
+    'private/var/mobile/Library/SMS/sms.db-wal': b'',
+    'private/var/mobile/Library/Notes/notes.sqlite': b'notes',
+}
+
+
+def expected_hashes(content):
+    return {algorithm: hashlib.new(algorithm, content).hexdigest() for algorithm in ALGORITHMS}
+
+
+class TestFileHashing(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        for name, content in CONTENTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.input_dir, name)), exist_ok=True)
+            with open(os.path.join(self.input_dir, name), 'wb') as file:
+                file.write(content)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_hashes(self, seeker, found):
+        self.assertEqual(len(found), len(CONTENTS))
+        for path in found:
+            source_path = seeker.file_infos[path].source_path
+            name = next(name for name in CONTENTS if source_path.endswith(name))
+            self.assertEqual(seeker.file_infos[path].hashes, expected_hashes(CONTENTS[name]))
+
+    def test_directory_modes(self):
+        for fs_mode in ('copy', 'hardlink', 'inplace'):
+            for run in range(2):
+                with self.subTest(fs_mode=fs_mode, run=run):
+                    listing_cache = ListingCache(self.input_dir, 'fs', self.cache_dir)
+                    hasher = FileHasher(ALGORITHMS, listing_cache)
+                    seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, f'data_{fs_mode}'),
+                                           listing_cache=listing_cache, fs_mode=fs_mode, hasher=hasher)
+                    self.check_hashes(seeker, seeker.search('*/Library/*/*'))
+                    hasher.save()
+                    if fs_mode == 'copy':
+                        self.assertEqual((hasher.hashed, hasher.reused), (0, 3) if run else (3, 0))
+
+    def test_changed_file_is_hashed_again(self):
+        listing_cache = ListingCache(self.input_dir, 'fs', self.cache_dir)
+        hasher = FileHasher(ALGORITHMS, listing_cache)
+        FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'), listing_cache=listing_cache,
+                      hasher=hasher).search('*/Library/*/*')
+        hasher.save()
+        CONTENTS['private/var/mobile/Library/Notes/notes.sqlite'] = b'changed notes'
+        self.addCleanup(CONTENTS.__setitem__, 'private/var/mobile/Library/Notes/notes.sqlite', b'notes')
+        with open(os.path.join(self.input_dir, 'private/var/mobile/Library/Notes/notes.sqlite'), 'wb') as file:
+            file.write(b'changed notes')
+        hasher = FileHasher(ALGORITHMS, listing_cache)
+        seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'),
+                               listing_cache=listing_cache, hasher=hasher)
+        self.check_hashes(seeker, seeker.search('*/Library/*/*'))
+        self.assertEqual((hasher.hashed, hasher.reused), (1, 2))
+
+    def test_archives(self):
+        tar_path = os.path.join(self.temp_dir.name, 'input.tar')
+        with tarfile.open(tar_path, 'w') as archive:
+            archive.add(self.input_dir, '.')
+        zip_path = os.path.join(self.temp_dir.name, 'input.zip')
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for name, content in CONTENTS.items():
+                archive.writestr(name, content)
+        for content_store in (False, True):
+            with self.subTest(content_store=content_store):
+                data_folder = os.path.join(self.temp_dir.name, f'data_{content_store}')
+                store = ContentStore(data_folder) if content_store else None
+                tar_seeker = FileSeekerTar(tar_path, os.path.join(data_folder, 'tar'), content_store=store,
+                                           hasher=FileHasher(ALGORITHMS))
+                self.check_hashes(tar_seeker, tar_seeker.search('*/Library/*/*'))
+                tar_seeker.cleanup()
+                zip_seeker = FileSeekerZip(zip_path, os.path.join(data_folder, 'zip'), 2, store,
+                                           FileHasher(ALGORITHMS))
+                self.check_hashes(zip_seeker, zip_seeker.search('*/Library/*/*'))
+                zip_seeker.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+"""Check that the fs modes without copies never modify the original files of the extraction."""
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.context import Context  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import get_sqlite_db_uri, open_sqlite_db_readonly  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir  # noqa: E402  pylint: disable=wrong-import-position
+
+SMS_DB = 'private/var/mobile/Library/SMS/sms.db'
+PLIST = 'private/var/mobile/Library/Preferences/com.apple.AppStore.plist'
+
+
+class TestFsModes(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        self.data_folder = os.path.join(self.temp_dir.name, 'data')
+        os.makedirs(os.path.dirname(os.path.join(self.input_dir, SMS_DB)))
+        os.makedirs(os.path.dirname(os.path.join(self.input_dir, PLIST)))
+        with open(os.path.join(self.input_dir, PLIST), 'wb') as file:
+            file.write(b'data')
+        db = sqlite3.connect(os.path.join(self.input_dir, SMS_DB))
+        db.execute('CREATE TABLE message (text TEXT)')
+        db.execute("INSERT INTO message VALUES ('hello')")
+        db.commit()
+        db.close()
+
+    def tearDown(self):
+        Context.set_seeker(None)
+        self.temp_dir.cleanup()
+
+    def input_snapshot(self):
+        return sorted((entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+                      for entry in os.scandir(os.path.dirname(os.path.join(self.input_dir, SMS_DB))))
+
+    def test_inplace_returns_original_paths(self):
+        seeker = FileSeekerDir(self.input_dir, self.data_folder, fs_mode='inplace')
+        Context.set_seeker(seeker)
+        before = self.input_snapshot()
+        found = seeker.search('*/Library/SMS/sms.db')
+        self.assertEqual(found, [os.path.join(self.input_dir, SMS_DB)])
+        self.assertEqual(seeker.file_infos[found[0]].source_path, found[0])
+        self.assertFalse(os.path.exists(self.data_folder))
+        self.assertTrue(get_sqlite_db_uri(found[0]).endswith('?immutable=1'))
+        db = open_sqlite_db_readonly(found[0])
+        self.assertEqual(db.execute('SELECT text FROM message').fetchall(), [('hello',)])
+        db.close()
+        self.assertEqual(self.input_snapshot(), before)
+        self.assertEqual(Context.get_relative_path(found[0]), SMS_DB.replace('/', os.sep))
+
+    def test_inplace_database_with_wal_is_copied(self):
+        seeker = FileSeekerDir(self.input_dir, self.data_folder, fs_mode='inplace')
+        Context.set_seeker(seeker)
+        db_path = os.path.join(self.input_dir, SMS_DB)
+        with open(db_path + '-wal', 'wb') as file:
+            file.write(b'wal')
+        uri = get_sqlite_db_uri(db_path)
+        self.assertTrue(uri.endswith('?mode=ro'))
+        self.assertTrue(os.path.isfile(seeker.get_data_path(db_path) + '-wal'))
+
+    def test_hardlink_mode_keeps_original_timestamps(self):
+        seeker = FileSeekerDir(self.input_dir, self.data_folder, fs_mode='hardlink')
+        original = os.path.join(self.input_dir, PLIST)
+        mtime_ns = os.stat(original).st_mtime_ns
+        found = seeker.search('*/Preferences/com.apple.AppStore.plist', force=True)
+        found = seeker.search('*/Preferences/com.apple.AppStore.plist', force=True)
+        with open(found[0], 'rb') as file:
+            self.assertEqual(file.read(), b'data')
+        self.assertEqual(os.stat(original).st_mtime_ns, mtime_ns)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Check that reads through the gzip checkpoint index return the same bytes as a sequential decompression."""
+import gzip
+import io
+import os
+import pathlib
+import random
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.gzip_index import GzipCheckpointReader  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.listing_cache import ListingCache  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+
+SPACING = 256 * 1024
+
+
+class TestGzipIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        generator = random.Random(0)
+        self.content = b''.join(generator.randbytes(1024) * generator.randint(1, 64) for _ in range(200))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_gzip(self, name, members, padding=0):
+        path = os.path.join(self.temp_dir.name, name)
+        size = -(-len(self.content) // members)
+        with open(path, 'wb') as file:
+            for start in range(0, len(self.content), size):
+                file.write(gzip.compress(self.content[start:start + size]))
+            file.write(b'\0' * padding)
+        return path
+
+    def test_random_reads_match_content(self):
+        generator = random.Random(1)
+        for members, padding in ((1, 0), (5, 0), (3, 1000)):
+            with self.subTest(members=members, padding=padding):
+                path = self.write_gzip(f'data_{members}_{padding}.gz', members, padding)
+                with io.BufferedReader(GzipCheckpointReader(path, SPACING)) as reader:
+                    self.assertEqual(reader.read(), self.content)
+                    self.assertGreater(len(reader.raw.checkpoints), 1)
+                    for _ in range(50):
+                        offset = generator.randrange(len(self.content))
+                        reader.seek(offset)
+                        self.assertEqual(reader.read(5000), self.content[offset:offset + 5000])
+                    self.assertEqual(reader.seek(0, os.SEEK_END), len(self.content))
+                    self.assertEqual(reader.seek(len(self.content) + 10), len(self.content))
+                    self.assertEqual(reader.read(), b'')
+
+    def test_tar_gz_members_are_read_in_any_order(self):
+        input_dir = os.path.join(self.temp_dir.name, 'input')
+        names = [f'private/var/mobile/Library/file_{position}.bin' for position in range(8)]
+        for position, name in enumerate(names):
+            os.makedirs(os.path.dirname(os.path.join(input_dir, name)), exist_ok=True)
+            with open(os.path.join(input_dir, name), 'wb') as file:
+                file.write(self.content[position * 1000:] + name.encode())
+        tar_path = os.path.join(self.temp_dir.name, 'input.tar.gz')
+        with tarfile.open(tar_path, 'w:gz') as archive:
+            archive.add(input_dir, arcname='.')
+        cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        for run in range(2):
+            data_folder = os.path.join(self.temp_dir.name, f'data{run}')
+            seeker = FileSeekerTar(tar_path, data_folder, ListingCache(tar_path, 'gz', cache_dir))
+            for position in reversed(range(len(names))):
+                found = seeker.search(f'*/file_{position}.bin')
+                with open(found[0], 'rb') as file:
+                    self.assertEqual(file.read(), self.content[position * 1000:] + names[position].encode())
+            seeker.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
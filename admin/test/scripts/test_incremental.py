@@ -0,0 +1,173 @@
+"""Check that an incremental run selects the unchanged artifacts and copies their output from the previous run."""
+import os
+import pathlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+import scripts.lavafuncs as lavafuncs  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.checkpoints import RunCheckpoints  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.file_hashing import FileHasher  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.html_parts import body_sidebar_dynamic_data_placeholder, nav_bar_script  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import icons, identifiers  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.incremental import IncrementalRun  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.lavafuncs import initialize_lava, lava_get_artifact_fingerprints  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.listing_cache import ListingCache  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.report import insert_sidebar_code, remove_sidebar_code, side_heading  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_planner import SearchPlan  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+PAGE = f'<html><nav>{body_sidebar_dynamic_data_placeholder}</nav><table>{{0}}</table></html>'
+SIDEBAR = side_heading.format('Saved Reports') + '<li>Report Home</li>' + nav_bar_script
+SMS_PATTERN = '*/sms.db'
+
+
+class TestIncrementalRun(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.previous_folder = os.path.join(self.temp_dir.name, 'previous')
+        self.output_folder = os.path.join(self.temp_dir.name, 'output')
+        for folder in (self.previous_folder, self.output_folder):
+            os.makedirs(os.path.join(folder, '_HTML', '_Script_Logs'))
+
+    def tearDown(self):
+        lavafuncs.lava_db.close()
+        icons.clear()
+        identifiers.clear()
+        self.temp_dir.cleanup()
+
+    def path(self, folder, *parts):
+        '''Returns the path of a file of a report folder'''
+        return os.path.join(folder, *parts)
+
+    def run_artifact(self, plugin):
+        '''Writes the output of plugin into the previous report folder'''
+        lavafuncs.lava_data['artifacts'].setdefault(plugin.category, []).append(
+            {'name': plugin.name, 'tablename': plugin.name, 'module': plugin.module_name})
+        lavafuncs.lava_db.execute(f'CREATE TABLE {plugin.name} (value TEXT)')
+        lavafuncs.lava_db.execute(f'INSERT INTO {plugin.name} VALUES (?)', (plugin.name,))
+        lavafuncs.lava_db.commit()
+        icons.setdefault(plugin.category, {}).update({plugin.name: 'message-square'})
+        identifiers.setdefault('Device Information', {})[plugin.name] = {
+            'value': plugin.name, 'source_file': self.path(self.previous_folder, 'data', 'sms.db'),
+            'artifact': plugin.name}
+        os.makedirs(self.path(self.previous_folder, '_HTML', plugin.category), exist_ok=True)
+        os.makedirs(self.path(self.previous_folder, '_TSV Exports'), exist_ok=True)
+        os.makedirs(self.path(self.previous_folder, '_Timeline'), exist_ok=True)
+        with open(self.path(self.previous_folder, '_HTML', plugin.category, f'{plugin.name} chats.temphtml'), 'w',
+                  encoding='utf8') as page_file:
+            page_file.write(PAGE.format(plugin.name))
+        with open(self.path(self.previous_folder, '_TSV Exports', 'Messages.tsv'), 'a',
+                  encoding='utf8') as tsv_file:
+            tsv_file.write(f'{plugin.name}\n')
+        db = sqlite3.connect(self.path(self.previous_folder, '_Timeline', 'tl.db'))
+        db.execute('CREATE TABLE IF NOT EXISTS data(key TEXT, activity TEXT, datalist TEXT)')
+        db.execute('INSERT INTO data VALUES (?, ?, ?)', ('2024-01-01', plugin.name, '{}'))
+        db.commit()
+        db.close()
+
+    def previous_run(self, plugins):
+        '''Runs plugins in the previous report folder, up to the generation of its pages'''
+        initialize_lava('input', self.previous_folder, 'fs')
+        checkpoints = RunCheckpoints(self.previous_folder)
+        checkpoints.start({'input_path': 'input', 'plugins': [plugin.name for plugin in plugins]})
+        for plugin in plugins:
+            self.run_artifact(plugin)
+            checkpoints.record(plugin, True)
+        lavafuncs.lava_insert_sqlite_artifact_fingerprints([(plugin.name, plugin.module_name, plugin.name)
+                                                            for plugin in plugins])
+        checkpoints.complete()
+        folder = self.path(self.previous_folder, '_HTML', 'Messages')
+        for name in os.listdir(folder):
+            with open(os.path.join(folder, name), encoding='utf8') as page_file:
+                page = insert_sidebar_code(page_file.read(), SIDEBAR, name)
+            with open(self.path(self.previous_folder, '_HTML', name.replace('.temphtml', '.html').replace(' ', '_')),
+                      'w', encoding='utf8') as page_file:
+                page_file.write(page)
+            os.remove(os.path.join(folder, name))
+        lavafuncs.lava_db.close()
+        icons.clear()
+        identifiers.clear()
+        initialize_lava('input', self.output_folder, 'fs')
+
+    def test_remove_sidebar_code(self):
+        page = PAGE.format('sms')
+        self.assertEqual(remove_sidebar_code(insert_sidebar_code(page, SIDEBAR, 'sms')), page)
+        self.assertIsNone(remove_sidebar_code(page))
+
+    def test_plan(self):
+        sms, calls = make_plugin('sms', SMS_PATTERN), make_plugin('calls', SMS_PATTERN)
+        contacts = make_plugin('contacts', SMS_PATTERN, requirements='calls module must be executed first')
+        summary = make_plugin('summary', search=None)
+        plugins = [sms, calls, contacts, summary]
+        self.previous_run(plugins)
+        incremental = IncrementalRun(self.previous_folder, self.output_folder,
+                                     lava_get_artifact_fingerprints(self.previous_folder))
+        search_plan = SearchPlan(plugins)
+        incremental.plan(plugins, search_plan, {'sms': 'sms', 'calls': 'changed', 'contacts': 'contacts',
+                                                'summary': 'summary'})
+        self.assertEqual(incremental.unchanged, {'sms'})
+        self.assertEqual(search_plan.skipped_plugins, {'sms'})
+        self.assertEqual(search_plan.eager_patterns(), ['*/sms.db'])
+        self.assertTrue(incremental.is_unchanged(sms))
+        self.assertFalse(incremental.is_unchanged(calls))
+
+    def test_copy(self):
+        sms, calls = make_plugin('sms', SMS_PATTERN), make_plugin('calls', SMS_PATTERN)
+        self.previous_run([sms, calls])
+        incremental = IncrementalRun(self.previous_folder, self.output_folder,
+                                     lava_get_artifact_fingerprints(self.previous_folder))
+        incremental.plan([sms, calls], SearchPlan([sms, calls]), {'sms': 'sms', 'calls': 'calls'})
+        self.assertTrue(incremental.copy(calls, set()))
+        self.assertTrue(incremental.copy(sms, set()))
+
+        with open(self.path(self.output_folder, '_HTML', 'Messages', 'sms chats.temphtml'),
+                  encoding='utf8') as page_file:
+            self.assertEqual(page_file.read(), PAGE.format('sms'))
+        with open(self.path(self.output_folder, '_TSV Exports', 'Messages.tsv'), encoding='utf8') as tsv_file:
+            self.assertEqual(tsv_file.read(), 'calls\nsms\n')
+        db = sqlite3.connect(self.path(self.output_folder, '_Timeline', 'tl.db'))
+        self.assertEqual(db.execute('SELECT activity FROM data').fetchall(), [('calls',), ('sms',)])
+        db.close()
+        self.assertEqual(lavafuncs.lava_db.execute('SELECT value FROM sms').fetchall(), [('sms',)])
+        self.assertEqual([artifact['name'] for artifact in lavafuncs.lava_data['artifacts']['Messages']],
+                         ['calls', 'sms'])
+        self.assertEqual(icons, {'Messages': {'sms': 'message-square', 'calls': 'message-square'}})
+        self.assertEqual(identifiers['Device Information']['sms']['source_file'],
+                         self.path(self.output_folder, 'data', 'sms.db'))
+
+    def test_file_edited_in_place_changes_fingerprint(self):
+        input_dir = os.path.join(self.temp_dir.name, 'input')
+        sms_path = os.path.join(input_dir, 'private', 'var', 'mobile', 'Library', 'SMS', 'sms.db')
+        os.makedirs(os.path.dirname(sms_path))
+        cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        for algorithms in ((), ('sha256',)):
+            with self.subTest(algorithms=algorithms):
+                fingerprints = []
+                for content, mtime in ((b'data', 1700000000), (b'DATA', 1700000100), (b'DATA', 1700000200)):
+                    with open(sms_path, 'wb') as sms_file:
+                        sms_file.write(content)
+                    os.utime(sms_path, (mtime, mtime))
+                    listing_cache = ListingCache(input_dir, 'fs', cache_dir)
+                    hasher = FileHasher(algorithms, listing_cache) if algorithms else None
+                    seeker = FileSeekerDir(input_dir, os.path.join(self.temp_dir.name, 'data'),
+                                           listing_cache=listing_cache, hasher=hasher)
+                    seeker.plan_searches(['*/sms.db'])
+                    fingerprints.append(seeker.planned_fingerprints('*/sms.db'))
+                    if hasher:
+                        hasher.save()
+                self.assertNotEqual(fingerprints[0], fingerprints[1])
+                if algorithms:
+                    # Only the content is fingerprinted
+                    self.assertEqual(fingerprints[1], fingerprints[2])
+                else:
+                    self.assertNotEqual(fingerprints[1], fingerprints[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
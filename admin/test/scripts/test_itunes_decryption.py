@@ -0,0 +1,104 @@
+"""Check that files of an encrypted iTunes backup are decrypted in chunks to the same content."""
+import hashlib
+import os
+import pathlib
+import plistlib
+import sqlite3
+import sys
+import tempfile
+import unittest
+
+import cryptography.hazmat.primitives.keywrap as crypt
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerItunes, ITUNES_DECRYPT_BUFFER_SIZE, ITUNES_IV  # noqa: E402  pylint: disable=wrong-import-position
+
+PROTECTION_CLASS = 3
+SIZES = (0, 15, 16, 1000, ITUNES_DECRYPT_BUFFER_SIZE - 1, ITUNES_DECRYPT_BUFFER_SIZE + 17,
+         3 * ITUNES_DECRYPT_BUFFER_SIZE)
+
+
+def encrypt(key, data):
+    '''Encrypts data like the backup files, AES-CBC with a 0'd IV and PKCS7 padding'''
+    padder = padding.PKCS7(128).padder()
+    encryptor = Cipher(algorithms.AES(key), modes.CBC(ITUNES_IV)).encryptor()
+    return encryptor.update(padder.update(data) + padder.finalize()) + encryptor.finalize()
+
+
+def file_metadata(wrapped_key, size):
+    '''Returns the NSKeyedArchiver MBFile blob stored in the file column of Manifest.db'''
+    return plistlib.dumps({
+        '$archiver': 'NSKeyedArchiver',
+        '$version': 100000,
+        '$top': {'root': plistlib.UID(1)},
+        '$objects': [
+            '$null',
+            {'$class': plistlib.UID(3), 'EncryptionKey': plistlib.UID(2), 'Size': size,
+             'ProtectionClass': PROTECTION_CLASS, 'Birth': 1600000000, 'LastModified': 1600000100},
+            {'$class': plistlib.UID(4), 'NS.data': PROTECTION_CLASS.to_bytes(4, 'little') + wrapped_key},
+            {'$classname': 'MBFile', '$classes': ['MBFile', 'NSObject']},
+            {'$classname': 'NSMutableData', '$classes': ['NSMutableData', 'NSData', 'NSObject']},
+        ]}, fmt=plistlib.PlistFormat.FMT_BINARY)
+
+
+class TestItunesDecryption(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.backup_dir = os.path.join(self.temp_dir.name, 'backup')
+        os.makedirs(self.backup_dir)
+        class_key = os.urandom(32)
+        manifest_key = os.urandom(32)
+        self.decryption_keys = ({PROTECTION_CLASS: {'CLAS': PROTECTION_CLASS, 'Unwrapped': class_key}}, manifest_key)
+        self.contents = {}
+        manifest_path = os.path.join(self.temp_dir.name, 'Manifest.db')
+        db = sqlite3.connect(manifest_path)
+        db.execute('CREATE TABLE Files (fileID TEXT, domain TEXT, relativePath TEXT, flags INTEGER, file BLOB)')
+        for size in SIZES:
+            relative_path = f'Library/Caches/file_{size}.bin'
+            file_id = hashlib.sha1(f'HomeDomain-{relative_path}'.encode()).hexdigest()
+            file_key = os.urandom(32)
+            content = os.urandom(size)
+            os.makedirs(os.path.join(self.backup_dir, file_id[:2]), exist_ok=True)
+            with open(os.path.join(self.backup_dir, file_id[:2], file_id), 'wb') as file:
+                file.write(encrypt(file_key, content))
+            db.execute('INSERT INTO Files VALUES (?, ?, ?, 1, ?)', (
+                file_id, 'HomeDomain', relative_path,
+                file_metadata(crypt.aes_key_wrap(class_key, file_key), size)))
+            self.contents[f'private/var/mobile/{relative_path}'] = content
+        db.commit()
+        db.close()
+        with open(manifest_path, 'rb') as manifest, open(os.path.join(self.backup_dir, 'Manifest.db'), 'wb') as file:
+            file.write(Cipher(algorithms.AES(manifest_key), modes.CBC(ITUNES_IV)).encryptor().update(manifest.read()))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_files_are_decrypted(self):
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                data_folder = os.path.join(self.temp_dir.name, f'data{workers}')
+                seeker = FileSeekerItunes(self.backup_dir, data_folder, 'db', self.decryption_keys, workers)
+                found = seeker.search('*/Library/Caches/*')
+                seeker.cleanup()
+                self.assertEqual(len(found), len(SIZES))
+                for data_path in found:
+                    relative_path = seeker.file_infos[data_path].source_path
+                    with open(data_path, 'rb') as file:
+                        self.assertEqual(file.read(), self.contents[relative_path])
+                    self.assertEqual(seeker.file_infos[data_path].modification_date, 1600000100)
+
+    def test_unknown_protection_class_is_not_reported(self):
+        del self.decryption_keys[0][PROTECTION_CLASS]
+        seeker = FileSeekerItunes(self.backup_dir, os.path.join(self.temp_dir.name, 'data'), 'db',
+                                  self.decryption_keys, 4)
+        self.assertEqual(len(seeker.search('*/Library/Caches/*')), len(SIZES))
+        seeker.cleanup()
+        self.assertEqual(seeker.copied, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
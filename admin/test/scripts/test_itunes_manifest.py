@@ -0,0 +1,117 @@
+"""Check that the Manifest readers of iTunes backups return the metadata of the files."""
+import hashlib
+import os
+import pathlib
+import plistlib
+import struct
+import sys
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.ilapfuncs import get_plist_content  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.itunes_manifest import ManifestMetadata, decode_mbfile_metadata, read_mbdb, read_mbfile_metadata  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerItunes  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def mbfile_blob(values, encryption_key=None):
+    '''Returns an NSKeyedArchiver MBFile binary plist holding values'''
+    mbfile = dict(values, **{'$class': plistlib.UID(2)})
+    objects = ['$null', mbfile, {'$classname': 'MBFile', '$classes': ['MBFile', 'NSObject']}]
+    if encryption_key is not None:
+        mbfile['EncryptionKey'] = plistlib.UID(3)
+        objects += [{'$class': plistlib.UID(4), 'NS.data': encryption_key},
+                    {'$classname': 'NSMutableData', '$classes': ['NSMutableData', 'NSData', 'NSObject']}]
+    return plistlib.dumps({'$archiver': 'NSKeyedArchiver', '$version': 100000,
+                           '$top': {'root': plistlib.UID(1)}, '$objects': objects},
+                          fmt=plistlib.PlistFormat.FMT_BINARY)
+
+
+def mbdb_string(value):
+    '''Returns an mbdb string, None is stored as an empty string'''
+    if value is None:
+        return b'\xff\xff'
+    return struct.pack('>H', len(value)) + value
+
+
+def mbdb_record(domain, path, mode, mtime, ctime, size, properties=()):
+    '''Returns an mbdb record with a data hash and the given properties'''
+    record = mbdb_string(domain.encode()) + mbdb_string(path.encode()) + mbdb_string(None)
+    record += mbdb_string(os.urandom(20)) + mbdb_string(None)
+    record += struct.pack('>HQIIIIIQBB', mode, 1234, 501, 501, mtime, mtime + 1, ctime, size, 3, len(properties))
+    for name, value in properties:
+        record += mbdb_string(name) + mbdb_string(value)
+    return record
+
+
+MBDB_RECORDS = (
+    ('HomeDomain', 'Library/SMS', 0o40755, 1500000000, 1400000000, 0, ()),
+    ('HomeDomain', 'Library/SMS/sms.db', 0o100644, 1500000100, 1400000100, 4096,
+     ((b'com.apple.backup.xattr', b'value'),)),
+    ('MediaDomain', 'Library/SMS/Attachments/\u00e9t\u00e9.jpg', 0o100644, 1500000200, 1400000200, 10, ()),
+)
+
+BLOBS = (
+    mbfile_blob({'Size': 224, 'Birth': 1600000000, 'LastModified': 1600000100, 'ProtectionClass': 3}),
+    mbfile_blob({'Size': 5 * 2 ** 32, 'Birth': 1600000000, 'LastModified': 1600000100, 'ProtectionClass': 4,
+                 'Mode': 33188, 'UserID': 501, 'GroupID': 501, 'InodeNumber': 123456, 'Flags': 0,
+                 'LastStatusChange': 1600000200, 'RelativePath': 'Library/SMS/sms.db'},
+                b'\x04\x00\x00\x00' + bytes(range(40))),
+    mbfile_blob({'Size': 0, 'Birth': 0, 'LastModified': 0, 'ProtectionClass': 1}, b''),
+)
+
+
+class TestItunesManifest(unittest.TestCase):
+    def test_fast_reader_matches_generic_decoding(self):
+        for blob in BLOBS:
+            with self.subTest(blob=blob[-40:]):
+                expected = get_plist_content(blob)
+                metadata = read_mbfile_metadata(blob)
+                for key in ('Size', 'Birth', 'LastModified', 'ProtectionClass'):
+                    self.assertEqual(metadata[key], expected[key])
+                if 'EncryptionKey' in expected:
+                    self.assertEqual(metadata['EncryptionKey'], expected['EncryptionKey']['NS.data'])
+
+    def test_other_layouts_use_generic_decoding(self):
+        blob = plistlib.dumps({'Size': 10, 'Birth': 1, 'LastModified': 2})
+        with self.assertRaises(ValueError):
+            read_mbfile_metadata(blob)
+        self.assertEqual(decode_mbfile_metadata(blob), {'Size': 10, 'Birth': 1, 'LastModified': 2})
+
+    def test_metadata_is_decoded_once(self):
+        metadata = ManifestMetadata()
+        metadata.add('abc', BLOBS[0])
+        self.assertIn('abc', metadata)
+        self.assertIs(metadata.get('abc'), metadata.get('abc'))
+        self.assertEqual(metadata.get('abc')['Size'], 224)
+        self.assertEqual(metadata.get('missing'), {})
+
+    def test_mbdb_records(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'Manifest.mbdb'), 'wb') as file:
+                file.write(b'mbdb\x05\x00' + b''.join(mbdb_record(*record) for record in MBDB_RECORDS))
+            records = read_mbdb(os.path.join(temp_dir, 'Manifest.mbdb'))
+            self.assertEqual([(record.domain, record.path, record.mode, record.mtime, record.ctime, record.size)
+                              for record in records], [record[:6] for record in MBDB_RECORDS])
+
+            for domain, path, _, _, _, size, _ in MBDB_RECORDS[1:]:
+                with open(os.path.join(temp_dir, hashlib.sha1(f'{domain}-{path}'.encode()).hexdigest()), 'wb') as file:
+                    file.write(b'\0' * size)
+            seeker = FileSeekerItunes(temp_dir, os.path.join(temp_dir, 'data'), 'mbdb', None)
+            found = seeker.search('*/Library/SMS/sms.db')
+            self.assertEqual(len(found), 1)
+            self.assertEqual((seeker.file_infos[found[0]].creation_date, seeker.file_infos[found[0]].modification_date),
+                             (1400000100, 1500000100))
+
+    def test_invalid_mbdb(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'Manifest.mbdb'), 'wb') as file:
+                file.write(b'bplist00')
+            with self.assertRaises(ValueError):
+                read_mbdb(os.path.join(temp_dir, 'Manifest.mbdb'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Check that lazy searches only extract the matched files that are actually read."""
+import os
+import pathlib
+import sqlite3
+import sys
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.context import Context  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import get_sqlite_db_records, materialize_file  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerTar, FileSeekerZip, LazyFile  # noqa: E402  pylint: disable=wrong-import-position
+
+SMS_DB = 'private/var/mobile/Library/SMS/sms.db'
+ATTACHMENTS = (
+    'private/var/mobile/Library/SMS/Attachments/00/IMG_0001.JPG',
+    'private/var/mobile/Library/SMS/Attachments/01/IMG_0002.JPG',
+)
+
+
+class TestLazyExtraction(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for relative_path in ATTACHMENTS:
+            full_path = os.path.join(self.input_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(relative_path.encode())
+        db = sqlite3.connect(os.path.join(self.input_dir, SMS_DB))
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('CREATE TABLE message (text TEXT)')
+        db.execute("INSERT INTO message VALUES ('hello')")
+        db.commit()
+        # Keep the connection open so that the row only exists in sms.db-wal
+        self.addCleanup(db.close)
+        self.assertTrue(os.path.getsize(os.path.join(self.input_dir, SMS_DB + '-wal')) > 0)
+
+    def tearDown(self):
+        Context.set_seeker(None)
+        self.temp_dir.cleanup()
+
+    def seekers(self):
+        archive_base = os.path.join(self.temp_dir.name, 'input')
+        with zipfile.ZipFile(archive_base + '.zip', 'w') as archive:
+            for folder, _, files in os.walk(self.input_dir):
+                for name in files:
+                    full_path = os.path.join(folder, name)
+                    archive.write(full_path, os.path.relpath(full_path, self.input_dir))
+        with tarfile.open(archive_base + '.tar', 'w') as archive:
+            archive.add(self.input_dir, arcname='.')
+        yield FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data_fs'))
+        yield FileSeekerZip(archive_base + '.zip', os.path.join(self.temp_dir.name, 'data_zip'))
+        yield FileSeekerTar(archive_base + '.tar', os.path.join(self.temp_dir.name, 'data_tar'))
+
+    def test_files_are_extracted_on_first_read(self):
+        for seeker in self.seekers():
+            with self.subTest(seeker=type(seeker).__name__):
+                Context.set_seeker(seeker)
+                found = seeker.search('*/Library/SMS/Attachments/*', lazy=True)
+                files = [path for path in found if isinstance(path, LazyFile)]
+                self.assertEqual(len(files), 2)
+                for path in files:
+                    self.assertFalse(os.path.exists(path))
+                    self.assertIn(path, seeker.file_infos)
+                with files[0].open() as file:
+                    self.assertEqual(file.read(), ATTACHMENTS[0].encode())
+                self.assertTrue(os.path.isfile(files[0]))
+                self.assertFalse(os.path.exists(files[1]))
+
+                # An eager search of an overlapping pattern extracts the deferred files
+                seeker.search('*/Attachments/01/*')
+                self.assertTrue(os.path.isfile(files[1]))
+                seeker.cleanup()
+
+    def test_database_is_extracted_with_its_journal(self):
+        for seeker in self.seekers():
+            with self.subTest(seeker=type(seeker).__name__):
+                Context.set_seeker(seeker)
+                found = seeker.search('*/Library/SMS/sms.db*', lazy=True)
+                db_path = next(path for path in found if path.endswith('sms.db'))
+                self.assertFalse(os.path.exists(db_path))
+                rows = list(get_sqlite_db_records(db_path, 'SELECT text FROM message'))
+                self.assertEqual([tuple(row) for row in rows], [('hello',)])
+                self.assertTrue(os.path.isfile(db_path + '-wal'))
+                self.assertEqual(materialize_file(db_path), db_path)
+                seeker.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
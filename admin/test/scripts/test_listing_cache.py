@@ -0,0 +1,91 @@
+"""Check that a cached listing is reused only while the extraction it was built from is unchanged."""
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.listing_cache import ListingCache  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+
+TREE = (
+    'private/var/mobile/Library/SMS/sms.db',
+    'private/var/mobile/Library/SMS/Attachments/0a/00/IMG_0001.JPG',
+    'private/var/mobile/Media/PhotoData/Photos.sqlite',
+)
+
+
+class TestListingCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        self.cache_dir = os.path.join(self.temp_dir.name, 'cache')
+        for relative_path in TREE:
+            full_path = os.path.join(self.input_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(b'data')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def seeker(self, rebuild=False):
+        cache = ListingCache(self.input_dir, 'fs', self.cache_dir, rebuild)
+        return FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'), listing_cache=cache)
+
+    def test_directory_listing_is_reused(self):
+        built = self.seeker()
+        cache = ListingCache(self.input_dir, 'fs', self.cache_dir)
+        paths, stats = cache.load_directory_listing()
+        self.assertEqual(list(paths), list(built._all_files))  # pylint: disable=protected-access
+        for position in range(len(paths)):
+            self.assertEqual(stats.get(position), built._stats.get(position))  # pylint: disable=protected-access
+        self.assertIsNone(ListingCache(self.input_dir, 'fs', self.cache_dir, rebuild=True).load_directory_listing())
+
+    def test_changed_directory_invalidates_listing(self):
+        self.seeker()
+        new_file = os.path.join(self.input_dir, 'private/var/mobile/Library/SMS/Attachments/new.heic')
+        with open(new_file, 'wb') as file:
+            file.write(b'data')
+        self.assertIsNone(ListingCache(self.input_dir, 'fs', self.cache_dir).load_directory_listing())
+        self.assertIn(new_file, self.seeker()._all_files)  # pylint: disable=protected-access
+
+    def test_file_edited_in_place_is_stated_again(self):
+        self.seeker()
+        sms_path = os.path.join(self.input_dir, 'private/var/mobile/Library/SMS/sms.db')
+        with open(sms_path, 'wb') as file:
+            file.write(b'DATA')
+        os.utime(sms_path, (1700000000, 1700000000))
+        seeker = self.seeker()
+        self.assertIsNotNone(ListingCache(self.input_dir, 'fs', self.cache_dir).load_directory_listing())
+        found = seeker.search('*/Library/SMS/sms.db')
+        self.assertEqual(seeker.file_infos[found[0]].modification_date, 1700000000)
+        self.assertEqual(os.path.getmtime(found[0]), 1700000000)
+        with open(found[0], 'rb') as file:
+            self.assertEqual(file.read(), b'DATA')
+
+    def test_tar_members_are_reused(self):
+        tar_path = os.path.join(self.temp_dir.name, 'input.tar')
+        with tarfile.open(tar_path, 'w') as tar:
+            tar.add(self.input_dir, arcname='.')
+        first = FileSeekerTar(tar_path, os.path.join(self.temp_dir.name, 'data1'),
+                              ListingCache(tar_path, 'tar', self.cache_dir))
+        expected = first.search('*/Library/SMS/*')
+        first.cleanup()
+        data_folder = os.path.join(self.temp_dir.name, 'data2')
+        second = FileSeekerTar(tar_path, data_folder, ListingCache(tar_path, 'tar', self.cache_dir))
+        self.assertIsNotNone(second.listing_cache.load_tar_members())
+        found = second.search('*/Library/SMS/*')
+        second.cleanup()
+        self.assertEqual([os.path.relpath(path, data_folder) for path in found],
+                         [os.path.relpath(path, os.path.join(self.temp_dir.name, 'data1')) for path in expected])
+        with open(os.path.join(data_folder, 'private/var/mobile/Library/SMS/sms.db'), 'rb') as file:
+            self.assertEqual(file.read(), b'data')
+
+
+if __name__ == '__main__':
+    unittest.main()
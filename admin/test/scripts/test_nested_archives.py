@@ -0,0 +1,126 @@
+"""Check that the members of nested archives are searched as paths below the archive, and extracted when matched."""
+import io
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+import zipfile
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.nested_archives import DEFAULT_NESTED_ARCHIVES, archive_prefix, reached_archive_patterns  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerFile, LazyFile  # noqa: E402  pylint: disable=wrong-import-position
+
+DIAGNOSTIC_LOGS = 'private/var/mobile/Library/Logs/CrashReporter/DiagnosticLogs/sysdiagnose'
+ARCHIVE = 'sysdiagnose_2024.01.15_10-30-00-0500_iPhone-OS_iPhone_21C66'
+MEMBERS = {
+    f'{ARCHIVE}/logs/SystemVersion/SystemVersion.plist': b'<plist/>',
+    f'{ARCHIVE}/logs/MobileInstallation/mobile_installation.log': b'install',
+    f'{ARCHIVE}/logs/MobileInstallation/mobile_installation.log.0': b'install 0',
+    f'{ARCHIVE}/otctl_status.txt': b'{}',
+}
+MTIME = 1705332600
+
+
+def add_member(tar, name, data):
+    '''Adds a file member holding data to tar'''
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = MTIME
+    tar.addfile(info, io.BytesIO(data))
+
+
+class TestNestedArchives(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        directory = os.path.join(self.input_dir, DIAGNOSTIC_LOGS)
+        os.makedirs(directory)
+        with tarfile.open(os.path.join(directory, ARCHIVE + '.tar.gz'), 'w:gz') as tar:
+            tar.addfile(tarfile.TarInfo(f'./{ARCHIVE}/logs'), None)
+            for name, data in MEMBERS.items():
+                add_member(tar, './' + name, data)
+        with zipfile.ZipFile(os.path.join(directory, 'sysdiagnose_other.zip'), 'w') as archive:
+            archive.writestr('other/logs/SystemVersion/SystemVersion.plist', b'<plist>zip</plist>')
+        with open(os.path.join(self.input_dir, 'private/var/sysdiagnose_broken.tar.gz'), 'wb') as file:
+            file.write(b'\x1f\x8bnot a tarball')
+        self.data_folder = os.path.join(self.temp_dir.name, 'data')
+        self.seeker = FileSeekerDir(self.input_dir, self.data_folder)
+
+    def tearDown(self):
+        self.seeker.cleanup()
+        self.temp_dir.cleanup()
+
+    def test_members_are_searched(self):
+        self.assertEqual(self.seeker.search('*/logs/SystemVersion/SystemVersion.plist'), [])
+        self.seeker.expand_nested_archives(DEFAULT_NESTED_ARCHIVES + ('*/sysdiagnose_*.zip',))
+        self.assertEqual(len(self.seeker.nested.archives), 2)
+
+        # The archives are read in place, not copied to the data folder
+        self.assertFalse(os.path.exists(self.data_folder))
+        found = self.seeker.search('*/sysdiagnose_*.tar.gz/*/logs/SystemVersion/SystemVersion.plist', force=True)
+        self.assertEqual(len(found), 1)
+        with open(found[0], 'rb') as file:
+            self.assertEqual(file.read(), b'<plist/>')
+        self.assertEqual(os.path.getmtime(found[0]), MTIME)
+        self.assertTrue(found[0].startswith(os.path.join(self.data_folder, DIAGNOSTIC_LOGS, ARCHIVE + '.tar.gz.contents')))
+        file_info = self.seeker.file_infos[found[0]]
+        self.assertEqual(file_info.source_path, os.path.join(self.input_dir, DIAGNOSTIC_LOGS, ARCHIVE + '.tar.gz')
+                         + f'/{ARCHIVE}/logs/SystemVersion/SystemVersion.plist')
+        self.assertEqual(len(self.seeker.search('*/sysdiagnose_*.zip/*/SystemVersion.plist')), 1)
+        # Only the patterns reaching into an archive match its members
+        self.assertEqual(self.seeker.search('*/SystemVersion/SystemVersion.plist', force=True), [])
+        self.assertEqual(self.seeker.search('**/mobile_installation.log.*'), [])
+        self.assertEqual([os.path.basename(path) for path in self.seeker.search(
+            '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*')],
+            ['mobile_installation.log', 'mobile_installation.log.0'])
+
+    def test_lazy_extraction(self):
+        self.seeker.expand_nested_archives(DEFAULT_NESTED_ARCHIVES)
+        found = self.seeker.search('*/sysdiagnose_*.tar.gz/*/otctl_status.txt', lazy=True)
+        self.assertEqual(len(found), 1)
+        self.assertIsInstance(found[0], LazyFile)
+        self.assertFalse(os.path.exists(found[0]))
+        with found[0].open() as file:
+            self.assertEqual(file.read(), b'{}')
+        self.assertIn(found[0], self.seeker.io_stats)
+        self.assertEqual(self.seeker.search('*/sysdiagnose_*.tar.gz/*/otctl_status.txt'), found)
+
+    def test_reached_archive_patterns(self):
+        search_patterns = ['*/otctl_status.txt', '*/sysdiagnose_*.tar.gz/*/otctl_status.txt',
+                           '**/sysdiagnose_*.tar.gz/**/logs/MobileActivation/mobileactivationd.log*',
+                           '*/Logs/*.zip/*.ips']
+        self.assertIsNone(archive_prefix(search_patterns[0], DEFAULT_NESTED_ARCHIVES))
+        self.assertEqual(archive_prefix(search_patterns[2]), '**/sysdiagnose_*.tar.gz')
+        self.assertEqual(reached_archive_patterns(search_patterns, DEFAULT_NESTED_ARCHIVES),
+                         ['*/sysdiagnose_*.tar.gz', '*/Logs/*.zip'])
+        self.assertEqual(reached_archive_patterns(search_patterns[:1], DEFAULT_NESTED_ARCHIVES), [])
+        # Without archive patterns, the archives named by the search patterns are still expanded
+        self.assertEqual(reached_archive_patterns(search_patterns[1:2], ()), ['*/sysdiagnose_*.tar.gz'])
+
+    def test_single_file_archive(self):
+        tarball = os.path.join(self.input_dir, DIAGNOSTIC_LOGS, ARCHIVE + '.tar.gz')
+        data_folder = os.path.join(self.temp_dir.name, 'file_data')
+        seeker = FileSeekerFile(tarball, data_folder)
+        self.addCleanup(seeker.cleanup)
+        search_patterns = ['*/System/Library/CoreServices/SystemVersion.plist',
+                           '*/sysdiagnose_*.tar.gz/*/logs/SystemVersion/SystemVersion.plist',
+                           '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*']
+        seeker.expand_nested_archives(reached_archive_patterns(search_patterns, DEFAULT_NESTED_ARCHIVES))
+        # The tarball is read in place, not copied
+        self.assertFalse(os.path.exists(os.path.join(data_folder, ARCHIVE + '.tar.gz')))
+        self.assertEqual(seeker.search(search_patterns[0]), [])
+        found = seeker.search(search_patterns[1])
+        self.assertEqual(len(found), 1)
+        with open(found[0], 'rb') as file:
+            self.assertEqual(file.read(), b'<plist/>')
+        self.assertEqual(seeker.file_infos[found[0]].source_path,
+                         tarball + f'/{ARCHIVE}/logs/SystemVersion/SystemVersion.plist')
+        self.assertEqual(len(seeker.search(search_patterns[2])), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
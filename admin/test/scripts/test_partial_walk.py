@@ -0,0 +1,76 @@
+"""Check that a partial walk lists only the entries the selected patterns match, with unchanged search results."""
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+
+from fnmatch import _compile_pattern
+from os.path import normcase
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerDir  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_index import PatternFilter  # noqa: E402  pylint: disable=wrong-import-position
+
+TREE = (
+    'private/var/mobile/Library/SMS/sms.db',
+    'private/var/mobile/Library/SMS/sms.db-wal',
+    'private/var/mobile/Library/SMS/Attachments/00/IMG_0001.HEIC',
+    'private/var/mobile/Library/Notes/NoteStore.sqlite',
+    'private/var/mobile/Library/Preferences/com.apple.MobileSMS.plist',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0002.JPG',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0003.MOV',
+    'private/var/mobile/Containers/Data/Application/ABCD/Library/Caches/cache.db',
+)
+SELECTED = ('*/Library/SMS/sms.db*', '*/SMS/Attachments/*', '*/Media/DCIM/*/*.JPG', '*/Library/Preferences/*')
+OTHER = ('*/Application/*/Library/Caches/*.db', '*/Notes/NoteStore.sqlite*')
+
+
+class TestPartialWalk(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for relative_path in TREE:
+            full_path = os.path.join(self.input_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(b'data')
+        self.full = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'full'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_pattern_filter(self):
+        pattern_filter = PatternFilter(SELECTED, 'root/')
+        pats = [_compile_pattern(normcase(pattern)) for pattern in SELECTED]
+        for path in self.full.listing_entries():
+            with self.subTest(path=path):
+                self.assertEqual(pattern_filter(normcase(path)),
+                                 any(pat('root/' + normcase(path)) is not None for pat in pats))
+
+    def test_partial_listing(self):
+        partial = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'partial'), walk_patterns=SELECTED)
+        listed = list(partial.listing_entries())
+        self.assertLess(len(listed), len(self.full.listing_entries()))
+        self.assertEqual(listed, [path for path in self.full.listing_entries() if path in listed])
+        self.assertNotIn(os.path.join(self.input_dir, TREE[3]), listed)
+        planned = partial.plan_searches(SELECTED)
+        self.assertEqual(planned, self.full.plan_searches(SELECTED))
+        for pattern in SELECTED:
+            with self.subTest(pattern=pattern):
+                self.assertEqual([os.path.relpath(path, partial.data_folder) for path in partial.search(pattern)],
+                                 [os.path.relpath(path, self.full.data_folder) for path in self.full.search(pattern)])
+        self.assertIsNotNone(partial.walk_patterns)
+
+        # A pattern outside of the selected ones lists the whole extraction
+        self.assertEqual(len(partial.search(OTHER[0])), 1)
+        self.assertIsNone(partial.walk_patterns)
+        self.assertEqual(list(partial.listing_entries()), list(self.full.listing_entries()))
+        self.assertEqual(len(partial.search(OTHER[1])), 1)
+        self.assertEqual(len(partial.search(SELECTED[0])), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
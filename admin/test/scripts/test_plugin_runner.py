@@ -0,0 +1,87 @@
+"""Check that artifacts run on worker threads write their output in artifact order, after the artifacts they require."""
+import contextlib
+import io
+import pathlib
+import sys
+import threading
+import time
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.context import Context  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import logfunc  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.output_capture import capturing  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.plugin_runner import PluginRunner, required_modules  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin, processed  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def parse(plugin, delay, finished):
+    '''Stands for an artifact, logging from the thread it runs on'''
+    Context.set_artifact_name(plugin.name)
+    time.sleep(delay)
+    logfunc(f'{plugin.name} parsed {Context.get_artifact_name()}')
+    print(f'{plugin.name} printed')
+    finished.append(plugin.name)
+    return plugin.name != 'failing'
+
+
+# Artifacts run on workers, whose method is declared in this file
+THREAD_SAFE = {'method': processed(parse), 'thread_safe': True}
+
+
+class TestPluginRunner(unittest.TestCase):
+    def run_plugins(self, plugins, workers, delays):
+        '''Runs plugins like crunch_artifacts, returns the lines written and the order they were parsed in'''
+        output = io.StringIO()
+        finished = []
+        with contextlib.redirect_stdout(output):
+            runner = PluginRunner(workers)
+            for plugin, delay in zip(plugins, delays):
+                runner.prepare(plugin)
+                capture = runner.capture(plugin)
+                with capturing(capture):
+                    logfunc(f'{plugin.name} files found')
+                runner.submit(plugin, capture, lambda plugin=plugin, delay=delay: parse(plugin, delay, finished),
+                              lambda success, plugin=plugin: logfunc(f'{plugin.name} completed {success}'))
+            runner.close()
+            self.assertIs(sys.stdout, output)
+        return [line for line in output.getvalue().splitlines() if not line.startswith('Parallel')], finished
+
+    def test_output_in_artifact_order(self):
+        plugins = [make_plugin(name, **THREAD_SAFE) for name in ('first', 'failing', 'third', 'fourth')]
+        delays = (0.2, 0.1, 0.05, 0)
+        serial, _ = self.run_plugins(plugins, 1, delays)
+        parallel, finished = self.run_plugins(plugins, 4, delays)
+        self.assertEqual(parallel, serial)
+        self.assertEqual(serial[:4], ['first files found', 'first parsed first', 'first printed',
+                                      'first completed True'])
+        self.assertIn('failing completed False', serial)
+        # The artifacts did run concurrently, the last one finishing first
+        self.assertEqual(finished[0], 'fourth')
+
+    def test_required_module(self):
+        plugins = [make_plugin('source', module_name='logarchive', **THREAD_SAFE), make_plugin('other', **THREAD_SAFE),
+                   make_plugin('dependent', requirements='logarchive module must be executed first', **THREAD_SAFE)]
+        self.assertEqual(required_modules(plugins[2]), {'logarchive'})
+        _, finished = self.run_plugins(plugins, 3, (0.2, 0.1, 0))
+        self.assertEqual(finished.index('dependent'), 2)
+
+    def test_not_thread_safe_runs_in_order(self):
+        plugins = [make_plugin('first', **THREAD_SAFE), make_plugin('second', method=processed(parse)),
+                   make_plugin('third', **THREAD_SAFE)]
+        _, finished = self.run_plugins(plugins, 3, (0.2, 0.1, 0))
+        self.assertEqual(finished.index('second'), 1)
+
+    def test_context_per_thread(self):
+        Context.set_artifact_name('main')
+        thread = threading.Thread(target=Context.set_artifact_name, args=('worker',))
+        thread.start()
+        thread.join()
+        self.assertEqual(Context.get_artifact_name(), 'main')
+        Context.clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Check that indexed and planned seeker searches return exactly what a linear fnmatch scan returns.
+
+FileSeekerDir narrows each pattern down to candidates with scripts/search_index.py
+before running the fnmatch regex. Any candidate set that misses a real match would
+silently drop files from the reports, so every lookup strategy (exact basename,
+basename prefix, extension, directory component) and the single pass search plan
+are compared against the plain scan over the same listing.
+"""
+import os
+import pathlib
+import sys
+import tempfile
+import unittest
+from fnmatch import _compile_pattern
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerDir, normcase  # noqa: E402  pylint: disable=wrong-import-position
+
+TREE = (
+    'private/var/mobile/Library/SMS/sms.db',
+    'private/var/mobile/Library/SMS/sms.db-wal',
+    'private/var/mobile/Library/SMS/Attachments/0a/00/IMG_0001.JPG',
+    'private/var/mobile/Library/SMS/Attachments/0a/01/clip.mov',
+    'private/var/mobile/Library/CallHistoryDB/CallHistory.storedata',
+    'private/var/mobile/Library/CallHistoryDB/call_history.db/nested.bin',
+    'private/var/mobile/Library/Voicemail/1.amr',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0002.jpg',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0003.jPg',
+    'private/var/mobile/Media/PhotoData/Photos.sqlite',
+    'private/var/mobile/Media/PhotoData/Photos.sqlite-shm',
+    'private/var/mobile/Containers/Data/Application/ABCD/Library/Preferences/'
+    '12345678-1234-1234-1234-123456789012.plist',
+    'private/var/mobile/Containers/Data/Application/ABCD/Documents/123/456/x/y.txt',
+    'private/var/root/Library/Caches/locationd/cache.plist',
+    'private/var/db/info.plist',
+    'Attachments.jpg/inner/file',
+)
+
+PATTERNS = (
+    '*/mobile/Library/SMS/sms.db*',
+    '*/Library/SMS/Attachments/*',
+    '*/mobile/Library/CallHistoryDB/call_history.db*',
+    '*/Voicemail/*.amr',
+    '*.[jJ][pP][gG]',
+    '*.[mM][oO][vV]',
+    '**/*.jpg',
+    '*Media/PhotoData/Photos.sqlite*',
+    '*/Containers/Data/Application/*/Library/Preferences/????????-????-????-????-????????????.plist',
+    '*/mobile/Containers/Data/Application/*/Documents/[0-9]*[0-9]/[0-9]*[0-9]/*/*.*',
+    '*/root/Library/Caches/locationd/cache.plist',
+    '*/info.plist',
+    'info.plist',
+    '*/Attachments*',
+    '**/*-wal',
+    '*',
+)
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for relative_path in TREE:
+            full_path = os.path.join(self.input_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(b'data')
+        self.seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def linear_matches(self, pattern):
+        pat = _compile_pattern(normcase(pattern))
+        root = normcase('root/')
+        return [item for item in self.seeker._all_files  # pylint: disable=protected-access
+                if pat(root + normcase(item)) is not None]
+
+    def test_indexed_matches_equal_linear_scan(self):
+        for pattern in PATTERNS:
+            with self.subTest(pattern=pattern):
+                self.assertEqual(list(self.seeker.matching_files(pattern)), self.linear_matches(pattern))
+
+    def test_planned_matches_equal_linear_scan(self):
+        planned = self.seeker.plan_searches(PATTERNS)
+        for pattern in PATTERNS:
+            with self.subTest(pattern=pattern):
+                self.assertEqual(planned[pattern], self.linear_matches(pattern))
+                self.assertEqual(list(self.seeker.matching_files(pattern)), self.linear_matches(pattern))
+
+    def test_parallel_listing_keeps_scandir_order(self):
+        def recursive_listing(directory):
+            listing = []
+            for item in os.scandir(directory):
+                listing.append(item.path)
+                if item.is_dir(follow_symlinks=False):
+                    listing.extend(recursive_listing(item.path))
+            return listing
+        seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'), walk_workers=4)
+        self.assertEqual(list(seeker._all_files), recursive_listing(self.input_dir))  # pylint: disable=protected-access
+
+    def test_search_copies_matched_files(self):
+        found = self.seeker.search('*/mobile/Library/SMS/sms.db*')
+        self.assertEqual(len(found), 2)
+        for data_path in found:
+            self.assertTrue(os.path.isfile(data_path))
+            self.assertIn(data_path, self.seeker.file_infos)
+            source_path = self.seeker.file_infos[data_path].source_path
+            self.assertEqual(os.stat(data_path).st_mtime, os.stat(source_path).st_mtime)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+"""Check that the files of the next plugins are searched ahead, within the prefetch depth."""
+import os
+import pathlib
+import sys
+import tempfile
+import time
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerDir  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_planner import SearchPlan, SearchPrefetcher  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+PLUGINS = [
+    make_plugin('sms', '*/Library/SMS/sms.db'),
+    make_plugin('notes', ('*/Library/Notes/*.sqlite',)),
+    make_plugin('photos', '*/Media/DCIM/*/*.JPG', lazy_extraction=True),
+    make_plugin('calls', '*/Library/CallHistoryDB/*.storedata'),
+    make_plugin('safari', '*/Library/Safari/History.db'),
+]
+FILES = ('private/var/mobile/Library/SMS/sms.db', 'private/var/mobile/Library/Notes/notes.sqlite',
+         'private/var/mobile/Media/DCIM/100APPLE/IMG_0001.JPG',
+         'private/var/mobile/Library/CallHistoryDB/CallHistory.storedata',
+         'private/var/mobile/Library/Safari/History.db')
+
+
+class TestSearchPrefetch(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for name in FILES:
+            os.makedirs(os.path.dirname(os.path.join(self.input_dir, name)), exist_ok=True)
+            with open(os.path.join(self.input_dir, name), 'wb') as file:
+                file.write(b'x' * 100000)
+        self.seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'))
+        self.search_plan = SearchPlan(PLUGINS)
+        self.search_plan.resolve(self.seeker)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def wait_for(self, prefetcher, count):
+        deadline = time.monotonic() + 10
+        while prefetcher.prefetched < count and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(prefetcher.prefetched, count)
+
+    def test_depth(self):
+        prefetcher = SearchPrefetcher(self.seeker, PLUGINS, self.search_plan, 2)
+        prefetcher.advance(1)
+        self.seeker.search(PLUGINS[0].search)
+        prefetcher.start()
+        # notes, then photos which is lazy and skipped
+        self.wait_for(prefetcher, 1)
+        self.assertIn(PLUGINS[1].search[0], self.seeker.searched)
+        self.assertNotIn(PLUGINS[3].search, self.seeker.searched)
+        prefetcher.advance(2)
+        self.wait_for(prefetcher, 2)
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir.name, 'data', FILES[3])))
+        self.assertNotIn(PLUGINS[2].search, self.seeker.searched)
+        prefetcher.close()
+        self.assertNotIn(PLUGINS[4].search, self.seeker.searched)
+        self.assertEqual(self.seeker.search(PLUGINS[1].search[0]), [os.path.join(self.temp_dir.name, 'data', FILES[1])])
+
+    def test_bandwidth_limit(self):
+        prefetcher = SearchPrefetcher(self.seeker, PLUGINS, self.search_plan, 10, bandwidth=10000)
+        prefetcher.start()
+        deadline = time.monotonic() + 10
+        while not prefetcher.throttled_seconds and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # Waiting 10 seconds once the first file is written, before the next one
+        self.assertGreater(prefetcher.throttled_seconds, 5)
+        self.assertEqual(prefetcher.prefetched, 0)
+        # The wait does not hold the search lock, the plugin loop searches meanwhile
+        start = time.monotonic()
+        self.assertEqual(len(self.seeker.search(PLUGINS[3].search)), 1)
+        self.assertLess(time.monotonic() - start, 5)
+        prefetcher.close()
+        # Interrupted by close()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual(prefetcher.prefetched, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
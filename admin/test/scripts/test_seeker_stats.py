@@ -0,0 +1,97 @@
+"""Check that the extraction I/O of the files found is summed per search pattern and per artifact."""
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+import scripts.lavafuncs as lavafuncs  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.ilapfuncs import icons  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.lavafuncs import initialize_lava  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.seeker_stats import SeekerStats  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.search_files import FileSeekerDir, FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+CONTENTS = {
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0001.JPG': b'j' * 5000,
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0002.JPG': b'j' * 7000,
+    'private/var/mobile/Library/SMS/sms.db': b's' * 3000,
+}
+PLUGIN = make_plugin('artifact', module_name='module')
+PATTERNS = ('*/Media/DCIM/*/*.JPG', '*/Library/SMS/sms.db', '*/Media/DCIM/*/IMG_0001.JPG')
+
+
+class TestSeekerStats(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        for name, content in CONTENTS.items():
+            os.makedirs(os.path.dirname(os.path.join(self.input_dir, name)), exist_ok=True)
+            with open(os.path.join(self.input_dir, name), 'wb') as file:
+                file.write(content)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def check_rows(self, seeker):
+        stats = SeekerStats()
+        for pattern in PATTERNS:
+            stats.record_search(PLUGIN, pattern, 0.5)
+            seeker.search(pattern)
+        rows = stats.collect(seeker)
+        self.assertEqual([row[2:6] for row in rows], [
+            (PATTERNS[0], 2, 12000, 12000), (PATTERNS[1], 1, 3000, 3000), (PATTERNS[2], 1, 5000, 5000),
+            (None, 3, 15000, 15000)])
+        self.assertEqual(rows[-1][7], 1.5)
+
+    def test_directory(self):
+        self.check_rows(FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data')))
+
+    def test_tar(self):
+        tar_path = os.path.join(self.temp_dir.name, 'input.tar')
+        with tarfile.open(tar_path, 'w') as archive:
+            archive.add(self.input_dir, '.')
+        seeker = FileSeekerTar(tar_path, os.path.join(self.temp_dir.name, 'data'))
+        self.check_rows(seeker)
+        seeker.cleanup()
+
+    def test_lazy_files_count_once_read(self):
+        seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'))
+        stats = SeekerStats()
+        stats.record_search(PLUGIN, PATTERNS[1], 0.1)
+        found = seeker.search(PATTERNS[1], lazy=True)
+        self.assertEqual(stats.collect(seeker)[0][3:6], (1, 0, 0))
+        found[0].materialize()
+        self.assertEqual(stats.collect(seeker)[0][3:6], (1, 3000, 3000))
+
+    def test_rows_per_artifact(self):
+        seeker = FileSeekerDir(self.input_dir, os.path.join(self.temp_dir.name, 'data'))
+        other = make_plugin('other', module_name='module')
+        restored = [('module', 'restored', None, 1, 10, 10, 0.1, 0.1)]
+        stats = SeekerStats(restored)
+        stats.record_search(PLUGIN, PATTERNS[0], 0.1)
+        stats.record_search(other, PATTERNS[1], 0.1)
+        seeker.search(PATTERNS[0])
+        seeker.search(PATTERNS[1])
+        self.assertEqual([row[1:4] for row in stats.collect(seeker, other)],
+                         [('other', PATTERNS[1], 1), ('other', None, 1)])
+        # The rows of the artifacts completed before a resumed run come first
+        report_folder = os.path.join(self.temp_dir.name, 'report')
+        os.makedirs(report_folder)
+        initialize_lava(self.input_dir, report_folder, 'fs')
+        try:
+            rows = stats.write(seeker, os.path.join(report_folder, '_HTML', 'Processing Statistics'))
+            self.assertEqual(lavafuncs.lava_db.execute('SELECT COUNT(*) FROM _seeker_stats').fetchone()[0], 5)
+        finally:
+            lavafuncs.lava_db.close()
+            icons.clear()
+        self.assertEqual(rows[0], restored[0])
+        self.assertEqual([row[1] for row in rows], ['restored', 'artifact', 'artifact', 'other', 'other'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""Check that the artifacts sharing a source file run back to back, from the position of the first one."""
+import pathlib
+import sys
+import unittest
+
+from types import SimpleNamespace
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.source_affinity import SourceAffinity  # noqa: E402  pylint: disable=wrong-import-position
+from plugin_specs import make_plugin  # noqa: E402  pylint: disable=wrong-import-position
+
+KNOWLEDGE = 'private/var/mobile/Library/CoreDuet/Knowledge/knowledgeC.db'
+PHOTOS = 'private/var/mobile/Media/PhotoData/Photos.sqlite'
+
+
+class TestSourceAffinity(unittest.TestCase):
+    def setUp(self):
+        self.plugins = [
+            make_plugin('appUsage', '*/knowledgeC.db*'),
+            make_plugin('photos', '*/Photos.sqlite*'),
+            make_plugin('battery', '*/knowledgeC.db*'),
+            make_plugin('dependent', '*/knowledgeC.db*', requirements='photos module must be executed first'),
+            make_plugin('lavaSource', None),
+            make_plugin('memories', '*/Photos.sqlite'),
+            make_plugin('screenTime', '*/knowledgeC.db'),
+        ]
+        matches = {
+            '*/knowledgeC.db*': [KNOWLEDGE, KNOWLEDGE + '-wal'],
+            '*/knowledgeC.db': [KNOWLEDGE],
+            '*/Photos.sqlite*': [PHOTOS],
+            '*/Photos.sqlite': [PHOTOS],
+        }
+        plugin_patterns = {plugin.name: [(1, plugin.search)] if plugin.search else None for plugin in self.plugins}
+        self.search_plan = SimpleNamespace(plugin_patterns=plugin_patterns, matches=matches)
+
+    def test_order(self):
+        affinity = SourceAffinity(self.plugins, self.search_plan)
+        self.assertEqual(affinity.sources['appUsage'], KNOWLEDGE)
+        self.assertEqual(affinity.groups, 2)
+        self.assertNotIn('dependent', affinity.sources)
+        self.assertEqual([plugin.name for plugin in affinity.order(self.plugins)],
+                         ['appUsage', 'battery', 'screenTime', 'photos', 'memories', 'dependent', 'lavaSource'])
+
+
+if __name__ == '__main__':
+    unittest.main()
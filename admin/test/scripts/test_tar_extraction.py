@@ -0,0 +1,63 @@
+"""Check that planned tar extraction in archive order writes the same files as per pattern searches."""
+import os
+import pathlib
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+
+TREE = (
+    'private/var/mobile/Media/PhotoData/Photos.sqlite',
+    'private/var/mobile/Library/SMS/sms.db',
+    'private/var/mobile/Library/SMS/Attachments/00/IMG_0001.JPG',
+    'private/var/mobile/Media/DCIM/100APPLE/IMG_0002.JPG',
+)
+PATTERNS = ('*/Library/SMS/*', '*/PhotoData/Photos.sqlite', '*.JPG')
+
+
+class TestTarExtraction(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        input_dir = os.path.join(self.temp_dir.name, 'input')
+        for position, relative_path in enumerate(TREE):
+            full_path = os.path.join(input_dir, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            with open(full_path, 'wb') as file:
+                file.write(relative_path.encode() * (position + 1) * 10000)
+            os.utime(full_path, (1600000000 + position, 1600000000 + position))
+        self.tar_path = os.path.join(self.temp_dir.name, 'input.tar.gz')
+        with tarfile.open(self.tar_path, 'w:gz') as archive:
+            archive.add(input_dir, arcname='.')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def extract(self, data_folder, planned):
+        seeker = FileSeekerTar(self.tar_path, data_folder)
+        if planned:
+            seeker.plan_searches(PATTERNS)
+            seeker.extract_planned(PATTERNS)
+        results = {pattern: [os.path.relpath(path, data_folder) for path in seeker.search(pattern)]
+                   for pattern in PATTERNS}
+        seeker.cleanup()
+        return results
+
+    def test_planned_extraction_matches_searches(self):
+        planned_folder = os.path.join(self.temp_dir.name, 'planned')
+        searched_folder = os.path.join(self.temp_dir.name, 'searched')
+        self.assertEqual(self.extract(planned_folder, True), self.extract(searched_folder, False))
+        for position, relative_path in enumerate(TREE):
+            with self.subTest(path=relative_path):
+                planned_path = os.path.join(planned_folder, relative_path)
+                with open(planned_path, 'rb') as file:
+                    self.assertEqual(file.read(), relative_path.encode() * (position + 1) * 10000)
+                self.assertEqual(os.stat(planned_path).st_mtime, 1600000000 + position)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Check that parallel zip extraction writes the same files and timestamps as ZipFile.extract."""
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import time
+import unittest
+import zipfile
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerZip  # noqa: E402  pylint: disable=wrong-import-position
+
+MEMBERS = {
+    'private/var/mobile/Library/SMS/sms.db': zipfile.ZIP_DEFLATED,
+    'private/var/mobile/Library/SMS/Attachments/00/IMG_0001.JPG': zipfile.ZIP_STORED,
+    'private/var/mobile/Library/SMS/Attachments/01/IMG_0002.JPG': zipfile.ZIP_BZIP2,
+    'private/var/mobile/Library/SMS/Attachments/02/empty.txt': zipfile.ZIP_DEFLATED,
+}
+# Extended timestamp extra field: modification and creation times
+EXTRA = struct.pack('<HHBII', 0x5455, 9, 5, 1600000100, 1600000000)
+
+
+class TestZipExtraction(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.zip_path = os.path.join(self.temp_dir.name, 'input.zip')
+        with zipfile.ZipFile(self.zip_path, 'w') as archive:
+            archive.writestr(zipfile.ZipInfo('private/var/mobile/Library/SMS/'), b'')
+            for position, (name, compression) in enumerate(MEMBERS.items()):
+                info = zipfile.ZipInfo(name, (2020, 1, 2, 3, 4, 2 * position))
+                info.compress_type = compression
+                info.extra = EXTRA
+                content = b'' if name.endswith('empty.txt') else name.encode() * 50000 + os.urandom(1000)
+                archive.writestr(info, content)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parallel_extraction_matches_zipfile(self):
+        expected_folder = os.path.join(self.temp_dir.name, 'expected')
+        with zipfile.ZipFile(self.zip_path) as archive:
+            archive.extractall(expected_folder)
+        for workers in (1, 4):
+            with self.subTest(workers=workers):
+                data_folder = os.path.join(self.temp_dir.name, f'data{workers}')
+                seeker = FileSeekerZip(self.zip_path, data_folder, workers)
+                seeker.plan_searches(['*/Library/SMS/*'])
+                seeker.extract_planned(['*/Library/SMS/*'])
+                found = seeker.search('*/Library/SMS/*')
+                seeker.cleanup()
+                self.assertEqual(len(found), len(MEMBERS) + 1)
+                for name in MEMBERS:
+                    extracted_path = os.path.join(data_folder, name)
+                    with open(extracted_path, 'rb') as file, \
+                            open(os.path.join(expected_folder, name), 'rb') as expected:
+                        self.assertEqual(file.read(), expected.read())
+                    info = seeker.zip_file.getinfo(name)
+                    self.assertEqual(os.stat(extracted_path).st_mtime, time.mktime(info.date_time + (0, 0, -1)))
+                    file_info = seeker.file_infos[extracted_path]
+                    self.assertEqual((file_info.creation_date, file_info.modification_date),
+                                     (1600000000, 1600000100))
+
+    def test_corrupted_member_is_not_reported(self):
+        name = 'private/var/mobile/Library/SMS/sms.db'
+        with zipfile.ZipFile(self.zip_path) as archive:
+            info = archive.getinfo(name)
+        with open(self.zip_path, 'r+b') as file:
+            file.seek(info.header_offset + 30 + len(name) + len(info.extra) + 100)
+            file.write(b'corrupted')
+        seeker = FileSeekerZip(self.zip_path, os.path.join(self.temp_dir.name, 'data'), 4)
+        seeker.search('*/Library/SMS/*')
+        seeker.cleanup()
+        self.assertNotIn(name, seeker.copied)
+        self.assertIn('private/var/mobile/Library/SMS/Attachments/00/IMG_0001.JPG', seeker.copied)
+
+
+if __name__ == '__main__':
+    unittest.main()
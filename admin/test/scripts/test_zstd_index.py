@@ -0,0 +1,122 @@
+"""Check that tar.zst inputs are read through their frame index, with the same results as a plain tar."""
+import io
+import os
+import pathlib
+import random
+import struct
+import sys
+import tarfile
+import tempfile
+import unittest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parents[3]
+sys.path.insert(0, str(REPO_ROOT))
+
+from scripts.search_files import FileSeekerTar  # noqa: E402  pylint: disable=wrong-import-position
+from scripts.zstd_index import open_zstd_index, read_frame_index, zstd_available  # noqa: E402  pylint: disable=wrong-import-position
+
+BLOCK_SIZE = 3000
+
+
+def zstd_frame(content, content_size=True):
+    '''Returns a zstd frame of raw and RLE blocks holding content, valid for any zstd decoder'''
+    if content_size:
+        # Single segment, 8 bytes content size
+        frame = struct.pack('<IBQ', 0xFD2FB528, 0xE0, len(content))
+    else:
+        # No content size, 1 MiB window
+        frame = struct.pack('<IBB', 0xFD2FB528, 0x00, 10 << 3)
+    chunks = [content[start:start + BLOCK_SIZE] for start in range(0, len(content), BLOCK_SIZE)] or [b'']
+    for number, chunk in enumerate(chunks):
+        last = number == len(chunks) - 1
+        if chunk and chunk == chunk[:1] * len(chunk):
+            frame += ((len(chunk) << 3) | (1 << 1) | last).to_bytes(3, 'little') + chunk[:1]
+        else:
+            frame += ((len(chunk) << 3) | last).to_bytes(3, 'little') + chunk
+    return frame
+
+
+def seek_table(frames, contents):
+    '''Returns the skippable frame holding the seek table of the seekable format'''
+    entries = b''.join(struct.pack('<II', len(frame), len(content)) for frame, content in zip(frames, contents))
+    table = entries + struct.pack('<IBI', len(frames), 0, 0x8F92EAB1)
+    return struct.pack('<II', 0x184D2A5E, len(table)) + table
+
+
+def frames_of(content, frame_size, content_size=True):
+    '''Splits content in frames of frame_size bytes'''
+    contents = [content[start:start + frame_size] for start in range(0, len(content), frame_size)]
+    return [zstd_frame(part, content_size) for part in contents], contents
+
+
+@unittest.skipUnless(zstd_available(), 'requires the zstandard package or the libzstd library')
+class TestZstdIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        generator = random.Random(0)
+        self.content = b''.join(generator.choice((bytes(generator.randrange(256) for _ in range(500)), b'\0' * 7000))
+                                for _ in range(60))
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, data):
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return path
+
+    def test_frame_index(self):
+        frames, contents = frames_of(self.content, 50000)
+        skippable = struct.pack('<II', 0x184D2A53, 4) + b'skip'
+        data = frames[0] + skippable + b''.join(frames[1:])
+        index = read_frame_index(data)
+        self.assertEqual([size for _, _, size in index], [len(content) for content in contents])
+        self.assertEqual(index[1][0], len(frames[0]) + len(skippable))
+        self.assertEqual([size for _, _, size in read_frame_index(zstd_frame(b'abc', False))], [None])
+        self.assertEqual(read_frame_index(b''.join(frames) + seek_table(frames, contents)),
+                         read_frame_index(b''.join(frames)))
+
+    def test_random_reads(self):
+        for content_size in (True, False):
+            frames, contents = frames_of(self.content, 40000, content_size)
+            data = b''.join(frames)
+            if content_size:
+                data += seek_table(frames, contents)
+            path = self.write(f'content_{content_size}.zst', data)
+            for workers in (1, 3):
+                with self.subTest(content_size=content_size, workers=workers):
+                    reader = open_zstd_index(path, workers)
+                    self.assertEqual(reader.read(), self.content)
+                    generator = random.Random(1)
+                    for _ in range(100):
+                        offset, size = generator.randrange(len(self.content)), generator.randrange(20000)
+                        reader.seek(offset)
+                        self.assertEqual(reader.read(size), self.content[offset:offset + size])
+                    self.assertEqual(reader.seek(0, io.SEEK_END), len(self.content))
+                    reader.close()
+
+    def test_tar_seeker(self):
+        input_dir = os.path.join(self.temp_dir.name, 'input')
+        contents = {f'private/var/mobile/Library/App{number}/data.db': os.urandom(number * 3000)
+                    for number in range(1, 9)}
+        for name, content in contents.items():
+            os.makedirs(os.path.dirname(os.path.join(input_dir, name)), exist_ok=True)
+            with open(os.path.join(input_dir, name), 'wb') as file:
+                file.write(content)
+        tar_data = io.BytesIO()
+        with tarfile.open(fileobj=tar_data, mode='w') as archive:
+            archive.add(input_dir, '.')
+        path = self.write('input.tar.zst', b''.join(frames_of(tar_data.getvalue(), 10240)[0]))
+        seeker = FileSeekerTar(path, os.path.join(self.temp_dir.name, 'data'), extract_workers=2)
+        found = seeker.search('*/Library/*/data.db')
+        self.assertEqual(len(found), len(contents))
+        for found_path in found:
+            name = seeker.file_infos[found_path].source_path
+            with open(found_path, 'rb') as file:
+                self.assertEqual(file.read(), contents[os.path.normpath(name)])
+        seeker.cleanup()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,7 @@ import sys
 import scripts.plugin_loader as plugin_loader
 import leapp_functions.app.history as history
 
+from functools import partial
 from shutil import copy2
 from getpass import getpass
 from scripts.search_files import *
@@ -24,12 +25,43 @@ from time import process_time, gmtime, strftime, perf_counter
 from scripts.lavafuncs import *
 from scripts.context import Context
 from scripts.lavafuncs import lava_json_name
+from scripts.artifact_timings import ArtifactTimings, CostModel
+from scripts.checkpoints import RunCheckpoints
+from scripts.incremental import IncrementalRun, artifact_fingerprint
+from scripts.search_planner import SearchPlan, SearchPrefetcher
+from scripts.source_affinity import SourceAffinity
+from scripts.listing_cache import ListingCache
+from scripts.content_store import ContentStore
+from scripts.file_hashing import FileHasher, HASH_ALGORITHMS
+from scripts.seeker_stats import SeekerStats, SEEKER_STATS_CATEGORY
+from scripts.zstd_index import zstd_available
+from scripts.nested_archives import DEFAULT_NESTED_ARCHIVES, reached_archive_patterns
+from scripts.output_capture import capturing
+from scripts.plugin_runner import PluginRunner
 
 
 def validate_args(args):
     if args.artifact_paths or args.create_profile_casedata:
         return  # Skip further validation if --artifact_paths is used
 
+    if args.resume:
+        run_info = lava_get_run_info(args.resume)
+        if not run_info:
+            raise argparse.ArgumentError(None, f'\'{args.resume}\' is not the report folder of a run that can be '
+                                               f'resumed! Run the program again.')
+        if run_info.get('complete'):
+            raise argparse.ArgumentError(None, f'The run of \'{args.resume}\' was completed, there is nothing to '
+                                               f'resume! Run the program again.')
+
+    if args.incremental:
+        if args.resume:
+            raise argparse.ArgumentError(None, 'An interrupted run cannot be resumed as an incremental run! '
+                                               'Run the program again.')
+        run_info = lava_get_run_info(args.incremental)
+        if not run_info or not run_info.get('complete') or lava_get_artifact_fingerprints(args.incremental) is None:
+            raise argparse.ArgumentError(None, f'\'{args.incremental}\' is not the report folder of a completed run '
+                                               f'with artifact fingerprints! Run the program again.')
+
     # Ensure other arguments are provided
     mandatory_args = ['input_path', 'output_path', 't']
     for arg in mandatory_args:
@@ -49,7 +81,7 @@ def validate_args(args):
     # Validate new folder name for output path
     output_folder_valid, output_folder_error = validate_output_folder_available(
         os.path.abspath(args.output_path), args.custom_output_folder)
-    if not output_folder_valid:
+    if not output_folder_valid and not args.resume:
         raise argparse.ArgumentError(None, output_folder_error)
 
     # Validate input_path based on type
@@ -66,6 +98,9 @@ def validate_args(args):
         if not os.path.isfile(abs_input_path):
             raise argparse.ArgumentError(None, f'INPUT path \'{args.input_path}\' is not a file. Type "file" requires a '
                                                f'single file input. Run the program again.')
+    elif args.t == 'zst' and not zstd_available():
+        raise argparse.ArgumentError(None, 'Type "zst" requires the zstandard package (pip install zstandard) or '
+                                           'the libzstd library. Run the program again.')
 
     if args.load_case_data and not os.path.exists(args.load_case_data):
         raise argparse.ArgumentError(None, 'LEAPP Case Data file not found! Run the program again.')
@@ -73,6 +108,18 @@ def validate_args(args):
     if args.load_profile and not os.path.exists(args.load_profile):
         raise argparse.ArgumentError(None, 'iLEAPP Profile file not found! Run the program again.')
 
+    if args.walk_workers is not None and args.walk_workers < 1:
+        raise argparse.ArgumentError(None, 'The number of walk workers must be at least 1! Run the program again.')
+
+    if args.extract_workers is not None and args.extract_workers < 1:
+        raise argparse.ArgumentError(None, 'The number of extract workers must be at least 1! Run the program again.')
+
+    if args.prefetch_depth < 0:
+        raise argparse.ArgumentError(None, 'The prefetch depth cannot be negative! Run the program again.')
+
+    if args.prefetch_bandwidth is not None and args.prefetch_bandwidth <= 0:
+        raise argparse.ArgumentError(None, 'The prefetch bandwidth must be positive! Run the program again.')
+
     try:
         timezone = pytz.timezone(args.timezone)
     except pytz.UnknownTimeZoneError:
@@ -171,10 +218,10 @@ def create_casedata(path):
 def main():
     check_runtime_dependencies()
     parser = argparse.ArgumentParser(description=f'iLEAPP v{leapp_version}: iOS Logs, Events, And Plists Parser.')
-    parser.add_argument('-t', choices=['fs', 'tar', 'zip', 'gz', 'itunes', 'file'], required=False, action="store",
+    parser.add_argument('-t', choices=['fs', 'tar', 'zip', 'gz', 'zst', 'itunes', 'file'], required=False, action="store",
                         help=("Specify the input type. "
                               "'fs' for a folder containing extracted files with normal paths and names, "
-                              "'tar', 'zip', or 'gz' for compressed packages containing files with normal names, "
+                              "'tar', 'zip', 'gz', or 'zst' for compressed packages containing files with normal names, "
                               "'itunes' for a folder containing a raw iTunes backup with hashed paths and names, "
                               "'file' for a single file input."))
     parser.add_argument('-o', '--output_path', required=False, action="store",
@@ -183,7 +230,9 @@ def main():
     parser.add_argument('-tz', '--timezone', required=False, action="store", default='UTC', type=str, help="Timezone name (e.g., 'America/New_York')")
     parser.add_argument('-w', '--wrap_text', required=False, action="store_false", default=True,
                         help='Do not wrap text for output of data files')
-    parser.add_argument('-m', '--load_profile', required=False, action="store", help="Path to iLEAPP Profile file (.ilprofile).")
+    parser.add_argument('-m', '--load_profile', required=False, action="store",
+                        help=("Path to iLEAPP Profile file (.ilprofile). For file system extractions, only the "
+                              "entries the search patterns of the profile modules can match are listed."))
     parser.add_argument('-d', '--load_case_data', required=False, action="store", help="Path to LEAPP Case Data file (.lcasedata).")
     parser.add_argument('-c', '--create_profile_casedata', required=False, action="store",
                         help=("Generate an iLEAPP Profile file (.ilprofile) or LEAPP Case Data file (.lcasedata) into the specified path. "
@@ -194,6 +243,54 @@ def main():
     parser.add_argument('--custom_output_folder', required=False, action="store", help="Custom name for the output folder")
     parser.add_argument('--custom_artifacts_path', required=False, action="store", help="Additional path to load artifacts from (e.g., scripts/alternate_artifacts)")
     parser.add_argument('--itunes_password', required=False, action="store", help="Password used for encrypted iTunes backup")
+    parser.add_argument('--walk_workers', required=False, action="store", type=int,
+                        help="Number of threads listing a file system extraction (default: CPU count + 4, max 32)")
+    parser.add_argument('--extract_workers', required=False, action="store", type=int,
+                        help="Number of threads extracting the matched files of a zip or iTunes backup input, "
+                             "or decompressing the frames of a zst input (default: CPU count, max 32)")
+    parser.add_argument('--fs_mode', required=False, action="store", choices=FS_MODES, default='copy',
+                        help="How files of a fs input are made available to the artifacts: copied to the data "
+                             "folder (default), cloned (reflink) or hard linked there, or read in place "
+                             "without copying (inplace)")
+    parser.add_argument('--dedup', required=False, action="store_true", default=False,
+                        help="Store the files extracted to the data folder once per content (SHA-256 digest), "
+                             "hard linked at their paths, to save space on extractions with many identical files")
+    parser.add_argument('--hash', required=False, action="store", nargs='+', choices=HASH_ALGORITHMS, default=[],
+                        help="Hash the source files found with these algorithms while they are copied; the "
+                             "digests are stored in the LAVA file list and the ProcessedFilesLog, and reused on "
+                             "the next runs on a fs/tar/gz/zst input for the files that did not change")
+    parser.add_argument('--rebuild_listing', required=False, action="store_true", default=False,
+                        help="Ignore the cached listing of a previous run on the same fs/tar/gz/zst input and rebuild it")
+    parser.add_argument('--prefetch_depth', required=False, action="store", type=int, default=0,
+                        help="Extract the files of the next N artifacts on a background thread while the current "
+                             "artifact is parsed (default: 0, no prefetch)")
+    parser.add_argument('--prefetch_bandwidth', required=False, action="store", type=float,
+                        help="Maximum average MB per second written by the prefetch (default: no limit)")
+    parser.add_argument('--nested_archives', required=False, action="store", nargs='*',
+                        default=list(DEFAULT_NESTED_ARCHIVES), metavar='GLOB',
+                        help="Globs of the archives in the extraction whose members are searched as paths below the "
+                             "archive (default: sysdiagnose tarballs). An archive is only expanded when a search "
+                             "pattern of the selected artifacts reaches into it; the tar, tgz, tar.gz, tar.zst and "
+                             "zip archives named by such patterns are expanded even without a matching GLOB")
+    parser.add_argument('--plugin_workers', required=False, action="store", type=int, default=1,
+                        help="Number of artifacts parsing their files at the same time on worker threads, the "
+                             "reports being the same as with a serial run. Only the artifacts declared thread_safe "
+                             "run on workers (default: 1, artifacts run serially)")
+    parser.add_argument('--source_affinity', required=False, action="store_true", default=False,
+                        help="Run the artifacts reading the same source file (e.g. knowledgeC.db, Photos.sqlite) "
+                             "back to back, while the file is still in the page cache, instead of in category "
+                             "order")
+    parser.add_argument('--cost_order', required=False, action="store_true", default=False,
+                        help="Run the artifacts expected to take the longest first, from their timings in the "
+                             "previous runs, instead of in category order")
+    parser.add_argument('--resume', required=False, action="store", metavar='REPORT_FOLDER',
+                        help="Resume the interrupted run whose report folder is REPORT_FOLDER, with its input, type, "
+                             "timezone and artifacts: the artifacts it completed are not run again "
+                             "(--custom_artifacts_path is needed again if the run used it)")
+    parser.add_argument('--incremental', required=False, action="store", metavar='PREVIOUS_REPORT_FOLDER',
+                        help="Only run the artifacts whose module source or matched files changed since the run "
+                             "whose report folder is PREVIOUS_REPORT_FOLDER, the output of the other artifacts is "
+                             "copied from it")
 
     # Check if no arguments were provided
     if len(sys.argv) == 1:
@@ -202,6 +299,16 @@ def main():
 
     args = parser.parse_args()
 
+    run_info = lava_get_run_info(args.resume) if args.resume else None
+    if run_info:
+        # The input, type and timezone of the interrupted run
+        args.input_path = run_info['input_path']
+        if args.input_path.startswith('\\\\?\\'):
+            args.input_path = args.input_path[4:]
+        args.t = run_info['extracttype']
+        args.timezone = run_info['time_offset']
+        args.output_path = os.path.dirname(os.path.abspath(args.resume))
+
     available_plugins = []
     loader_paths = [plugin_loader.PLUGINPATH]
     if args.custom_artifacts_path:
@@ -326,12 +433,34 @@ def main():
                 print(profile_load_error)
                 return
 
+    if run_info:
+        profile_filename = run_info['profile_filename']
+        casedata = run_info['casedata']
+        missing_plugins = [name for name in run_info['plugins'] if name not in loader]
+        if missing_plugins:
+            print(f'Artifacts of the interrupted run not found: {", ".join(missing_plugins)}')
+            return
+        selected_plugins = [loader[name] for name in run_info['plugins']]
+
     input_path = args.input_path
-    wrap_text = args.wrap_text
-    output_path = os.path.abspath(args.output_path)
+    wrap_text = run_info['wrap_text'] if run_info else args.wrap_text
+    output_path = os.path.abspath(args.resume if run_info else args.output_path)
     time_offset = args.timezone
     custom_output_folder = args.custom_output_folder
     itunes_backup_password = args.itunes_password
+    walk_workers = args.walk_workers
+    extract_workers = args.extract_workers
+    rebuild_listing = args.rebuild_listing
+    fs_mode = args.fs_mode
+    dedup = args.dedup
+    hash_algorithms = args.hash
+    prefetch_depth = args.prefetch_depth
+    prefetch_bandwidth = args.prefetch_bandwidth * 1024 * 1024 if args.prefetch_bandwidth else None
+    nested_archives = args.nested_archives
+    plugin_workers = args.plugin_workers
+    source_affinity = args.source_affinity
+    cost_order = args.cost_order
+    incremental_folder = os.path.abspath(args.incremental) if args.incremental else None
 
     # ios file system extractions contain paths > 260 char, which causes problems
     # This fixes the problem by prefixing \\?\ on each windows path.
@@ -339,23 +468,32 @@ def main():
         if input_path[1] == ':' and extracttype =='fs': input_path = '\\\\?\\' + input_path.replace('/', '\\')
         if output_path[1] == ':': output_path = '\\\\?\\' + output_path.replace('/', '\\')
 
-    out_params = OutputParameters(output_path, custom_output_folder)
+    out_params = OutputParameters(output_path, custom_output_folder, existing=bool(run_info))
     Context.set_output_params(out_params)
 
-    initialize_lava(input_path, out_params.output_folder_base, extracttype)
+    initialize_lava(input_path, out_params.output_folder_base, extracttype, resume=bool(run_info))
 
     # Record history if enabled
     history.record_input_path(input_path)
-    history.record_output_path(output_path)
+    history.record_output_path(os.path.dirname(output_path) if run_info else output_path)
 
     crunch_artifacts(selected_plugins, extracttype, input_path, out_params, wrap_text, loader, casedata, time_offset,
-        profile_filename, itunes_backup_password)
+        profile_filename, itunes_backup_password, walk_workers=walk_workers, rebuild_listing=rebuild_listing,
+        fs_mode=fs_mode, extract_workers=extract_workers, dedup=dedup,
+        hash_algorithms=hash_algorithms, prefetch_depth=prefetch_depth, prefetch_bandwidth=prefetch_bandwidth,
+        partial_walk=bool(profile_filename), nested_archives=nested_archives, plugin_workers=plugin_workers,
+        source_affinity=source_affinity, cost_order=cost_order, resume=bool(run_info),
+        incremental_folder=incremental_folder)
 
     lava_finalize_output(out_params.output_folder_base)
 
 def crunch_artifacts(
         plugins: typing.Sequence[plugin_loader.PluginSpec], extracttype, input_path, out_params, wrap_text,
-        loader: plugin_loader.PluginLoader, casedata, time_offset, profile_filename, itunes_backup_password=None, decryption_keys=None):
+        loader: plugin_loader.PluginLoader, casedata, time_offset, profile_filename, itunes_backup_password=None, decryption_keys=None,
+        walk_workers=None, rebuild_listing=False, fs_mode='copy', extract_workers=None, dedup=False,
+        hash_algorithms=(), prefetch_depth=0, prefetch_bandwidth=None, partial_walk=False,
+        nested_archives=DEFAULT_NESTED_ARCHIVES, plugin_workers=1, source_affinity=False,
+        cost_order=False, resume=False, incremental_folder=None):
     start = process_time()
     start_wall = perf_counter()
 
@@ -366,21 +504,53 @@ def crunch_artifacts(
     logfunc('Objective: Triage iOS Full File System and iTunes Backup Extractions.')
     logfunc('By: Alexis Brignoni | @AlexisBrignoni | abrignoni.com')
     logfunc('By: Yogesh Khatri   | @SwiftForensics | swiftforensics.com\n')
-    logdevinfo()
+    # Each completed artifact is recorded, so that the run can be resumed if it is interrupted
+    checkpoints = RunCheckpoints(out_params.output_folder_base)
+    if resume:
+        checkpoints.resume()
+    else:
+        logdevinfo()
+        checkpoints.start({'input_path': input_path, 'extracttype': extracttype, 'time_offset': time_offset,
+                           'wrap_text': wrap_text, 'profile_filename': profile_filename, 'casedata': casedata,
+                           'plugins': [plugin.name for plugin in plugins]})
+    # Only the artifacts changed since the previous run are run, the output of the others is copied
+    incremental = None
+    if incremental_folder:
+        incremental = IncrementalRun(incremental_folder, out_params.output_folder_base,
+                                     lava_get_artifact_fingerprints(incremental_folder))
     seeker = None
+    content_store = None
+    listing_cache = None
+    hasher = None
     password = itunes_backup_password
+    # add last_build at the start except for iTunes backups
+    if extracttype != 'itunes':
+        plugins.insert(0, loader["last_build"])
+    # Only the archives the search patterns of the selected artifacts reach into are expanded
+    nested_archives = reached_archive_patterns(SearchPlan(plugins).patterns(), nested_archives)
     try:
+        if dedup:
+            content_store = ContentStore(out_params.data_folder)
+        if extracttype in ('fs', 'tar', 'gz', 'zst'):
+            listing_cache = ListingCache(input_path, extracttype, rebuild=rebuild_listing, workers=walk_workers)
+        if hash_algorithms:
+            hasher = FileHasher(hash_algorithms, listing_cache)
+
         if extracttype == 'fs':
-            seeker = FileSeekerDir(input_path, out_params.data_folder)
+            # With a subset of the modules, only the entries their search patterns can match are listed
+            walk_patterns = SearchPlan(plugins).patterns() + list(nested_archives) if partial_walk else None
+            seeker = FileSeekerDir(input_path, out_params.data_folder, walk_workers, listing_cache, fs_mode,
+                                   content_store, hasher, walk_patterns)
 
         elif extracttype == 'file':
-            seeker = FileSeekerFile(input_path, out_params.data_folder)
+            seeker = FileSeekerFile(input_path, out_params.data_folder, content_store, hasher)
 
-        elif extracttype in ('tar', 'gz'):
-            seeker = FileSeekerTar(input_path, out_params.data_folder)
+        elif extracttype in ('tar', 'gz', 'zst'):
+            seeker = FileSeekerTar(input_path, out_params.data_folder, listing_cache, content_store, hasher,
+                                   extract_workers)
 
         elif extracttype == 'zip':
-            seeker = FileSeekerZip(input_path, out_params.data_folder)
+            seeker = FileSeekerZip(input_path, out_params.data_folder, extract_workers, content_store, hasher)
 
         elif extracttype == 'itunes':
             itunes_backup_type = get_itunes_backup_type(input_path)
@@ -402,7 +572,8 @@ def crunch_artifacts(
                 logfunc('Input folder is not a valid iTunes backup!')
                 return False
             seeker = FileSeekerItunes(input_path, out_params.data_folder,
-                                    itunes_backup_type, decryption_keys)
+                                    itunes_backup_type, decryption_keys, extract_workers, content_store,
+                                    hasher)
 
         else:
             logfunc('Error on argument -o (input type)')
@@ -415,11 +586,11 @@ def crunch_artifacts(
         temp_file.close()
         return False
 
-    # Now ready to run
-    # add last_build at the start except for iTunes backups
-    if extracttype != 'itunes':
-        plugins.insert(0, loader["last_build"])
+    # Members of the archives found in the extraction are searched as paths below the archive
+    if nested_archives:
+        seeker.expand_nested_archives(nested_archives)
 
+    # Now ready to run
     logfunc(f'Info: {len(loader) - 2} modules loaded.') # excluding last_build and iTunesBackupInfo
     if profile_filename:
         logfunc(f'Loaded profile: {profile_filename}')
@@ -427,9 +598,11 @@ def crunch_artifacts(
     logfunc(f'File/Directory selected: {input_path}')
     logfunc('\n--------------------------------------------------------------------------------------')
 
-    log = open(os.path.join(out_params.output_folder_base, '_HTML', '_Script_Logs', 'ProcessedFilesLog.html'), 'w+', encoding='utf8')
-    log.write(f'Extraction/Path selected: {input_path}<br><br>')
-    log.write(f'Timezone selected: {time_offset}<br><br>')
+    log = open(os.path.join(out_params.output_folder_base, '_HTML', '_Script_Logs', 'ProcessedFilesLog.html'),
+               'a' if resume else 'w+', encoding='utf8')
+    if not log.tell():
+        log.write(f'Extraction/Path selected: {input_path}<br><br>')
+        log.write(f'Timezone selected: {time_offset}<br><br>')
 
     # Special processing for iTunesBackup Info.plist as it is a seperate entity, not part of the Manifest.db. Seeker won't find it
     if extracttype == 'itunes':
@@ -437,118 +610,227 @@ def crunch_artifacts(
         if os.path.exists(info_plist_path):
             # process_artifact([info_plist_path], 'iTunesBackupInfo', 'Device Info', seeker, out_params.output_folder_base)
             #plugin.method([info_plist_path], out_params.output_folder_base, seeker, wrap_text)
-            report_folder = os.path.join(out_params.output_folder_base, '_HTML', 'iTunes Backup')
-            if not os.path.exists(report_folder):
-                try:
-                    os.makedirs(report_folder)
-                except (FileExistsError, FileNotFoundError) as ex:
-                    logfunc('Error creating report directory at path {}'.format(report_folder))
-                    logfunc('Error was {}'.format(str(ex)))
-            loader["itunes_backup_info"].method([info_plist_path], report_folder, seeker, wrap_text, time_offset)
-            report_folder = os.path.join(out_params.output_folder_base, '_HTML', 'Installed Apps')
-            if not os.path.exists(report_folder):
-                try:
-                    os.makedirs(report_folder)
-                except (FileExistsError, FileNotFoundError) as ex:
-                    logfunc('Error creating report directory at path {}'.format(report_folder))
-                    logfunc('Error was {}'.format(str(ex)))
-            loader["itunes_backup_installed_applications"].method([info_plist_path], report_folder, seeker, wrap_text, time_offset)
+            if 'itunes_backup_info' not in checkpoints.completed:
+                report_folder = os.path.join(out_params.output_folder_base, '_HTML', 'iTunes Backup')
+                if not os.path.exists(report_folder):
+                    try:
+                        os.makedirs(report_folder)
+                    except (FileExistsError, FileNotFoundError) as ex:
+                        logfunc('Error creating report directory at path {}'.format(report_folder))
+                        logfunc('Error was {}'.format(str(ex)))
+                loader["itunes_backup_info"].method([info_plist_path], report_folder, seeker, wrap_text, time_offset)
+                checkpoints.record(loader["itunes_backup_info"], True)
+            if 'itunes_backup_installed_applications' not in checkpoints.completed:
+                report_folder = os.path.join(out_params.output_folder_base, '_HTML', 'Installed Apps')
+                if not os.path.exists(report_folder):
+                    try:
+                        os.makedirs(report_folder)
+                    except (FileExistsError, FileNotFoundError) as ex:
+                        logfunc('Error creating report directory at path {}'.format(report_folder))
+                        logfunc('Error was {}'.format(str(ex)))
+                loader["itunes_backup_installed_applications"].method([info_plist_path], report_folder, seeker, wrap_text, time_offset)
+                checkpoints.record(loader["itunes_backup_installed_applications"], True)
             #del search_list['last_build'] # removing last_build as this takes its place
             print([info_plist_path])  # TODO Remove special consideration for itunes? Merge into main search
         else:
             logfunc('Info.plist not found for iTunes Backup!')
             log.write('Info.plist not found for iTunes Backup!')
 
+    # Match the search patterns of all plugins in a single pass over the listing
+    search_plan = SearchPlan(plugins)
+    search_plan.resolve(seeker)
+    if resume:
+        # Only the artifacts not completed before the run was interrupted run again
+        plugins = checkpoints.remaining(plugins)
+        lava_delete_sqlite_artifact_links([artifact_search_pattern_id for plugin in plugins
+                                           for artifact_search_pattern_id, _
+                                           in search_plan.plugin_patterns.get(plugin.name) or ()])
+    else:
+        search_plan.record_search_patterns()
+        fingerprints = {plugin.name: artifact_fingerprint(plugin, search_plan, seeker, time_offset, wrap_text)
+                        for plugin in plugins}
+        lava_insert_sqlite_artifact_fingerprints([(plugin.name, plugin.module_name, fingerprints[plugin.name])
+                                                  for plugin in plugins])
+        if incremental:
+            incremental.plan(plugins, search_plan, fingerprints)
+    search_plan.extract(seeker, plugins)
+    # Estimated processing time from the timings of the artifacts in the previous runs
+    cost_model = CostModel()
+    estimates = cost_model.estimates(
+        [plugin for plugin in plugins if plugin.name not in search_plan.skipped_plugins], search_plan, seeker)
+    cost_model.log_estimate(estimates, plugin_workers)
+    if cost_order:
+        plugins = cost_model.order(plugins, estimates)
+    timings = ArtifactTimings()
+    # Artifacts sharing a source file run back to back, while the db is still in the page cache
+    affinity = SourceAffinity(plugins, search_plan) if source_affinity else None
+    if affinity:
+        plugins = affinity.order(plugins)
+    prefetcher = SearchPrefetcher(seeker, plugins, search_plan, prefetch_depth, prefetch_bandwidth)
+    prefetcher.start()
+
     # Search for the files per the arguments
     parsed_modules = 0
-    lava_only = False
-    artifact_search_pattern_id = 0
-    file_path_ids = set()
-
-    for plugin_number, plugin in enumerate(plugins, start=1):
-        logfunc()
-        logfunc('[{}/{}] {} [{}] artifact started'.format(plugin_number, len(plugins),
-                                                              plugin.name, plugin.module_name))
-        output_types = plugin.artifact_info.get('output_types', '')
-        if isinstance(plugin.search, list) or isinstance(plugin.search, tuple):
-            search_regexes = plugin.search
-        elif plugin.search is None:
-            search_regexes = plugin.search
-        else:
-            search_regexes = [plugin.search]
-        files_found = []
-        log.write(f'<b>For {plugin.name} artifact</b>')
-        if search_regexes is None:
-            log.write(f'<ul><li>No search regexes provided for {plugin.name} artifact.')
-            log.write("<ul><li><i>'_lava_artifacts.db'</i> used as source file.</li></ul></li></ul>")
-            files_found = [os.path.join(out_params.output_folder_base, '_lava_artifacts.db')]
-        else:
-            for artifact_search_regex in search_regexes:
-                artifact_search_pattern_id += 1
-                lava_insert_sqlite_artifact_search_pattern(
-                    artifact_search_pattern_id, plugin.module_name, plugin.name, artifact_search_regex)
-                pattern_already_searched = artifact_search_regex in seeker.searched
-                found = seeker.search(artifact_search_regex)
-                if not found:
-                    if plugin.name == 'logarchive' and extracttype != 'fs' and extracttype != 'file':
-                        src = os.path.join(os.path.dirname(input_path), "logarchive.json")
-                        dst = os.path.join(out_params.data_folder, "logarchive.json")
-                        if os.path.exists(src):
-                            copy2(src, dst)
-                            files_found.append(dst)
-                    log.write(f'<ul><li>No file found for regex <i>{artifact_search_regex}</i></li></ul>')
-                else:
-                    log.write(f'<ul><li>{len(found)} {"files" if len(found) > 1 else "file"} for regex <i>{artifact_search_regex}</i> located at:')
-                    for pathh in found:
-                        if pathh.startswith('\\\\?\\'):
-                            pathh = pathh[4:]
-                        log.write(f'<ul><li>{pathh}</li></ul>')
-                        if seeker.file_infos.get(pathh):
-                            file_path_id = id(seeker.file_infos.get(pathh))
-                            if not pattern_already_searched and file_path_id not in file_path_ids:
-                                lava_insert_sqlite_file_path(file_path_id, seeker.file_infos.get(pathh).source_path)
-                                file_path_ids.add(file_path_id)
-                            lava_insert_sqlite_artifact_link_pattern_to_file(artifact_search_pattern_id, file_path_id)
-                    log.write(f'</li></ul>')
-                    files_found.extend(found)
-        if files_found:
-            if not lava_only and 'lava_only' in output_types:
-                lava_only = True
-            category_folder = os.path.join(out_params.output_folder_base, '_HTML', plugin.category)
-            if not os.path.exists(category_folder):
-                try:
-                    os.makedirs(category_folder)
-                except (FileExistsError, FileNotFoundError) as ex:
-                    logfunc('Error creating {} report directory at path {}'.format(plugin.name, category_folder))
-                    logfunc('Error was {}'.format(str(ex)))
-                    continue  # cannot do work
-            try:
-                plugin.method(files_found, category_folder, seeker, wrap_text, time_offset)
-                if plugin.name == 'logarchive':
-                    lava_db_path = os.path.join(out_params.output_folder_base, '_lava_artifacts.db')
-                    if does_table_exist_in_db(lava_db_path, 'logarchive'):
-                        loader["logarchive_artifacts"].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
-                    if does_table_exist_in_db(lava_db_path, 'logarchive_artifacts'):
-                        unifed_logs_artifacts = []
-                        unifed_logs_artifacts = [plugin.name for plugin in loader.plugins
-                                                 if plugin.module_name=='logarchive'
-                                                 and plugin.name != 'logarchive'
-                                                 and plugin.name != 'logarchive_artifacts']
-                        for unifed_log_artifact in unifed_logs_artifacts:
-                            loader[unifed_log_artifact].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
-            except Exception as ex:
-                logfunc('Reading {} artifact had errors!'.format(plugin.name))
-                logfunc('Error was {}'.format(str(ex)))
-                logfunc('Exception Traceback: {}'.format(traceback.format_exc()))
-                continue  # nope
-        else:
-            logfunc(f"No file found")
+    lava_only = checkpoints.lava_only
+    file_path_ids = lava_get_file_path_ids() if resume else set()
+    searched_patterns = set()
+    seeker_stats = SeekerStats(checkpoints.seeker_stats)
+
+    def run_plugin(plugin, files_found, category_folder):
+        '''Runs the artifact on files_found, returns False if it had errors'''
+        try:
+            plugin.method(files_found, category_folder, seeker, wrap_text, time_offset)
+            if plugin.name == 'logarchive':
+                lava_db_path = os.path.join(out_params.output_folder_base, '_lava_artifacts.db')
+                if does_table_exist_in_db(lava_db_path, 'logarchive'):
+                    loader["logarchive_artifacts"].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
+                if does_table_exist_in_db(lava_db_path, 'logarchive_artifacts'):
+                    unifed_logs_artifacts = []
+                    unifed_logs_artifacts = [plugin.name for plugin in loader.plugins
+                                             if plugin.module_name=='logarchive'
+                                             and plugin.name != 'logarchive'
+                                             and plugin.name != 'logarchive_artifacts']
+                    for unifed_log_artifact in unifed_logs_artifacts:
+                        loader[unifed_log_artifact].method([lava_db_path], category_folder, seeker, wrap_text, time_offset)
+        except Exception as ex:
+            logfunc('Reading {} artifact had errors!'.format(plugin.name))
+            logfunc('Error was {}'.format(str(ex)))
+            logfunc('Exception Traceback: {}'.format(traceback.format_exc()))
+            return False  # nope
+        return True
+
+    def finish_plugin(plugin, unhashed_files, success):
+        '''Completes an artifact once it ran and its output was written, in artifact order'''
+        nonlocal parsed_modules
+        lava_update_sqlite_file_path_hashes(
+            [(file_info.path_id, file_info.hashes) for file_info in unhashed_files if file_info.hashes])
+        log.flush()
+        checkpoints.record(plugin, success, lava_only, seeker_stats.collect(seeker, plugin))
+        if not success:
+            return
         logfunc('{} [{}] artifact completed'.format(plugin.name, plugin.module_name))
         parsed_modules += 1
         GuiWindow.SetProgressBar(parsed_modules, len(plugins))
-        log.flush()
+
+    def copy_plugin(plugin, success):
+        '''Copies the output of an unchanged artifact from the previous run, in artifact order'''
+        success = incremental.copy(plugin, file_path_ids) and success
+        finish_plugin(plugin, [], success)
+
+    # With several plugin workers, artifacts run on worker threads and their output is written in artifact order
+    runner = PluginRunner(plugin_workers)
+    for plugin_number, plugin in enumerate(plugins, start=1):
+        runner.prepare(plugin)
+        capture = runner.capture(plugin)
+        with capturing(capture):
+            logfunc()
+            logfunc('[{}/{}] {} [{}] artifact started'.format(plugin_number, len(plugins),
+                                                                  plugin.name, plugin.module_name))
+            prefetcher.advance(plugin_number)
+            output_types = plugin.artifact_info.get('output_types', '')
+            search_patterns = search_plan.plugin_patterns.get(plugin.name)
+            lazy_extraction = bool(plugin.artifact_info.get('lazy_extraction', False))
+            if incremental and incremental.is_unchanged(plugin):
+                logfunc('{} [{}] artifact unchanged since the previous run, its output is copied'.format(
+                    plugin.name, plugin.module_name))
+                log.write(f'<b>For {plugin.name} artifact</b>')
+                log.write(f'<ul><li>Unchanged since the previous run, output copied from '
+                          f'<i>{incremental.previous_folder}</i></li></ul>')
+                if not lava_only and 'lava_only' in output_types and (search_patterns is None or any(
+                        search_plan.matches.get(pattern) for _, pattern in search_patterns)):
+                    lava_only = True
+                runner.submit(plugin, capture, None, partial(copy_plugin, plugin))
+                continue
+            files_found = []
+            file_path_rows = []
+            pattern_to_file_rows = []
+            unhashed_files = []
+            log.write(f'<b>For {plugin.name} artifact</b>')
+            if search_patterns is None:
+                log.write(f'<ul><li>No search regexes provided for {plugin.name} artifact.')
+                log.write("<ul><li><i>'_lava_artifacts.db'</i> used as source file.</li></ul></li></ul>")
+                files_found = [os.path.join(out_params.output_folder_base, '_lava_artifacts.db')]
+            else:
+                for artifact_search_pattern_id, artifact_search_regex in search_patterns:
+                    # Not seeker.searched, the pattern may have been searched ahead by the prefetcher
+                    pattern_already_searched = artifact_search_regex in searched_patterns
+                    searched_patterns.add(artifact_search_regex)
+                    search_start = perf_counter()
+                    found = seeker.search(artifact_search_regex, lazy=lazy_extraction)
+                    seeker_stats.record_search(plugin, artifact_search_regex, perf_counter() - search_start)
+                    if not found:
+                        if plugin.name == 'logarchive' and extracttype != 'fs' and extracttype != 'file':
+                            src = os.path.join(os.path.dirname(input_path), "logarchive.json")
+                            dst = os.path.join(out_params.data_folder, "logarchive.json")
+                            if os.path.exists(src):
+                                copy2(src, dst)
+                                files_found.append(dst)
+                        log.write(f'<ul><li>No file found for regex <i>{artifact_search_regex}</i></li></ul>')
+                    else:
+                        log.write(f'<ul><li>{len(found)} {"files" if len(found) > 1 else "file"} for regex <i>{artifact_search_regex}</i> located at:')
+                        for pathh in found:
+                            if pathh.startswith('\\\\?\\'):
+                                pathh = pathh[4:]
+                            file_info = seeker.file_infos.get(pathh)
+                            if file_info and file_info.hashes:
+                                hashes = ', '.join(f'{algorithm.upper()}: {digest}'
+                                                   for algorithm, digest in file_info.hashes.items())
+                                log.write(f'<ul><li>{pathh} <i>({hashes})</i></li></ul>')
+                            else:
+                                log.write(f'<ul><li>{pathh}</li></ul>')
+                            if file_info:
+                                file_path_id = file_info.path_id
+                                if not pattern_already_searched and file_path_id not in file_path_ids:
+                                    file_path_rows.append((file_path_id, file_info.source_path, file_info.hashes))
+                                    file_path_ids.add(file_path_id)
+                                    if hasher and not file_info.hashes:
+                                        # Extraction deferred, hashed when the artifact reads it
+                                        unhashed_files.append(file_info)
+                                pattern_to_file_rows.append((artifact_search_pattern_id, file_path_id))
+                        log.write(f'</li></ul>')
+                        files_found.extend(found)
+                lava_insert_sqlite_file_paths(file_path_rows)
+                lava_insert_sqlite_artifact_links_pattern_to_file(pattern_to_file_rows)
+
+            run = None
+            finish = partial(finish_plugin, plugin, unhashed_files)
+            if files_found:
+                if not lava_only and 'lava_only' in output_types:
+                    lava_only = True
+                category_folder = os.path.join(out_params.output_folder_base, '_HTML', plugin.category)
+                if not os.path.exists(category_folder):
+                    try:
+                        os.makedirs(category_folder)
+                    except (FileExistsError, FileNotFoundError) as ex:
+                        logfunc('Error creating {} report directory at path {}'.format(plugin.name, category_folder))
+                        logfunc('Error was {}'.format(str(ex)))
+                        finish = None  # cannot do work
+                if finish:
+                    input_bytes = search_plan.input_size(plugin, seeker) if search_patterns is not None else None
+                    run = partial(timings.measure, plugin, input_bytes,
+                                  partial(run_plugin, plugin, files_found, category_folder))
+            else:
+                logfunc(f"No file found")
+        runner.submit(plugin, capture, run, finish)
+    runner.close()
+    timings.save()
     log.close()
 
+    prefetcher.close()
+    if prefetcher.prefetched:
+        logfunc(f'Prefetch: {prefetcher.prefetched} search patterns extracted ahead of their artifacts'
+                + (f', {prefetcher.throttled_seconds:.1f}s waited to stay under the bandwidth limit'
+                   if prefetcher.throttled_seconds else ''))
+    seeker_stats.write(seeker, os.path.join(out_params.output_folder_base, '_HTML', SEEKER_STATS_CATEGORY))
+
+    if hasher:
+        hasher.save()
+        logfunc(f'File hashes: {hasher.hashed} files hashed, {hasher.reused} reused from a previous run')
+    if content_store:
+        logfunc(f'Content store: {content_store.files} files extracted, '
+                f'{content_store.stored_bytes / 1048576:.1f} MB stored, '
+                f'{content_store.duplicate_bytes / 1048576:.1f} MB of duplicate content not stored')
+
     write_device_info()
     if lava_only:
         write_lava_only_log()
@@ -573,6 +855,7 @@ def crunch_artifacts(
             input_path = input_path[4:]
 
     report.generate_report(out_params.output_folder_base, run_time_secs, run_time_HMS, extracttype, input_path, casedata, profile_filename, icons, lava_only)
+    checkpoints.complete()
     logfunc('Report generation Completed.')
 
     # Record the run in history
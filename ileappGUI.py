@@ -513,7 +513,8 @@ def process(casedata):
 
         crunch_successful = ileapp.crunch_artifacts(
             selected_modules, extracttype, input_path, out_params, wrap_text,
-            loader, casedata, time_offset, profile_filename, None, decryption_keys)
+            loader, casedata, time_offset, profile_filename, None, decryption_keys,
+            partial_walk=profile_filename is not None)
 
         lava_finalize_output(out_params.output_folder_base)
 
@@ -583,9 +584,9 @@ def select_input(button_type):
     if button_type == 'file':
         input_filename = tk_filedialog.askopenfilename(parent=main_window,
                                                        title='Select a file',
-                                                       filetypes=(('All supported files', '*.tar *.zip *.gz'),
+                                                       filetypes=(('All supported files', '*.tar *.zip *.gz *.zst'),
                                                                   ('tar file', '*.tar'), ('zip file', '*.zip'),
-                                                                  ('gz file', '*.gz')))
+                                                                  ('gz file', '*.gz'), ('zst file', '*.zst')))
     else:
         input_filename = tk_filedialog.askdirectory(parent=main_window, title='Select a folder')
     input_entry.delete(0, 'end')
@@ -867,7 +868,7 @@ leapps_logo_label.bind("<Button-1>", lambda e: open_website("https://leapps.org"
 ### Input output selection
 input_frame = ttk.LabelFrame(
     main_window,
-    text=' Select the file (tar/zip/gz) or directory of the target iOS full file system extraction for parsing: ')
+    text=' Select the file (tar/zip/gz/zst) or directory of the target iOS full file system extraction for parsing: ')
 input_frame.pack(padx=14, pady=2, fill='x')
 input_entry = ttk.Entry(input_frame)
 input_entry.pack(side='left', padx=5, pady=4, fill='x', expand=True)
@@ -289,12 +289,12 @@ def _iter_extraction_files(seeker):
             yield member.name, member.size, _format_utc(member.mtime)
         return
     all_files = getattr(seeker, '_all_files', None)
-    if isinstance(all_files, dict):
+    if all_files is not None and getattr(seeker, 'backup_type', None):
         # iTunes backup: relative "Domain/path" keys; sizes are not in the listing.
         for path in all_files:
             yield path, '', ''
         return
-    if isinstance(all_files, list):
+    if all_files is not None:
         directory = getattr(seeker, 'directory', '')
         for item in all_files:
             try:
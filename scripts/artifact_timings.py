@@ -0,0 +1,205 @@
+"""
+Run time of the artifacts, kept from run to run, and the cost model estimating it.
+
+After each run, the wall time, CPU time and input size (total size of the
+listing entries matched by their search patterns) of the artifacts that ran
+are stored in a small SQLite database in the shared LEAPP directory, keeping
+the last MAX_RUNS_PER_ARTIFACT runs of each artifact.
+
+On the next runs, once the search plan has matched the files of every
+artifact, the cost model estimates the time of each artifact from its seconds
+per input MB in the previous runs, and the estimated processing time is
+logged before the first artifact starts, in the GUI log as on the command
+line. Artifacts that never ran are estimated with the median seconds per MB
+of the artifacts that did, and artifacts whose input size is unknown (iTunes
+backups, _lava_artifacts.db sources) with their mean time.
+
+With --cost_order, the artifacts expected to take the longest run first, so
+that with --plugin_workers they do not end up running alone at the end of the
+run. last_build, the artifacts using _lava_artifacts.db as source, and the
+artifacts depending on other modules or required by them keep their position.
+
+Classes:
+    ArtifactTimings: Measures the artifacts of a run and stores their timings after the run.
+    CostModel: Estimates the run time of the artifacts from the timings of the previous runs.
+
+Functions:
+    get_timings_path: Returns the path of the database holding the artifact timings.
+"""
+
+import heapq
+import os
+import sqlite3
+import statistics
+
+from time import gmtime, perf_counter, strftime, thread_time, time
+
+from leapp_functions.app.history import get_shared_directory
+from scripts.ilapfuncs import logfunc
+from scripts.plugin_runner import required_modules
+
+MAX_RUNS_PER_ARTIFACT = 10
+# Smallest input of the cost model, opening and parsing even a tiny file takes time
+MIN_INPUT_MB = 0.01
+DEFAULT_SECONDS_PER_MB = 0.5
+DEFAULT_ARTIFACT_SECONDS = 1.0
+TIMINGS_SCHEMA = ('CREATE TABLE IF NOT EXISTS artifact_runs (artifact TEXT, module TEXT, wall_seconds REAL, '
+                  'cpu_seconds REAL, input_bytes INTEGER, recorded REAL)')
+
+
+def get_timings_path():
+    '''Returns the path of the database holding the artifact timings, inside the shared LEAPP directory'''
+    return os.path.join(get_shared_directory(), 'artifact_timings.db')
+
+
+def _input_mb(input_bytes):
+    return max(input_bytes / 1048576, MIN_INPUT_MB)
+
+
+class ArtifactTimings:
+    """
+    Wall time, CPU time and input size of the artifacts run, stored with the timings of the previous runs.
+    Attributes:
+        timings_path (str): Path of the SQLite database holding the timings.
+        rows (list): (artifact name, module name, wall seconds, CPU seconds, input bytes) of the artifacts run.
+    Methods:
+        measure(plugin, input_bytes, run): Calls run() and records its time if it returned True.
+        save(): Stores the timings of the run, keeping the last MAX_RUNS_PER_ARTIFACT of each artifact.
+    """
+
+    def __init__(self, timings_path=None):
+        self.timings_path = timings_path or get_timings_path()
+        self.rows = []
+
+    def measure(self, plugin, input_bytes, run):
+        '''Calls run() on the thread running plugin, records its wall and CPU time if it returned True'''
+        start = perf_counter()
+        cpu_start = thread_time()
+        success = run()
+        if success:
+            self.rows.append((plugin.name, plugin.module_name, perf_counter() - start,
+                              thread_time() - cpu_start, input_bytes))
+        return success
+
+    def save(self):
+        '''Stores the timings of the run, keeping the last MAX_RUNS_PER_ARTIFACT runs of each artifact'''
+        if not self.rows:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.timings_path), exist_ok=True)
+            db = sqlite3.connect(self.timings_path)
+            try:
+                with db:
+                    db.execute(TIMINGS_SCHEMA)
+                    recorded = time()
+                    db.executemany('INSERT INTO artifact_runs VALUES (?, ?, ?, ?, ?, ?)',
+                                   [row + (recorded,) for row in self.rows])
+                    db.execute('DELETE FROM artifact_runs WHERE rowid NOT IN (SELECT rowid FROM artifact_runs AS run '
+                               'WHERE run.artifact = artifact_runs.artifact ORDER BY recorded DESC LIMIT ?)',
+                               (MAX_RUNS_PER_ARTIFACT,))
+            finally:
+                db.close()
+        except (sqlite3.Error, OSError) as ex:
+            logfunc(f'Could not save the artifact timings {self.timings_path} ' + str(ex))
+
+
+class CostModel:
+    """
+    Estimates the run time of the artifacts from the timings of their previous runs.
+    Attributes:
+        seconds_per_mb (dict): Seconds per input MB of each artifact run with a known input size.
+        mean_seconds (dict): Mean wall time in seconds of each artifact run before.
+        default_seconds_per_mb (float): Median of seconds_per_mb, for the artifacts never run.
+        default_seconds (float): Median of mean_seconds, for the artifacts never run.
+    Methods:
+        estimate(plugin, input_bytes): Returns the estimated seconds of plugin for input_bytes of input.
+        estimates(plugins, search_plan, seeker): Returns the estimated seconds of the plugins with files.
+        order(plugins, estimates): Returns plugins with the artifacts expected to take the longest first.
+        total_seconds(estimates, workers): Returns the estimated processing time with workers threads.
+        log_estimate(estimates, workers): Logs the estimated processing time.
+    """
+
+    def __init__(self, timings_path=None):
+        self.seconds_per_mb = {}
+        self.mean_seconds = {}
+        self.default_seconds_per_mb = DEFAULT_SECONDS_PER_MB
+        self.default_seconds = DEFAULT_ARTIFACT_SECONDS
+        self._load(timings_path or get_timings_path())
+
+    def _load(self, timings_path):
+        '''Reads the timings of the previous runs, if any'''
+        if not os.path.isfile(timings_path):
+            return
+        sized = {}
+        walls = {}
+        try:
+            db = sqlite3.connect(f'file:{timings_path}?mode=ro', uri=True)
+            try:
+                for artifact, wall_seconds, input_bytes in db.execute(
+                        'SELECT artifact, wall_seconds, input_bytes FROM artifact_runs'):
+                    walls.setdefault(artifact, []).append(wall_seconds)
+                    if input_bytes is not None:
+                        seconds, input_mb = sized.get(artifact, (0, 0))
+                        sized[artifact] = (seconds + wall_seconds, input_mb + _input_mb(input_bytes))
+            finally:
+                db.close()
+        except sqlite3.Error as ex:
+            logfunc(f'Could not read the artifact timings {timings_path} ' + str(ex))
+            return
+        self.seconds_per_mb = {artifact: seconds / input_mb for artifact, (seconds, input_mb) in sized.items()}
+        self.mean_seconds = {artifact: statistics.fmean(seconds) for artifact, seconds in walls.items()}
+        if self.seconds_per_mb:
+            self.default_seconds_per_mb = statistics.median(self.seconds_per_mb.values())
+        if self.mean_seconds:
+            self.default_seconds = statistics.median(self.mean_seconds.values())
+
+    def estimate(self, plugin, input_bytes):
+        '''Returns the estimated seconds of plugin for input_bytes of input files (None if unknown)'''
+        if input_bytes is not None and (plugin.name in self.seconds_per_mb or plugin.name not in self.mean_seconds):
+            return self.seconds_per_mb.get(plugin.name, self.default_seconds_per_mb) * _input_mb(input_bytes)
+        return self.mean_seconds.get(plugin.name, self.default_seconds)
+
+    def estimates(self, plugins, search_plan, seeker):
+        '''Returns a dict of the estimated seconds of each plugin, leaving out the plugins without files'''
+        estimates = {}
+        for plugin in plugins:
+            plugin_patterns = search_plan.plugin_patterns.get(plugin.name)
+            if plugin_patterns and search_plan.matches and not any(
+                    search_plan.matches.get(pattern) for _, pattern in plugin_patterns):
+                continue
+            input_bytes = search_plan.input_size(plugin, seeker) if plugin_patterns else None
+            estimates[plugin.name] = self.estimate(plugin, input_bytes)
+        return estimates
+
+    @staticmethod
+    def order(plugins, estimates):
+        '''
+        Returns the list of plugins where the artifacts expected to take the longest run first.
+        last_build, the artifacts using _lava_artifacts.db as source, and the artifacts depending on
+        other modules or required by them keep their position.
+        '''
+        required = set().union(*(required_modules(plugin) for plugin in plugins))
+        pinned = {plugin.name for plugin in plugins
+                  if plugin.name == 'last_build' or plugin.search is None
+                  or plugin.module_name in required or required_modules(plugin)}
+        movable = sorted((plugin for plugin in plugins if plugin.name not in pinned),
+                         key=lambda plugin: estimates.get(plugin.name, 0), reverse=True)
+        movable = iter(movable)
+        return [plugin if plugin.name in pinned else next(movable) for plugin in plugins]
+
+    @staticmethod
+    def total_seconds(estimates, workers=1):
+        '''Returns the estimated processing time, each artifact going to the first of workers threads available'''
+        loads = [0.0] * max(1, workers or 1)
+        for seconds in sorted(estimates.values(), reverse=True):
+            heapq.heappush(loads, heapq.heappop(loads) + seconds)
+        return max(loads)
+
+    def log_estimate(self, estimates, workers=1):
+        '''Logs the estimated processing time of the artifacts, if some of them ran before'''
+        known = sum(1 for name in estimates if name in self.mean_seconds)
+        if not known:
+            return
+        total = self.total_seconds(estimates, workers)
+        logfunc(f'Estimated processing time = {strftime("%H:%M:%S", gmtime(total))} '
+                f'(timings of previous runs for {known} of {len(estimates)} artifacts)')
@@ -11,6 +11,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "photo",
 'sample_data': {
@@ -43,6 +44,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "photo",
 'sample_data': {
@@ -72,6 +74,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "player-play",
 'sample_data': {
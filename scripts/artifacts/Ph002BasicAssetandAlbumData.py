@@ -15,6 +15,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-wAlbums-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "photo",
 'sample_data': {
@@ -52,6 +53,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-wAlbums-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "photo",
 'sample_data': {
@@ -85,6 +87,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-BasicData-wAlbums-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "player-play",
 'sample_data': {
@@ -12,6 +12,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-Trashed-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "trash",
 'sample_data': {
@@ -46,6 +47,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-Trashed-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "trash",
 'sample_data': {
@@ -76,6 +78,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-Trashed-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "trash",
 'sample_data': {
@@ -12,6 +12,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-Hidden-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "eye-off",
 'sample_data': {
@@ -45,6 +46,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-Hidden-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "eye-off",
 'sample_data': {
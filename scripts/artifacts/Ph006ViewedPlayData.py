@@ -14,6 +14,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-ViewPlay-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "eye",
 'sample_data': {
@@ -49,6 +50,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-ViewPlay-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "eye"
 },
@@ -67,6 +69,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-ViewPlay-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "eye",
 'sample_data': {
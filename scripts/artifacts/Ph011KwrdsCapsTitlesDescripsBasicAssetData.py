@@ -18,6 +18,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-withDescriptions-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "info-circle",
 'sample_data': {
@@ -57,6 +58,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-withDescriptions-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "info-circle",
 'sample_data': {
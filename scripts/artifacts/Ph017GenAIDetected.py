@@ -12,6 +12,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-GenAIDetected-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "sparkles",
 'sample_data': {
@@ -45,6 +46,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-GenAIDetected-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "sparkles",
 'sample_data': {
@@ -75,6 +77,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-GenAIDetected-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "sparkles",
 'sample_data': {
@@ -15,6 +15,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Albums-NAD-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "book",
 'sample_data': {
@@ -51,6 +52,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Albums-NAD-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "book",
 'sample_data': {
@@ -84,6 +86,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Albums-NAD-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "book",
 'sample_data': {
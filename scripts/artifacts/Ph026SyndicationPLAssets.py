@@ -21,6 +21,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-SWY-Assets-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "refresh",
 'sample_data': {
@@ -63,6 +64,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-SWY-Assets-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "message",
 'sample_data': {
@@ -14,6 +14,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Assets-iCloudSPL-fromOthers-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "cloud-download",
 'sample_data': {
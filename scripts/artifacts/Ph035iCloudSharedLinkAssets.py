@@ -11,6 +11,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Shared-Assets-iCldLinks-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "link",
 'sample_data': {
@@ -16,6 +16,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-InternalResourceData-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "database",
 'sample_data': {
@@ -53,6 +54,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-InternalResourceData-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "database",
 'sample_data': {
@@ -90,6 +92,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-InternalResourceData-GenPlaygrndPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Application/com.apple.GenerativePlayground/00000000-0000-0000-0000-000000000001.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "database",
 'sample_data': {
@@ -12,6 +12,7 @@ __artifacts_v2__ = {
         "category": "Photos.sqlite-Y-Settings-Plist-MobileSlideShow",
         "notes": "",
         "paths": ('*/Library/Preferences/com.apple.mobileslideshow.plist',),
+        "thread_safe": True,
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "settings",
         "sample_data": {
@@ -13,6 +13,7 @@ __artifacts_v2__ = {
         "category": "Photos.sqlite-Y-Settings-Plist-MediaAnalysis-PhotoLib-List",
         "notes": "",
         "paths": ('*/mobile/Library/Preferences/com.apple.mediaanalysisd.plist',),
+        "thread_safe": True,
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "book",
         "sample_data": {
@@ -11,6 +11,7 @@ __artifacts_v2__ = {
         "category": "Photos.sqlite-Y-Settings-Plist-PurpleBuddy",
         "notes": "",
         "paths": ('*/Library/Preferences/com.apple.purplebuddy.plist',),
+        "thread_safe": True,
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "settings",
         "sample_data": {
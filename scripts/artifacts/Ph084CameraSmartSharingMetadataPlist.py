@@ -13,6 +13,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Y-Settings-Plist-Camera-Smart-Share',
 'notes': '',
 'paths': ('*/PhotoData/Caches/SmartSharing/camera_smart_sharing_metadata.plist',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "camera",
 'sample_data': {
@@ -12,6 +12,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Y-Settings-Plist-CPL-Service-Enabled',
 'notes': '',
 'paths': ('*/com.apple.accountsd/cloudServiceEnableLog.plist',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "settings",
 'sample_data': {
@@ -14,6 +14,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Z-TableJoinReference-iOS14-PhotoData-Psql',
 'notes': '',
 'paths': ('*/PhotoData/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "database",
 'sample_data': {
@@ -49,6 +50,7 @@ __artifacts_v2__ = {
 'category': 'Photos.sqlite-Z-TableJoinReference-iOS14-SyndicationPL-Psql',
 'notes': '',
 'paths': ('*/mobile/Library/Photos/Libraries/Syndication.photoslibrary/database/Photos.sqlite*',),
+'thread_safe': True,
 "output_types": ["standard", "tsv", "none"],
 "artifact_icon": "database",
 'sample_data': {
@@ -5,11 +5,12 @@ __artifacts_v2__ = {
                        "(including logs found inside sysdiagnose archives)",
         "author": "@AlexisBrignoni",
         "creation_date": "2026-06-23",
-        "last_update_date": "2026-06-24",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Mobile Activation Logs",
         "notes": "",
-        "paths": ('**/mobileactivationd.log*', '**/sysdiagnose_*.tar.gz'),
+        "paths": ('**/mobileactivationd.log*',
+                  '**/sysdiagnose_*.tar.gz/**/logs/MobileActivation/mobileactivationd.log*'),
         "output_types": "standard",
         "artifact_icon": "settings",
         "sample_data": {
@@ -30,9 +31,7 @@ __artifacts_v2__ = {
     }
 }
 
-import io
 import re
-import tarfile
 from datetime import datetime, timezone
 from pathlib import Path
 
@@ -42,12 +41,11 @@ _DATE_RE = re.compile(r'(([A-Za-z]+[\s]+([a-zA-Z]+[\s]+[0-9]+)[\s]+([0-9]+\:[0-9
                       r'([0-9]{4}))([\s]+[\[\d\]]+[\s]+[\<a-z\>]+[\s]+[\(\w\)]+[\s]+[A-Z]{2}\:[\s]+)'
                       r'([main\:\s]*.*)$)')
 _UPGRADE_RE = re.compile(r'((.*)(Upgrade\s+from\s+[\w]+\s+to\s+[\w]+\s+detected\.$))')
-_TAR_MEMBER_RE = re.compile(r"logs/MobileActivation/mobileactivationd\.log(\.\d+)?$")
 _STARTUP = '____________________ Mobile Activation Startup _____________________'
 
 
 def _iter_logs(files_found):
-    """Yield (log_name, lines, source_full_path) for mobileactivationd.log files and those in sysdiagnose tars."""
+    """Yield (log_name, lines, source_full_path) for mobileactivationd.log files, including those in sysdiagnose tars."""
     for filename in files_found:
         filename = str(filename)
         if 'mobileactivationd.log' in filename:
@@ -58,21 +56,6 @@ def _iter_logs(files_found):
             except OSError:
                 continue
             yield Path(path).name, lines, filename
-        elif 'sysdiagnose_' in filename and 'IN_PROGRESS_' not in filename:
-            try:
-                tar = tarfile.open(filename)
-            except (tarfile.TarError, OSError):
-                continue
-            try:
-                for member in tar.getmembers():
-                    if not _TAR_MEMBER_RE.search(member.name):
-                        continue
-                    extracted = tar.extractfile(member)
-                    if extracted is not None:
-                        with io.TextIOWrapper(extracted, encoding='utf-8', errors='ignore') as tfp:
-                            yield member.name, tfp.readlines(), filename
-            finally:
-                tar.close()
 
 
 @artifact_processor
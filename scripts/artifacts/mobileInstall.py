@@ -4,11 +4,12 @@ __artifacts_v2__ = {
         "description": "Apps whose most recent mobile_installation.log event is an install/update",
         "author": "@AlexisBrignoni",
         "creation_date": "2026-06-23",
-        "last_update_date": "2026-06-24",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Mobile Installation Logs",
         "notes": "All timestamps are in LOCAL device time (the log records local time), not UTC.",
-        "paths": ('**/mobile_installation.log.*', '**/sysdiagnose_*.tar.gz'),
+        "paths": ('**/mobile_installation.log.*',
+                  '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*'),
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "download",
         "sample_data": {
@@ -34,11 +35,12 @@ __artifacts_v2__ = {
         "description": "Apps whose most recent mobile_installation.log event is an uninstall/destroy",
         "author": "@AlexisBrignoni",
         "creation_date": "2026-06-23",
-        "last_update_date": "2026-06-24",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Mobile Installation Logs",
         "notes": "All timestamps are in LOCAL device time (the log records local time), not UTC.",
-        "paths": ('**/mobile_installation.log.*', '**/sysdiagnose_*.tar.gz'),
+        "paths": ('**/mobile_installation.log.*',
+                  '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*'),
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "trash",
         "sample_data": {
@@ -64,11 +66,12 @@ __artifacts_v2__ = {
         "description": "All app install/update/uninstall/container/reboot events from mobile_installation.log",
         "author": "@AlexisBrignoni",
         "creation_date": "2026-06-23",
-        "last_update_date": "2026-06-24",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Mobile Installation Logs",
         "notes": "All timestamps are in LOCAL device time (the log records local time), not UTC.",
-        "paths": ('**/mobile_installation.log.*', '**/sysdiagnose_*.tar.gz'),
+        "paths": ('**/mobile_installation.log.*',
+                  '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*'),
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "list",
         "sample_data": {
@@ -94,11 +97,12 @@ __artifacts_v2__ = {
         "description": "Reboot events detected in mobile_installation.log",
         "author": "@AlexisBrignoni",
         "creation_date": "2026-06-23",
-        "last_update_date": "2026-06-24",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Mobile Installation Logs",
         "notes": "All timestamps are in LOCAL device time (the log records local time), not UTC.",
-        "paths": ('**/mobile_installation.log.*', '**/sysdiagnose_*.tar.gz'),
+        "paths": ('**/mobile_installation.log.*',
+                  '**/sysdiagnose_*.tar.gz/**/logs/MobileInstallation/mobile_installation.log*'),
         "output_types": ["html", "tsv", "lava"],
         "artifact_icon": "refresh",
         "sample_data": {
@@ -121,15 +125,12 @@ __artifacts_v2__ = {
     }
 }
 
-import io
 import re
-import tarfile
 
 from scripts.ilapfuncs import artifact_processor
 
 _MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
 _UNINSTALL_ACTIONS = ('Destroying container', 'Uninstalling identifier')
-_TAR_MEMBER_RE = re.compile(r"logs/MobileInstallation/mobile_installation\.log(\.\d+)?$")
 
 
 def _first_group(line, *patterns):
@@ -190,7 +191,7 @@ def _parse_events(lines):
 
 
 def _iter_log_lines(files_found):
-    """Yield (lines, source_full_path) for mobile_installation.log files and those inside sysdiagnose tars."""
+    """Yield (lines, source_full_path) for mobile_installation.log files, including those inside sysdiagnose tars."""
     for filename in files_found:
         filename = str(filename)
         if 'mobile_installation' in filename:
@@ -199,21 +200,6 @@ def _iter_log_lines(files_found):
                     yield fp.readlines(), filename
             except OSError:
                 continue
-        elif 'sysdiagnose_' in filename and 'IN_PROGRESS_' not in filename:
-            try:
-                tar = tarfile.open(filename)
-            except (tarfile.TarError, OSError):
-                continue
-            try:
-                for member in tar.getmembers():
-                    if not _TAR_MEMBER_RE.search(member.name):
-                        continue
-                    extracted = tar.extractfile(member)
-                    if extracted is not None:
-                        with io.TextIOWrapper(extracted, encoding='utf-8', errors='ignore') as tfp:
-                            yield tfp.readlines(), filename
-            finally:
-                tar.close()
 
 
 def _events_and_source(context):
@@ -4,12 +4,13 @@ __artifacts_v2__ = {
         "description": "Parses SMS and iMessage chats",
         "author": "@AlexisBrignoni, @XperyLab, @ydkhatri, @tobraha, @snoop168",
         "creation_date": "2020-04-30",
-        "last_update_date": "2026-07-10",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "SMS & iMessage",
         "notes": "",
         "paths": ('*/Library/SMS/sms.db*',
                   '*/Library/SMS/Attachments/*'),
+        "lazy_extraction": True,
         "output_types": "standard",
         "artifact_icon": "message",
         "sample_data": {
@@ -7,13 +7,11 @@ __artifacts_v2__ = {
             to get informations about other devices connected to the same Apple-ID.",
         "author": "@C_Peter",
         "creation_date": "2025-05-22",
-        "last_update_date": "2025-10-01",
+        "last_update_date": "2026-10-18",
         "requirements": "none",
         "category": "Sysdiagnose",
         "notes": "OCTL refers to the Octagon Account (iCloud Keychain)",
-        "paths": (
-            '*/otctl_status.txt',
-            '*/mobile/Library/Logs/CrashReporter/DiagnosticLogs/sysdiagnose/sysdiagnose_*.tar.gz'),
+        "paths": ('*/otctl_status.txt', '*/sysdiagnose_*.tar.gz/*/otctl_status.txt'),
         "output_types": "standard",
         "artifact_icon": "device-mobile",
         "sample_data": {
@@ -25,10 +23,9 @@ __artifacts_v2__ = {
 }
 
 import json
-import tarfile
 import os
 
-from scripts.ilapfuncs import artifact_processor, get_file_path
+from scripts.ilapfuncs import artifact_processor
 
 
 @artifact_processor
@@ -39,25 +36,13 @@ def get_sysdiag_account_devices(context):
     sources = []
     for file_found in files_found:
         file_found = str(file_found)
-        filename = os.path.basename(file_found)
-        if filename == "otctl_status.txt":
-            source_path = get_file_path(files_found, 'otctl_status.txt')
-            print(f"File: {source_path} found.")
-            with open(source_path, 'r', encoding='utf-8') as otctl:
-                f = json.load(otctl)
-        elif "sysdiagnose_" in filename and "IN_PROGRESS_" not in filename:
-            print(f"File: {filename} found.")
-            source_path = get_file_path(files_found, filename)
-            tar = tarfile.open(source_path)
-            root = tar.getmembers()[0].name.split('/')[0]
-            try:
-                tarf = tar.extractfile(f"{root}/otctl_status.txt")
-                f = json.load(tarf)
-            except KeyError:
-                continue
-        else:
+        # Also found inside sysdiagnose archives, which the seeker lists as folders
+        if os.path.basename(file_found) != "otctl_status.txt":
             continue
-        sources.append(source_path)
+        print(f"File: {file_found} found.")
+        with open(file_found, 'r', encoding='utf-8') as otctl:
+            f = json.load(otctl)
+        sources.append(file_found)
         # Older iOS otctl_status.txt may omit these keys entirely
         opush = f.get("lastOctagonPush", '')
 
@@ -8,13 +8,13 @@ __artifacts_v2__ = {
                        "that will contain the iOS version. Previously named Ph99SystemVersionPlist.py",
         "author": "Scott Koenig",
         "creation_date": "2025-06-02",
-        "last_update_date": "2025-10-14",
+        "last_update_date": "2026-10-18",
         "requirements": "Acquisition that contains SystemVersion.plist",
         "category": "IOS Build",
         "notes": "Added parsing of SystemVersion.plist in a sysdiagnose archive by C_Peter",
         "paths": (
             "*/System/Library/CoreServices/SystemVersion.plist",
-            "*/sysdiagnose_*.tar.gz"),
+            "*/sysdiagnose_*.tar.gz/*/logs/SystemVersion/SystemVersion.plist"),
         "output_types": ["standard", "tsv", "none"],
         "artifact_icon": "git-commit",
         "sample_data": {
@@ -36,7 +36,6 @@ __artifacts_v2__ = {
     }
 }
 
-import tarfile
 from scripts.ilapfuncs import artifact_processor, get_plist_file_content, logfunc, \
     device_info, iOS
 
@@ -48,20 +47,12 @@ def system_version_plist(context):
     data_source = ""
     pl = None
 
+    # The plist of the extraction comes first, then the ones of the sysdiagnose archives
     plist_file = context.get_source_file_path("SystemVersion.plist")
-    sysdiagnose_archive = context.get_source_file_path("sysdiagnose_*.tar.gz")
 
     if plist_file:
         data_source = plist_file
         pl = get_plist_file_content(data_source)
-    elif sysdiagnose_archive and 'sysdiagnose_' in sysdiagnose_archive and "IN_PROGRESS_" not in sysdiagnose_archive:
-        tar = tarfile.open(sysdiagnose_archive)
-        root = tar.getmembers()[0].name.split('/')[0]
-        try:
-            data_source = tar.extractfile(f"{root}/logs/SystemVersion/SystemVersion.plist")
-            pl = get_plist_file_content(data_source)
-        except KeyError:
-            pl = None
 
     if pl is not None:
         for key, val in pl.items():
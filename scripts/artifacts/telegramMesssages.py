@@ -11,7 +11,7 @@ __artifacts_v2__ = {
         ),
         "author": "Stek29 / Victor Oreshkin, updated by @AlexisBrignoni, @JamesHabben",
         "creation_date": "2023-05-01", # Placeholder, original date unknown
-        "last_update_date": "2026-06-25",
+        "last_update_date": "2026-10-18",
         "requirements": "Python packages: mmh3",
         "category": "Telegram",
         "notes": "Original Gist: https://gist.github.com/stek29/8a7ac0e673818917525ec4031d77a713. "
@@ -21,6 +21,7 @@ __artifacts_v2__ = {
             '*/telegram-data/account-*/postbox/db/db_sqlite*',
             '*/telegram-data/account-*/postbox/media/**'
         ),
+        "lazy_extraction": True,
         "output_types": "standard",
         "data_views": {
             "conversation": {
@@ -60,7 +61,8 @@ import struct
 import enum
 import mmh3
 
-from scripts.ilapfuncs import artifact_processor, open_sqlite_db_readonly, check_in_media, logfunc
+from scripts.ilapfuncs import artifact_processor, open_sqlite_db_readonly, check_in_media, logfunc, \
+    materialize_file
 
 # Code courtesy of Stek29 / Victor Oreshkin
 # Github: https://gist.github.com/stek29
@@ -493,7 +495,7 @@ def telegramMessages(context):
                 is_in_media_path = "/postbox/media/" in normalized_f_path
 
                 if is_in_media_path and basename_matches:
-                    is_file = os.path.isfile(current_f_path_str)
+                    is_file = os.path.isfile(materialize_file(current_f_path_str))
                     if is_file:
                         found_media_file_path = current_f_path_str
                         break
@@ -0,0 +1,251 @@
+"""
+Checkpoints of the artifacts completed in a run, to resume it once interrupted.
+
+When a run starts, its parameters (input, type, timezone, selected artifacts)
+are stored in the _resume_run_info table of its LAVA database. Each time an
+artifact is completed, once its output was written, a checkpoint is stored in
+the _resume_checkpoints table with the report state it added since the
+previous checkpoint: its entries in the LAVA data, the category icons, the
+device information, the LAVA tables it created, the size of the report files
+(HTML, TSV, KML) it wrote, the last rows of the timeline and KML
+databases, and its seeker statistics rows.
+
+With --resume <report folder>, the interrupted run goes on with its stored
+parameters. The state of the completed artifacts is restored, the output
+written after the last checkpoint (new report files and the end of the
+others, the new LAVA tables, timeline and KML rows) is removed, and only the
+artifacts without a checkpoint run before the report is generated. The files
+already extracted into the data folder and the listing cache are reused, only
+the files of the remaining artifacts are searched and extracted again.
+Artifacts that completed with errors are not run again.
+
+Classes:
+    RunCheckpoints: Stores and restores the checkpoints of the artifacts of a run.
+"""
+
+import json
+import os
+import sqlite3
+
+import scripts.lavafuncs as lavafuncs
+
+from scripts.context import Context
+from scripts.ilapfuncs import icons, identifiers, iOS, lava_only_artifacts, logfunc
+from scripts.lavafuncs import lava_db_name, lava_drop_tables, lava_get_checkpoints, lava_get_run_info, \
+    lava_get_table_names, lava_insert_sqlite_checkpoint, lava_insert_sqlite_run_info, lava_json_name
+
+# Report databases whose rows are rolled back, instead of their size
+REPORT_DBS = (os.path.join('_Timeline', 'tl.db'), os.path.join('_KML Exports', '_latlong.db'))
+# Output not rolled back: extracted files, media, the screen log appended to by both runs, LAVA output
+UNTRACKED_FOLDERS = ('data', 'media', os.path.join('_HTML', 'media'))
+UNTRACKED_FILES = (lava_db_name, lava_json_name, os.path.join('_HTML', '_Script_Logs', 'Screen_Output.html'))
+SQLITE_SIDECARS = ('-journal', '-wal', '-shm')
+
+
+def _max_rowid(db_path):
+    '''Returns the last rowid of the data table of a report database, 0 if it has none'''
+    try:
+        db = sqlite3.connect(db_path)
+        try:
+            return db.execute('SELECT MAX(rowid) FROM data').fetchone()[0] or 0
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return 0
+
+
+def _remove(path):
+    '''Removes the file at path, and the SQLite files next to it'''
+    for sidecar in ('',) + SQLITE_SIDECARS:
+        try:
+            os.remove(path + sidecar)
+        except FileNotFoundError:
+            pass
+
+
+class RunCheckpoints:
+    """
+    Checkpoints of the artifacts completed in a run, stored in its LAVA database.
+    Attributes:
+        output_folder (str): The report folder of the run.
+        completed (dict): Maps the names of the artifacts completed before the run was resumed to their success.
+        lava_only (bool): True if an artifact completed before the run was resumed only has LAVA output.
+        seeker_stats (list): The seeker statistics rows of the artifacts completed before the run was resumed.
+    Methods:
+        start(run_info): Stores the parameters of a new run.
+        resume(): Restores the state of the completed artifacts and removes the output of the others.
+        remaining(plugins): Returns the plugins not completed before the run was resumed.
+        record(plugin, success, lava_only, seeker_stats): Stores the checkpoint of plugin once its output was written.
+        complete(): Marks the run as completed once its report was generated, it cannot be resumed.
+        restore(state): Adds the state of a checkpoint to the LAVA data and the report globals.
+    """
+
+    def __init__(self, output_folder):
+        self.output_folder = output_folder
+        self.completed = {}
+        self.lava_only = False
+        self.seeker_stats = []
+        self._marks = None
+
+    def start(self, run_info):
+        '''Stores the parameters of a new run, with the LAVA tables and report files before any artifact ran'''
+        self._marks = self._snapshot()
+        lava_insert_sqlite_run_info(dict(run_info, tables=sorted(self._marks['tables']), files=self._marks['files']))
+
+    def resume(self):
+        '''Restores the state of the completed artifacts and removes the output written after the last checkpoint'''
+        run_info = lava_get_run_info(self.output_folder) or {}
+        files = dict(run_info.get('files', {}))
+        report_dbs = {}
+        tables = set(run_info.get('tables', ()))
+        for _, artifact_name, success, state in lava_get_checkpoints():
+            self.completed[artifact_name] = success
+            self.lava_only = self.lava_only or state['lava_only']
+            self.restore(state)
+            self.seeker_stats.extend(tuple(row) for row in state.get('seeker_stats', ()))
+            files.update(state['files'])
+            report_dbs = state['report_dbs']
+            tables.update(state['tables'])
+        self._roll_back(files, report_dbs, tables)
+        self._marks = self._snapshot()
+        logfunc(f'Resuming the run of {self.output_folder}: {len(self.completed)} artifacts completed '
+                f'before it was interrupted')
+
+    def remaining(self, plugins):
+        '''Returns the list of plugins not completed before the run was resumed'''
+        return [plugin for plugin in plugins if plugin.name not in self.completed]
+
+    def record(self, plugin, success, lava_only=False, seeker_stats=()):
+        '''Stores the checkpoint of plugin and its seeker_stats rows, on the main thread once its output was written'''
+        previous = self._marks
+        marks = self._snapshot()
+        lava_data = lavafuncs.lava_data
+        state = {
+            'artifacts': {category: artifacts[previous['artifacts'].get(category, 0):]
+                          for category, artifacts in lava_data['artifacts'].items()
+                          if len(artifacts) > previous['artifacts'].get(category, 0)},
+            'meta_modules': [dict(module, artifacts=module['artifacts'][previous['meta_modules'].get(
+                                 module['module_name'], 0):])
+                             for module in lava_data['meta']['modules']
+                             if len(module['artifacts']) > previous['meta_modules'].get(module['module_name'], -1)],
+            'modules': lava_data['modules'][previous['modules']:],
+            'icons': {category: {name: icon for name, icon in category_icons.items()
+                                 if previous['icons'].get(category, {}).get(name) != icon}
+                      for category, category_icons in marks['icons'].items()
+                      if category_icons != previous['icons'].get(category)},
+            'tables': sorted(marks['tables'] - previous['tables']),
+            'files': {path: size for path, size in marks['files'].items() if previous['files'].get(path) != size},
+            'report_dbs': marks['report_dbs'],
+            'lava_only': lava_only,
+            'ios_version': iOS.get_version(),
+            'installed_os_version': Context.get_installed_os_version(),
+            'seeker_stats': [list(row) for row in seeker_stats],
+        }
+        # Only stored when they changed, they are restored as a whole
+        if marks['identifiers'] != previous['identifiers']:
+            state['identifiers'] = identifiers
+        if marks['lava_only_artifacts'] != previous['lava_only_artifacts']:
+            state['lava_only_artifacts'] = lava_only_artifacts
+        lava_insert_sqlite_checkpoint(plugin.module_name, plugin.name, success, state)
+        self._marks = marks
+
+    @staticmethod
+    def complete():
+        '''Marks the run as completed once its report was generated, the checkpoints are not used anymore'''
+        lava_insert_sqlite_run_info({'complete': True})
+
+    def _snapshot(self):
+        '''Returns the marks of the report state, what is added after them goes into the next checkpoint'''
+        lava_data = lavafuncs.lava_data
+        return {
+            'artifacts': {category: len(artifacts) for category, artifacts in lava_data['artifacts'].items()},
+            'meta_modules': {module['module_name']: len(module['artifacts'])
+                             for module in lava_data['meta']['modules']},
+            'modules': len(lava_data['modules']),
+            'icons': {category: dict(category_icons) for category, category_icons in icons.items()},
+            'identifiers': json.dumps(identifiers, default=str),
+            'lava_only_artifacts': json.dumps(lava_only_artifacts, default=str),
+            'tables': lava_get_table_names(),
+            'files': self._report_files(),
+            'report_dbs': {path: _max_rowid(os.path.join(self.output_folder, path)) for path in REPORT_DBS
+                           if os.path.isfile(os.path.join(self.output_folder, path))},
+        }
+
+    def _report_files(self):
+        '''Returns the size of the report files, by path relative to the report folder'''
+        files = {}
+        for root, folders, names in os.walk(self.output_folder):
+            relative_root = os.path.relpath(root, self.output_folder)
+            if relative_root == os.curdir:
+                relative_root = ''
+            folders[:] = [name for name in folders if os.path.join(relative_root, name) not in UNTRACKED_FOLDERS]
+            for name in names:
+                path = os.path.join(relative_root, name)
+                if path in UNTRACKED_FILES or path in REPORT_DBS or name.endswith(SQLITE_SIDECARS):
+                    continue
+                try:
+                    files[path] = os.path.getsize(os.path.join(root, name))
+                except OSError:
+                    continue
+        return files
+
+    @staticmethod
+    def restore(state):
+        '''Adds the state of a checkpoint to the LAVA data and the report globals'''
+        lava_data = lavafuncs.lava_data
+        for category, artifacts in state['artifacts'].items():
+            lava_data['artifacts'].setdefault(category, []).extend(artifacts)
+        for module in state['meta_modules']:
+            module_info = next((module_info for module_info in lava_data['meta']['modules']
+                                if module_info['module_name'] == module['module_name']), None)
+            if module_info is None:
+                lava_data['meta']['modules'].append(module)
+            else:
+                module_info['artifacts'].extend(module['artifacts'])
+        lava_data['modules'].extend(state['modules'])
+        for category, category_icons in state['icons'].items():
+            icons.setdefault(category, {}).update(category_icons)
+        if 'identifiers' in state:
+            identifiers.clear()
+            identifiers.update(state['identifiers'])
+        if 'lava_only_artifacts' in state:
+            lava_only_artifacts.clear()
+            lava_only_artifacts.update(state['lava_only_artifacts'])
+        if state['ios_version']:
+            iOS.set_version(state['ios_version'])
+        if state['installed_os_version']:
+            Context.set_installed_os_version(state['installed_os_version'])
+
+    def _roll_back(self, files, report_dbs, tables):
+        '''Removes the output written after the last checkpoint, leaving files at their checkpoint size'''
+        for path, size in self._report_files().items():
+            full_path = os.path.join(self.output_folder, path)
+            if path not in files:
+                _remove(full_path)
+                self._remove_empty_folders(os.path.dirname(full_path))
+            elif size > files[path]:
+                with open(full_path, 'r+b') as report_file:
+                    report_file.truncate(files[path])
+        for path in REPORT_DBS:
+            full_path = os.path.join(self.output_folder, path)
+            if path not in report_dbs:
+                if os.path.isfile(full_path):
+                    _remove(full_path)
+                    self._remove_empty_folders(os.path.dirname(full_path))
+                continue
+            db = sqlite3.connect(full_path)
+            try:
+                with db:
+                    db.execute('DELETE FROM data WHERE rowid > ?', (report_dbs[path],))
+            finally:
+                db.close()
+        lava_drop_tables(lava_get_table_names() - tables)
+
+    def _remove_empty_folders(self, folder):
+        '''Removes folder and its parents up to the report folder, while they are empty'''
+        while os.path.normpath(folder) != os.path.normpath(self.output_folder):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                return
+            folder = os.path.dirname(folder)
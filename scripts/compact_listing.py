@@ -0,0 +1,115 @@
+"""
+Compact storage of file listings.
+
+A full file system extraction lists millions of paths, and keeping each of
+them as a Python string costs the whole path again for every entry, plus the
+string object header. Most of it is the directory part, shared by all the
+entries of a directory, so the listing is stored as a table of interned
+directories and, for each entry, the id of its directory and the offset of its
+name in a single buffer of UTF-8 bytes. Full paths are only built when an
+entry is accessed.
+
+Classes:
+    CompactListing: Sequence of paths stored as (directory id, name) entries.
+"""
+
+import os
+import sys
+
+from array import array
+from collections.abc import Sequence
+
+SEPARATORS = tuple(dict.fromkeys(('/', os.sep)))
+
+
+def _split(path):
+    '''Returns (directory, name) of path, the directory keeping its trailing separator'''
+    position = max(path.rfind(separator) for separator in SEPARATORS) + 1
+    return path[:position], path[position:]
+
+
+class CompactListing(Sequence):
+    """
+    List of paths holding each directory once, the names of the entries being
+    packed in a single bytes buffer. Paths are rebuilt on access, identical to
+    the paths appended, and the listing can be indexed and iterated like the
+    list of paths it replaces.
+    Attributes:
+        directories (list): The distinct directories, with their trailing separator.
+        dir_ids (array): Index in directories of the directory of each entry.
+        name_ends (array): End offset in names of the name of each entry, a name
+            starting where the previous one ends.
+        names (bytearray): The names of the entries, UTF-8 encoded.
+    Methods:
+        append(path): Adds path at the end of the listing.
+        extend(paths): Adds all paths at the end of the listing.
+        normcased(): Returns the listing of the normcase'd paths.
+        nbytes(): Returns the approximate memory used by the listing.
+    """
+
+    def __init__(self, paths=()):
+        self.directories = []
+        self.dir_ids = array('I')
+        self.name_ends = array('Q')
+        self.names = bytearray()
+        self._directory_ids = {}
+        self.extend(paths)
+
+    def __len__(self):
+        return len(self.dir_ids)
+
+    def _name(self, position):
+        start = self.name_ends[position - 1] if position else 0
+        # surrogateescape keeps the undecodable bytes of the paths returned by os.scandir
+        return self.names[start:self.name_ends[position]].decode('utf-8', 'surrogateescape')
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[index] for index in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        return self.directories[self.dir_ids[position]] + self._name(position)
+
+    def __iter__(self):
+        directories, names = self.directories, self.names
+        start = 0
+        for dir_id, end in zip(self.dir_ids, self.name_ends):
+            yield directories[dir_id] + names[start:end].decode('utf-8', 'surrogateescape')
+            start = end
+
+    def append(self, path):
+        '''Adds path at the end of the listing'''
+        directory, name = _split(path)
+        dir_id = self._directory_ids.get(directory)
+        if dir_id is None:
+            dir_id = self._directory_ids[directory] = len(self.directories)
+            self.directories.append(directory)
+        self.dir_ids.append(dir_id)
+        self.names += name.encode('utf-8', 'surrogateescape')
+        self.name_ends.append(len(self.names))
+
+    def extend(self, paths):
+        '''Adds all paths at the end of the listing'''
+        for path in paths:
+            self.append(path)
+
+    def normcased(self):
+        '''
+        Returns the listing of the normcase'd paths, which is the listing itself when
+        normcase does not change paths (POSIX).
+        '''
+        if os.path.normcase('A/') == 'A/':
+            return self
+        listing = CompactListing()
+        listing.directories = [os.path.normcase(directory) for directory in self.directories]
+        listing.dir_ids = self.dir_ids
+        for position in range(len(self)):
+            listing.names += os.path.normcase(self._name(position)).encode('utf-8', 'surrogateescape')
+            listing.name_ends.append(len(listing.names))
+        return listing
+
+    def nbytes(self):
+        '''Returns the approximate memory used by the listing, in bytes'''
+        return (sum(sys.getsizeof(directory) for directory in self.directories)
+                + sum(sys.getsizeof(value) for value in (self.directories, self._directory_ids, self.dir_ids,
+                                                         self.name_ends, self.names)))
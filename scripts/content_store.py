@@ -0,0 +1,198 @@
+"""
+Content-addressed storage of the files extracted to the data folder.
+
+The seekers write a separate copy of every matched file to the data folder,
+and check_in_media copies the media files again to the media folder. Full file
+system extractions and backups hold many identical files (app caches,
+attachments, the same file in several domains), which are then written and
+stored several times. With a ContentStore, the files are hashed while they are
+extracted and stored once under their SHA-256 digest in CONTENT_STORE_FOLDER of
+the data folder. Each path of the data folder is a hard link to the stored
+object (a copy where the file system does not allow hard links: a symbolic link
+would make SQLite look for the -wal and -journal files of a database next to
+the object instead of next to its path). Files up to CONTENT_STORE_SPOOL_SIZE
+are hashed in memory, so the content of a duplicate is never written to disk.
+
+Hard links share the inode of the stored object, so the duplicates of a file
+also share their file system timestamps. The dates of the original files are
+kept in the FileInfo of each path.
+
+Classes:
+    ContentStore: Files of the data folder stored once per content.
+    StoredFile: Writable file hashed as it is written, then stored in a ContentStore.
+
+Functions:
+    open_output: Opens a file of the data folder for writing, through a ContentStore and a HashingWriter if needed.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+
+from shutil import copyfile
+
+from scripts.file_hashing import HashingWriter
+
+CONTENT_STORE_FOLDER = '.content_store'
+CONTENT_STORE_DIGEST = 'sha256'
+CONTENT_STORE_SPOOL_SIZE = 1024 * 1024
+
+
+def open_output(path, content_store=None, algorithms=()):
+    '''
+    Opens the file at path for writing, through content_store if there is one.
+    If hash algorithms are given, the output is a HashingWriter computing their digests.
+    '''
+    if content_store is not None:
+        output = content_store.open(path)
+    else:
+        output = open(path, 'wb')  # pylint: disable=consider-using-with
+    return HashingWriter(output, algorithms) if algorithms else output
+
+
+class StoredFile:
+    """
+    A file of a ContentStore being written: its content is hashed as it is written,
+    kept in memory up to CONTENT_STORE_SPOOL_SIZE and then in a temporary file of the store.
+    On close(), it is stored under its digest and linked at its path.
+    Attributes:
+        path (str): The path of the file in the data folder.
+        size (int): Number of bytes written.
+        digest (str): The hex digest of the content, once closed.
+    """
+
+    def __init__(self, store, path):
+        self.store = store
+        self.path = path
+        self.size = 0
+        self.digest = None
+        self._hash = hashlib.new(CONTENT_STORE_DIGEST)
+        self._buffer = bytearray()
+        self._file = None
+        self._temp_path = None
+
+    def write(self, data):
+        '''Writes data, returns its length'''
+        self._hash.update(data)
+        self.size += len(data)
+        if self._file is None:
+            self._buffer += data
+            if len(self._buffer) > CONTENT_STORE_SPOOL_SIZE:
+                self._file, self._temp_path = self.store.temporary_file()
+                self._file.write(self._buffer)
+                self._buffer = bytearray()
+        else:
+            self._file.write(data)
+        return len(data)
+
+    def close(self):
+        '''Stores the content under its digest and links it at path'''
+        if self.digest is not None:
+            return
+        if self._file is not None:
+            self._file.close()
+        self.digest = self._hash.hexdigest()
+        self.store.add(self.path, self.digest, self.size, self._buffer, self._temp_path)
+        self._buffer = None
+
+    def discard(self):
+        '''Drops what was written, nothing is stored'''
+        if self._file is not None:
+            self._file.close()
+            os.remove(self._temp_path)
+        self._buffer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+class ContentStore:
+    """
+    Files of the data folder stored once per content, under their digest.
+    Files are added through open(), from any thread.
+    Attributes:
+        root (str): The folder of the stored objects.
+        digests (dict): The digest of the content of each path written through the store.
+        files (int): Number of files written through the store.
+        stored_bytes (int): Size of the objects stored, each content counted once.
+        duplicate_bytes (int): Size of the files whose content was already stored.
+    Methods:
+        open(path): Returns a StoredFile writing the file at path.
+        object_path(digest): Returns the path of the object stored for digest.
+        link(digest, path): Makes the object stored for digest available at path.
+        get_digest(path): Returns the digest of the file at path if it was written through the store.
+    """
+
+    def __init__(self, data_folder):
+        self.root = os.path.join(data_folder, CONTENT_STORE_FOLDER)
+        self.digests = {}
+        self.files = 0
+        self.stored_bytes = 0
+        self.duplicate_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.root, 'tmp'), exist_ok=True)
+
+    def open(self, path):
+        '''Returns a StoredFile writing the file at path'''
+        return StoredFile(self, path)
+
+    def temporary_file(self):
+        '''Returns a new temporary file of the store, opened for writing, and its path'''
+        descriptor, temp_path = tempfile.mkstemp(dir=os.path.join(self.root, 'tmp'))
+        return os.fdopen(descriptor, 'wb'), temp_path
+
+    def object_path(self, digest):
+        '''Returns the path of the object stored for digest'''
+        return os.path.join(self.root, digest[:2], digest)
+
+    def get_digest(self, path):
+        '''Returns the digest of the file at path if it was written through the store, else None'''
+        return self.digests.get(str(path))
+
+    def add(self, path, digest, size, data=None, temp_path=None):
+        '''
+        Stores the content with digest, held in data or in the temporary file temp_path,
+        unless it is already stored, and links it at path.
+        '''
+        object_path = self.object_path(digest)
+        is_new = not os.path.exists(object_path)
+        if is_new:
+            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+            if temp_path is None:
+                output, temp_path = self.temporary_file()
+                with output:
+                    output.write(data)
+            # Another thread may store the same content meanwhile, both objects are identical
+            os.replace(temp_path, object_path)
+        elif temp_path is not None:
+            os.remove(temp_path)
+        if os.path.lexists(path):
+            # Never write through a previous link to a stored object
+            os.remove(path)
+        if size:
+            self.link(digest, path)
+        else:
+            # Empty files take no space, they are not linked (hard links per inode are limited)
+            open(path, 'wb').close()  # pylint: disable=consider-using-with
+        with self._lock:
+            self.digests[str(path)] = digest
+            self.files += 1
+            if is_new:
+                self.stored_bytes += size
+            else:
+                self.duplicate_bytes += size
+
+    def link(self, digest, path):
+        '''Makes the object stored for digest available at path, as a hard link or else a copy'''
+        object_path = self.object_path(digest)
+        try:
+            os.link(object_path, path)
+        except OSError:
+            copyfile(object_path, path)
@@ -2,28 +2,57 @@
 
 import json
 import re
+import threading
 from os.path import basename
 from pathlib import Path
 
+# State of the artifact being processed, kept per thread so that artifacts can run on worker threads
+ARTIFACT_STATE = ('_report_folder', '_seeker', '_artifact_info', '_module_name', '_module_file_path',
+                  '_artifact_name', '_files_found', '_filename_lookup_map')
 
-class Context:
+
+class _ArtifactState(threading.local):
+    """The state of the artifact being processed by the current thread"""
+
+    def __init__(self):
+        super().__init__()
+        for name in ARTIFACT_STATE:
+            setattr(self, name, None)
+        self._files_found = []
+        self._filename_lookup_map = {}
+
+
+def _artifact_state_property(name):
+    """Returns the class property storing name in the artifact state of the current thread"""
+    def getter(cls):
+        return getattr(cls.artifact_state, name)
+
+    def setter(cls, value):
+        setattr(cls.artifact_state, name, value)
+    return property(getter, setter)
+
+
+class _ContextMeta(type):
+    """Makes the ARTIFACT_STATE class attributes of Context per thread"""
+
+
+for _name in ARTIFACT_STATE:
+    setattr(_ContextMeta, _name, _artifact_state_property(_name))
+
+
+class Context(metaclass=_ContextMeta):
     """
     Context class provides a static context for managing and accessing global
     state and configuration used during artifact processing in the LEAPPs
     framework. It stores information such as report folder, artifact details,
     files found, device IDs, and OS build mappings, and provides utility
     methods for retrieving and manipulating this data.
+    The artifact details (ARTIFACT_STATE) are kept per thread, the output
+    parameters, metadata and installed OS version are shared by all threads.
     """
 
+    artifact_state = _ArtifactState()
     _output_params = None
-    _report_folder = None
-    _seeker = None
-    _artifact_info = None
-    _module_name = None
-    _module_file_path = None
-    _artifact_name = None
-    _files_found = []
-    _filename_lookup_map = {}
     _data_folder = None
     _metadata = {}
     _installed_os_version = ""
@@ -419,7 +448,8 @@ class Context:
     def get_relative_path(full_path):
         """
         Converts a full on-disk path (from files_found) to a relative
-        extraction path by removing the global data_folder prefix.
+        extraction path by removing the global data_folder prefix, or the
+        extraction directory prefix for files read in place.
 
         Args:
             full_path (str): The full path to the file.
@@ -428,13 +458,17 @@ class Context:
             str: The relative extraction path, or the original path if
                  the data_folder is not available.
         """
-        if not full_path or not Context._data_folder:
+        if not full_path:
             return full_path
 
-        if full_path.startswith(Context._data_folder):
+        if Context._data_folder and full_path.startswith(Context._data_folder):
             # Strip the base path and any leading separators
             return full_path[len(Context._data_folder):].lstrip('/\\')
 
+        # Files of a file system extraction read in place are not under the data_folder
+        if getattr(Context._seeker, 'in_place', False) and full_path.startswith(Context._seeker.directory):
+            return full_path[len(Context._seeker.directory):].lstrip('/\\')
+
         return full_path
 
     @staticmethod
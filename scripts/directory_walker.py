@@ -0,0 +1,251 @@
+"""
+Parallel listing of directory extractions.
+
+Listing a full file system extraction is dominated by per-directory syscall
+latency (network shares, large NVMe extractions), and os.scandir releases the
+GIL while it waits, so directories are scanned by a pool of threads. Each
+worker keeps its own deque of pending directories and steals from the other
+workers when it runs out. The scan results are then assembled into the same
+depth-first order as the recursive os.scandir listing used by FileSeekerDir.
+
+The stat data of each entry is captured during the walk, so that copying a
+matched file and building its FileInfo does not need another stat call, and
+the paths are stored in a CompactListing. The stat data of a listing reused
+from the listing cache is refreshed entry by entry with ListingStats.refresh,
+when the entry is matched.
+
+When only a few artifacts are selected, an entry filter keeps only the entries
+their search patterns can match: the other entries are neither stat'ed nor
+stored, the directories are still walked.
+
+Classes:
+    ListingStats: Compact per-entry stat data aligned with a listing.
+    DirectoryWalker: Work-stealing thread pool producing the ordered listing.
+
+Constants:
+    ENTRY_OTHER, ENTRY_FILE, ENTRY_DIRECTORY: Kinds of entries in ListingStats.
+"""
+
+import os
+import stat
+import threading
+
+from array import array
+from collections import deque
+
+from scripts.compact_listing import CompactListing
+from scripts.ilapfuncs import logfunc
+
+ENTRY_OTHER = 0
+ENTRY_FILE = 1
+ENTRY_DIRECTORY = 2
+
+DEFAULT_PROGRESS_INTERVAL = 10000
+
+
+def default_walk_workers():
+    '''Returns the default number of walker threads, the same as ThreadPoolExecutor'''
+    return min(32, (os.cpu_count() or 1) + 4)
+
+
+def _entry_kind(mode):
+    '''Returns the kind of an entry of the listing from its st_mode'''
+    if stat.S_ISREG(mode):
+        return ENTRY_FILE
+    if stat.S_ISDIR(mode):
+        return ENTRY_DIRECTORY
+    return ENTRY_OTHER
+
+
+def _scan_directory(directory, entry_filter=None):
+    '''
+    Scans a single directory.
+    Returns:
+        tuple: (entries, subdirectories, error) where entries is a list of
+            (path, kind, size, atime, mtime, ctime) tuples in scandir order,
+            limited to the paths accepted by entry_filter if it is given
+            (a directory it rejects is kept with the kind None, to place its
+            own entries in the listing), subdirectories the paths to walk next and error the OSError
+            message if the directory could not be read completely.
+    '''
+    entries = []
+    subdirectories = []
+    error = None
+    try:
+        with os.scandir(directory) as files_list:
+            for item in files_list:
+                if entry_filter is not None and not entry_filter(item.path):
+                    if item.is_dir(follow_symlinks=False):
+                        entries.append((item.path, None, 0, 0.0, 0.0, 0.0))
+                        subdirectories.append(item.path)
+                    continue
+                try:
+                    # Follow symlinks like os.path.isfile() and Path.stat() did before
+                    item_stat = item.stat()
+                    entries.append((item.path, _entry_kind(item_stat.st_mode), item_stat.st_size, item_stat.st_atime,
+                                    item_stat.st_mtime, item_stat.st_ctime))
+                except OSError:
+                    entries.append((item.path, ENTRY_OTHER, 0, 0.0, 0.0, 0.0))
+                if item.is_dir(follow_symlinks=False):
+                    subdirectories.append(item.path)
+    except OSError as ex:
+        error = f'Error reading {directory} ' + str(ex)
+    return entries, subdirectories, error
+
+
+class ListingStats:
+    """
+    Stat data captured for each entry of a listing, kept in compact arrays
+    aligned with the listing positions instead of one object per entry.
+    Attributes:
+        kinds (bytearray): ENTRY_FILE, ENTRY_DIRECTORY or ENTRY_OTHER (broken symlinks, devices...).
+        sizes (array): File sizes in bytes.
+        atimes, mtimes, ctimes (array): Access, modification and change/creation times.
+    """
+
+    def __init__(self):
+        self.kinds = bytearray()
+        self.sizes = array('q')
+        self.atimes = array('d')
+        self.mtimes = array('d')
+        self.ctimes = array('d')
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def append(self, kind, size, atime, mtime, ctime):
+        '''Adds the stat data of the next listing entry'''
+        self.kinds.append(kind)
+        self.sizes.append(size)
+        self.atimes.append(atime)
+        self.mtimes.append(mtime)
+        self.ctimes.append(ctime)
+
+    def get(self, position):
+        '''Returns (kind, size, atime, mtime, ctime) of the entry at position'''
+        return (self.kinds[position], self.sizes[position], self.atimes[position],
+                self.mtimes[position], self.ctimes[position])
+
+    def refresh(self, position, path):
+        '''Replaces the stat data of the entry at position by a new stat of path, and returns it like get()'''
+        try:
+            # Follow symlinks like the walk
+            path_stat = os.stat(path)
+            entry = (_entry_kind(path_stat.st_mode), path_stat.st_size, path_stat.st_atime,
+                     path_stat.st_mtime, path_stat.st_ctime)
+        except OSError:
+            entry = (ENTRY_OTHER, 0, 0.0, 0.0, 0.0)
+        (self.kinds[position], self.sizes[position], self.atimes[position],
+         self.mtimes[position], self.ctimes[position]) = entry
+        return entry
+
+
+class DirectoryWalker:
+    """
+    Lists a directory tree with a pool of work-stealing threads.
+    Attributes:
+        workers (int): Number of threads scanning directories.
+        progress_interval (int): A progress line is logged every progress_interval directories.
+        entry_filter (callable): Optional predicate on the path of an entry, the entries it
+            rejects are left out of the listing (their subdirectories are still walked).
+    Methods:
+        walk(directory): Returns the depth-first ordered CompactListing of the paths
+            below directory and their ListingStats.
+    """
+
+    def __init__(self, workers=None, progress_interval=DEFAULT_PROGRESS_INTERVAL, entry_filter=None):
+        self.workers = max(1, workers or default_walk_workers())
+        self.progress_interval = progress_interval
+        self.entry_filter = entry_filter
+        self._condition = threading.Condition()
+        self._queues = []
+        self._results = {}
+        self._errors = []
+        self._pending = 0
+        self._directories_scanned = 0
+        self._entries_found = 0
+
+    def _next_directory(self, worker_id):
+        '''Pops from the worker's own deque, or steals the oldest directory of another worker'''
+        own = self._queues[worker_id]
+        if own:
+            return own.pop()
+        for offset in range(1, len(self._queues)):
+            other = self._queues[(worker_id + offset) % len(self._queues)]
+            if other:
+                return other.popleft()
+        return None
+
+    def _work(self, worker_id):
+        while True:
+            with self._condition:
+                directory = self._next_directory(worker_id)
+                while directory is None:
+                    if self._pending == 0:
+                        return
+                    self._condition.wait()
+                    directory = self._next_directory(worker_id)
+            entries, subdirectories, error = _scan_directory(directory, self.entry_filter)
+            with self._condition:
+                self._results[directory] = entries
+                if error:
+                    self._errors.append(error)
+                self._queues[worker_id].extend(subdirectories)
+                self._pending += len(subdirectories) - 1
+                self._directories_scanned += 1
+                self._entries_found += len(entries)
+                self._condition.notify_all()
+
+    def _log_progress(self):
+        '''Logs progress from the calling thread until all directories are scanned'''
+        next_report = self.progress_interval
+        while True:
+            with self._condition:
+                if self._pending == 0:
+                    return
+                self._condition.wait(0.5)
+                directories_scanned = self._directories_scanned
+                entries_found = self._entries_found
+            if self.progress_interval and directories_scanned >= next_report:
+                logfunc(f'Listing in progress - {directories_scanned} directories, {entries_found} files')
+                next_report = (directories_scanned // self.progress_interval + 1) * self.progress_interval
+
+    def walk(self, directory):
+        '''
+        Returns the CompactListing of all paths below directory, in depth-first scandir order,
+        and their ListingStats
+        '''
+        self._queues = [deque() for _ in range(self.workers)]
+        self._queues[0].append(directory)
+        self._results = {}
+        self._errors = []
+        self._pending = 1
+        self._directories_scanned = 0
+        self._entries_found = 0
+
+        threads = [threading.Thread(target=self._work, args=(worker_id,), daemon=True)
+                   for worker_id in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        self._log_progress()
+        for thread in threads:
+            thread.join()
+        for error in self._errors:
+            logfunc(error)
+
+        paths = CompactListing()
+        stats = ListingStats()
+        stack = [iter(self._results.pop(directory, []))]
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            path, kind, size, atime, mtime, ctime = entry
+            if kind is not None:
+                paths.append(path)
+                stats.append(kind, size, atime, mtime, ctime)
+            children = self._results.pop(path, None)
+            if children:
+                stack.append(iter(children))
+        return paths, stats
@@ -0,0 +1,142 @@
+"""
+Digests of the source files used by the artifacts, computed while they are copied.
+
+Forensic reports have to identify the source files used by hash. Reading every
+file again after the processing doubles the I/O of the files found, so the
+seekers hash the content of the files while they copy, extract or decrypt it to
+the data folder: their output is wrapped in a HashingWriter updating all the
+selected digests. The files read without being copied (fs input read in place
+or linked into the data folder) are read once to be hashed.
+
+With a persistent listing cache (fs, tar and gz inputs), the digests are saved
+with the cached listing, keyed by source path, size and modification time, and
+reused by the next runs on the same input instead of hashing the files again.
+
+Classes:
+    HashingWriter: Output file wrapper updating digests of the data written.
+    FileHasher: Selected digest algorithms, and digests known from previous runs.
+
+Functions:
+    hash_file: Returns the digests of the content of a file.
+"""
+
+import hashlib
+import threading
+
+HASH_ALGORITHMS = ('md5', 'sha1', 'sha256')
+HASH_READ_SIZE = 1024 * 1024
+
+
+def _new_hash(algorithm):
+    '''Returns a new hash object, MD5 and SHA-1 are used for identification, not security'''
+    return hashlib.new(algorithm, usedforsecurity=False)
+
+
+def hash_file(path, algorithms):
+    '''Returns the {algorithm: hex digest} of the content of the file at path'''
+    hashes = [_new_hash(algorithm) for algorithm in algorithms]
+    buffer = bytearray(HASH_READ_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb') as file:
+        while True:
+            count = file.readinto(buffer)
+            if not count:
+                break
+            for file_hash in hashes:
+                file_hash.update(view[:count])
+    return {algorithm: file_hash.hexdigest() for algorithm, file_hash in zip(algorithms, hashes)}
+
+
+class HashingWriter:
+    """
+    Output file wrapper updating digests of the data written to it.
+    Closing it (or leaving its context) closes the wrapped output.
+    Attributes:
+        output (file object): The wrapped output.
+        algorithms (tuple): Names of the hashlib algorithms.
+    """
+
+    def __init__(self, output, algorithms):
+        self.output = output
+        self.algorithms = tuple(algorithms)
+        self._hashes = [_new_hash(algorithm) for algorithm in self.algorithms]
+
+    def write(self, data):
+        '''Writes data to the output, returns the number of bytes written'''
+        for file_hash in self._hashes:
+            file_hash.update(data)
+        return self.output.write(data)
+
+    def hexdigests(self):
+        '''Returns the {algorithm: hex digest} of the data written'''
+        return {algorithm: file_hash.hexdigest() for algorithm, file_hash in zip(self.algorithms, self._hashes)}
+
+    def close(self):
+        '''Closes the wrapped output'''
+        self.output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.output.__exit__(exc_type, exc_value, traceback)
+
+
+class FileHasher:
+    """
+    Digest algorithms selected for the source files, and digests known from previous runs.
+    The digests of a file are identified by a (source path, size, modification time) key.
+    Attributes:
+        algorithms (tuple): Names of the hashlib algorithms, from HASH_ALGORITHMS.
+        listing_cache (ListingCache): Optional listing cache the digests are loaded from and saved to.
+        hashed (int): Number of files hashed during this run.
+        reused (int): Number of files whose digests were known from a previous run.
+    Methods:
+        lookup(key): Returns the digests of a file known from a previous run or hashed during this run, or None.
+        record(key, digests): Records the digests of a file hashed during this run.
+        save(): Saves the digests computed during this run with the listing cache.
+    """
+
+    def __init__(self, algorithms, listing_cache=None):
+        self.algorithms = tuple(dict.fromkeys(algorithms))
+        self.listing_cache = listing_cache
+        self.hashed = 0
+        self.reused = 0
+        self._known = None
+        self._new = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, key):
+        '''Returns the {algorithm: hex digest} known for the file with key, or None'''
+        if key is None:
+            return None
+        with self._lock:
+            hashed = self._new.get(key[0])
+        if hashed is not None and hashed[:2] == key[1:]:
+            return dict(hashed[2])
+        if self.listing_cache is None:
+            return None
+        if self._known is None:
+            # Loaded on first use, once the seeker has loaded or stored the listing
+            self._known = self.listing_cache.load_hashes()
+        source_path, size, mtime = key
+        known = self._known.get(source_path)
+        if known is None or known[:2] != (size, mtime) or not all(algorithm in known[2]
+                                                                   for algorithm in self.algorithms):
+            return None
+        with self._lock:
+            self.reused += 1
+        return {algorithm: known[2][algorithm] for algorithm in self.algorithms}
+
+    def record(self, key, digests):
+        '''Records the digests of a file hashed during this run'''
+        with self._lock:
+            self.hashed += 1
+            if key is not None:
+                self._new[key[0]] = key[1:] + (digests,)
+
+    def save(self):
+        '''Saves the digests computed during this run with the listing cache'''
+        if self.listing_cache and self._new:
+            self.listing_cache.store_hashes(
+                (source_path, size, mtime, digests) for source_path, (size, mtime, digests) in self._new.items())
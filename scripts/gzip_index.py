@@ -0,0 +1,166 @@
+"""
+Random access to the decompressed content of tar.gz inputs.
+
+A gzip stream can only be decompressed forward, so reading a member of a
+tar.gz that lies before the current position (or far after it) means
+decompressing again from the start of the archive. This module keeps
+checkpoints of the decompressor state every GZIP_CHECKPOINT_SPACING bytes of
+decompressed data, built during the first sequential pass (the listing of the
+archive), so that any later read only decompresses from the closest
+checkpoint before the requested offset.
+
+If the indexed_gzip package is available it is used instead of the pure Python
+reader: its checkpoints are stored with their 32 KiB window and can be exported
+to a file, which lets a later run on the same archive start with the full index.
+
+Classes:
+    GzipCheckpointReader: Seekable raw reader keeping zlib decompressor checkpoints in memory.
+
+Functions:
+    open_gzip_index: Returns a seekable file object for a gzip file.
+    can_persist_index: Returns True if the checkpoints of a reader can be exported to a file.
+"""
+
+import io
+import zlib
+
+from bisect import bisect_right
+
+try:
+    import indexed_gzip
+except ImportError:
+    indexed_gzip = None
+
+GZIP_CHECKPOINT_SPACING = 32 * 1024 * 1024
+GZIP_READ_SIZE = 64 * 1024
+GZIP_MAX_OUTPUT = 1024 * 1024
+GZIP_BUFFER_SIZE = 1024 * 1024
+GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+class GzipCheckpointReader(io.RawIOBase):
+    """
+    Seekable reader of the decompressed content of a (possibly multi-member) gzip file.
+    A copy of the zlib decompressor is kept every spacing bytes of output, seeking restores
+    the closest checkpoint before the target and decompresses forward from there.
+    Attributes:
+        name (str): Path of the gzip file.
+        spacing (int): Minimum number of decompressed bytes between two checkpoints.
+        checkpoints (list): (decompressed offset, compressed offset, decompressor or None) tuples.
+            None is used at the start of a gzip member, where a new decompressor is created.
+    """
+
+    def __init__(self, path, spacing=GZIP_CHECKPOINT_SPACING):
+        super().__init__()
+        self.name = path
+        self.spacing = spacing
+        self.checkpoints = [(0, 0, None)]
+        self._file = open(path, 'rb')  # pylint: disable=consider-using-with
+        self._restore(self.checkpoints[0])
+
+    def _restore(self, checkpoint):
+        '''Resets the decompression to the state saved in checkpoint'''
+        output_offset, compressed_offset, decompressor = checkpoint
+        self._decompressor = decompressor.copy() if decompressor else zlib.decompressobj(GZIP_WBITS)
+        self._member_start = decompressor is None
+        self._file.seek(compressed_offset)
+        self._compressed_offset = compressed_offset
+        self._output = b''
+        self._output_pos = 0
+        self._output_offset = output_offset
+        self._eof = False
+
+    def _add_checkpoint(self):
+        '''Saves the decompressor state if the output went spacing bytes past the last checkpoint'''
+        output_end = self._output_offset + len(self._output)
+        if output_end - self.checkpoints[-1][0] < self.spacing or self._decompressor.unconsumed_tail:
+            return
+        decompressor = None if self._member_start else self._decompressor.copy()
+        self.checkpoints.append((output_end, self._compressed_offset, decompressor))
+
+    def _decompress_next(self):
+        '''Replaces the output buffer with the next decompressed chunk, returns False at the end of the file'''
+        data = self._decompressor.unconsumed_tail
+        while not data:
+            chunk = self._file.read(GZIP_READ_SIZE)
+            self._compressed_offset += len(chunk)
+            # Like the gzip module, accept zero padding after the last member
+            data = chunk.lstrip(b'\0') if self._member_start else chunk
+            if not chunk:
+                if not self._member_start:
+                    raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+                self._eof = True
+                return False
+        self._output_offset += len(self._output)
+        self._output = self._decompressor.decompress(data, GZIP_MAX_OUTPUT)
+        self._output_pos = 0
+        self._member_start = False
+        if self._decompressor.eof:
+            unused = len(self._decompressor.unused_data)
+            if unused:
+                self._compressed_offset -= unused
+                self._file.seek(self._compressed_offset)
+            self._decompressor = zlib.decompressobj(GZIP_WBITS)
+            self._member_start = True
+        self._add_checkpoint()
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._output_pos >= len(self._output):
+            if self._eof or not self._decompress_next():
+                return 0
+        count = min(len(buffer), len(self._output) - self._output_pos)
+        buffer[:count] = self._output[self._output_pos:self._output_pos + count]
+        self._output_pos += count
+        return count
+
+    def tell(self):
+        return self._output_offset + self._output_pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            while not self._eof and self._decompress_next():
+                pass
+            offset += self._output_offset + len(self._output)
+        if offset < 0:
+            raise ValueError(f'negative seek position {offset}')
+        if not self._output_offset <= offset <= self._output_offset + len(self._output):
+            checkpoint = self.checkpoints[bisect_right(self.checkpoints, offset, key=lambda item: item[0]) - 1]
+            if offset < self._output_offset or checkpoint[0] > self._output_offset + len(self._output):
+                self._restore(checkpoint)
+            while offset > self._output_offset + len(self._output):
+                if self._eof or not self._decompress_next():
+                    break
+        self._output_pos = min(offset - self._output_offset, len(self._output))
+        return self.tell()
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+            self.checkpoints = []
+        super().close()
+
+
+def open_gzip_index(path, spacing=GZIP_CHECKPOINT_SPACING):
+    '''
+    Returns a seekable binary file object reading the decompressed content of the gzip file at path.
+    Checkpoints are added while the file is read forward, later seeks decompress from the closest one.
+    '''
+    if indexed_gzip is not None:
+        return indexed_gzip.IndexedGzipFile(
+            path, spacing=spacing, drop_handles=False, buffer_size=GZIP_BUFFER_SIZE)
+    return io.BufferedReader(GzipCheckpointReader(path, spacing), GZIP_BUFFER_SIZE)
+
+
+def can_persist_index(reader):
+    '''Returns True if the checkpoints of reader can be exported to a file and imported by a later run'''
+    return hasattr(reader, 'export_index')
+
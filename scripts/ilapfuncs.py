@@ -20,6 +20,7 @@ from pathlib import Path
 from urllib.parse import quote
 import scripts.artifact_report as artifact_report
 from scripts.context import Context
+from scripts.output_capture import current_capture
 from scripts.version_info import leapp_name
 
 # new location for modules imported for backward compatibility
@@ -43,7 +44,7 @@ _console_write = sys.stdout.write
 # common third party imports
 import pytz
 import simplekml
-from scripts.filetype import guess_mime, guess_extension
+from scripts.filetype import get_signature_bytes, guess_mime, guess_extension
 from functools import wraps
 
 # LEAPP version unique imports
@@ -85,8 +86,9 @@ class OutputParameters:
     nl = '\n'
     screen_output_file_path = ''
 
-    def __init__(self, output_folder, custom_folder_name=None):
-        self.output_folder_base = get_output_folder_base(output_folder, custom_folder_name)
+    def __init__(self, output_folder, custom_folder_name=None, existing=False):
+        # existing: output_folder is the report folder of an interrupted run being resumed
+        self.output_folder_base = output_folder if existing else get_output_folder_base(output_folder, custom_folder_name)
         self.data_folder = os.path.join(self.output_folder_base, 'data')
         self.media_folder = os.path.join(self.output_folder_base, 'media')
         self.html_media_folder = os.path.join(self.output_folder_base, '_HTML', 'media')
@@ -97,8 +99,8 @@ class OutputParameters:
         OutputParameters.screen_output_file_path_lava_only = os.path.join(
             self.output_folder_base, '_HTML', '_Script_Logs', 'Lava_only_artifacts_log.html')
 
-        os.makedirs(os.path.join(self.output_folder_base, '_HTML', '_Script_Logs'))
-        os.makedirs(self.data_folder)
+        os.makedirs(os.path.join(self.output_folder_base, '_HTML', '_Script_Logs'), exist_ok=existing)
+        os.makedirs(self.data_folder, exist_ok=existing)
         os.makedirs(self.media_folder, exist_ok=True)
         os.makedirs(self.html_media_folder, exist_ok=True)
         
@@ -150,6 +152,12 @@ class MediaReferences():
 
 
 def logfunc(message=""):
+    capture = current_capture()
+    if capture is not None:
+        # Artifact running on a worker thread, the message is written in artifact order
+        capture.record(logfunc, message)
+        return
+
     def redirect_logs(string):
         _console_write(string)
         log_text.insert('end', string)  # pylint: disable=used-before-assignment
@@ -216,7 +224,7 @@ def set_media_references(media_ref_id, media_id, module_name, artifact_name, nam
     lava_insert_sqlite_media_references(media_references)
 
 def _check_in_media(media_id, source_path, is_embedded, name, media_data=None, converted_file_path=None, force_type=None,
-                    force_extension=None, force_creation_date=None, force_modification_date=None):
+                    force_extension=None, force_creation_date=None, force_modification_date=None, content_digest=None):
     '''
     Check in media.
     Args:
@@ -230,6 +238,7 @@ def _check_in_media(media_id, source_path, is_embedded, name, media_data=None, c
         force_extension: The extension of the media (optional).
         force_creation_date: The creation date of the media (optional).
         force_modification_date: The modification date of the media (optional).
+        content_digest: The digest of the file in the content store of the seeker (optional).
     Returns:
         The media reference ID or None.
     '''
@@ -296,6 +305,11 @@ def _check_in_media(media_id, source_path, is_embedded, name, media_data=None, c
         canonical_media_path = Path(output_params.media_folder).joinpath(media_id).with_suffix(suffix)
         if is_embedded:
             canonical_media_path.write_bytes(media_data)
+        elif content_digest:
+            seeker.content_store.link(content_digest, canonical_media_path)
+        elif _get_in_place_seeker(file_to_copy):
+            # Never link the original files of an extraction read in place into the report
+            shutil.copy2(file_to_copy, canonical_media_path)
         else:
             try:
                 canonical_media_path.hardlink_to(file_to_copy)
@@ -339,14 +353,23 @@ def check_in_media(file_path, name="", converted_file_path=False, force_type=Non
         logfunc(f'No matching file found for "{file_path}"')
         return None
 
-    file_info = Context.get_seeker().file_infos.get(extraction_path)
+    seeker = Context.get_seeker()
+    file_info = seeker.file_infos.get(extraction_path)
     if file_info:
         media_id = hashlib.sha1(f"{file_info.source_path}".encode()).hexdigest()
-        with open(extraction_path, "rb") as f:
-            file_data = f.read()
+        extraction_path = materialize_file(extraction_path)
+        content_store = getattr(seeker, 'content_store', None)
+        content_digest = content_store.get_digest(extraction_path) if content_store and not converted_file_path else None
+        if content_digest:
+            # The stored object is linked as the media file, only its signature is read to guess its type
+            file_data = bytes(get_signature_bytes(extraction_path))
+        else:
+            with open(extraction_path, "rb") as f:
+                file_data = f.read()
         return _check_in_media(media_id, file_path, False, name, media_data=file_data, converted_file_path=converted_file_path,
                                force_type=force_type, force_extension=force_extension,
-                               force_creation_date=force_creation_date, force_modification_date=force_modification_date)
+                               force_creation_date=force_creation_date, force_modification_date=force_modification_date,
+                               content_digest=content_digest)
     return None
 
 def check_in_embedded_media(source_file, data, name="", force_type=None, force_extension=None,
@@ -477,14 +500,17 @@ def artifact_processor(func):
         output_types = artifact_info.get('output_types', ['html', 'tsv', 'timeline', 'lava', 'kml'])
         is_lava_only = 'lava_only' in output_types
 
-        Context.clear()
-        Context.set_report_folder(report_folder)
-        Context.set_seeker(seeker)
-        Context.set_files_found(files_found)
-        Context.set_artifact_info(artifact_info)
-        Context.set_module_name(module_name)
-        Context.set_module_file_path(module_file_path)
-        Context.set_artifact_name(artifact_name)
+        def set_context():
+            Context.clear()
+            Context.set_report_folder(report_folder)
+            Context.set_seeker(seeker)
+            Context.set_files_found(files_found)
+            Context.set_artifact_info(artifact_info)
+            Context.set_module_name(module_name)
+            Context.set_module_file_path(module_file_path)
+            Context.set_artifact_name(artifact_name)
+
+        set_context()
 
         sig = inspect.signature(func)
         if len(sig.parameters) == 1:
@@ -499,58 +525,67 @@ def artifact_processor(func):
             source_path = '\n'.join(
                 Context.get_relative_path(p) for p in str(source_path).split('\n'))
 
-        if len(data_list):
-            if isinstance(data_list, tuple):
-                data_list, html_data_list = data_list
-            else:
-                html_data_list = data_list
-            logfunc(f"Found {len(data_list):,} {'records' if len(data_list)>1 else 'record'} for {artifact_name}")
-            icons.setdefault(category, {artifact_name: icon}).update({artifact_name: icon})
-
-            # Strip tuples from headers for HTML, TSV, and timeline
-            stripped_headers = strip_tuple_from_headers(data_headers)
-
-            # Check if headers contains a 'media' type
-            media_header_info = get_media_header_info(data_headers)
-            if media_header_info:
-                html_columns.extend([data_headers[idx][0] for idx in media_header_info])
-                html_data_list, txt_data_list = get_data_list_with_media(media_header_info, data_list)
-
-            if check_output_types('html', output_types):
-                report = artifact_report.ArtifactHtmlReport(artifact_name)
-                report.start_artifact_report(report_folder, artifact_name, description)
-                report.add_script()
-                report.write_artifact_data_table(stripped_headers, html_data_list, source_path, html_no_escape=html_columns)
-                report.end_artifact_report()
-
-            if check_output_types('tsv', output_types):
-                tsv(report_folder, stripped_headers, txt_data_list if media_header_info else data_list, artifact_name)
-
-            if check_output_types('timeline', output_types):
-                timeline(report_folder, artifact_name, txt_data_list if media_header_info else data_list, stripped_headers)
-
-            if check_output_types('lava', output_types):
-                table_name, object_columns, column_map = lava_process_artifact(category,
-                                                                               module_name,
-                                                                               artifact_name,
-                                                                               data_headers,
-                                                                               len(data_list),
-                                                                               func_name=func_name,
-                                                                               data_views=artifact_info.get("data_views"),
-                                                                               artifact_icon=icon,
-                                                                               source_path=source_path)
-                if is_lava_only:
-                    lava_only_info(category, artifact_name, table_name, len(data_list))
-                lava_insert_sqlite_data(table_name, data_list, object_columns, data_headers, column_map)
-
-            if check_output_types('kml', output_types):
-                kmlgen(report_folder, artifact_name, txt_data_list if media_header_info else data_list, stripped_headers)
+        def write_output(data_list, source_path):
+            if len(data_list):
+                if isinstance(data_list, tuple):
+                    data_list, html_data_list = data_list
+                else:
+                    html_data_list = data_list
+                logfunc(f"Found {len(data_list):,} {'records' if len(data_list)>1 else 'record'} for {artifact_name}")
+                icons.setdefault(category, {artifact_name: icon}).update({artifact_name: icon})
+
+                # Strip tuples from headers for HTML, TSV, and timeline
+                stripped_headers = strip_tuple_from_headers(data_headers)
+
+                # Check if headers contains a 'media' type
+                media_header_info = get_media_header_info(data_headers)
+                if media_header_info:
+                    html_columns.extend([data_headers[idx][0] for idx in media_header_info])
+                    html_data_list, txt_data_list = get_data_list_with_media(media_header_info, data_list)
+
+                if check_output_types('html', output_types):
+                    report = artifact_report.ArtifactHtmlReport(artifact_name)
+                    report.start_artifact_report(report_folder, artifact_name, description)
+                    report.add_script()
+                    report.write_artifact_data_table(stripped_headers, html_data_list, source_path, html_no_escape=html_columns)
+                    report.end_artifact_report()
+
+                if check_output_types('tsv', output_types):
+                    tsv(report_folder, stripped_headers, txt_data_list if media_header_info else data_list, artifact_name)
+
+                if check_output_types('timeline', output_types):
+                    timeline(report_folder, artifact_name, txt_data_list if media_header_info else data_list, stripped_headers)
+
+                if check_output_types('lava', output_types):
+                    table_name, object_columns, column_map = lava_process_artifact(category,
+                                                                                   module_name,
+                                                                                   artifact_name,
+                                                                                   data_headers,
+                                                                                   len(data_list),
+                                                                                   func_name=func_name,
+                                                                                   data_views=artifact_info.get("data_views"),
+                                                                                   artifact_icon=icon,
+                                                                                   source_path=source_path)
+                    if is_lava_only:
+                        lava_only_info(category, artifact_name, table_name, len(data_list))
+                    lava_insert_sqlite_data(table_name, data_list, object_columns, data_headers, column_map)
+
+                if check_output_types('kml', output_types):
+                    kmlgen(report_folder, artifact_name, txt_data_list if media_header_info else data_list, stripped_headers)
 
+            else:
+                if output_types != 'none':
+                    logfunc(f"No data found for {artifact_name}")
+                    if is_lava_only:
+                        lava_only_info(category, artifact_name, artifact_name, 0)
+
+        capture = current_capture()
+        if capture is not None:
+            # Artifact running on a worker thread, its output is written in artifact order, with its Context
+            capture.record(set_context)
+            capture.record(write_output, data_list, source_path)
         else:
-            if output_types != 'none':
-                logfunc(f"No data found for {artifact_name}")
-                if is_lava_only:
-                    lava_only_info(category, artifact_name, artifact_name, 0)
+            write_output(data_list, source_path)
 
         return data_headers, data_list, source_path
     return wrapper
@@ -607,8 +642,19 @@ def get_file_path(files_found, filename, skip=False):
         logfunc(f"Error: {str(e)}")
     return None        
 
+def materialize_file(path):
+    '''Returns the path to read a found file from, extracting it first if the seeker deferred its extraction'''
+    try:
+        seeker = Context.get_seeker()
+    except ValueError:
+        return path
+    if path and getattr(seeker, 'materialize', None):
+        seeker.materialize(str(path))
+    return path
+
 def get_txt_file_content(file_path):
     try:
+        file_path = materialize_file(file_path)
         with open(file_path, "r", encoding="utf-8") as file:
             file_content = file.readlines()
             return file_content
@@ -644,6 +690,7 @@ def get_plist_content(data):
 
 def get_plist_file_content(file_path):
     try:
+        file_path = materialize_file(file_path)
         with open(file_path, 'rb') as file:
             plist_content = plistlib.load(file)
             if isinstance(plist_content, dict) and plist_content.get('$archiver', '') == 'NSKeyedArchiver':
@@ -687,12 +734,39 @@ def get_sqlite_db_path(path):
     else:
         return quote(str(path), safe='/')
 
+def _get_in_place_seeker(path):
+    '''Returns the current seeker if path is an original file it reads in place, else None'''
+    try:
+        seeker = Context.get_seeker()
+    except ValueError:
+        return None
+    if path and getattr(seeker, 'is_in_place_path', None) and seeker.is_in_place_path(str(path)):
+        return seeker
+    return None
+
+def get_sqlite_db_uri(path):
+    '''Returns the URI opening a sqlite db in read-only mode.
+    Databases read in place from the extraction are opened as immutable, so SQLite never
+    creates a -shm file or writes next to the original. If they have a non empty -wal or
+    journal, they are copied to the data folder first so the journal is still applied.
+    Databases whose extraction was deferred are extracted first, with their journals.'''
+    for suffix in ('', '-wal', '-shm', '-journal'):
+        materialize_file(f"{path}{suffix}")
+    seeker = _get_in_place_seeker(path)
+    if seeker:
+        path = str(path)
+        if any(os.path.isfile(path + suffix) and os.path.getsize(path + suffix) > 0
+               for suffix in ('-wal', '-journal')):
+            path = seeker.copy_original(path)
+        else:
+            return f"file:{get_sqlite_db_path(path)}?immutable=1"
+    return f"file:{get_sqlite_db_path(path)}?mode=ro"
+
 def open_sqlite_db_readonly(path):
     '''Opens a sqlite db in read-only mode, so original db (and -wal/journal are intact)'''
     try:
         if path:
-            path = get_sqlite_db_path(path)
-            with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as db:
+            with sqlite3.connect(get_sqlite_db_uri(path), uri=True) as db:
                 return db
     except sqlite3.OperationalError as e:
         logfunc(f"Error with {path}:")
@@ -703,8 +777,7 @@ def attach_sqlite_db_readonly(path, db_name):
     '''Return the query to attach a sqlite db in read-only mode.
     path: str --> Path of the SQLite DB to attach
     db_name: str --> Name of the SQLite DB in the query'''
-    path = get_sqlite_db_path(path)
-    return  f'''ATTACH DATABASE "file:{path}?mode=ro" AS {db_name}'''
+    return  f'''ATTACH DATABASE "{get_sqlite_db_uri(path)}" AS {db_name}'''
 
 def get_sqlite_db_records(path, query, attach_query=None):
     db = open_sqlite_db_readonly(path)
@@ -1076,7 +1149,17 @@ def device_info(category, label, value, source_file=""):
         func_name = frame.function
     except:  # pylint: disable=bare-except
         func_name = 'unknown'
-    
+
+    capture = current_capture()
+    if capture is not None:
+        # Artifact running on a worker thread, the values are stored in artifact order
+        capture.record(_store_device_info, category, label, value, source_file, func_name)
+    else:
+        _store_device_info(category, label, value, source_file, func_name)
+
+
+def _store_device_info(category, label, value, source_file, func_name):
+    '''Stores a device_info value in the identifiers dictionary'''
     values = identifiers.get(category, {})
     
     # Create value object with both the value and source module
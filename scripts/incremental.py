@@ -0,0 +1,345 @@
+"""
+Incremental runs, re-processing only the artifacts that changed since a previous run.
+
+Each run stores the fingerprint of its artifacts in the _artifact_fingerprints
+table of its LAVA database: a SHA-256 of the source of the module of the
+artifact, of the timezone and text wrapping of the run, and of the files its
+search patterns matched. The files of a file system extraction are fingerprinted
+by their content digests when the run hashes the source files (--hash, the
+digests are then reused from the listing cache for the files that did not
+change), otherwise by their size and modification time, from a new stat of each
+matched file. For the other inputs, the listing metadata stands in for a hash of
+the content, so that the files of the unchanged artifacts are never extracted or
+read (size and modification time of a tar member or iTunes backup file, size and
+CRC-32 of a zip member). Artifacts whose
+matched files cannot be fingerprinted (single file input, members of nested
+archives) or whose pages link to the extracted files of the data folder always
+run again.
+
+With --incremental <previous report folder>, an artifact is unchanged when its
+fingerprint is the one of the previous run, it completed there without errors,
+the modules it requires are unchanged, and, for the artifacts reading
+_lava_artifacts.db, when no other artifact changed. Instead of running it, its
+output is copied from the previous report folder, using its checkpoint (see
+checkpoints.py): its LAVA tables, media, file path records, entries in the LAVA
+data and the device information, the part of the HTML pages (rebuilt from the
+final pages), TSV and KML files it wrote, and its timeline and KML rows. The
+report index and sidebar are then generated from all the pages, as in a full
+run. Changes to the shared code of iLEAPP (scripts/) are not detected: the
+modules whose source changed run again.
+
+Classes:
+    IncrementalRun: Selects the unchanged artifacts of a run and copies their output from a previous run.
+
+Functions:
+    artifact_fingerprint: Returns the fingerprint of the module source and the matched files of an artifact.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+import shutil
+import sqlite3
+
+from functools import lru_cache
+
+from scripts.checkpoints import REPORT_DBS, RunCheckpoints
+from scripts.context import Context
+from scripts.file_hashing import HASH_ALGORITHMS
+from scripts.ilapfuncs import identifiers, iOS, lava_only_artifacts, logfunc
+from scripts.lavafuncs import lava_copy_sqlite_media, lava_copy_sqlite_tables, lava_db_name, lava_get_run_info, \
+    lava_insert_sqlite_artifact_links_pattern_to_file, lava_insert_sqlite_file_paths
+from scripts.plugin_runner import required_modules
+from scripts.report import remove_sidebar_code
+
+# Modules whose pages link to the extracted files of the data folder, which are not copied
+DATA_FOLDER_LINK_RE = re.compile(r'\bmedia_to_html\(')
+# Logs of the run, written by each run for all the artifacts
+RUN_LOGS_FOLDER = os.path.join('_HTML', '_Script_Logs')
+
+
+@lru_cache(maxsize=None)
+def _read_source(source_file):
+    '''Returns the bytes of the module at source_file, None if it cannot be read'''
+    try:
+        with open(source_file, 'rb') as module_file:
+            return module_file.read()
+    except OSError:
+        return None
+
+
+def _module_source(plugin):
+    '''Returns the source of the module of plugin, None if it cannot be read'''
+    try:
+        source_file = inspect.getsourcefile(inspect.unwrap(plugin.method))
+    except TypeError:
+        return None
+    return _read_source(source_file) if source_file else None
+
+
+def artifact_fingerprint(plugin, search_plan, seeker, time_offset, wrap_text):
+    '''
+    Returns the hex SHA-256 fingerprint of the module source of plugin, the digests or metadata of the
+    files matched by its search patterns and the parameters of the run, None if it cannot be computed
+    '''
+    source = _module_source(plugin)
+    if source is None or DATA_FOLDER_LINK_RE.search(source.decode('utf-8', 'replace')):
+        return None
+    matched_files = []
+    for _, pattern in search_plan.plugin_patterns.get(plugin.name) or ():
+        fingerprints = seeker.planned_fingerprints(pattern)
+        if fingerprints is None:
+            return None
+        matched_files.append([pattern, fingerprints])
+    fingerprint = hashlib.sha256(source)
+    fingerprint.update(json.dumps([plugin.name, time_offset, wrap_text, matched_files]).encode('utf-8'))
+    return fingerprint.hexdigest()
+
+
+def _link(source, destination):
+    '''Hard links source to destination, or copies it, unless destination exists'''
+    if os.path.exists(destination) or not os.path.isfile(source):
+        return
+    os.makedirs(os.path.dirname(destination), exist_ok=True)
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+class IncrementalRun:
+    """
+    Selects the artifacts unchanged since a previous run, and copies their output from its report folder.
+    Attributes:
+        previous_folder (str): The report folder of the previous run.
+        output_folder (str): The report folder of the run.
+        unchanged (set): Names of the artifacts whose output is copied from the previous run.
+    Methods:
+        plan(plugins, search_plan, fingerprints): Selects the unchanged artifacts from their fingerprints.
+        is_unchanged(plugin): Returns True if the output of plugin is copied, once the artifacts before it ran.
+        copy(plugin, file_path_ids): Copies the output of plugin from the previous run.
+    """
+
+    def __init__(self, previous_folder, output_folder, previous_fingerprints):
+        self.previous_folder = previous_folder
+        self.output_folder = output_folder
+        self.unchanged = set()
+        self._previous_fingerprints = previous_fingerprints
+        self._db_path = os.path.join(previous_folder, lava_db_name)
+        self._artifacts = {}
+        self._search_plan = None
+        self._rerun_modules = set()
+        self._load()
+
+    def _connect(self, path):
+        '''Returns a read-only connection to a database of the previous report folder, which is left unchanged'''
+        return sqlite3.connect(f'file:{os.path.join(self.previous_folder, path)}?immutable=1', uri=True)
+
+    def _load(self):
+        '''Reads the checkpoints of the previous run, with the report state before and after each artifact'''
+        files = dict((lava_get_run_info(self.previous_folder) or {}).get('files', {}))
+        db = self._connect(lava_db_name)
+        try:
+            checkpoints = db.execute('SELECT artifact_name, success, state FROM _resume_checkpoints ORDER BY id')
+            checkpoints = checkpoints.fetchall()
+        finally:
+            db.close()
+        report_dbs = {}
+        device_info = {}
+        lava_only = {}
+        versions = [None, '']
+        for artifact_name, success, state in checkpoints:
+            state = json.loads(state)
+            self._artifacts[artifact_name] = {
+                'success': bool(success),
+                'state': state,
+                'files': {path: (files.get(path, 0), size) for path, size in state['files'].items()},
+                'report_dbs': {path: (report_dbs.get(path, 0), rowid) for path, rowid in state['report_dbs'].items()
+                               if rowid > report_dbs.get(path, 0)},
+                'identifiers': (device_info, state.get('identifiers', device_info)),
+                'lava_only_artifacts': (lava_only, state.get('lava_only_artifacts', lava_only)),
+                'versions': versions,
+            }
+            files.update(state['files'])
+            report_dbs = state['report_dbs']
+            device_info = state.get('identifiers', device_info)
+            lava_only = state.get('lava_only_artifacts', lava_only)
+            versions = [state['ios_version'], state['installed_os_version']]
+
+    def plan(self, plugins, search_plan, fingerprints):
+        '''
+        Selects the artifacts of plugins unchanged since the previous run, from their fingerprints, and
+        adds them to the skipped plugins of search_plan, whose files are not extracted
+        '''
+        self._search_plan = search_plan
+        unchanged = {plugin.name for plugin in plugins
+                     if fingerprints.get(plugin.name) is not None
+                     and fingerprints[plugin.name] == self._previous_fingerprints.get(plugin.name)
+                     and self._artifacts.get(plugin.name, {}).get('success') and self._can_copy(plugin)}
+        # The artifacts depending on the output of changed artifacts run again
+        while True:
+            changed = [plugin for plugin in plugins if plugin.name not in unchanged]
+            changed_modules = {plugin.module_name for plugin in changed}
+            dependent = {plugin.name for plugin in plugins if plugin.name in unchanged
+                         and (required_modules(plugin) & changed_modules or (plugin.search is None and changed))}
+            if not dependent:
+                break
+            unchanged -= dependent
+        self.unchanged = unchanged
+        search_plan.skipped_plugins.update(unchanged)
+        logfunc(f'Incremental run: {len(unchanged)} of {len(plugins)} artifacts unchanged since the run of '
+                f'{self.previous_folder}, their output is copied')
+
+    def _can_copy(self, plugin):
+        '''Returns True if the files plugin wrote in the previous run can be copied from its report folder'''
+        for path, (_, size) in self._artifacts[plugin.name]['files'].items():
+            if path.startswith(RUN_LOGS_FOLDER + os.sep):
+                continue
+            if path.endswith('.temphtml'):
+                if not os.path.isfile(self._page_path(path)):
+                    return False
+            elif not os.path.isfile(os.path.join(self.previous_folder, path)) \
+                    or os.path.getsize(os.path.join(self.previous_folder, path)) < size:
+                return False
+        return all(os.path.isfile(os.path.join(self.previous_folder, path))
+                   for path in self._artifacts[plugin.name]['report_dbs'])
+
+    def is_unchanged(self, plugin):
+        '''
+        Returns True if the output of plugin is copied from the previous run. Called in artifact order,
+        once the artifacts that may set the iOS version before plugin ran: plugin runs again if the
+        version differs from the one it got in the previous run, or if modules it requires ran again.
+        '''
+        if plugin.name in self.unchanged and not required_modules(plugin) & self._rerun_modules \
+                and [iOS.get_version(), Context.get_installed_os_version()] == \
+                self._artifacts[plugin.name]['versions']:
+            return True
+        if plugin.name in self.unchanged:
+            self.unchanged.discard(plugin.name)
+            self._search_plan.skipped_plugins.discard(plugin.name)
+            logfunc(f'{plugin.name} [{plugin.module_name}] depends on output that changed, it runs again')
+        self._rerun_modules.add(plugin.module_name)
+        return False
+
+    def copy(self, plugin, file_path_ids):
+        '''
+        Copies the output of plugin from the previous run, file_path_ids being the ids of the file
+        path records of the run. Returns False if some of it could not be copied.
+        '''
+        artifact = self._artifacts[plugin.name]
+        success = self._copy_files(artifact['files'])
+        self._copy_report_dbs(artifact['report_dbs'])
+        lava_copy_sqlite_tables(self._db_path, artifact['state']['tables'])
+        for extraction_path in lava_copy_sqlite_media(self._db_path, plugin.module_name,
+                                                      plugin.artifact_info.get('name', plugin.name)):
+            _link(os.path.join(self.previous_folder, extraction_path),
+                  os.path.join(self.output_folder, extraction_path))
+            html_media_path = os.path.join('_HTML', 'media', os.path.basename(extraction_path))
+            if os.path.isfile(os.path.join(self.previous_folder, html_media_path)):
+                _link(os.path.join(self.output_folder, extraction_path),
+                      os.path.join(self.output_folder, html_media_path))
+        self._copy_file_paths(plugin, file_path_ids)
+        state = {key: value for key, value in artifact['state'].items()
+                 if key not in ('identifiers', 'lava_only_artifacts')}
+        RunCheckpoints.restore(state)
+        before, after = artifact['identifiers']
+        for category, values in after.items():
+            for label, value in values.items():
+                if before.get(category, {}).get(label) != value:
+                    identifiers.setdefault(category, {})[label] = self._relocate(value)
+        before, after = artifact['lava_only_artifacts']
+        for category, artifacts in after.items():
+            if len(artifacts) > len(before.get(category, ())):
+                lava_only_artifacts.setdefault(category, []).extend(artifacts[len(before.get(category, ())):])
+        return success
+
+    def _relocate(self, value):
+        '''Returns a device information value whose source files in the previous report folder are in the report folder'''
+        if isinstance(value, list):
+            return [self._relocate(item) for item in value]
+        source_file = value.get('source_file')
+        if isinstance(source_file, str) and source_file.startswith(self.previous_folder + os.sep):
+            value = dict(value, source_file=self.output_folder + source_file[len(self.previous_folder):])
+        return value
+
+    def _page_path(self, path):
+        '''Returns the path of the final page of the previous run generated from the temporary page at path'''
+        return os.path.join(self.previous_folder, '_HTML',
+                            os.path.basename(path).replace('.temphtml', '.html').replace(' ', '_'))
+
+    def _copy_files(self, files):
+        '''Appends to the report files the part of the previous files between the sizes in files'''
+        success = True
+        for path, (start, end) in files.items():
+            if path.startswith(RUN_LOGS_FOLDER + os.sep):
+                continue
+            if path.endswith('.temphtml'):
+                # The temporary page is the final page without its sidebar
+                with open(self._page_path(path), 'r', encoding='utf8', newline='') as page_file:
+                    data = remove_sidebar_code(page_file.read(), os.linesep)
+                data = data.encode('utf8')[start:end] if data is not None else b''
+            else:
+                with open(os.path.join(self.previous_folder, path), 'rb') as previous_file:
+                    previous_file.seek(start)
+                    data = previous_file.read(end - start)
+            if len(data) != end - start:
+                logfunc(f'Error, could not copy {path} from {self.previous_folder}')
+                success = False
+                continue
+            os.makedirs(os.path.dirname(os.path.join(self.output_folder, path)), exist_ok=True)
+            with open(os.path.join(self.output_folder, path), 'ab') as report_file:
+                report_file.write(data)
+        return success
+
+    def _copy_report_dbs(self, report_dbs):
+        '''Copies the rows of the timeline and KML databases with rowids in the ranges of report_dbs'''
+        for path in REPORT_DBS:
+            if path not in report_dbs:
+                continue
+            start, end = report_dbs[path]
+            previous_db = self._connect(path)
+            try:
+                sql = previous_db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'data'")
+                sql = sql.fetchone()[0]
+                rows = previous_db.execute('SELECT * FROM data WHERE rowid > ? AND rowid <= ? ORDER BY rowid',
+                                           (start, end)).fetchall()
+            finally:
+                previous_db.close()
+            os.makedirs(os.path.dirname(os.path.join(self.output_folder, path)), exist_ok=True)
+            db = sqlite3.connect(os.path.join(self.output_folder, path))
+            try:
+                with db:
+                    if not db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'data'").fetchone():
+                        db.execute(sql)
+                    if rows:
+                        db.executemany(f'INSERT INTO data VALUES ({", ".join("?" * len(rows[0]))})', rows)
+            finally:
+                db.close()
+
+    def _copy_file_paths(self, plugin, file_path_ids):
+        '''Copies the file path records of the files matched by plugin and links them to its search patterns'''
+        pattern_ids = {}
+        for artifact_search_pattern_id, pattern in self._search_plan.plugin_patterns.get(plugin.name) or ():
+            pattern_ids.setdefault(pattern, artifact_search_pattern_id)
+        db = self._connect(lava_db_name)
+        try:
+            links = db.execute('''SELECT pattern.regex, link.file_path_id FROM _artifact_pattern_to_file AS link
+                                  JOIN _artifact_search_patterns AS pattern
+                                  ON pattern.id = link.artifact_search_pattern_id
+                                  WHERE pattern.artifact_name = ? ORDER BY link.id''', (plugin.name,)).fetchall()
+            file_ids = sorted({file_path_id for _, file_path_id in links} - file_path_ids)
+            file_paths = []
+            for position in range(0, len(file_ids), 500):
+                batch = file_ids[position:position + 500]
+                file_paths.extend(db.execute(
+                    f'''SELECT id, file_path, {", ".join(f'"{algorithm}"' for algorithm in HASH_ALGORITHMS)}
+                        FROM _file_path_list WHERE id IN ({", ".join("?" * len(batch))})''', batch))
+        finally:
+            db.close()
+        lava_insert_sqlite_file_paths([(file_path_id, file_path, dict(zip(HASH_ALGORITHMS, hashes)))
+                                       for file_path_id, file_path, *hashes in file_paths])
+        file_path_ids.update(file_path_id for file_path_id, *_ in file_paths)
+        lava_insert_sqlite_artifact_links_pattern_to_file([(pattern_ids[regex], file_path_id)
+                                                           for regex, file_path_id in links if regex in pattern_ids])
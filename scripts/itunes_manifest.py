@@ -0,0 +1,216 @@
+"""
+Decoding of the file metadata stored in the Manifest of iTunes backups.
+
+Every row of the Files table of Manifest.db holds an NSKeyedArchiver binary
+plist (MBFile) with the metadata of the file. Deserializing it with the
+generic plist functions for every row when the backup is opened is a large
+cost for backups with hundreds of thousands of files, while the seeker only
+needs a handful of values for the files that are actually matched.
+ManifestMetadata keeps the raw blobs and decodes them on first use with
+read_mbfile_metadata, a reader of the binary plist format limited to the
+MBFILE_KEYS values. Blobs with another layout are decoded with
+get_plist_content.
+
+Legacy backups (iOS 9 and older) list their files in Manifest.mbdb, a flat
+sequence of variable length records. read_mbdb parses it from a memory map with
+precompiled struct layouts and returns the file attributes of every record, so
+that the files of these backups also get their timestamps.
+
+Classes:
+    ManifestMetadata: Raw MBFile blobs by file ID, decoded on demand and memoized.
+    MbdbRecord: A record of Manifest.mbdb.
+
+Functions:
+    read_mbfile_metadata: Reads the MBFILE_KEYS values of a binary MBFile plist.
+    decode_mbfile_metadata: Same as read_mbfile_metadata, with a fallback on the generic plist decoding.
+    read_mbdb: Returns the records of a Manifest.mbdb file.
+"""
+
+import mmap
+import struct
+
+from collections import namedtuple
+from plistlib import UID
+
+from scripts.ilapfuncs import get_plist_content
+
+MBFILE_KEYS = ('EncryptionKey', 'Size', 'Birth', 'LastModified', 'ProtectionClass')
+BPLIST_HEADER = b'bplist00'
+BPLIST_TRAILER = struct.Struct('>6xBBQQQ')
+MBDB_HEADER = b'mbdb\x05\x00'
+# mode, inode, user id, group id, mtime, atime, ctime, size, protection class, number of properties
+MBDB_ATTRIBUTES = struct.Struct('>HQIIIIIQBB')
+MBDB_STRING_LENGTH = struct.Struct('>H')
+MBDB_EMPTY_STRING = 0xFFFF
+
+MbdbRecord = namedtuple('MbdbRecord', (
+    'domain', 'path', 'mode', 'inode', 'user_id', 'group_id', 'mtime', 'atime', 'ctime', 'size',
+    'protection_class'))
+
+
+class _BinaryPlist:
+    '''
+    Minimal reader of the objects of a binary plist.
+    Containers are returned unresolved: arrays as lists of object indexes,
+    dictionaries as {key: value object index}.
+    '''
+
+    def __init__(self, data):
+        if data[:len(BPLIST_HEADER)] != BPLIST_HEADER:
+            raise ValueError('not a binary plist')
+        self.data = data
+        self.offset_size, self.ref_size, self.count, self.top, self.table_offset = \
+            BPLIST_TRAILER.unpack_from(data, len(data) - BPLIST_TRAILER.size)
+
+    def _offset(self, index):
+        if index >= self.count:
+            raise IndexError(f'object {index} out of range')
+        start = self.table_offset + index * self.offset_size
+        return int.from_bytes(self.data[start:start + self.offset_size], 'big')
+
+    def _length(self, info, position):
+        '''Returns the length of an object and the position of its content'''
+        if info != 0xF:
+            return info, position + 1
+        size = 1 << (self.data[position + 1] & 0xF)
+        return int.from_bytes(self.data[position + 2:position + 2 + size], 'big'), position + 2 + size
+
+    def _refs(self, position, count):
+        size = self.ref_size
+        return [int.from_bytes(self.data[start:start + size], 'big')
+                for start in range(position, position + count * size, size)]
+
+    def value(self, index):
+        '''Returns the object at index'''
+        data = self.data
+        position = self._offset(index)
+        marker = data[position]
+        kind, info = marker >> 4, marker & 0xF
+        if kind == 0x1:
+            size = 1 << info
+            return int.from_bytes(data[position + 1:position + 1 + size], 'big', signed=size >= 8)
+        if kind == 0x2:
+            return struct.unpack_from('>f' if info == 2 else '>d', data, position + 1)[0]
+        if kind == 0x8:
+            return UID(int.from_bytes(data[position + 1:position + 2 + info], 'big'))
+        length, start = self._length(info, position)
+        if kind == 0x4:
+            return bytes(data[start:start + length])
+        if kind == 0x5:
+            return data[start:start + length].decode('ascii')
+        if kind == 0x6:
+            return data[start:start + 2 * length].decode('utf-16-be')
+        if kind == 0xA:
+            return self._refs(start, length)
+        if kind == 0xD:
+            keys = self._refs(start, length)
+            values = self._refs(start + length * self.ref_size, length)
+            return {self.value(key): value for key, value in zip(keys, values)}
+        raise ValueError(f'unsupported object type {marker:#x}')
+
+
+def read_mbfile_metadata(blob):
+    '''
+    Reads the MBFILE_KEYS values of the NSKeyedArchiver MBFile binary plist blob.
+    EncryptionKey is returned as bytes (the content of its NS.data).
+    Raises ValueError, KeyError, IndexError or TypeError if blob does not have the expected layout.
+    '''
+    plist = _BinaryPlist(blob)
+    top = plist.value(plist.top)
+    objects = plist.value(top['$objects'])
+    root = plist.value(plist.value(top['$top'])['root'])
+    mbfile = plist.value(objects[root.data])
+    metadata = {key: plist.value(mbfile[key]) for key in MBFILE_KEYS[1:] if key in mbfile}
+    if 'EncryptionKey' in mbfile:
+        key_object = plist.value(objects[plist.value(mbfile['EncryptionKey']).data])
+        metadata['EncryptionKey'] = plist.value(key_object['NS.data'])
+    return metadata
+
+
+def decode_mbfile_metadata(blob):
+    '''Returns the MBFILE_KEYS values of an MBFile plist blob, decoded with the generic functions if needed'''
+    try:
+        return read_mbfile_metadata(blob)
+    except (ValueError, KeyError, IndexError, TypeError, AttributeError, struct.error):
+        pass
+    plist = get_plist_content(blob)
+    metadata = {key: plist[key] for key in MBFILE_KEYS if key in plist}
+    if isinstance(metadata.get('EncryptionKey'), dict):
+        metadata['EncryptionKey'] = metadata['EncryptionKey'].get('NS.data')
+    return metadata
+
+
+class ManifestMetadata:
+    """
+    Raw MBFile metadata blobs of the files of a backup, by file ID.
+    The blobs are only decoded when the metadata of a file is first requested.
+    Methods:
+        add(file_id, blob): Stores the raw metadata of a file.
+        get(file_id): Returns the decoded MBFILE_KEYS values of a file.
+    """
+
+    def __init__(self):
+        self._blobs = {}
+        self._decoded = {}
+
+    def __contains__(self, file_id):
+        return file_id in self._blobs
+
+    def __len__(self):
+        return len(self._blobs)
+
+    def __getitem__(self, file_id):
+        return self._blobs[file_id]
+
+    def add(self, file_id, blob):
+        '''Stores the raw metadata blob of a file'''
+        self._blobs[file_id] = blob
+        self._decoded.pop(file_id, None)
+
+    def get(self, file_id):
+        '''Returns the decoded MBFILE_KEYS values of a file, an empty dict if it has no metadata'''
+        metadata = self._decoded.get(file_id)
+        if metadata is None:
+            blob = self._blobs.get(file_id)
+            metadata = decode_mbfile_metadata(blob) if blob else {}
+            self._decoded[file_id] = metadata
+        return metadata
+
+
+def read_mbdb(manifest_path):
+    '''
+    Returns the records of the Manifest.mbdb file at manifest_path as a list of MbdbRecord.
+    Raises ValueError if the file is not an mbdb file.
+    '''
+    records = []
+    unpack_length = MBDB_STRING_LENGTH.unpack_from
+    unpack_attributes = MBDB_ATTRIBUTES.unpack_from
+    attributes_size = MBDB_ATTRIBUTES.size
+    with open(manifest_path, 'rb') as manifest, \
+            mmap.mmap(manifest.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        if data[:len(MBDB_HEADER)] != MBDB_HEADER:
+            raise ValueError('This does not look like an MBDB file')
+        end = len(data)
+        offset = len(MBDB_HEADER)
+        while offset < end:
+            # domain, path, then link target, data hash and encryption key which are skipped
+            strings = []
+            for _ in range(2):
+                length, = unpack_length(data, offset)
+                offset += 2
+                if length == MBDB_EMPTY_STRING:
+                    strings.append('')
+                else:
+                    strings.append(data[offset:offset + length].decode('utf-8'))
+                    offset += length
+            for _ in range(3):
+                length, = unpack_length(data, offset)
+                offset += 2 if length == MBDB_EMPTY_STRING else 2 + length
+            attributes = unpack_attributes(data, offset)
+            offset += attributes_size
+            # properties: name and value strings
+            for _ in range(2 * attributes[-1]):
+                length, = unpack_length(data, offset)
+                offset += 2 if length == MBDB_EMPTY_STRING else 2 + length
+            records.append(MbdbRecord(*strings, *attributes[:-1]))
+    return records
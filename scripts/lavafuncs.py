@@ -22,6 +22,23 @@ Functions:
     lava_get_media_references: Retrieves media reference information.
     lava_insert_sqlite_media_references: Inserts media reference into database.
     lava_get_full_media_info: Retrieves complete media information with joins.
+    lava_insert_sqlite_artifact_search_patterns: Inserts many artifact search patterns at once.
+    lava_insert_sqlite_file_paths: Inserts many file path records at once.
+    lava_update_sqlite_file_path_hashes: Sets the digests of file path records.
+    lava_insert_sqlite_artifact_links_pattern_to_file: Links many search patterns to file paths at once.
+    lava_insert_sqlite_seeker_stats: Inserts the extraction I/O statistics per search pattern and per artifact.
+    lava_get_run_info: Retrieves the parameters of the run stored in the database of an output folder.
+    lava_insert_sqlite_run_info: Stores the parameters of the run, to resume it.
+    lava_insert_sqlite_checkpoint: Stores the checkpoint of a completed artifact.
+    lava_get_checkpoints: Retrieves the checkpoints of the completed artifacts, in completion order.
+    lava_get_table_names: Retrieves the names of the tables of the database.
+    lava_drop_tables: Drops tables of the database.
+    lava_delete_sqlite_artifact_links: Deletes the links of search patterns to file paths.
+    lava_get_file_path_ids: Retrieves the ids of the file path records.
+    lava_insert_sqlite_artifact_fingerprints: Stores the fingerprints of the artifacts of the run.
+    lava_get_artifact_fingerprints: Retrieves the fingerprints of the artifacts stored in the database of an output folder.
+    lava_copy_sqlite_tables: Copies tables from another LAVA database.
+    lava_copy_sqlite_media: Copies the media of an artifact from another LAVA database.
     lava_finalize_output: Finalizes and saves LAVA output files.
 """
 
@@ -34,6 +51,7 @@ from collections import OrderedDict
 import re
 import datetime
 
+from scripts.file_hashing import HASH_ALGORITHMS
 from scripts.version_info import leapp_name, leapp_version
 from scripts.context import Context
 
@@ -83,14 +101,14 @@ def get_sql_type(python_type):
     return type_map.get(python_type, 'TEXT')
 
 
-def initialize_lava(input_path, output_path, input_type):
+def initialize_lava(input_path, output_path, input_type, resume=False):
     '''
     Initialize the LAVA data.
     Args:
         input_path: The path to the input file.
         output_path: The path to the output file.
         input_type: The type of input file.
-        selected_artifacts: List of selected artifacts.
+        resume: True to resume an interrupted run, reopening its database.
     '''
 
     global lava_data, lava_db
@@ -118,6 +136,8 @@ def initialize_lava(input_path, output_path, input_type):
 
     db_path = os.path.join(output_path, lava_db_name)
     lava_db = sqlite3.connect(db_path)
+    if resume:
+        return
 
     cursor = lava_db.cursor()
     cursor.execute('''CREATE TABLE _artifact_search_patterns (
@@ -125,15 +145,26 @@ def initialize_lava(input_path, output_path, input_type):
                         module_name TEXT NOT NULL,
                         artifact_name TEXT NOT NULL,
                         regex TEXT NOT NULL)''')
-    cursor.execute('''CREATE TABLE _file_path_list (
+    cursor.execute(f'''CREATE TABLE _file_path_list (
                         id INTEGER PRIMARY KEY,
-                        file_path TEXT NOT NULL)''')
+                        file_path TEXT NOT NULL,
+                        {", ".join(f"{algorithm} TEXT" for algorithm in HASH_ALGORITHMS)})''')
     cursor.execute('''CREATE TABLE _artifact_pattern_to_file (
                         id INTEGER PRIMARY KEY,
                         artifact_search_pattern_id INTEGER NOT NULL,
                         file_path_id INTEGER NOT NULL,
                         FOREIGN KEY (artifact_search_pattern_id) REFERENCES _artifact_search_patterns(id),
                         FOREIGN KEY (file_path_id) REFERENCES _file_path_list(id))''')
+    cursor.execute('''CREATE TABLE _seeker_stats (
+                        id INTEGER PRIMARY KEY,
+                        module_name TEXT NOT NULL,
+                        artifact_name TEXT NOT NULL,
+                        regex TEXT,
+                        file_count INTEGER,
+                        bytes_read INTEGER,
+                        bytes_written INTEGER,
+                        extraction_seconds REAL,
+                        search_seconds REAL)''')
     cursor.execute('''CREATE TABLE _lava_media_items (
                         id TEXT PRIMARY KEY,
                         source_path TEXT,
@@ -166,6 +197,19 @@ def initialize_lava(input_path, output_path, input_type):
                             lmi.is_embedded
                         FROM _lava_media_references as lmr
                         LEFT JOIN _lava_media_items as lmi ON lmr.media_item_id = lmi.id''')
+    cursor.execute('''CREATE TABLE _resume_run_info (
+                        key TEXT PRIMARY KEY,
+                        value TEXT)''')
+    cursor.execute('''CREATE TABLE _resume_checkpoints (
+                        id INTEGER PRIMARY KEY,
+                        module_name TEXT NOT NULL,
+                        artifact_name TEXT NOT NULL,
+                        success INTEGER NOT NULL,
+                        state TEXT NOT NULL)''')
+    cursor.execute('''CREATE TABLE _artifact_fingerprints (
+                        artifact_name TEXT PRIMARY KEY,
+                        module_name TEXT NOT NULL,
+                        fingerprint TEXT)''')
 
 
 def lava_process_artifact(
@@ -580,21 +624,23 @@ def lava_insert_sqlite_artifact_search_pattern(artifact_regex_id, module_name, a
         print(str(e))
 
 
-def lava_insert_sqlite_file_path(file_id, file_path):
+def lava_insert_sqlite_file_path(file_id, file_path, hashes=None):
     """
     Insert a file path record into the _file_path_list table.
     Args:
         file_id (int): Unique identifier for the file path entry.
         file_path (str): Relative file path to store.
+        hashes (dict): Hex digests of the file by algorithm, from HASH_ALGORITHMS (optional).
     """
 
     global lava_db
     cursor = lava_db.cursor()
-    sql = '''INSERT INTO _file_path_list
-                ("id", "file_path")
-                VALUES (?, ?)'''
+    sql = f'''INSERT INTO _file_path_list
+                ("id", "file_path", {", ".join(f'"{algorithm}"' for algorithm in HASH_ALGORITHMS)})
+                VALUES (?, ?{", ?" * len(HASH_ALGORITHMS)})'''
 
-    data = (file_id, file_path)
+    hashes = hashes or {}
+    data = (file_id, file_path) + tuple(hashes.get(algorithm) for algorithm in HASH_ALGORITHMS)
 
     try:
         cursor.execute(sql, data)
@@ -626,6 +672,388 @@ def lava_insert_sqlite_artifact_link_pattern_to_file(artifact_regex_id, file_id)
         print(str(e))
 
 
+def lava_insert_sqlite_artifact_search_patterns(search_patterns):
+    """
+    Inserts many artifact search patterns into the _artifact_search_patterns table
+    in a single transaction.
+    Args:
+        search_patterns (list): Tuples of (artifact_regex_id, module_name, artifact_name, regex).
+    """
+
+    global lava_db
+    if not search_patterns:
+        return
+    cursor = lava_db.cursor()
+    sql = '''INSERT INTO _artifact_search_patterns
+                ("id", "module_name", "artifact_name", "regex")
+                VALUES (?, ?, ?, ?)'''
+
+    try:
+        cursor.executemany(sql, search_patterns)
+        lava_db.commit()
+    except sqlite3.IntegrityError as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_insert_sqlite_file_paths(file_paths):
+    """
+    Inserts many file path records into the _file_path_list table in a single transaction.
+    Args:
+        file_paths (list): Tuples of (file_id, file_path) or (file_id, file_path, hashes), hashes being
+            the hex digests of the file by algorithm.
+    """
+
+    global lava_db
+    if not file_paths:
+        return
+    cursor = lava_db.cursor()
+    sql = f'''INSERT INTO _file_path_list
+                ("id", "file_path", {", ".join(f'"{algorithm}"' for algorithm in HASH_ALGORITHMS)})
+                VALUES (?, ?{", ?" * len(HASH_ALGORITHMS)})'''
+    file_paths = [row[:2] + tuple((row[2] if len(row) > 2 else {}).get(algorithm) for algorithm in HASH_ALGORITHMS)
+                  for row in file_paths]
+
+    try:
+        cursor.executemany(sql, file_paths)
+        lava_db.commit()
+    except sqlite3.IntegrityError as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_update_sqlite_file_path_hashes(file_hashes):
+    """
+    Sets the digests of file path records of the _file_path_list table in a single transaction.
+    Used for the files whose extraction was deferred, hashed after the records were inserted.
+    Args:
+        file_hashes (list): Tuples of (file_id, hashes), hashes being the hex digests of the file by algorithm.
+    """
+
+    global lava_db
+    if not file_hashes:
+        return
+    cursor = lava_db.cursor()
+    sql = f'''UPDATE _file_path_list
+                SET {", ".join(f'"{algorithm}" = ?' for algorithm in HASH_ALGORITHMS)}
+                WHERE "id" = ?'''
+
+    try:
+        cursor.executemany(sql, (tuple(hashes.get(algorithm) for algorithm in HASH_ALGORITHMS) + (file_id,)
+                                 for file_id, hashes in file_hashes))
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_insert_sqlite_artifact_links_pattern_to_file(links):
+    """
+    Links many artifact search patterns to file path entries in a single transaction.
+    Args:
+        links (list): Tuples of (artifact_regex_id, file_id).
+    """
+
+    global lava_db
+    if not links:
+        return
+    cursor = lava_db.cursor()
+    sql = '''INSERT INTO _artifact_pattern_to_file
+                ("artifact_search_pattern_id", "file_path_id")
+                VALUES (?, ?)'''
+
+    try:
+        cursor.executemany(sql, links)
+        lava_db.commit()
+    except sqlite3.IntegrityError as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_insert_sqlite_seeker_stats(rows):
+    """
+    Inserts the extraction I/O statistics into the _seeker_stats table in a single transaction.
+    Args:
+        rows (list): Tuples of (module_name, artifact_name, regex, file_count, bytes_read, bytes_written,
+            extraction_seconds, search_seconds), regex being None for the totals of an artifact.
+    """
+
+    global lava_db
+    if not rows:
+        return
+    cursor = lava_db.cursor()
+    sql = '''INSERT INTO _seeker_stats
+                ("module_name", "artifact_name", "regex", "file_count", "bytes_read", "bytes_written",
+                 "extraction_seconds", "search_seconds")
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)'''
+
+    try:
+        cursor.executemany(sql, rows)
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+def lava_get_run_info(output_path):
+    """
+    Retrieves the parameters of the run stored in the LAVA database of an output folder.
+    Args:
+        output_path (str): The report folder of the run.
+    Returns:
+        dict: The parameters of the run by name, or None if the folder has no LAVA database
+              or the run was not stored.
+    """
+
+    db_path = os.path.join(output_path, lava_db_name)
+    if not os.path.isfile(db_path):
+        return None
+    try:
+        db = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            rows = db.execute('SELECT key, value FROM _resume_run_info').fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    return {key: json.loads(value) for key, value in rows} or None
+
+
+def lava_insert_sqlite_run_info(run_info):
+    """
+    Stores the parameters of the run into the _resume_run_info table, to resume it if it is interrupted.
+    Args:
+        run_info (dict): The parameters of the run by name, JSON serializable.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    sql = '''INSERT OR REPLACE INTO _resume_run_info ("key", "value") VALUES (?, ?)'''
+
+    try:
+        cursor.executemany(sql, [(key, json.dumps(value)) for key, value in run_info.items()])
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_insert_sqlite_checkpoint(module_name, artifact_name, success, state):
+    """
+    Stores the checkpoint of a completed artifact into the _resume_checkpoints table, once the
+    rows of the artifact were committed.
+    Args:
+        module_name (str): The name of the module of the artifact.
+        artifact_name (str): The name of the artifact.
+        success (bool): False if the artifact had errors.
+        state (dict): The report state added by the artifact, JSON serializable.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    sql = '''INSERT INTO _resume_checkpoints
+                ("module_name", "artifact_name", "success", "state")
+                VALUES (?, ?, ?, ?)'''
+
+    try:
+        cursor.execute(sql, (module_name, artifact_name, int(success), json.dumps(state, default=str)))
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_get_checkpoints():
+    """
+    Retrieves the checkpoints of the artifacts completed in the run.
+    Returns:
+        list: Tuples of (module_name, artifact_name, success, state), in completion order.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    cursor.execute('''SELECT module_name, artifact_name, success, state FROM _resume_checkpoints ORDER BY id''')
+    return [(module_name, artifact_name, bool(success), json.loads(state))
+            for module_name, artifact_name, success, state in cursor.fetchall()]
+
+
+def lava_get_table_names():
+    """
+    Retrieves the names of the tables of the LAVA database.
+    Returns:
+        set: The table names.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'table' ''')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def lava_drop_tables(table_names):
+    """
+    Drops tables of the LAVA database in a single transaction.
+    Args:
+        table_names (iterable): The names of the tables to drop.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+
+    try:
+        for table_name in table_names:
+            cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_delete_sqlite_artifact_links(artifact_regex_ids):
+    """
+    Deletes the links of artifact search patterns to file path entries in a single transaction.
+    Args:
+        artifact_regex_ids (iterable): The ids of the search patterns.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    sql = '''DELETE FROM _artifact_pattern_to_file WHERE "artifact_search_pattern_id" = ?'''
+
+    try:
+        cursor.executemany(sql, [(artifact_regex_id,) for artifact_regex_id in artifact_regex_ids])
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_get_file_path_ids():
+    """
+    Retrieves the ids of the records of the _file_path_list table.
+    Returns:
+        set: The file path ids.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    cursor.execute('''SELECT id FROM _file_path_list''')
+    return {row[0] for row in cursor.fetchall()}
+
+
+def lava_insert_sqlite_artifact_fingerprints(fingerprints):
+    """
+    Stores the fingerprints of the artifacts of the run into the _artifact_fingerprints table in a
+    single transaction, to re-run only the changed artifacts in an incremental run.
+    Args:
+        fingerprints (list): Tuples of (artifact_name, module_name, fingerprint), fingerprint being
+            None when it is unknown.
+    """
+
+    global lava_db
+    if not fingerprints:
+        return
+    cursor = lava_db.cursor()
+    sql = '''INSERT OR REPLACE INTO _artifact_fingerprints
+                ("artifact_name", "module_name", "fingerprint")
+                VALUES (?, ?, ?)'''
+
+    try:
+        cursor.executemany(sql, fingerprints)
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+
+
+def lava_get_artifact_fingerprints(output_path):
+    """
+    Retrieves the fingerprints of the artifacts stored in the LAVA database of an output folder.
+    Args:
+        output_path (str): The report folder of the run.
+    Returns:
+        dict: The fingerprint of each artifact by name, or None if the folder has no LAVA database
+              or the fingerprints were not stored.
+    """
+
+    db_path = os.path.join(output_path, lava_db_name)
+    if not os.path.isfile(db_path):
+        return None
+    try:
+        db = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+        try:
+            rows = db.execute('SELECT artifact_name, fingerprint FROM _artifact_fingerprints').fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        return None
+    return dict(rows)
+
+
+def lava_copy_sqlite_tables(db_path, table_names):
+    """
+    Copies tables, with their rows, from another LAVA database in a single transaction.
+    Tables already in the database are left as they are.
+    Args:
+        db_path (str): The path of the LAVA database to copy the tables from.
+        table_names (iterable): The names of the tables to copy.
+    """
+
+    global lava_db
+    table_names = set(table_names) - lava_get_table_names()
+    if not table_names:
+        return
+    cursor = lava_db.cursor()
+    cursor.execute('''ATTACH DATABASE ? AS previous''', (db_path,))
+
+    try:
+        cursor.execute('''SELECT name, sql FROM previous.sqlite_master WHERE type = 'table' ''')
+        for table_name, sql in cursor.fetchall():
+            if table_name in table_names:
+                cursor.execute(sql)
+                cursor.execute(f'INSERT INTO main."{table_name}" SELECT * FROM previous."{table_name}"')
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+    finally:
+        cursor.execute('''DETACH DATABASE previous''')
+
+
+def lava_copy_sqlite_media(db_path, module_name, artifact_name):
+    """
+    Copies the media references of an artifact, and the media items they reference, from another
+    LAVA database in a single transaction.
+    Args:
+        db_path (str): The path of the LAVA database to copy the media from.
+        module_name (str): The name of the module of the artifact.
+        artifact_name (str): The name of the artifact, as stored in the media references.
+    Returns:
+        list: The extraction paths of the media items referenced, relative to the report folder.
+    """
+
+    global lava_db
+    cursor = lava_db.cursor()
+    cursor.execute('''ATTACH DATABASE ? AS previous''', (db_path,))
+    references = '''SELECT * FROM previous._lava_media_references WHERE module_name = ? AND artifact_name = ?'''
+    extraction_paths = []
+
+    try:
+        cursor.execute(f'''INSERT OR IGNORE INTO main._lava_media_items SELECT * FROM previous._lava_media_items
+                            WHERE id IN (SELECT media_item_id FROM ({references}))''', (module_name, artifact_name))
+        cursor.execute(f'''INSERT OR IGNORE INTO main._lava_media_references {references}''',
+                       (module_name, artifact_name))
+        cursor.execute(f'''SELECT extraction_path FROM previous._lava_media_items
+                            WHERE id IN (SELECT media_item_id FROM ({references}))''', (module_name, artifact_name))
+        extraction_paths = [row[0] for row in cursor.fetchall() if row[0]]
+        lava_db.commit()
+    except sqlite3.Error as e:
+        lava_db.rollback()
+        print(str(e))
+    finally:
+        cursor.execute('''DETACH DATABASE previous''')
+    return extraction_paths
+
+
 def lava_finalize_output(output_path):
     """
     Finalizes the LAVA output by completing data processing and saving results.
@@ -0,0 +1,347 @@
+"""
+Persistent listing cache for extractions processed more than once.
+
+Examiners often run iLEAPP several times against the same extraction (other
+profiles, updated modules). Walking a full file system extraction or reading
+all the members of a tar/tar.gz archive is then repeated on every run, so the
+listing of the first run is stored in a small SQLite database in the shared
+LEAPP directory and reused by the next runs.
+
+A cached listing is only reused if the input still has the same fingerprint:
+size, modification time and, for archives, a hash of their first and last
+blocks. For file system extractions the modification time of every listed
+directory is also checked, which detects added, removed or renamed entries at
+the cost of one stat call per directory instead of a full walk. A file rewritten
+in place does not change its directory, so only the paths of a reused listing
+are trusted: the seeker stats again the files its searches match.
+
+For tar.gz inputs read through a reader able to export its checkpoints (see
+scripts/gzip_index.py), the gzip index built while listing the archive is
+stored next to the cached listing and only imported with a valid listing.
+
+The digests of the files hashed during a run (see scripts/file_hashing.py) are
+stored in the cached listing with the size and modification time of the files,
+so that the next runs only hash the files that changed.
+
+Classes:
+    ListingCache: Stores and validates the cached listing of one input.
+
+Functions:
+    get_listing_cache_directory: Returns the directory holding the cached listings.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tarfile
+
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from leapp_functions.app.history import get_shared_directory
+from scripts.compact_listing import CompactListing
+from scripts.directory_walker import ENTRY_DIRECTORY, ListingStats, default_walk_workers
+from scripts.gzip_index import can_persist_index
+from scripts.ilapfuncs import logfunc
+
+LISTING_CACHE_VERSION = 2
+MAX_CACHED_LISTINGS = 20
+FINGERPRINT_BLOCK_SIZE = 65536
+
+
+def get_listing_cache_directory():
+    '''Returns the directory holding the cached listings, inside the shared LEAPP directory'''
+    return os.path.join(get_shared_directory(), 'listing_cache')
+
+
+def _directory_mtime_matches(path, mtime):
+    '''Returns True if the directory at path still has the modification time stored in the cache'''
+    try:
+        return os.stat(path).st_mtime == mtime
+    except OSError:
+        return False
+
+
+class ListingCache:
+    """
+    Cached listing of a single input (file system extraction or tar archive).
+    Attributes:
+        input_path (str): Absolute path of the input.
+        input_type (str): The input type ('fs', 'tar', 'gz', 'zst').
+        cache_path (str): Path of the SQLite database holding the listing.
+        rebuild (bool): If True, an existing cached listing is ignored and replaced.
+        workers (int): Number of threads validating directory modification times.
+        gzip_index_path (str): Path of the exported gzip index of a tar.gz input.
+    Methods:
+        load_directory_listing(): Returns the cached (paths, ListingStats) of a file system extraction, or None.
+        store_directory_listing(paths, stats): Stores the listing of a file system extraction.
+        load_tar_members(): Returns the cached TarInfo members of a tar archive, or None.
+        store_tar_members(members): Stores the members of a tar archive.
+        load_gzip_index(reader): Imports the stored gzip index into reader.
+        store_gzip_index(reader): Exports the gzip index of reader.
+        load_hashes(): Returns the digests of the files hashed by previous runs.
+        store_hashes(rows): Stores the digests of files hashed during this run.
+    """
+
+    def __init__(self, input_path, input_type, cache_directory=None, rebuild=False, workers=None):
+        self.input_path = os.path.abspath(input_path)
+        self.input_type = input_type
+        self.rebuild = rebuild
+        self.workers = workers or default_walk_workers()
+        self.cache_directory = cache_directory or get_listing_cache_directory()
+        cache_key = hashlib.sha1(
+            f'{input_type}|{os.path.normcase(self.input_path)}'.encode('utf-8', 'surrogateescape')).hexdigest()
+        self.cache_path = os.path.join(self.cache_directory, f'{cache_key}.db')
+        self.gzip_index_path = os.path.join(self.cache_directory, f'{cache_key}.gzidx')
+
+    def _fingerprint(self):
+        '''Returns the values identifying the current state of the input'''
+        input_stat = os.stat(self.input_path)
+        fingerprint = {
+            'version': str(LISTING_CACHE_VERSION),
+            'input_path': self.input_path,
+            'input_type': self.input_type,
+            'size': str(input_stat.st_size),
+            'mtime_ns': str(input_stat.st_mtime_ns),
+        }
+        if os.path.isfile(self.input_path):
+            digest = hashlib.sha1()
+            with open(self.input_path, 'rb') as input_file:
+                digest.update(input_file.read(FINGERPRINT_BLOCK_SIZE))
+                if input_stat.st_size > FINGERPRINT_BLOCK_SIZE:
+                    input_file.seek(max(FINGERPRINT_BLOCK_SIZE, input_stat.st_size - FINGERPRINT_BLOCK_SIZE))
+                    digest.update(input_file.read(FINGERPRINT_BLOCK_SIZE))
+            fingerprint['blocks_sha1'] = digest.hexdigest()
+        return fingerprint
+
+    def _open_valid(self):
+        '''Returns a connection to the cached listing if it matches the input, else None'''
+        if self.rebuild or not os.path.exists(self.cache_path):
+            return None
+        try:
+            db = sqlite3.connect(self.cache_path)
+            stored = dict(db.execute('SELECT key, value FROM meta').fetchall())
+            if stored == self._fingerprint():
+                return db
+            db.close()
+            logfunc('Listing cache is outdated, the listing will be rebuilt')
+        except (sqlite3.Error, OSError) as ex:
+            logfunc(f'Could not read the listing cache {self.cache_path} ' + str(ex))
+        return None
+
+    def _create(self, schema):
+        '''Creates an empty cache database for the input, returns the connection or None on failure'''
+        try:
+            os.makedirs(self.cache_directory, exist_ok=True)
+            for path in (self.cache_path, self.gzip_index_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            db = sqlite3.connect(self.cache_path)
+            db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            db.execute('CREATE TABLE hashes (path TEXT, algorithm TEXT, size INTEGER, mtime REAL, digest TEXT, '
+                       'PRIMARY KEY (path, algorithm))')
+            db.execute(schema)
+            return db
+        except (sqlite3.Error, OSError) as ex:
+            logfunc(f'Could not create the listing cache {self.cache_path} ' + str(ex))
+            return None
+
+    def _finish(self, db, count):
+        '''Writes the fingerprint last, so that an interrupted store is never considered valid'''
+        try:
+            db.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', self._fingerprint().items())
+            db.commit()
+            db.close()
+            # The listing was rebuilt, later reads (file hashes) may use it
+            self.rebuild = False
+            logfunc(f'Listing cache saved - {count} entries')
+        except (sqlite3.Error, OSError) as ex:
+            db.close()
+            logfunc(f'Could not save the listing cache {self.cache_path} ' + str(ex))
+        self._prune()
+
+    def _prune(self):
+        '''Removes the least recently used cached listings above MAX_CACHED_LISTINGS and their gzip indexes'''
+        try:
+            cached = [entry for entry in os.scandir(self.cache_directory) if entry.name.endswith('.db')]
+            cached.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+            for entry in cached[MAX_CACHED_LISTINGS:]:
+                os.remove(entry.path)
+                gzip_index_path = entry.path[:-len('.db')] + '.gzidx'
+                if os.path.exists(gzip_index_path):
+                    os.remove(gzip_index_path)
+        except OSError as ex:
+            logfunc(f'Could not clean up the listing cache directory {self.cache_directory} ' + str(ex))
+
+    def _touch(self):
+        '''Marks the cached listing as recently used'''
+        try:
+            os.utime(self.cache_path)
+        except OSError:
+            pass
+
+    def load_directory_listing(self):
+        '''
+        Returns the cached listing of a file system extraction as (CompactListing, ListingStats),
+        or None if there is no valid cached listing.
+        '''
+        db = self._open_valid()
+        if db is None:
+            return None
+        start = perf_counter()
+        stats = ListingStats()
+        paths = CompactListing()
+        try:
+            for path, kind, size, atime, mtime, ctime in db.execute(
+                    'SELECT path, kind, size, atime, mtime, ctime FROM entries ORDER BY position'):
+                paths.append(path)
+                stats.append(kind, size, atime, mtime, ctime)
+        except sqlite3.Error as ex:
+            logfunc(f'Could not read the listing cache {self.cache_path} ' + str(ex))
+            return None
+        finally:
+            db.close()
+
+        directories = [(path, stats.mtimes[position]) for position, path in enumerate(paths)
+                       if stats.kinds[position] == ENTRY_DIRECTORY]
+        with ThreadPoolExecutor(self.workers) as executor:
+            unchanged = all(executor.map(lambda item: _directory_mtime_matches(*item), directories))
+        if not unchanged:
+            logfunc('Listing cache is outdated, the listing will be rebuilt')
+            return None
+        self._touch()
+        logfunc(f'Listing cache reused - {len(paths)} entries ({perf_counter() - start:.2f}s)')
+        return paths, stats
+
+    def store_directory_listing(self, paths, stats):
+        '''Stores the listing of a file system extraction and its ListingStats'''
+        db = self._create('CREATE TABLE entries (position INTEGER PRIMARY KEY, path TEXT, kind INTEGER, '
+                          'size INTEGER, atime REAL, mtime REAL, ctime REAL)')
+        if db is None:
+            return
+        try:
+            db.executemany(
+                'INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((position, path) + stats.get(position) for position, path in enumerate(paths)))
+        except (sqlite3.Error, UnicodeEncodeError) as ex:
+            db.close()
+            logfunc(f'Could not save the listing cache {self.cache_path} ' + str(ex))
+            return
+        self._finish(db, len(paths))
+
+    def load_tar_members(self):
+        '''Returns the cached members of a tar archive as TarInfo objects, or None if there is no valid cache'''
+        db = self._open_valid()
+        if db is None:
+            return None
+        start = perf_counter()
+        try:
+            rows = db.execute(
+                'SELECT name, type, size, mtime, mode, linkname, uid, gid, uname, gname, offset, offset_data '
+                'FROM members ORDER BY position').fetchall()
+        except sqlite3.Error as ex:
+            logfunc(f'Could not read the listing cache {self.cache_path} ' + str(ex))
+            return None
+        finally:
+            db.close()
+        members = []
+        for name, member_type, size, mtime, mode, linkname, uid, gid, uname, gname, offset, offset_data in rows:
+            member = tarfile.TarInfo(name)
+            member.type = member_type
+            member.size = size
+            member.mtime = mtime
+            member.mode = mode
+            member.linkname = linkname
+            member.uid = uid
+            member.gid = gid
+            member.uname = uname
+            member.gname = gname
+            member.offset = offset
+            member.offset_data = offset_data
+            members.append(member)
+        self._touch()
+        logfunc(f'Listing cache reused - {len(members)} members ({perf_counter() - start:.2f}s)')
+        return members
+
+    def store_tar_members(self, members):
+        '''Stores the members of a tar archive, unless some of them are sparse files'''
+        if any(member.sparse is not None for member in members):
+            return
+        db = self._create('CREATE TABLE members (position INTEGER PRIMARY KEY, name TEXT, type BLOB, '
+                          'size INTEGER, mtime REAL, mode INTEGER, linkname TEXT, uid INTEGER, gid INTEGER, '
+                          'uname TEXT, gname TEXT, offset INTEGER, offset_data INTEGER)')
+        if db is None:
+            return
+        try:
+            db.executemany(
+                'INSERT INTO members VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                ((position, member.name, member.type, member.size, member.mtime, member.mode, member.linkname,
+                  member.uid, member.gid, member.uname, member.gname, member.offset, member.offset_data)
+                 for position, member in enumerate(members)))
+        except (sqlite3.Error, UnicodeEncodeError) as ex:
+            db.close()
+            logfunc(f'Could not save the listing cache {self.cache_path} ' + str(ex))
+            return
+        self._finish(db, len(members))
+
+    def load_gzip_index(self, reader):
+        '''
+        Imports the stored gzip index into reader. Must only be called once load_tar_members
+        returned the cached members, as the index is only valid for the same archive.
+        '''
+        if not can_persist_index(reader) or not os.path.exists(self.gzip_index_path):
+            return
+        start = perf_counter()
+        try:
+            reader.import_index(self.gzip_index_path)
+            logfunc(f'Gzip index reused ({perf_counter() - start:.2f}s)')
+        except (OSError, ValueError) as ex:
+            logfunc(f'Could not read the gzip index {self.gzip_index_path} ' + str(ex))
+
+    def store_gzip_index(self, reader):
+        '''Exports the gzip index of reader, built while reading the members of the archive'''
+        if not can_persist_index(reader):
+            return
+        try:
+            reader.export_index(self.gzip_index_path)
+        except (OSError, ValueError) as ex:
+            logfunc(f'Could not save the gzip index {self.gzip_index_path} ' + str(ex))
+
+    def load_hashes(self):
+        '''
+        Returns the digests of the files hashed by previous runs on the input, as
+        {path: (size, mtime, {algorithm: hex digest})}, empty if there is no valid cached listing.
+        '''
+        db = self._open_valid()
+        if db is None:
+            return {}
+        try:
+            rows = db.execute('SELECT path, algorithm, size, mtime, digest FROM hashes').fetchall()
+        except sqlite3.Error as ex:
+            logfunc(f'Could not read the listing cache {self.cache_path} ' + str(ex))
+            return {}
+        finally:
+            db.close()
+        hashes = {}
+        for path, algorithm, size, mtime, digest in rows:
+            known = hashes.get(path)
+            if known is None or known[:2] != (size, mtime):
+                known = hashes[path] = (size, mtime, {})
+            known[2][algorithm] = digest
+        return hashes
+
+    def store_hashes(self, rows):
+        '''Stores the (path, size, mtime, {algorithm: hex digest}) rows of the files hashed during this run'''
+        db = self._open_valid()
+        if db is None:
+            return
+        try:
+            db.executemany(
+                'INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?)',
+                ((path, algorithm, size, mtime, digest)
+                 for path, size, mtime, digests in rows for algorithm, digest in digests.items()))
+            db.commit()
+        except (sqlite3.Error, UnicodeEncodeError) as ex:
+            logfunc(f'Could not save the file hashes in the listing cache {self.cache_path} ' + str(ex))
+        finally:
+            db.close()
@@ -0,0 +1,253 @@
+"""
+Archives found inside an extraction, exposed as virtual paths.
+
+Some artifacts are stored in archives of the extraction, the sysdiagnose
+tarballs above all, and several artifacts used to open and decompress the
+same tarball in turn to read a few of its members. Instead, the seekers index
+each nested archive once and list its members as virtual paths below the path
+of the archive, for instance:
+
+    .../sysdiagnose_2024.tar.gz/sysdiagnose_2024/logs/SystemVersion/SystemVersion.plist
+
+which the artifact `paths` globs match like any other file. A member is only
+extracted when a search matches it, to the <archive data path>.contents folder,
+reading it through the gzip checkpoint or zstd frame index of the archive.
+
+Only the patterns reaching into an archive, such as the one above, match its
+members, and an archive is only indexed when one of the search patterns of the
+selected artifacts reaches into it. The archives are recognized in the patterns
+by the globs configured with --nested_archives, or by their extension.
+
+Classes:
+    NestedArchive: The file members of one tar, tar.gz, tar.zst or zip archive.
+    NestedArchives: Virtual listing of the members of all the nested archives of an extraction.
+
+Functions:
+    archive_prefix: Returns the part of a search pattern naming the archive it reaches into.
+    reached_archive_patterns: Returns the archive patterns to expand for the search patterns of a run.
+
+Constants:
+    DEFAULT_NESTED_ARCHIVES: Globs of the archives expanded unless configured otherwise.
+    NESTED_CONTENTS_SUFFIX: Suffix of the data folder directory holding the members of an archive.
+"""
+
+import os
+import re
+import tarfile
+import time
+import zipfile
+import zlib
+
+from fnmatch import fnmatchcase
+from shutil import copyfileobj
+
+from scripts.compact_listing import CompactListing
+from scripts.gzip_index import open_gzip_index
+from scripts.ilapfuncs import logfunc
+from scripts.search_index import PathIndex, match_patterns
+from scripts.zstd_index import is_zstd_file, open_zstd_index, zstd_available
+
+DEFAULT_NESTED_ARCHIVES = ('*/sysdiagnose_*.tar.gz',)
+NESTED_CONTENTS_SUFFIX = '.contents'
+NESTED_COPY_BUFFER_SIZE = 1024 * 1024
+ARCHIVE_ERRORS = (OSError, EOFError, tarfile.TarError, zipfile.BadZipFile, zlib.error)
+ARCHIVE_NAME_RE = re.compile(r'\.(?:tar|tgz|tar\.gz|tar\.zst|zip)$', re.IGNORECASE)
+
+
+def _archive_name(archive_pattern):
+    '''Returns the last part of an archive pattern, the glob of the archive file names'''
+    return archive_pattern.replace('\\', '/').rsplit('/', 1)[-1]
+
+
+def archive_prefix(filepattern, archive_patterns=()):
+    '''
+    Returns the part of filepattern naming the archive it reaches into, e.g. */sysdiagnose_*.tar.gz
+    for */sysdiagnose_*.tar.gz/*/logs/SystemVersion/SystemVersion.plist, or None if filepattern
+    only names files of the extraction. Archives are recognized by the file names of
+    archive_patterns or by their extension.
+    '''
+    archive_names = [_archive_name(archive_pattern) for archive_pattern in archive_patterns]
+    parts = filepattern.replace('\\', '/').split('/')
+    for index, part in enumerate(parts[:-1]):
+        if ARCHIVE_NAME_RE.search(part) or any(fnmatchcase(part, name) for name in archive_names):
+            return '/'.join(parts[:index + 1])
+    return None
+
+
+def reached_archive_patterns(search_patterns, archive_patterns):
+    '''
+    Returns the patterns of the archives to expand for search_patterns: the archive_patterns
+    that a search pattern reaches into, and the archive part of the search patterns reaching
+    into an archive that none of archive_patterns names.
+    '''
+    reached = []
+    for filepattern in search_patterns:
+        prefix = archive_prefix(filepattern, archive_patterns)
+        if prefix is None:
+            continue
+        name = _archive_name(prefix)
+        for archive_pattern in [archive_pattern for archive_pattern in archive_patterns
+                                if fnmatchcase(name, _archive_name(archive_pattern))] or [prefix]:
+            if archive_pattern not in reached:
+                reached.append(archive_pattern)
+    return reached
+
+
+def _member_name(name):
+    '''Returns the name of an archive member without its leading ./ or /'''
+    while name.startswith('./'):
+        name = name[2:]
+    return name.lstrip('/')
+
+
+class NestedArchive:
+    """
+    The file members of an archive found in the extraction, read through a seekable
+    index so that members can be extracted in any order.
+    Attributes:
+        source_path (str): The path of the archive in the extraction.
+        path (str): The path of the archive file read, in the data folder or in place.
+        contents_path (str): The folder the members are extracted to.
+        members (list): The TarInfo or ZipInfo of the file members.
+    Methods:
+        names(): Yields the names of the members, in archive order.
+        modification_date(member): Returns the modification time of a member.
+        extract(member, destination, output_file): Writes the content of a member to destination.
+        close(): Closes the archive.
+    """
+
+    def __init__(self, source_path, path, contents_path):
+        self.source_path = source_path
+        self.path = path
+        self.contents_path = contents_path
+        self._reader = None
+        self._zip_file = None
+        self._tar_file = None
+        with open(path, 'rb') as file:
+            magic = file.read(4)
+        if zipfile.is_zipfile(path):
+            self._zip_file = zipfile.ZipFile(path)  # pylint: disable=consider-using-with
+            self.members = [info for info in self._zip_file.infolist()
+                            if not info.is_dir() and not info.filename.startswith('__MACOSX')]
+            return
+        if magic[:2] == b'\x1f\x8b':
+            self._reader = open_gzip_index(path)
+        elif is_zstd_file(path) and zstd_available():
+            self._reader = open_zstd_index(path)
+        try:
+            if self._reader is not None:
+                self._tar_file = tarfile.open(path, 'r:', fileobj=self._reader)
+            else:
+                self._tar_file = tarfile.open(path, 'r:')
+            self.members = [member for member in self._tar_file.getmembers() if member.isfile()]
+        except ARCHIVE_ERRORS:
+            self.close()
+            raise
+
+    def names(self):
+        '''Yields the names of the file members, in archive order'''
+        for member in self.members:
+            yield _member_name(member.filename if self._zip_file else member.name)
+
+    def modification_date(self, member):
+        '''Returns the modification time of member, as a timestamp'''
+        if self._zip_file:
+            # Zip dates are in local time
+            return time.mktime(member.date_time + (0, 0, -1))
+        return member.mtime
+
+    def extract(self, member, destination, output_file):
+        '''
+        Writes the content of member to destination through output_file, the output_file
+        context manager of the seeker. Archive errors are raised as OSError.
+        '''
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        try:
+            if self._zip_file:
+                source = self._zip_file.open(member)
+            else:
+                source = self._tar_file.extractfile(member)
+            with source, output_file(destination) as output:
+                copyfileobj(source, output, NESTED_COPY_BUFFER_SIZE)
+        except ARCHIVE_ERRORS as ex:
+            raise OSError(f'{self.source_path}: {ex}') from ex
+        modification_date = self.modification_date(member)
+        os.utime(destination, (modification_date, modification_date))
+
+    def close(self):
+        '''Closes the archive and its index'''
+        for archive in (self._zip_file, self._tar_file, self._reader):
+            if archive is not None:
+                archive.close()
+
+
+class NestedArchives:
+    """
+    Virtual listing of the file members of the nested archives of an extraction,
+    named <archive source path>/<member name> and matched by the seekers searches
+    reaching into an archive, in addition to their own listing.
+    Attributes:
+        archive_patterns (tuple): The patterns of the archives expanded.
+        archives (list): The NestedArchive objects.
+        listing (CompactListing): The virtual paths of all the members.
+        extracted (dict): Maps the positions in listing of the members already registered
+            by a search to their path in the data folder.
+    Methods:
+        add(source_path, path, contents_path): Indexes the archive at path, returns False if it cannot be read.
+        matching_positions(filepattern, prefix): Returns the positions in listing of the members matching filepattern.
+        member(position): Returns the (NestedArchive, member) at position in listing.
+        data_path(position): Returns the path a member is extracted to.
+        close(): Closes all the archives.
+    """
+
+    def __init__(self, archive_patterns=()):
+        self.archive_patterns = tuple(archive_patterns)
+        self.archives = []
+        self.listing = CompactListing()
+        self.extracted = {}
+        self._members = []
+        self._keys = None
+        self._index = None
+
+    def add(self, source_path, path, contents_path):
+        '''
+        Indexes the archive at path, listed as source_path in the extraction, whose members are
+        extracted to contents_path. Returns False if it cannot be read.
+        '''
+        try:
+            archive = NestedArchive(source_path, path, contents_path)
+        except ARCHIVE_ERRORS as ex:
+            logfunc(f'Could not read the nested archive {source_path} ' + str(ex))
+            return False
+        self.archives.append(archive)
+        for member, name in zip(archive.members, archive.names()):
+            self.listing.append(source_path + '/' + name)
+            self._members.append((archive, member, name))
+        self._keys = None
+        self._index = None
+        return True
+
+    def matching_positions(self, filepattern, prefix=''):
+        '''Returns the sorted positions in listing of the members matching filepattern, if it reaches into an archive'''
+        if archive_prefix(filepattern, self.archive_patterns) is None:
+            return []
+        if self._index is None:
+            self._keys = self.listing.normcased()
+            self._index = PathIndex(self._keys)
+        return match_patterns([filepattern], self._keys, self._index, prefix)[filepattern]
+
+    def member(self, position):
+        '''Returns the (NestedArchive, member) at position in listing'''
+        archive, member, _ = self._members[position]
+        return archive, member
+
+    def data_path(self, position):
+        '''Returns the path in the data folder the member at position in listing is extracted to'''
+        archive, _, name = self._members[position]
+        parts = [part for part in name.split('/') if part not in ('', os.curdir, os.pardir)]
+        return os.path.join(archive.contents_path, *parts)
+
+    def close(self):
+        '''Closes all the archives'''
+        for archive in self.archives:
+            archive.close()
@@ -0,0 +1,93 @@
+"""
+Capture of the output of artifacts processed on worker threads.
+
+When artifacts run in parallel, their log messages, device information,
+report output (HTML, TSV, timeline, LAVA, KML) and what they print are not
+written from the worker threads. They are recorded in the OutputCapture of the artifact, and replayed
+by the thread writing the reports, in the order the artifacts would have run
+serially, so that the reports are the same as with a serial run.
+
+Classes:
+    OutputCapture: The output recorded for one artifact.
+    CapturedStream: Stream recording the writes of the threads capturing their output.
+
+Functions:
+    current_capture: Returns the OutputCapture recording the output of the current thread, if any.
+    capturing: Context manager recording the output of the current thread in an OutputCapture.
+"""
+
+import contextlib
+import threading
+
+_capture = threading.local()
+
+
+class OutputCapture:
+    """
+    The output calls recorded for an artifact, in call order.
+    Attributes:
+        entries (list): (function, args) of the recorded calls.
+    Methods:
+        record(function, *args): Records a call of function with args.
+        replay(): Makes the recorded calls, from the thread writing the reports.
+    """
+
+    def __init__(self):
+        self.entries = []
+
+    def record(self, function, *args):
+        '''Records a call of function with args, made when the capture is replayed'''
+        self.entries.append((function, args))
+
+    def replay(self):
+        '''Makes the recorded calls in order, stopping at the first one raising an exception'''
+        entries, self.entries = self.entries, []
+        for function, args in entries:
+            function(*args)
+
+
+class CapturedStream:
+    """
+    Wraps a stream such as sys.stdout, so that what a thread capturing its output writes to it
+    (print() calls) is recorded in its OutputCapture, the other threads writing to the stream.
+    Attributes:
+        stream: The wrapped stream.
+    Methods:
+        write(text): Writes text, or records it if the current thread captures its output.
+        flush(): Flushes the stream, unless the current thread captures its output.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        '''Writes text to the stream, or records it in the capture of the current thread'''
+        capture = current_capture()
+        if capture is not None:
+            capture.record(self.write, text)
+            return len(text)
+        return self.stream.write(text)
+
+    def flush(self):
+        '''Flushes the stream, the recorded writes are flushed when replayed'''
+        if current_capture() is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def current_capture():
+    '''Returns the OutputCapture recording the output of the current thread, or None if it writes its output'''
+    return getattr(_capture, 'current', None)
+
+
+@contextlib.contextmanager
+def capturing(capture):
+    '''Records the output of the current thread in capture, if it is not None, while in the with block'''
+    previous = current_capture()
+    _capture.current = capture
+    try:
+        yield capture
+    finally:
+        _capture.current = previous
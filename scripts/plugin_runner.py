@@ -0,0 +1,149 @@
+"""
+Parallel execution of the artifacts of a run.
+
+By default the artifacts run one after the other. With --plugin_workers N, up
+to N artifacts parse their files at the same time on worker threads, while the
+main thread searches the files of the next artifacts. The log messages, device
+information and report output of an artifact run on a worker are captured
+(see output_capture.py) and written by the main thread in artifact order, so
+the reports are the same as with a serial run.
+
+Only the artifacts declared with @artifact_processor and `"thread_safe": True`
+in their artifact info run on workers: their module only returns its rows to
+@artifact_processor and writes no shared state while parsing (media checked in
+the LAVA database, report files or LAVA tables written directly, the iOS
+version...), directly or through the helpers it calls. The other artifacts, and
+the ones without `paths` reading the _lava_artifacts.db of the run, run on the
+main thread, in artifact order once all the artifacts before them are written.
+An artifact whose `requirements` say that a module must be executed first
+starts once the artifacts of that module are written. What the artifacts on
+workers print is captured with their output.
+
+Workers are threads of the iLEAPP process and not separate processes: artifacts
+read their files through the seeker, which holds the open input archive or
+backup, the extracted files and the search cache of the run.
+
+Classes:
+    PluginRunner: Runs the artifacts on worker threads and writes their output in artifact order.
+
+Functions:
+    required_modules: Returns the modules whose artifacts must run before an artifact.
+    runs_in_order: Returns True if an artifact must run on the main thread, in artifact order.
+"""
+
+import re
+import sys
+import traceback
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.ilapfuncs import logfunc
+from scripts.output_capture import CapturedStream, OutputCapture, capturing
+
+REQUIRED_MODULE_RE = re.compile(r'(\w+) module must be executed first')
+
+
+def required_modules(plugin):
+    '''Returns the set of the modules whose artifacts must run before plugin, from its requirements'''
+    requirements = plugin.artifact_info.get('requirements') or ''
+    return set(REQUIRED_MODULE_RE.findall(str(requirements)))
+
+
+def runs_in_order(plugin):
+    '''Returns True if plugin must run on the main thread, after the artifacts before it are written'''
+    return (plugin.search is None or not hasattr(plugin.method, '__wrapped__')
+            or plugin.artifact_info.get('thread_safe') is not True)
+
+
+class PluginRunner:
+    """
+    Runs the artifacts on worker threads, and writes their output from the main thread in
+    artifact order. With a single worker, artifacts run right away on the main thread.
+    For each artifact, the main thread calls prepare(), records the output of the search of
+    its files in capture(), then calls submit().
+    Attributes:
+        workers (int): Number of worker threads, 1 to run the artifacts serially.
+        parallel (int): Number of artifacts run on worker threads.
+    Methods:
+        prepare(plugin): Writes the pending artifacts that must run before plugin.
+        capture(plugin): Returns the OutputCapture for the output of plugin, None if it is written right away.
+        submit(plugin, capture, run, finish): Runs an artifact and completes it in artifact order.
+        close(): Writes all the pending artifacts and stops the workers.
+    """
+
+    def __init__(self, workers=1):
+        self.workers = max(1, workers or 1)
+        self.parallel = 0
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='Artifact') if self.workers > 1 else None
+        self._pending = deque()
+        self._stdout = None
+        if self._executor is not None:
+            # What the artifacts on workers print is written with the rest of their output
+            self._stdout = sys.stdout
+            sys.stdout = CapturedStream(sys.stdout)
+
+    def prepare(self, plugin):
+        '''Writes the output of the pending artifacts that must run before plugin'''
+        if self._executor is None:
+            return
+        if runs_in_order(plugin):
+            self._write_pending(len(self._pending))
+            return
+        modules = required_modules(plugin)
+        count = max((position + 1 for position, (pending_plugin, *_) in enumerate(self._pending)
+                     if pending_plugin.module_name in modules), default=0)
+        # Bounds the captured output kept in memory
+        count = max(count, len(self._pending) - 2 * self.workers + 1)
+        self._write_pending(count)
+
+    def capture(self, plugin):
+        '''Returns the OutputCapture recording the output of plugin, or None if it is written right away'''
+        if self._executor is None or runs_in_order(plugin):
+            return None
+        return OutputCapture()
+
+    def submit(self, plugin, capture, run=None, finish=None):
+        '''
+        Runs plugin with run(), which returns False if the artifact had errors, then calls
+        finish(success) from the main thread once its output is written. Without capture,
+        the artifact runs right away. Without run, there is nothing to run.
+        '''
+        if capture is None:
+            success = run() if run else True
+            if finish:
+                finish(success)
+            return
+        future = self._executor.submit(self._run_captured, capture, run) if run else None
+        if run:
+            self.parallel += 1
+        self._pending.append((plugin, capture, future, finish))
+
+    @staticmethod
+    def _run_captured(capture, run):
+        with capturing(capture):
+            return run()
+
+    def _write_pending(self, count):
+        '''Writes the output of the count first pending artifacts, waiting for them to run'''
+        for _ in range(count):
+            plugin, capture, future, finish = self._pending.popleft()
+            success = future.result() if future else True
+            try:
+                capture.replay()
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logfunc('Reading {} artifact had errors!'.format(plugin.name))
+                logfunc('Error was {}'.format(str(ex)))
+                logfunc('Exception Traceback: {}'.format(traceback.format_exc()))
+                success = False
+            if finish:
+                finish(success)
+
+    def close(self):
+        '''Writes all the pending artifacts and stops the worker threads'''
+        self._write_pending(len(self._pending))
+        if self._executor is not None:
+            self._executor.shutdown()
+            sys.stdout = self._stdout
+            if self.parallel:
+                logfunc(f'Parallel artifacts: {self.parallel} artifacts run on {self.workers} worker threads')
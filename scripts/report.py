@@ -20,6 +20,13 @@ from scripts.version_info import leapp_version, ileapp_contributors
 from leapp_functions.data_sources.text_files import get_txt_file_content
 from leapp_functions.data_sources.json_files import get_json_file_content
 
+side_heading = \
+    """
+        <h6 class="sidebar-heading justify-content-between align-items-center px-3 mt-4 mb-1">
+            {0}
+        </h6>
+        """
+
 
 def get_tabler_icon_names():
     """Returns a set of available tabler icon names by parsing the scripts/_elements/tabler-icons.css file."""
@@ -42,12 +49,6 @@ def generate_report(reportfolderbase, time_in_secs, time_hms, extraction_type, i
         Path(__file__).resolve().parent.joinpath("data", "feather_to_tabler_icon_names.json"))
 
     control = None
-    side_heading = \
-        """
-        <h6 class="sidebar-heading justify-content-between align-items-center px-3 mt-4 mb-1">
-            {0}
-        </h6>
-        """
     list_item = \
         """
         <li class="nav-item">
@@ -337,6 +338,22 @@ def insert_sidebar_code(data, sidebar_code, filename):
         return ret
 
 
+def remove_sidebar_code(data, newline='\n'):
+    """
+    Replaces the navigation sidebar code in the page HTML with the sidebar placeholder, the reverse of
+    insert_sidebar_code(). newline is the line separator the page was written with. Returns None if the
+    page has no sidebar code.
+    """
+    start = data.find(side_heading.format('Saved Reports').replace('\n', newline))
+    if start < 0:
+        return None
+    script = nav_bar_script.replace('\n', newline)
+    end = data.find(script, start)
+    if end < 0:
+        return None
+    return data[0: start] + body_sidebar_dynamic_data_placeholder + data[end + len(script):]
+
+
 def mark_item_active(data, itemname):
     '''Finds itemname in data, then marks that node as active. Return value is changed data'''
     pos = data.find(f'" href="{itemname}"')
@@ -6,6 +6,7 @@ metadata (creation/modification dates), and decrypting encrypted iTunes backups.
 
 Classes:
     FileInfo: Container for file metadata (source path, creation date, modification date)
+    LazyFile: Path of a matched file extracted from the input only when it is first read
     FileSeekerBase: Abstract base class for file searching implementations
     FileSeekerDir: File seeker for local directories
     FileSeekerItunes: File seeker for iTunes backups (supports encryption)
@@ -14,21 +15,30 @@ Classes:
     FileSeekerFile: File seeker for individual files
 
 Functions:
+    reflink_file: Creates a copy-on-write clone of a file where the file system supports it
     get_itunes_backup_type: Determines iTunes backup type (db/mbdb)
     get_itunes_backup_encryption: Checks if iTunes backup is encrypted
     check_itunes_backup_status: Validates iTunes backup status and encryption
     decrypt_itunes_backup: Decrypts encrypted iTunes backups using provided passcode
+    decrypt_itunes_file: Decrypts a file of an encrypted iTunes backup through a fixed size buffer
 """
 
 import time as timex
-import fnmatch
+import contextlib
+import ctypes
+import ctypes.util
+import errno
 import os
+import sys
 import tarfile
+import threading
 import hashlib
 import struct
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
 from pathlib import Path
-from shutil import copy2
+from shutil import copy2, copyfile, copyfileobj, copystat
 from zipfile import ZipFile
 from fnmatch import _compile_pattern
 from functools import lru_cache
@@ -38,11 +48,35 @@ import cryptography.hazmat.primitives.keywrap as crypt
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
 
-from scripts.ilapfuncs import get_plist_file_content, get_plist_content, logfunc, \
+from scripts.ilapfuncs import get_plist_file_content, logfunc, \
     is_platform_windows, open_sqlite_db_readonly, sanitize_file_path
 from scripts.filetype import guess_mime
+from scripts.search_index import PathIndex, PatternFilter, match_patterns
+from scripts.content_store import open_output
+from scripts.file_hashing import hash_file
+from scripts.compact_listing import CompactListing
+from scripts.directory_walker import DirectoryWalker, ListingStats, ENTRY_DIRECTORY, ENTRY_FILE
+from scripts.gzip_index import open_gzip_index
+from scripts.zstd_index import is_zstd_file, open_zstd_index
+from scripts.nested_archives import NESTED_CONTENTS_SUFFIX, NestedArchives
+from scripts.itunes_manifest import ManifestMetadata, read_mbdb
+from scripts.zip_extraction import ParallelZipExtractor, default_extract_workers
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
 normcase = lru_cache(maxsize=None)(os.path.normcase)
+
+FS_MODES = ('copy', 'reflink', 'hardlink', 'inplace')
+FICLONE = 0x40049409
+COPY_BUFFER_SIZE = 1024 * 1024
+TAR_COPY_BUFFER_SIZE = 1024 * 1024
+ITUNES_DECRYPT_BUFFER_SIZE = 1024 * 1024
+# Apple uses a 0'd out 16-byte IV
+ITUNES_IV = b'\x00' * 16
+SQLITE_JOURNAL_SUFFIXES = ('-wal', '-journal', '-shm')
 domains = {
     "AppDomain-": "private/var/mobile/Containers/Data/Application",
     "AppDomainGroup-": "private/var/mobile/Containers/Shared/AppGroup",
@@ -69,6 +103,30 @@ domains = {
 }
 
 
+# File transfer functions
+def reflink_file(source, destination):
+    '''
+    Creates destination as a copy-on-write clone of source (btrfs, XFS, APFS...).
+    Raises OSError if the platform or the file system does not support it.
+    '''
+    if sys.platform.startswith('linux') and fcntl:
+        with open(source, 'rb') as source_file, open(destination, 'wb') as destination_file:
+            try:
+                fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+                return
+            except OSError:
+                pass
+        os.remove(destination)
+        raise OSError(errno.EOPNOTSUPP, 'Reflinks are not supported on this file system', source)
+    if sys.platform == 'darwin':
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        if libc.clonefile(os.fsencode(source), os.fsencode(destination), 0) == 0:
+            return
+        error = ctypes.get_errno()
+        raise OSError(error, os.strerror(error), source)
+    raise OSError(errno.EOPNOTSUPP, 'Reflinks are not supported on this platform', source)
+
+
 # iTunes backups functions
 def get_itunes_backup_type(directory):
     """
@@ -262,6 +320,41 @@ def decrypt_itunes_backup(directory, passcode):
     return (protection_classes, unwrapped_manifest_key), "Decryption successful"
 
 
+def decrypt_itunes_file(key, source_path, destination_path, size=None, output_file=open_output):
+    '''
+    Decrypts the AES-CBC encrypted file source_path to destination_path through a fixed size
+    buffer, so that memory use does not depend on the size of the file.
+    If size is given, only the first size bytes are written (the padding is dropped).
+    output_file opens destination_path for writing (FileSeekerBase.output_file to write through
+    the content store and hash the decrypted content).
+    '''
+    decryptor = Cipher(algorithms.AES(key), modes.CBC(ITUNES_IV)).decryptor()
+    buffer = bytearray(ITUNES_DECRYPT_BUFFER_SIZE)
+    output = bytearray(ITUNES_DECRYPT_BUFFER_SIZE + 15)
+    remaining = size
+    with open(source_path, 'rb') as source, output_file(destination_path) as destination:
+        while True:
+            count = source.readinto(buffer)
+            if not count:
+                break
+            decrypted = decryptor.update_into(memoryview(buffer)[:count], output)
+            if remaining is not None:
+                decrypted = min(decrypted, remaining)
+                remaining -= decrypted
+            destination.write(memoryview(output)[:decrypted])
+        final = decryptor.finalize()
+        destination.write(final if remaining is None else final[:remaining])
+
+
+def synchronized(method):
+    '''Runs a seeker method holding the search lock of the seeker, searches can run on a prefetch thread'''
+    @wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.search_lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
 class FileInfo:
     """
     A class to store file metadata information.
@@ -269,12 +362,45 @@ class FileInfo:
         source_path (str): The full path to the source file.
         creation_date (datetime): The date and time when the file was created.
         modification_date (datetime): The date and time when the file was last modified.
+        hashes (dict): The hex digests of the content of the file by algorithm, when hashing is enabled.
+        path_id (int): The id of the file in the _file_path_list LAVA table, the same in every run.
     """
 
     def __init__(self, source_path, creation_date, modification_date):
         self.source_path = source_path
         self.creation_date = creation_date
         self.modification_date = modification_date
+        self.hashes = {}
+
+    @property
+    def path_id(self):
+        '''Returns a positive 63-bit id derived from the SHA-1 of the source path, like the media item ids'''
+        digest = hashlib.sha1(self.source_path.encode('utf-8', 'surrogateescape')).digest()
+        return int.from_bytes(digest[:8], 'big') >> 1
+
+
+class LazyFile(str):
+    """
+    Path of a matched file whose extraction from the input is deferred until it is first read.
+    It is the str path the file is extracted to, so it can be used like the paths returned
+    for eagerly extracted files, but the file only exists on disk after materialize(),
+    open(), or one of the ilapfuncs helpers reading files was called with it.
+    Attributes:
+        seeker (FileSeekerBase): The seeker that deferred the extraction.
+    """
+
+    def __new__(cls, path, seeker):
+        lazy_file = super().__new__(cls, path)
+        lazy_file.seeker = seeker
+        return lazy_file
+
+    def materialize(self):
+        '''Extracts the file if it was not yet, and returns its path'''
+        return self.seeker.materialize(str(self))
+
+    def open(self, mode='rb', **kwargs):
+        '''Extracts the file if it was not yet, and opens it'''
+        return open(self.materialize(), mode, **kwargs)  # pylint: disable=unspecified-encoding
 
 
 class FileSeekerBase:
@@ -282,13 +408,289 @@ class FileSeekerBase:
     Abstract base class for file seeking operations.
     This class provides an interface for searching files and performing cleanup operations
     in different storage contexts (e.g., filesystem, archives, databases).
+    Seekers working from a listing of the extraction (directory walk, archive members,
+    backup manifest) expose it through listing_entries() and entry_name(), and get
+    indexed pattern matching and single pass search planning from this class.
+    Searches with lazy=True return LazyFile paths for the matched files: the file
+    metadata is recorded in file_infos right away, but the extraction is deferred
+    until the file is materialized.
+    Archives of the extraction expanded by expand_nested_archives() are listed in nested,
+    and searches also match their members, as paths below the path of the archive.
+    Attributes:
+        match_prefix (str): String prepended to each entry name before pattern matching.
+        nested (NestedArchives): The nested archives expanded, None if there are none.
+        content_store (ContentStore): Optional store the extracted files are written through,
+            each content being stored once.
+        hasher (FileHasher): Optional digest algorithms the files are hashed with while they are
+            written, the digests are set in their FileInfo.
+        io_stats (dict): [bytes read, bytes written, seconds] spent extracting each path.
+        search_lock (threading.RLock): Held by searches and extractions, which are not thread safe.
     """
-    def search(self, filepattern, return_on_first_hit=False):
+    match_prefix = "root/"
+
+    def __init__(self, content_store=None, hasher=None):
+        self.content_store = content_store
+        self.hasher = hasher
+        self.file_infos = {}
+        self.io_stats = {}
+        self._io_lock = threading.Lock()
+        self.search_lock = threading.RLock()
+        self._index = None
+        self._keys = None
+        self._planned = {}
+        self._deferred = {}
+        self.nested = None
+
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         '''Returns a list of paths for files/folders that matched'''
         raise NotImplementedError
 
+    def extract_planned(self, filepatterns):  # pylint: disable=unused-argument
+        '''
+        Extracts the files matched by the planned filepatterns ahead of the searches.
+        Only done by seekers whose input is read much faster in a single ordered pass.
+        '''
+
+    def defer(self, path, extract):
+        '''Records extract, the callable writing the file at path, and returns the LazyFile for path'''
+        self._deferred[path] = extract
+        return LazyFile(path, self)
+
+    @synchronized
+    def materialize(self, path):
+        '''Runs the deferred extraction of the file at path, if any. Returns the path to read the file from.'''
+        extract = self._deferred.pop(path, None)
+        if extract is not None:
+            try:
+                extract()
+            except OSError as ex:
+                logfunc(f'Could not write file to filesystem, path was {path} ' + str(ex))
+        return path
+
+    def materialize_all(self, paths):
+        '''Runs the deferred extraction of all paths'''
+        for path in paths:
+            self.materialize(path)
+
+    def record_io(self, path, bytes_read=0, bytes_written=0, seconds=0):
+        '''Adds the I/O done to extract the file at path to io_stats, from any thread'''
+        with self._io_lock:
+            stats = self.io_stats.setdefault(path, [0, 0, 0])
+            stats[0] += bytes_read
+            stats[1] += bytes_written
+            stats[2] += seconds
+
+    def _set_hashes(self, path, digests):
+        '''Sets the digests in the FileInfo of the file at path'''
+        file_info = self.file_infos.get(path)
+        if file_info is not None:
+            file_info.hashes = digests
+
+    @contextlib.contextmanager
+    def output_file(self, path, key=None):
+        '''
+        Opens the file at path for writing, through the content store and hashing what is written
+        if they are enabled. key is the (source path, size, modification time) of the file, used to
+        reuse its digests from a previous run instead of hashing it.
+        '''
+        digests = self.hasher.lookup(key) if self.hasher else None
+        hash_algorithms = self.hasher.algorithms if self.hasher and digests is None else ()
+        start = timex.perf_counter()
+        with open_output(path, self.content_store, hash_algorithms) as output:
+            yield output
+        self.record_io(path, bytes_written=os.path.getsize(path), seconds=timex.perf_counter() - start)
+        if hash_algorithms:
+            digests = output.hexdigests()
+            self.hasher.record(key, digests)
+        if digests:
+            self._set_hashes(path, digests)
+
+    def copy_file(self, source, destination, key=None):
+        '''
+        Copies the content of the file source to destination, hashing it and writing it
+        through the content store if they are enabled.
+        '''
+        if self.content_store is None and (self.hasher is None or self.hash_original(source, destination, key)):
+            start = timex.perf_counter()
+            copyfile(source, destination)
+            size = os.path.getsize(destination)
+            self.record_io(destination, size, size, timex.perf_counter() - start)
+            return
+        with open(source, 'rb') as input_file, self.output_file(destination, key) as output:
+            copyfileobj(input_file, output, COPY_BUFFER_SIZE)
+            self.record_io(destination, bytes_read=input_file.tell())
+
+    def hash_original(self, source, path, key=None, read=False):
+        '''
+        Sets the digests of source, the original of the file at path, if they are known from a
+        previous run, or if read is True by reading it. Returns True if the digests were set.
+        '''
+        digests = self.hasher.lookup(key)
+        if digests is None and read:
+            start = timex.perf_counter()
+            digests = hash_file(source, self.hasher.algorithms)
+            self.record_io(path, bytes_read=os.path.getsize(source), seconds=timex.perf_counter() - start)
+            self.hasher.record(key, digests)
+        if digests:
+            self._set_hashes(path, digests)
+        return bool(digests)
+
+    def expand_nested_archives(self, archive_patterns):
+        '''
+        Indexes the archives of the extraction matching archive_patterns (e.g. the sysdiagnose
+        tarballs), so that the following searches also match their members, as virtual paths
+        <archive source path>/<member name>, for the patterns reaching into an archive. Archives
+        are only read, members are extracted when a search matches them.
+        '''
+        nested = NestedArchives(archive_patterns)
+        expanded = set()
+        for pattern in archive_patterns:
+            for data_path in self.search(pattern, lazy=True):
+                file_info = self.file_infos.get(data_path)
+                if file_info is None or file_info.source_path in expanded:
+                    continue
+                expanded.add(file_info.source_path)
+                path, contents_path = self.nested_archive_paths(data_path, file_info)
+                nested.add(file_info.source_path, path, contents_path)
+        if nested.archives:
+            logfunc(f'Nested archives: {len(nested.archives)} archives, {len(nested.listing)} files')
+            self.nested = nested
+
+    def nested_archive_paths(self, data_path, file_info):  # pylint: disable=unused-argument
+        '''
+        Returns the path the nested archive found at data_path is read from, and the folder
+        its members are extracted to.
+        '''
+        return self.materialize(data_path), str(data_path) + NESTED_CONTENTS_SUFFIX
+
+    def _search_nested(self, filepattern, pathlist, return_on_first_hit=False, force=False, lazy=False):
+        '''Appends to pathlist the paths of the members of the nested archives matching filepattern'''
+        if self.nested is None or (return_on_first_hit and pathlist):
+            return
+        nested = self.nested
+        for position in nested.matching_positions(filepattern, normcase(self.match_prefix)):
+            data_path = nested.extracted.get(position)
+            if data_path is None or force:
+                archive, member = nested.member(position)
+                data_path = nested.data_path(position)
+                extract = partial(archive.extract, member, data_path, self.output_file)
+                self.file_infos[data_path] = FileInfo(nested.listing[position], 0,
+                                                      archive.modification_date(member))
+                if lazy:
+                    data_path = self.defer(data_path, extract)
+                else:
+                    try:
+                        extract()
+                    except OSError as ex:
+                        logfunc(f'Could not write file to filesystem, path was {nested.listing[position]} ' + str(ex))
+                        self.file_infos.pop(data_path, None)
+                        continue
+                nested.extracted[position] = data_path
+            elif not lazy:
+                self.materialize(data_path)
+            pathlist.append(data_path)
+            if return_on_first_hit:
+                return
+
     def cleanup(self):
         '''close any open handles'''
+        if self.nested is not None:
+            self.nested.close()
+            self.nested = None
+
+    def is_in_place_path(self, path):  # pylint: disable=unused-argument
+        '''Returns True if path is read directly from the extraction instead of from a copy in the data folder'''
+        return False
+
+    def listing_entries(self):
+        '''Returns the list of entries of the extraction listing'''
+        return []
+
+    def entry_name(self, entry):
+        '''Returns the path of a listing entry, as matched against the search patterns'''
+        return entry
+
+    def listing_keys(self):
+        '''Returns the normcase'd names of the listing entries, matched against the search patterns'''
+        return [normcase(self.entry_name(entry)) for entry in self.listing_entries()]
+
+    def _get_index(self):
+        '''Builds the PathIndex over the listing on first use'''
+        if self._index is None:
+            self._keys = self.listing_keys()
+            self._index = PathIndex(self._keys)
+        return self._index
+
+    def matching_positions(self, filepattern):
+        '''Returns the sorted positions in the listing of the entries matching filepattern'''
+        positions = self._planned.get(filepattern)
+        if positions is None:
+            index = self._get_index()
+            positions = match_patterns([filepattern], self._keys, index, normcase(self.match_prefix))[filepattern]
+        return positions
+
+    def entry_size(self, position):  # pylint: disable=unused-argument
+        '''Returns the size in bytes of the listing entry at position, None if the listing has no sizes'''
+        return None
+
+    def planned_size(self, filepattern):
+        '''Returns the total size in bytes of the listing entries planned for filepattern, None if unknown'''
+        positions = self._planned.get(filepattern)
+        if positions is None:
+            return None
+        total = 0
+        for position in positions:
+            size = self.entry_size(position)  # pylint: disable=assignment-from-none
+            if size is None:
+                return None
+            total += size
+        return total
+
+    def entry_fingerprint(self, position):  # pylint: disable=unused-argument
+        '''
+        Returns a JSON serializable value that changes when the content of the listing entry at
+        position changes, from its metadata or digests, None if the listing has no such metadata
+        '''
+        return None
+
+    def planned_fingerprints(self, filepattern):
+        '''
+        Returns the [name, fingerprint] pairs of the listing entries planned for filepattern,
+        None if unknown or if the pattern matches members of nested archives
+        '''
+        positions = self._planned.get(filepattern)
+        if positions is None:
+            return None
+        if self.nested is not None and self.nested.matching_positions(filepattern, normcase(self.match_prefix)):
+            return None
+        entries = self.listing_entries()
+        fingerprints = []
+        for position in positions:
+            fingerprint = self.entry_fingerprint(position)  # pylint: disable=assignment-from-none
+            if fingerprint is None:
+                return None
+            fingerprints.append([self.entry_name(entries[position]), fingerprint])
+        return fingerprints
+
+    def matching_files(self, filepattern):
+        '''Yields the listing entries matching filepattern, in listing order'''
+        entries = self.listing_entries()
+        for position in self.matching_positions(filepattern):
+            yield entries[position]
+
+    def plan_searches(self, filepatterns):
+        '''
+        Matches all filepatterns against the listing in a single pass, so that later
+        calls to search() only have to extract the planned entries.
+        Returns:
+            dict: Maps each pattern to the names of the matching listing entries.
+        '''
+        entries = self.listing_entries()
+        index = self._get_index()
+        pending = [pattern for pattern in dict.fromkeys(filepatterns) if pattern not in self._planned]
+        self._planned.update(match_patterns(pending, self._keys, index, normcase(self.match_prefix)))
+        return {pattern: [self.entry_name(entries[position]) for position in self._planned[pattern]]
+                for pattern in filepatterns}
 
 
 class FileSeekerDir(FileSeekerBase):
@@ -299,76 +701,251 @@ class FileSeekerDir(FileSeekerBase):
     Attributes:
         directory (str): The root directory to search within.
         data_folder (str): The destination folder where matched files will be copied.
-        _all_files (list): Internal list containing all file paths found in the directory tree.
+        _all_files (CompactListing): All file paths found in the directory tree.
+        _stats (ListingStats): Stat data captured during the walk, aligned with _all_files.
+        _unrefreshed (bytearray): Set for the entries of a listing reused from the listing cache whose
+            stat data has not been refreshed yet, None for a listing walked during this run.
+        walk_workers (int): Number of threads listing the directory tree.
+        listing_cache (ListingCache): Optional cache the listing is loaded from and saved to.
+        walk_patterns (list): The search patterns of the selected artifacts when the listing only holds
+            the entries they match (partial walk), None when it holds the whole extraction.
+        fs_mode (str): How matched files are made available to the artifacts, one of FS_MODES:
+            'copy' copies them to data_folder, 'reflink' and 'hardlink' link them into data_folder
+            (falling back to a copy when the file system does not allow it) and 'inplace'
+            returns the paths of the original files, which are then only read.
         searched (dict): Cache of search results, mapping file patterns to lists of matched paths.
         copied (dict): Mapping of source file paths to their copied destination paths.
         file_infos (dict): Dictionary storing FileInfo objects with metadata for copied files.
     Methods:
-        build_files_list(directory): Recursively scans directory and populates _all_files list.
+        build_files_list(directory, entry_filter=None): Scans directory with a DirectoryWalker and
+            populates _all_files list.
+        complete_listing(): Replaces a partial listing by the listing of the whole extraction.
         search(filepattern, return_on_first_hit=False, force=False): Searches for files matching
             the given pattern, copies them to data_folder, and returns matching paths.
+        is_in_place_path(path): Returns True if path is an original file of the extraction read in place.
+        copy_original(path): Copies an original file read in place and its SQLite journals to data_folder.
+        get_hash_key(item): Returns the key identifying the digests of an original file in previous runs.
     """
 
-    def __init__(self, directory, data_folder):
-        FileSeekerBase.__init__(self)
+    def __init__(self, directory, data_folder, walk_workers=None, listing_cache=None, fs_mode='copy',
+                 content_store=None, hasher=None, walk_patterns=None):
+        FileSeekerBase.__init__(self, content_store, hasher)
         self.directory = directory
-        self._all_files = []
+        self._all_files = CompactListing()
+        self._stats = ListingStats()
+        self._unrefreshed = None
+        self.walk_workers = walk_workers
+        self.listing_cache = listing_cache
+        self.walk_patterns = None
+        self.fs_mode = fs_mode
+        self.in_place = fs_mode == 'inplace'
+        self._directory_prefix = os.path.join(os.path.abspath(directory), '')
+        self.original_copies = {}
         self.data_folder = data_folder
         logfunc('Building files listing...')
-        self.build_files_list(directory)
+        cached_listing = listing_cache.load_directory_listing() if listing_cache else None
+        if cached_listing:
+            # Only the directories were checked, the stat data of the files is refreshed when they are matched
+            self._all_files, self._stats = cached_listing
+            self._unrefreshed = bytearray(b'\x01') * len(self._all_files)
+        elif walk_patterns is not None:
+            # Only the entries the selected artifacts can match are listed (and not cached)
+            self.walk_patterns = set(walk_patterns)
+            pattern_filter = PatternFilter(self.walk_patterns, normcase(self.match_prefix))
+            self.build_files_list(directory, lambda path: pattern_filter(normcase(path)))
+            logfunc(f'Partial listing for {len(self.walk_patterns)} search patterns')
+        else:
+            self.build_files_list(directory)
+            if listing_cache:
+                listing_cache.store_directory_listing(self._all_files, self._stats)
         logfunc(f'File listing complete - {len(self._all_files)} files')
+        self._get_index()
         self.searched = {}
         self.copied = {}
         self.file_infos = {}
 
-    def build_files_list(self, directory):
-        '''Populates all paths in directory into _all_files'''
-        try:
-            files_list = os.scandir(directory)
-            for item in files_list:
-                self._all_files.append(item.path)
-                if item.is_dir(follow_symlinks=False):
-                    self.build_files_list(item.path)
-        except OSError as ex:
-            logfunc(f'Error reading {directory} ' + str(ex))
-
-    def search(self, filepattern, return_on_first_hit=False, force=False):
+    def build_files_list(self, directory, entry_filter=None):
+        '''
+        Populates all paths in directory into _all_files, and their stat data into _stats.
+        If entry_filter is given, only the paths it accepts are listed.
+        '''
+        self._all_files, self._stats = DirectoryWalker(self.walk_workers, entry_filter=entry_filter).walk(directory)
+
+    def complete_listing(self):
+        '''
+        Replaces a partial listing by the listing of the whole extraction, for the searches of
+        patterns that are not in walk_patterns. The results of the searches already done stay
+        valid, as they only matched listed entries.
+        '''
+        logfunc('Searching a pattern outside of the partial listing, listing the whole extraction...')
+        self.walk_patterns = None
+        self.build_files_list(self.directory)
+        self._unrefreshed = None
+        if self.listing_cache:
+            self.listing_cache.store_directory_listing(self._all_files, self._stats)
+        logfunc(f'File listing complete - {len(self._all_files)} files')
+        self._index = None
+        self._keys = None
+        self._planned = {}
+
+    def _cover_patterns(self, filepatterns):
+        '''Completes a partial listing if it does not cover all filepatterns'''
+        if self.walk_patterns is not None and not self.walk_patterns.issuperset(filepatterns):
+            self.complete_listing()
+
+    @synchronized
+    def plan_searches(self, filepatterns):
+        self._cover_patterns(filepatterns)
+        return FileSeekerBase.plan_searches(self, filepatterns)
+
+    def listing_entries(self):
+        return self._all_files
+
+    def listing_keys(self):
+        return self._all_files.normcased()
+
+    def _entry_stats(self, position):
+        '''
+        Returns the (kind, size, atime, mtime, ctime) of the entry at position. Files rewritten in
+        place do not change the modification time of their directory, so the stat data of a
+        listing reused from the listing cache is refreshed the first time an entry is used.
+        '''
+        if self._unrefreshed is not None and self._unrefreshed[position]:
+            self._unrefreshed[position] = 0
+            return self._stats.refresh(position, self._all_files[position])
+        return self._stats.get(position)
+
+    def entry_size(self, position):
+        kind, size = self._entry_stats(position)[:2]
+        return size if kind == ENTRY_FILE else 0
+
+    def entry_fingerprint(self, position):
+        kind, size, _, mtime, _ = self._entry_stats(position)
+        if kind != ENTRY_FILE:
+            return 'directory'
+        if self.hasher is None:
+            return [size, mtime]
+        # The files are hashed anyway, the digests are reused when they are copied and by the next runs
+        item = self._all_files[position]
+        key = (item, size, mtime)
+        digests = self.hasher.lookup(key)
+        if digests is None:
+            digests = hash_file(item, self.hasher.algorithms)
+            self.hasher.record(key, digests)
+        return digests
+
+    def get_data_path(self, item):
+        '''Returns the path of the copy of item in data_folder'''
+        item_rel_path = item.replace(self.directory, '')
+        data_path = os.path.join(self.data_folder, item_rel_path[1:])
+        if is_platform_windows():
+            data_path = data_path.replace('/', '\\')
+        return data_path
+
+    def nested_archive_paths(self, data_path, file_info):
+        # Nested archives are read from the extraction, their members extracted next to their data path
+        return file_info.source_path, self.get_data_path(file_info.source_path) + NESTED_CONTENTS_SUFFIX
+
+    def is_in_place_path(self, path):
+        return self.in_place and os.path.abspath(path).startswith(self._directory_prefix)
+
+    def get_hash_key(self, item):
+        '''Returns the (path, size, modification time) identifying the digests of the original file item'''
+        stat = os.stat(item)
+        return item, stat.st_size, stat.st_mtime
+
+    def transfer_file(self, source, destination, access_date, modification_date):
+        '''Makes source available at destination according to fs_mode'''
+        os.makedirs(os.path.dirname(destination), exist_ok=True)
+        if os.path.lexists(destination):
+            # Never write through an existing hard link to the original file
+            os.remove(destination)
+        key = self.get_hash_key(source) if self.hasher else None
+        if self.fs_mode == 'hardlink':
+            try:
+                # A hard link shares the inode, and so the timestamps, of the original
+                os.link(source, destination)
+                if self.hasher:
+                    self.hash_original(source, destination, key, read=True)
+                return
+            except OSError:
+                pass
+        elif self.fs_mode == 'reflink':
+            try:
+                reflink_file(source, destination)
+                os.utime(destination, (access_date, modification_date))
+                if self.hasher:
+                    self.hash_original(source, destination, key, read=True)
+                return
+            except OSError:
+                pass
+        self.copy_file(source, destination, key)
+        os.utime(destination, (access_date, modification_date))
+
+    def copy_original(self, path):
+        '''
+        Copies an original file read in place, and its SQLite -wal/-journal/-shm files,
+        to data_folder. Used for databases that cannot be opened as immutable because
+        their journal holds data not yet written to the database file.
+        Returns:
+            str: The path of the copy.
+        '''
+        if path in self.original_copies:
+            return self.original_copies[path]
+        data_path = self.get_data_path(path)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        for suffix in ('',) + SQLITE_JOURNAL_SUFFIXES:
+            if os.path.isfile(path + suffix):
+                copy2(path + suffix, data_path + suffix)
+        self.original_copies[path] = data_path
+        return data_path
+
+    @synchronized
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
+            if not lazy:
+                self.materialize_all(pathlist)
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
+        self._cover_patterns((filepattern,))
         pathlist = []
-        pat = _compile_pattern(normcase(filepattern))
-        root = normcase("root/")
-        for item in self._all_files:
-            if pat(root + normcase(item)) is not None:
-                item_rel_path = item.replace(self.directory, '')
-                data_path = os.path.join(self.data_folder, item_rel_path[1:])
-                if is_platform_windows():
-                    data_path = data_path.replace('/', '\\')
-                if item not in self.copied or force:
-                    try:
-                        if os.path.isdir(item):
-                            pass
-                        elif os.path.isfile(item):
-                            os.makedirs(os.path.dirname(data_path), exist_ok=True)
-                            copy2(item, data_path)
-                            self.copied[item] = data_path
-                            creation_date = Path(item).stat().st_ctime
-                            modification_date = Path(item).stat().st_mtime
-                            file_info = FileInfo(item, creation_date, modification_date)
-                            self.file_infos[data_path] = file_info
+        for position in self.matching_positions(filepattern):
+            item = self._all_files[position]
+            data_path = item if self.in_place else self.get_data_path(item)
+            if item not in self.copied or force:
+                try:
+                    kind, _, access_date, modification_date, creation_date = self._entry_stats(position)
+                    if kind == ENTRY_DIRECTORY:
+                        pass
+                    elif kind == ENTRY_FILE:
+                        # Registered first, the digests computed during the transfer are set in it
+                        self.file_infos[data_path] = FileInfo(item, creation_date, modification_date)
+                        if self.in_place:
+                            if self.hasher:
+                                self.hash_original(item, data_path, self.get_hash_key(item), read=True)
+                        elif lazy:
+                            data_path = self.defer(data_path, partial(
+                                self.transfer_file, item, data_path, access_date, modification_date))
                         else:
-                            logfunc(f"INFO: Item '{item}' is neither a file nor a directory "
-                                    "(e.g. symlink not followed, or broken). Skipped.")
-                    except OSError as ex:
-                        logfunc(f'Could not copy {item} to {data_path} ' + str(ex))
-                else:
-                    data_path = self.copied[item]
-                pathlist.append(data_path)
-                if return_on_first_hit:
-                    self.searched[filepattern] = pathlist
-                    return data_path
+                            self.transfer_file(item, data_path, access_date, modification_date)
+                        self.copied[item] = data_path
+                    else:
+                        logfunc(f"INFO: Item '{item}' is neither a file nor a directory "
+                                "(e.g. symlink not followed, or broken). Skipped.")
+                except OSError as ex:
+                    logfunc(f'Could not copy {item} to {data_path} ' + str(ex))
+                    self.file_infos.pop(data_path, None)
+            else:
+                data_path = self.copied[item]
+                if not lazy:
+                    self.materialize(data_path)
+            pathlist.append(data_path)
+            if return_on_first_hit:
+                break
+        self._search_nested(filepattern, pathlist, return_on_first_hit, force, lazy)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
         return pathlist
 
 
@@ -383,47 +960,68 @@ class FileSeekerItunes(FileSeekerBase):
         data_folder (str): The folder where the extracted files will be stored.
         backup_type (str): The type of backup, either 'db' or 'mbdb'.
         decryption_keys (list): A list of keys used for decrypting files, if applicable.
-        _all_files (dict): A dictionary mapping full file paths to their corresponding hash filenames.
-        _all_file_meta (dict): A dictionary storing metadata for each file.
-        files_metadata (dict): A dictionary mapping hash filenames to their metadata.
+        extract_workers (int): Number of threads copying or decrypting batches of matched files.
+        _all_files (CompactListing): The full paths of the files of the backup.
+        _hashes (bytearray): The SHA-1 hash filenames of the files, 20 bytes per listing position.
+        files_metadata (ManifestMetadata): The raw metadata of the files by hash filename, decoded on demand.
+        mbdb_records (dict): The MbdbRecord (mode, size, times) of the files of an mbdb backup by hash filename.
         searched (dict): A dictionary storing search results for file patterns.
         copied (dict): A dictionary tracking copied files and their destinations.
         file_infos (dict): A dictionary storing file information such as creation and modification dates.
     Methods:
-        __init__(directory, data_folder, backup_type, decryption_keys):
+        __init__(directory, data_folder, backup_type, decryption_keys, extract_workers=None,
+                 content_store=None, hasher=None):
             Initializes the FileSeekerItunes instance and builds the file listing based on the backup type.
         get_root_path_from_domain(domain):
             Retrieves the root path associated with a given domain.
         build_files_list_from_manifest_db(manifest_path):
             Populates paths from Manifest.db files into _all_files.
         build_files_list_from_manifest_mbdb(manifest_path):
-            Populates paths from Manifest.mbdb files into _all_files.
-        search(filepattern, return_on_first_hit=False, force=False):
+            Populates paths from Manifest.mbdb files into _all_files and their records into mbdb_records.
+        hash_filename(position):
+            Returns the hash filename of the file at position in the listing.
+        get_file_key(position):
+            Returns the unwrapped encryption key of a file of an encrypted backup.
+        extract_file(position, original_location, data_path):
+            Copies a backup file to data_path, decrypting it if needed.
+        extract_members(pending):
+            Copies or decrypts a batch of backup files concurrently.
+        extract_planned(filepatterns):
+            Extracts all the files matched by planned patterns in a single batch.
+        search(filepattern, return_on_first_hit=False, force=False, lazy=False):
             Searches for files matching the given pattern and returns their paths.
+        cleanup():
+            Stops the extraction threads.
     """
+    match_prefix = ""
 
-    def __init__(self, directory, data_folder, backup_type, decryption_keys):
-        FileSeekerBase.__init__(self)
+    def __init__(self, directory, data_folder, backup_type, decryption_keys, extract_workers=None,
+                 content_store=None, hasher=None):
+        FileSeekerBase.__init__(self, content_store, hasher)
         self.directory = directory
-        self._all_files = {}
-        self._all_file_meta = {}
+        self._all_files = CompactListing()
+        self._hashes = bytearray()
         self.data_folder = data_folder
-        self.files_metadata = {}
+        self.files_metadata = ManifestMetadata()
+        self.mbdb_records = {}
         self.decryption_keys = decryption_keys
         self.backup_type = backup_type
+        self.extract_workers = extract_workers or default_extract_workers()
+        self._executor = None
+        # Unwrapped keys of the protection classes and of the files already extracted
+        self._class_keys = {}
+        self._file_keys = {}
+        if decryption_keys:
+            self._class_keys = {protection_class: value['Unwrapped']
+                                for protection_class, value in decryption_keys[0].items() if 'Unwrapped' in value}
         logfunc('Building files listing...')
         if backup_type == "db":
             manifest_path = os.path.join(directory, "Manifest.db")
             if decryption_keys:
-                unwrapped_manifest_key = decryption_keys[1]
-                with open(manifest_path, "rb") as manifest_contents:
-                    cipher = Cipher(algorithms.AES(unwrapped_manifest_key),
-                                    modes.CBC(b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'))
-                    decryptor = cipher.decryptor()
-                    decrypted_manifest_contents = decryptor.update(manifest_contents.read()) + decryptor.finalize()
-                    manifest_path = os.path.join(data_folder, "Manifest.db")
-                    with open(manifest_path, "wb") as new_manifest_contents:
-                        new_manifest_contents.write(decrypted_manifest_contents)
+                decrypted_manifest_path = os.path.join(data_folder, "Manifest.db")
+                os.makedirs(data_folder, exist_ok=True)
+                decrypt_itunes_file(decryption_keys[1], manifest_path, decrypted_manifest_path)
+                manifest_path = decrypted_manifest_path
 
             self.build_files_list_from_manifest_db(manifest_path)
         elif backup_type == "mbdb":
@@ -434,6 +1032,22 @@ class FileSeekerItunes(FileSeekerBase):
         self.copied = {}
         self.file_infos = {}
 
+    def listing_entries(self):
+        return self._all_files
+
+    def listing_keys(self):
+        return self._all_files.normcased()
+
+    def _set_files(self, files):
+        '''Stores the files of the backup, a dict of full path to hash filename, in _all_files and _hashes'''
+        for full_path, hash_filename in files.items():
+            self._all_files.append(full_path)
+            self._hashes += bytes.fromhex(hash_filename)
+
+    def hash_filename(self, position):
+        '''Returns the hash filename of the file at position in the listing'''
+        return self._hashes[position * 20:position * 20 + 20].hex()
+
     def get_root_path_from_domain(self, domain):
         """
         Retrieve the root path associated with a given domain.
@@ -454,6 +1068,7 @@ class FileSeekerItunes(FileSeekerBase):
 
     def build_files_list_from_manifest_db(self, manifest_path):
         '''Populates paths from Manifest.db files into _all_files'''
+        files = {}
         try:
             db = open_sqlite_db_readonly(manifest_path)
             cursor = db.cursor()
@@ -472,231 +1087,366 @@ class FileSeekerItunes(FileSeekerBase):
                 relative_path = row[2]
                 file_metadata = row[3]
                 full_path = os.path.join(root_path, relative_path)
-                self._all_files[full_path] = hash_filename
-                if self.decryption_keys:
-                    # Load the file's plist and find the encryption key
-                    tmp_file_plist = get_plist_content(row[3])
-                    tmp_wrapped_key = tmp_file_plist["EncryptionKey"]["NS.data"]
-
-                    # Store the results into a dict for future
-                    self._all_file_meta[full_path] = {}
-                    self._all_file_meta[full_path]['Class'] = int.from_bytes(tmp_wrapped_key[0:4], byteorder="little")
-                    self._all_file_meta[full_path]['Key'] = tmp_wrapped_key[4:]
-                    self._all_file_meta[full_path]['Size'] = tmp_file_plist["Size"]
-                self.files_metadata[hash_filename] = file_metadata
+                files[full_path] = hash_filename
+                # Decoded when the file is matched (encryption key, size and dates)
+                self.files_metadata.add(hash_filename, file_metadata)
             db.close()
+            self._set_files(files)
         except Exception as ex:
             logfunc(f'Error opening Manifest.db from {manifest_path}, ' + str(ex))
             raise ex
 
     def build_files_list_from_manifest_mbdb(self, manifest_path):
-        '''Populates paths from Manifest.mbdb files into _all_files'''
-        def getint(data, offset, intsize):
-            """Retrieve an integer (big-endian) and new offset from the current offset"""
-            value = 0
-            while intsize > 0:
-                value = (value << 8) + data[offset]
-                offset = offset + 1
-                intsize = intsize - 1
-            return value, offset
-
-        def getstring(data, offset, binary=False):
-            """Retrieve a string and new offset from the current offset into the data"""
-            if chr(data[offset]) == chr(0xFF) and chr(data[offset+1]) == chr(0xFF):
-                return '', offset+2  # Blank string
-            length, offset = getint(data, offset, 2)  # 2-byte length
-            value = "" if binary else data[offset:offset+length].decode()
-            return value, (offset + length)
-
-        def process_mbdb_file(manifest_path):
-            files = []
-            with open(manifest_path, 'rb') as f:
-                data = f.read()
-            if data[0:4].decode() != "mbdb":
-                raise UnicodeDecodeError("This does not look like an MBDB file")
-            offset = 4
-            offset = offset + 2  # value x05 x00, not sure what this is
-            while offset < len(data):
-                domain, offset = getstring(data, offset)
-                filename, offset = getstring(data, offset)
-                _, offset = getstring(data, offset, True)
-                _, offset = getstring(data, offset, True)
-                _, offset = getstring(data, offset, True)
-                _, offset = getint(data, offset, 2)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 4)
-                _, offset = getint(data, offset, 8)
-                _, offset = getint(data, offset, 1)
-                numprops, offset = getint(data, offset, 1)
-                for _ in range(numprops):
-                    _, offset = getstring(data, offset, True)
-                    _, offset = getstring(data, offset, True)
-                hash_filename = hashlib.sha1(f"{domain}-{filename}".encode()).hexdigest()
-                files.append((hash_filename, domain, filename))
-            return files
-
+        '''Populates paths from Manifest.mbdb files into _all_files and their records into mbdb_records'''
+        files = {}
         try:
-            all_rows = process_mbdb_file(manifest_path)
-            for row in all_rows:
-                hash_filename = row[0]
-                domain = row[1]
-                root_path = self.get_root_path_from_domain(domain)
-                relative_path = row[2]
-                full_path = os.path.join(root_path, relative_path)
-                self._all_files[full_path] = hash_filename
+            for record in read_mbdb(manifest_path):
+                hash_filename = hashlib.sha1(f"{record.domain}-{record.path}".encode()).hexdigest()
+                root_path = self.get_root_path_from_domain(record.domain)
+                full_path = os.path.join(root_path, record.path)
+                files[full_path] = hash_filename
+                self.mbdb_records[hash_filename] = record
+            self._set_files(files)
         except Exception as ex:
             logfunc(f'Error opening Manifest.mbdb from {self.directory}, ' + str(ex))
             raise ex
 
-    def search(self, filepattern, return_on_first_hit=False, force=False):
+    def get_file_key(self, position):
+        '''
+        Returns the unwrapped encryption key of the file at position in the listing, in an encrypted backup.
+        Raises KeyError if the protection class of the file is not in the keybag.
+        '''
+        file_key = self._file_keys.get(position)
+        if file_key is None:
+            wrapped_key = self.files_metadata.get(self.hash_filename(position))['EncryptionKey']
+            protection_class = int.from_bytes(wrapped_key[0:4], byteorder="little")
+            class_key = self._class_keys.get(protection_class)
+            if class_key is None:
+                logfunc(f'Can\'t locate the protection class for {self._all_files[position]}: {protection_class}')
+                raise KeyError(protection_class)
+            file_key = crypt.aes_key_unwrap(class_key, wrapped_key[4:])
+            self._file_keys[position] = file_key
+        return file_key
+
+    def extract_file(self, position, original_location, data_path):
+        '''Copies the backup file at position in the listing to data_path, decrypting it if the backup is encrypted'''
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+
+        # Handle encrypted backups differently, don't just copy the encrypted files
+        if self.decryption_keys:
+            # Only write the expected size, no padding
+            decrypt_itunes_file(self.get_file_key(position), original_location, data_path,
+                                self.files_metadata.get(self.hash_filename(position))['Size'], self.output_file)
+            self.record_io(data_path, bytes_read=os.path.getsize(original_location))
+
+        # If not encrypted, just copy the thing
+        else:
+            self.copy_file(original_location, data_path)
+            copystat(original_location, data_path)
+
+    def _extract_item(self, item):
+        '''Extracts one (position, original_location, data_path) item, returns (item, exception) if it failed'''
+        try:
+            self.extract_file(*item)
+        except (OSError, KeyError, ValueError) as ex:
+            return item, ex
+        return None
+
+    def extract_members(self, pending):
+        '''
+        Copies or decrypts (position, original_location, data_path) items, on a pool of
+        threads when there are several of them (the decryption releases the GIL).
+        Files that cannot be extracted are removed from copied and file_infos.
+        '''
+        if self.extract_workers > 1 and len(pending) > 1:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.extract_workers)
+            results = self._executor.map(self._extract_item, pending)
+        else:
+            results = map(self._extract_item, pending)
+        for (_, original_location, data_path), ex in filter(None, results):
+            logfunc(f'Could not copy {original_location} to {data_path} ' + str(ex))
+            self.copied.pop(original_location, None)
+            self.file_infos.pop(data_path, None)
+
+    def entry_fingerprint(self, position):
+        try:
+            stat = os.stat(self._original_location(position))
+        except OSError:
+            return None
+        return [stat.st_size, stat.st_mtime]
+
+    def _original_location(self, position):
+        '''Returns the path of the backup file holding the file at position in the listing'''
+        hash_filename = self.hash_filename(position)
+        if self.backup_type == "db":
+            return os.path.join(self.directory, hash_filename[:2], hash_filename)
+        return os.path.join(self.directory, hash_filename)
+
+    def _register_file(self, position, lazy):
+        '''
+        Records the matched file at position in the listing in copied and file_infos.
+        Returns its path in the data folder and its (position, original_location, data_path)
+        item if its extraction is pending.
+        '''
+        relative_path = self._all_files[position]
+        original_location = self._original_location(position)
+        if self.backup_type == "db":
+            metadata = self.files_metadata.get(self.hash_filename(position))
+            creation_date = metadata.get('Birth', 0)
+            modification_date = metadata.get('LastModified', 0)
+        else:
+            # mbdb records have no birth time, the inode change time is used like for single files
+            record = self.mbdb_records.get(self.hash_filename(position))
+            creation_date = record.ctime if record else 0
+            modification_date = record.mtime if record else 0
+        data_path = os.path.join(self.data_folder, sanitize_file_path(relative_path))
+        if is_platform_windows():
+            data_path = data_path.replace('/', '\\')
+        pending = None
+        if lazy:
+            data_path = self.defer(data_path, partial(
+                self.extract_file, position, original_location, data_path))
+        else:
+            pending = (position, original_location, data_path)
+        source_path = relative_path.replace('\\', '/')
+        self.file_infos[data_path] = FileInfo(source_path, creation_date, modification_date)
+        self.copied[original_location] = data_path
+        return data_path, pending
+
+    def extract_planned(self, filepatterns):
+        positions = sorted({position for pattern in filepatterns for position in self._planned.get(pattern, ())})
+        pending = []
+        for position in positions:
+            if self._original_location(position) in self.copied:
+                continue
+            _, item = self._register_file(position, False)
+            pending.append(item)
+        if pending:
+            logfunc(f'Extracting {len(pending)} planned files with {self.extract_workers} threads...')
+            self.extract_members(pending)
+
+    @synchronized
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
+            if not lazy:
+                self.materialize_all(pathlist)
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
         pathlist = []
-        matching_keys = fnmatch.filter(self._all_files, filepattern)
-        for relative_path in matching_keys:
-            hash_filename = self._all_files[relative_path]
-            if self.backup_type == "db":
-                original_location = os.path.join(self.directory, hash_filename[:2], hash_filename)
-                metadata = get_plist_content(self.files_metadata[hash_filename])
-                creation_date = metadata.get('Birth', 0)
-                modification_date = metadata.get('LastModified', 0)
-            else:
-                original_location = os.path.join(self.directory, hash_filename)
-                # TO DO: extract creation and modification dates from manifest.mbdb
-                creation_date = 0
-                modification_date = 0
-            data_path = os.path.join(self.data_folder, sanitize_file_path(relative_path))
-            if is_platform_windows():
-                data_path = data_path.replace('/', '\\')
+        pending = []
+        for position in self.matching_positions(filepattern):
+            original_location = self._original_location(position)
             if original_location not in self.copied or force:
-                try:
-                    os.makedirs(os.path.dirname(data_path), exist_ok=True)
-
-                    # Handle encrypted backups differently, don't just copy the encrypted files
-                    if self.decryption_keys:
-                        protection_classes = self.decryption_keys[0]
-                        # Snag the right protection class
-                        tmp_file_meta = self._all_file_meta[relative_path]
-                        if tmp_file_meta['Class'] not in protection_classes:
-                            logfunc(f'Can\'t locate the protection class for {relative_path}: {tmp_file_meta["Class"]}')
-                            raise KeyError
-                        tmp_protection_class = protection_classes[tmp_file_meta['Class']]
-
-                        # Grab the file's key
-                        tmp_file_wrapped_key = tmp_file_meta['Key']
-                        tmp_file_unwrapped_key = crypt.aes_key_unwrap(tmp_protection_class['Unwrapped'],
-                                                                      tmp_file_wrapped_key)
-
-                        # Open the file and snag the contents
-                        with open(original_location, "rb") as temp_original_file:
-                            # Decrypt the contents, Apple uses a 0'd out 16-byte IV
-                            cipher = Cipher(
-                                algorithms.AES(tmp_file_unwrapped_key),
-                                modes.CBC(b'\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00'))
-                            decryptor = cipher.decryptor()
-                            decrypted_contents = decryptor.update(temp_original_file.read()) + decryptor.finalize()
-
-                            # Write the decrypt into the expected located, only write the expected size, no padding
-                            with open(data_path, "wb") as temp_new_file:
-                                temp_new_file.write(decrypted_contents[0:tmp_file_meta['Size']])
-
-                    # If not encrypted, just copy the thing
-                    else:
-                        copy2(original_location, data_path)
-
-                    source_path = relative_path.replace('\\', '/')
-                    file_info = FileInfo(source_path, creation_date, modification_date)
-                    self.file_infos[data_path] = file_info
-                    self.copied[original_location] = data_path
-                except OSError as ex:
-                    logfunc(f'Could not copy {original_location} to {data_path} ' + str(ex))
+                data_path, item = self._register_file(position, lazy)
+                if item:
+                    pending.append(item)
             else:
                 data_path = self.copied[original_location]
+                if not lazy:
+                    self.materialize(data_path)
             pathlist.append(data_path)
             if return_on_first_hit:
-                self.searched[filepattern] = pathlist
-                return data_path
+                break
+        self.extract_members(pending)
+        self._search_nested(filepattern, pathlist, return_on_first_hit, force, lazy)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
         return pathlist
 
+    def cleanup(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        FileSeekerBase.cleanup(self)
+
 
 class FileSeekerTar(FileSeekerBase):
     """
     This is a class that extends FileSeekerBase to facilitate searching and extracting files
-    from a tar archive. It supports both gzip and regular tar files.
+    from a tar archive. It supports gzip, zstd and regular tar files.
     Attributes:
         tar_file_path (str): The path to the tar file.
         data_folder (str): The directory where extracted files will be stored.
         is_gzip (bool): Indicates if the tar file is gzipped.
+        gzip_file (file object): Seekable reader of the decompressed tar.gz, with its checkpoint index.
+        zstd_file (file object): Seekable reader of the decompressed tar.zst, with its frame index.
         tar_file (tarfile.TarFile): The opened tar file object.
+        listing_cache (ListingCache): Optional cache the members are loaded from and saved to.
         searched (dict): A dictionary to keep track of searched file patterns and their results.
         copied (dict): A dictionary to keep track of files that have been copied.
         file_infos (dict): A dictionary to store file information for extracted files.
     Methods:
-        __init__(tar_file_path, data_folder):
+        __init__(tar_file_path, data_folder, listing_cache=None, content_store=None, hasher=None,
+                 extract_workers=None):
             Initializes the FileSeekerTar instance with the specified tar file path and data folder.
-        search(filepattern, return_on_first_hit=False, force=False):
+            The frames of a tar.zst are decompressed ahead on extract_workers threads.
+        extract_member(member, full_path):
+            Copies the content of a file member to full_path through a fixed size buffer.
+        extract_members(pending):
+            Extracts a batch of members in the order of their data in the archive.
+        extract_planned(filepatterns):
+            Extracts all the members matched by planned patterns in a single pass over the archive.
+        search(filepattern, return_on_first_hit=False, force=False, lazy=False):
             Searches for files matching the given pattern in the tar archive and extracts them to the data folder.
             Returns a list of paths to the extracted files or the first hit if specified.
         cleanup():
             Closes the tar file to free up resources.
     """
 
-    def __init__(self, tar_file_path, data_folder):
-        FileSeekerBase.__init__(self)
+    def __init__(self, tar_file_path, data_folder, listing_cache=None, content_store=None, hasher=None,
+                 extract_workers=None):
+        FileSeekerBase.__init__(self, content_store, hasher)
         self.is_gzip = tar_file_path.lower().endswith('gz')
-        mode = 'r:gz' if self.is_gzip else 'r'
-        self.tar_file = tarfile.open(tar_file_path, mode)
+        self.gzip_file = None
+        self.zstd_file = None
+        if self.is_gzip:
+            # Members are read through a checkpoint index instead of tarfile's gzip stream,
+            # which has to decompress again from the start of the archive on every backward seek
+            self.gzip_file = open_gzip_index(tar_file_path)
+            self.tar_file = tarfile.open(tar_file_path, 'r:', fileobj=self.gzip_file)
+        elif is_zstd_file(tar_file_path):
+            self.zstd_file = open_zstd_index(tar_file_path, extract_workers or default_extract_workers())
+            self.tar_file = tarfile.open(tar_file_path, 'r:', fileobj=self.zstd_file)
+        else:
+            self.tar_file = tarfile.open(tar_file_path, 'r')
+        self.listing_cache = listing_cache
+        self._members = None
         self.data_folder = data_folder
         self.searched = {}
         self.copied = {}
         self.file_infos = {}
-
-    def search(self, filepattern, return_on_first_hit=False, force=False):
+        logfunc('Building files listing...')
+        self._get_index()
+        logfunc(f'File listing complete - {len(self._members)} files')
+
+    def get_extract_path(self, member):
+        '''Returns the path member is extracted to in the data folder'''
+        return os.path.join(self.data_folder, Path(sanitize_file_path(member.name)))
+
+    def extract_member(self, member, full_path):
+        '''Copies the content of a file member to full_path through a fixed size buffer'''
+        parent_dir = os.path.dirname(full_path)
+        if not os.path.exists(parent_dir):
+            os.makedirs(parent_dir, exist_ok=True)
+        with self.output_file(full_path, (member.name, member.size, member.mtime)) as fout:
+            copyfileobj(tarfile.ExFileObject(self.tar_file, member), fout, TAR_COPY_BUFFER_SIZE)
+        self.record_io(full_path, bytes_read=member.size)
+        os.utime(full_path, (member.mtime, member.mtime))
+
+    def extract_members(self, pending):
+        '''
+        Extracts (member, full_path) pairs in the order of their data in the archive, so that
+        the tar is read forward in a single pass instead of seeking back and forth (which,
+        for a tar.gz, means decompressing again from the closest checkpoint).
+        Members that cannot be written are removed from copied and file_infos.
+        '''
+        for member, full_path in sorted(pending, key=lambda item: item[0].offset_data):
+            try:
+                self.extract_member(member, full_path)
+            except OSError as ex:
+                logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
+                self.copied.pop(member.name, None)
+                self.file_infos.pop(full_path, None)
+
+    def _register_member(self, member, full_path, lazy):
+        '''
+        Records a matched member in copied and file_infos, creating directories right away.
+        Returns the path of the member and whether its extraction is still pending.
+        '''
+        if member.isdir():
+            os.makedirs(full_path, exist_ok=True)
+            return full_path, False
+        if lazy:
+            full_path = self.defer(full_path, partial(self.extract_member, member, full_path))
+        self.file_infos[full_path] = FileInfo(member.name, 0, member.mtime)
+        self.copied[member.name] = full_path
+        return full_path, not lazy
+
+    def extract_planned(self, filepatterns):
+        entries = self.listing_entries()
+        positions = sorted({position for pattern in filepatterns for position in self._planned.get(pattern, ())})
+        pending = []
+        for position in positions:
+            member = entries[position]
+            if member.name in self.copied:
+                continue
+            try:
+                full_path, extract = self._register_member(member, self.get_extract_path(member), False)
+            except OSError as ex:
+                logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
+                continue
+            if extract:
+                pending.append((member, full_path))
+        if pending:
+            logfunc(f'Extracting {len(pending)} planned files in archive order...')
+            self.extract_members(pending)
+
+    @synchronized
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
+            if not lazy:
+                self.materialize_all(pathlist)
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
         pathlist = []
-        pat = _compile_pattern(normcase(filepattern))
-        root = normcase("root/")
-        for member in self.tar_file.getmembers():
-            if pat(root + normcase(member.name)) is not None:
-                clean_name = sanitize_file_path(member.name)
-                full_path = os.path.join(self.data_folder, Path(clean_name))
-                if member.name not in self.copied or force:
-                    try:
-                        if member.isdir():
-                            os.makedirs(full_path, exist_ok=True)
-                        else:
-                            parent_dir = os.path.dirname(full_path)
-                            if not os.path.exists(parent_dir):
-                                os.makedirs(parent_dir)
-                            with open(full_path, "wb") as fout:
-                                fout.write(tarfile.ExFileObject(self.tar_file, member).read())
-                                fout.close()
-                                file_info = FileInfo(member.name, 0, member.mtime)
-                                self.file_infos[full_path] = file_info
-                                self.copied[member.name] = full_path
-                            os.utime(full_path, (member.mtime, member.mtime))
-                    except OSError as ex:
-                        logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
-                else:
-                    full_path = self.copied[member.name]
-                pathlist.append(full_path)
-                if return_on_first_hit:
-                    self.searched[filepattern] = pathlist
-                    return full_path
+        pending = []
+        for member in self.matching_files(filepattern):
+            full_path = self.get_extract_path(member)
+            if member.name not in self.copied or force:
+                try:
+                    full_path, extract = self._register_member(member, full_path, lazy)
+                    if extract:
+                        pending.append((member, full_path))
+                except OSError as ex:
+                    logfunc(f'Could not write file to filesystem, path was {member.name} ' + str(ex))
+            else:
+                full_path = self.copied[member.name]
+                if not lazy:
+                    self.materialize(full_path)
+            pathlist.append(full_path)
+            if return_on_first_hit:
+                break
+        self.extract_members(pending)
+        self._search_nested(filepattern, pathlist, return_on_first_hit, force, lazy)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
         return pathlist
 
+    def listing_entries(self):
+        if self._members is None:
+            if self.listing_cache:
+                self._members = self.listing_cache.load_tar_members()
+                if self._members is not None and self.gzip_file:
+                    self.listing_cache.load_gzip_index(self.gzip_file)
+            if self._members is None:
+                self._members = self.tar_file.getmembers()
+                if self.listing_cache:
+                    self.listing_cache.store_tar_members(self._members)
+                    if self.gzip_file:
+                        self.listing_cache.store_gzip_index(self.gzip_file)
+        return self._members
+
+    def entry_name(self, entry):
+        return entry.name
+
+    def entry_size(self, position):
+        member = self.listing_entries()[position]
+        return member.size if member.isfile() else 0
+
+    def entry_fingerprint(self, position):
+        member = self.listing_entries()[position]
+        return [member.size, member.mtime] if member.isfile() else 'directory'
+
     def cleanup(self):
         self.tar_file.close()
+        if self.gzip_file:
+            self.gzip_file.close()
+        if self.zstd_file:
+            self.zstd_file.close()
+        FileSeekerBase.cleanup(self)
 
 
 class FileSeekerZip(FileSeekerBase):
@@ -704,26 +1454,37 @@ class FileSeekerZip(FileSeekerBase):
     This is a class that extends FileSeekerBase to facilitate searching and extracting files from a ZIP archive.
     Attributes:
         zip_file (ZipFile): The ZIP file object representing the archive.
+        extractor (ParallelZipExtractor): Extracts batches of matched members on a pool of threads.
         name_list (list): A list of file names contained in the ZIP archive.
         data_folder (str): The directory where extracted files will be stored.
         searched (dict): A dictionary to keep track of searched file patterns and their corresponding paths.
         copied (dict): A dictionary to keep track of files that have been extracted and their paths.
         file_infos (dict): A dictionary to store file information such as creation and modification dates.
     Methods:
-        __init__(zip_file_path, data_folder):
+        __init__(zip_file_path, data_folder, extract_workers=None, content_store=None, hasher=None):
             Initializes the FileSeekerZip instance with the specified ZIP file path and data folder.
         decode_extended_timestamp(extra_data):
             Decodes the extended timestamp information from the extra data of a file in the ZIP archive.
-        search(filepattern, return_on_first_hit=False, force=False):
+        get_extract_path(member):
+            Returns the path a member is extracted to.
+        extract_member(member, date_time):
+            Extracts a member to the data folder.
+        extract_members(pending):
+            Extracts a batch of file members concurrently.
+        extract_planned(filepatterns):
+            Extracts all the members matched by planned patterns in a single batch.
+        search(filepattern, return_on_first_hit=False, force=False, lazy=False):
             Searches for files matching the specified pattern in the ZIP archive and extracts them if found.
         cleanup():
-            Closes the ZIP file to free up resources.
+            Stops the extraction threads and closes the ZIP file to free up resources.
     """
 
-    def __init__(self, zip_file_path, data_folder):
-        FileSeekerBase.__init__(self)
+    def __init__(self, zip_file_path, data_folder, extract_workers=None, content_store=None, hasher=None):
+        FileSeekerBase.__init__(self, content_store, hasher)
         self.zip_file = ZipFile(zip_file_path)
+        self.extractor = ParallelZipExtractor(self.zip_file, extract_workers, self.output_file)
         self.name_list = self.zip_file.namelist()
+        self._members = [member for member in self.name_list if not member.startswith("__MACOSX")]
         self.data_folder = data_folder
         self.searched = {}
         self.copied = {}
@@ -761,42 +1522,132 @@ class FileSeekerZip(FileSeekerBase):
                 offset += data_size
         return None, None
 
-    def search(self, filepattern, return_on_first_hit=False, force=False):
+    def get_extract_path(self, member):
+        '''Returns the path ZipFile.extract() writes member to in the data folder'''
+        arcname = member.replace('/', os.path.sep)
+        if os.path.altsep:
+            arcname = arcname.replace(os.path.altsep, os.path.sep)
+        arcname = os.path.splitdrive(arcname)[1]
+        invalid_path_parts = ('', os.path.curdir, os.path.pardir)
+        arcname = os.path.sep.join(part for part in arcname.split(os.path.sep) if part not in invalid_path_parts)
+        if os.path.sep == '\\':
+            # already replaces illegal chars with _ when exporting
+            arcname = ZipFile._sanitize_windows_name(arcname, os.path.sep)  # pylint: disable=protected-access
+        return os.path.normpath(os.path.join(self.data_folder, arcname))
+
+    def extract_member(self, member, date_time):
+        '''Extracts member to the data folder and sets its modification time'''
+        info = self.zip_file.getinfo(member)
+        if info.is_dir():
+            extracted_path = self.zip_file.extract(info, path=self.data_folder)
+            os.utime(extracted_path, (date_time, date_time))
+            return extracted_path
+        extracted_path = self.get_extract_path(member)
+        self.extractor.extract_file(info, extracted_path, date_time)
+        self.record_io(extracted_path, bytes_read=info.compress_size)
+        return extracted_path
+
+    def extract_members(self, pending):
+        '''
+        Extracts (info, path, date_time) file members concurrently.
+        Members that cannot be extracted are removed from copied and file_infos.
+        '''
+        failed = self.extractor.extract(pending)
+        for (info, extracted_path, _), ex in failed:
+            logfunc(f'Could not write file to filesystem, path was {info.filename} ' + str(ex))
+            self.copied.pop(info.filename, None)
+            self.file_infos.pop(extracted_path, None)
+        failed_paths = {extracted_path for (_, extracted_path, _), _ in failed}
+        for info, extracted_path, _ in pending:
+            if extracted_path not in failed_paths:
+                self.record_io(extracted_path, bytes_read=info.compress_size)
+
+    def _register_member(self, member, lazy):
+        '''
+        Records a matched member in copied and file_infos, extracting directories right away.
+        Returns the path of the member and its (info, path, date_time) item if its extraction is pending.
+        '''
+        info = self.zip_file.getinfo(member)
+        date_time = timex.mktime(info.date_time + (0, 0, -1))
+        pending = None
+        if info.is_dir():
+            extracted_path = self.extract_member(member, date_time)
+        elif lazy:
+            extracted_path = self.defer(self.get_extract_path(member),
+                                        partial(self.extract_member, member, date_time))
+        else:
+            extracted_path = self.get_extract_path(member)
+            pending = (info, extracted_path, date_time)
+        creation_date, modification_date = self.decode_extended_timestamp(info.extra)
+        self.file_infos[extracted_path] = FileInfo(member, creation_date, modification_date)
+        self.copied[member] = extracted_path
+        return extracted_path, pending
+
+    def extract_planned(self, filepatterns):
+        entries = self.listing_entries()
+        positions = sorted({position for pattern in filepatterns for position in self._planned.get(pattern, ())})
+        pending = []
+        for position in positions:
+            member = entries[position]
+            if member in self.copied:
+                continue
+            try:
+                _, item = self._register_member(member, False)
+            except OSError as ex:
+                logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
+                continue
+            if item:
+                pending.append(item)
+        if pending:
+            logfunc(f'Extracting {len(pending)} planned files with {self.extractor.workers} threads...')
+            self.extract_members(pending)
+
+    @synchronized
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         if filepattern in self.searched and not force:
             pathlist = self.searched[filepattern]
+            if not lazy:
+                self.materialize_all(pathlist)
             return self.searched[filepattern][0] if return_on_first_hit and pathlist else pathlist
         pathlist = []
-        pat = _compile_pattern(normcase(filepattern))
-        root = normcase("root/")
-        for member in self.name_list:
-            if member.startswith("__MACOSX"):
-                continue
-            if pat(root + normcase(member)) is not None:
-                if member not in self.copied or force:
-                    try:
-                        # already replaces illegal chars with _ when exporting
-                        extracted_path = self.zip_file.extract(member, path=self.data_folder)
-                        f = self.zip_file.getinfo(member)
-                        creation_date, modification_date = self.decode_extended_timestamp(f.extra)
-                        file_info = FileInfo(member, creation_date, modification_date)
-                        self.file_infos[extracted_path] = file_info
-                        date_time = f.date_time
-                        date_time = timex.mktime(date_time + (0, 0, -1))
-                        os.utime(extracted_path, (date_time, date_time))
-                        self.copied[member] = extracted_path
-                    except OSError as ex:
-                        logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
-                else:
-                    extracted_path = self.copied[member]
-                pathlist.append(extracted_path)
-                if return_on_first_hit:
-                    self.searched[filepattern] = pathlist
-                    return extracted_path
+        pending = []
+        for member in self.matching_files(filepattern):
+            if member not in self.copied or force:
+                try:
+                    extracted_path, item = self._register_member(member, lazy)
+                except OSError as ex:
+                    logfunc(f'Could not write file to filesystem, path was {member} ' + str(ex))
+                    continue
+                if item:
+                    pending.append(item)
+            else:
+                extracted_path = self.copied[member]
+                if not lazy:
+                    self.materialize(extracted_path)
+            pathlist.append(extracted_path)
+            if return_on_first_hit:
+                break
+        self.extract_members(pending)
+        self._search_nested(filepattern, pathlist, return_on_first_hit, force, lazy)
         self.searched[filepattern] = pathlist
+        if return_on_first_hit and pathlist:
+            return pathlist[0]
         return pathlist
 
+    def listing_entries(self):
+        return self._members
+
+    def entry_size(self, position):
+        return self.zip_file.getinfo(self._members[position]).file_size
+
+    def entry_fingerprint(self, position):
+        info = self.zip_file.getinfo(self._members[position])
+        return [info.file_size, info.CRC]
+
     def cleanup(self):
+        self.extractor.close()
         self.zip_file.close()
+        FileSeekerBase.cleanup(self)
 
 
 class FileSeekerFile(FileSeekerBase):
@@ -812,15 +1663,18 @@ class FileSeekerFile(FileSeekerBase):
         copied (dict): A dictionary to track copied files and their destination paths.
         file_infos (dict): A dictionary to store file information objects for copied files.
     Methods:
-        search(filepattern, return_on_first_hit=False, force=False):
+        search(filepattern, return_on_first_hit=False, force=False, lazy=False):
             Searches for the file based on the provided filename pattern and copies it
-            to the data folder if a match is found.
+            to the data folder if a match is found. If the file is a nested archive
+            expanded by expand_nested_archives(), also searches its members.
+        nested_archive_paths(data_path, file_info):
+            Returns the single file, read in place when expanded as a nested archive.
         cleanup():
-            Placeholder method for cleanup operations (currently does nothing).
+            Closes the nested archive expanded from the file, if any.
     """
 
-    def __init__(self, file_path, data_folder):
-        FileSeekerBase.__init__(self)
+    def __init__(self, file_path, data_folder, content_store=None, hasher=None):
+        FileSeekerBase.__init__(self, content_store, hasher)
         self.single_file_abs_path = os.path.abspath(file_path)
         self.data_folder = data_folder
 
@@ -834,11 +1688,14 @@ class FileSeekerFile(FileSeekerBase):
         self.copied = {}
         self.file_infos = {}
 
-    def search(self, filepattern, return_on_first_hit=False, force=False):
+    @synchronized
+    def search(self, filepattern, return_on_first_hit=False, force=False, lazy=False):
         if not self.single_file_basename:
             return []
 
         if filepattern in self.searched and not force:
+            if not lazy:
+                self.materialize_all(self.searched[filepattern])
             return self.searched[filepattern]
 
         pattern_to_match_filename_against = None  # The specific filename pattern to use
@@ -859,8 +1716,10 @@ class FileSeekerFile(FileSeekerBase):
                         f"component ('{basename_of_pattern}') is too generic (e.g., '*', '**', '*.*'). "
                         f"FileSeekerFile will not match its single file ('{self.single_file_basename}') "
                         "against such a broad path-based pattern. No match.")
-                self.searched[filepattern] = []
-                return []
+                found_data_paths = []
+                self._search_nested(filepattern, found_data_paths, return_on_first_hit, force, lazy)
+                self.searched[filepattern] = found_data_paths
+                return found_data_paths
         else:  # Original pattern does not contain path separators (e.g., "*.json", "myfile.db")
             # This is a direct filename pattern.
             pattern_to_match_filename_against = filepattern
@@ -888,19 +1747,25 @@ class FileSeekerFile(FileSeekerBase):
             if self.single_file_abs_path not in self.copied or force:
                 try:
                     os.makedirs(self.data_folder, exist_ok=True)
-                    copy2(self.single_file_abs_path, dest_data_path)
-                    self.copied[self.single_file_abs_path] = dest_data_path
                     s = Path(self.single_file_abs_path).stat()
                     file_info_obj = FileInfo(self.single_file_abs_path, s.st_ctime, s.st_mtime)
                     self.file_infos[dest_data_path] = file_info_obj
+                    if lazy:
+                        dest_data_path = self.defer(dest_data_path, partial(self._copy_single_file, dest_data_path))
+                    else:
+                        self._copy_single_file(dest_data_path)
+                    self.copied[self.single_file_abs_path] = dest_data_path
                     found_data_paths.append(dest_data_path)
                     # logfunc(f"FileSeekerFile: Matched and copied. Dest: {dest_data_path}")
                 except OSError as ex:
+                    self.file_infos.pop(dest_data_path, None)
                     logfunc("FileSeekerFile: Could not copy file "
                             f"{self.single_file_abs_path} to {dest_data_path}: {str(ex)}")
             else:  # Already copied
                 copied_dest_path = self.copied.get(self.single_file_abs_path)
                 if copied_dest_path:
+                    if not lazy:
+                        self.materialize(copied_dest_path)
                     found_data_paths.append(copied_dest_path)
                     # logfunc(f"FileSeekerFile: Matched (already copied). Dest: {copied_dest_path}")
         else:
@@ -908,8 +1773,22 @@ class FileSeekerFile(FileSeekerBase):
                     f"'{pattern_to_match_filename_against}' against "
                     f"actual file basename '{self.single_file_basename}'")
 
+        self._search_nested(filepattern, found_data_paths, return_on_first_hit, force, lazy)
         self.searched[filepattern] = found_data_paths
         return found_data_paths
 
+    def _copy_single_file(self, dest_data_path):
+        '''Copies the single file to dest_data_path in the data folder'''
+        self.copy_file(self.single_file_abs_path, dest_data_path)
+        copystat(self.single_file_abs_path, dest_data_path)
+
+    def nested_archive_paths(self, data_path, file_info):
+        # The single file is read in place when it is a nested archive, its members extracted next to its data path
+        return self.single_file_abs_path, str(data_path) + NESTED_CONTENTS_SUFFIX
+
+    def plan_searches(self, filepatterns):
+        '''Single files are matched by basename in search(), there is no listing to plan against'''
+        return {}
+
     def cleanup(self):
-        pass
+        FileSeekerBase.cleanup(self)
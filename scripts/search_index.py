@@ -0,0 +1,410 @@
+"""
+Indexed lookup of file listing entries for glob pattern searches.
+
+The seekers match artifact `paths` globs with fnmatch against
+"root/" + normcase(entry), where `*` also matches path separators. Running
+the compiled regex over every entry of a multi-million file listing for every
+pattern is the dominant cost of a search, so this module narrows each search
+down to a small candidate set first, using the literal parts of the glob.
+
+The candidate set is always a superset of the real matches: the seeker still
+runs the full fnmatch regex on every candidate, so results (and their order)
+are identical to a linear scan. Patterns without a usable literal return None
+and the caller falls back to the linear scan.
+
+Classes:
+    PathIndex: Basename, lowercase extension and directory component index
+        over a list of normalized paths.
+    PatternFilter: Tells whether a single normalized path matches any of a set of
+        glob patterns, used to filter a listing while it is built.
+
+Functions:
+    split_pattern_components: Splits a normalized glob into path components.
+    parse_glob_tokens: Tokenizes a single glob component.
+    match_patterns: Matches many glob patterns against a listing in a single pass.
+"""
+
+import os
+import re
+
+from array import array
+from bisect import bisect_left, bisect_right
+from fnmatch import _compile_pattern, translate
+from itertools import product
+
+GLOB_CHARS = frozenset('*?[')
+MAX_EXTENSION_EXPANSIONS = 64
+
+
+def _is_literal(component):
+    '''Returns True if the glob component contains no wildcard characters'''
+    return not GLOB_CHARS.intersection(component)
+
+
+def split_pattern_components(pattern, sep=os.sep):
+    '''Splits a normcase'd glob pattern into its path components'''
+    return pattern.split(sep)
+
+
+def _expand_class(stuff):
+    '''
+    Returns the set of characters matched by a simple bracket expression,
+    or None if the expression is negated or too complex to expand safely.
+    '''
+    if not stuff or stuff[0] in '!-' or stuff[-1] == '-' or '\\' in stuff or '[' in stuff:
+        return None
+    chars = set()
+    i = 0
+    while i < len(stuff):
+        if i + 2 < len(stuff) and stuff[i + 1] == '-':
+            first, last = stuff[i], stuff[i + 2]
+            if not (first.isalnum() and last.isalnum()) or first > last:
+                return None
+            chars.update(chr(code) for code in range(ord(first), ord(last) + 1))
+            i += 3
+        else:
+            if not stuff[i].isalnum():
+                return None
+            chars.add(stuff[i])
+            i += 1
+    return chars
+
+
+def parse_glob_tokens(component):
+    '''
+    Tokenizes a glob component the way fnmatch does.
+    Returns a list of tuples:
+        ('lit', char)  - a literal character
+        ('class', set) - a simple bracket expression and the characters it matches
+        ('any', None)  - '?', or a bracket expression that could not be expanded
+        ('star', None) - '*'
+    '''
+    tokens = []
+    i, n = 0, len(component)
+    while i < n:
+        c = component[i]
+        i += 1
+        if c == '*':
+            tokens.append(('star', None))
+        elif c == '?':
+            tokens.append(('any', None))
+        elif c == '[':
+            j = i
+            if j < n and component[j] == '!':
+                j += 1
+            if j < n and component[j] == ']':
+                j += 1
+            while j < n and component[j] != ']':
+                j += 1
+            if j >= n:
+                tokens.append(('lit', '['))
+            else:
+                chars = _expand_class(component[i:j])
+                tokens.append(('class', chars) if chars else ('any', None))
+                i = j + 1
+        else:
+            tokens.append(('lit', c))
+    return tokens
+
+
+def _literal_prefix(component):
+    '''Returns the literal characters before the first wildcard of a glob component'''
+    for position, char in enumerate(component):
+        if char in GLOB_CHARS:
+            return component[:position]
+    return component
+
+
+def _extension_candidates(component):
+    '''
+    Returns the set of lowercase extensions a file must have to match a glob
+    component ending in ".<literal or simple bracket classes>", or None.
+    '''
+    tokens = parse_glob_tokens(component)
+    dot_position = None
+    for position in range(len(tokens) - 1, -1, -1):
+        if tokens[position] == ('lit', '.'):
+            dot_position = position
+            break
+    if dot_position is None or dot_position == len(tokens) - 1:
+        return None
+    choices = []
+    for kind, value in tokens[dot_position + 1:]:
+        if kind == 'lit':
+            if value in '/\\.':
+                return None
+            choices.append({value.lower()})
+        elif kind == 'class':
+            choices.append({char.lower() for char in value})
+        else:
+            return None
+    combinations = 1
+    for choice in choices:
+        combinations *= len(choice)
+        if combinations > MAX_EXTENSION_EXPANSIONS:
+            return None
+    return {''.join(chars) for chars in product(*choices)}
+
+
+class _DirNode:
+    '''A directory of the index trie, holding the entries directly inside it'''
+    __slots__ = ('children', 'entries', 'size')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = array('I')
+        self.size = 0
+
+
+class PathIndex:
+    """
+    Index over a list of normalized (normcase'd) paths, used to find the
+    entries that could match a glob pattern without scanning the whole list.
+    Entry indexes are kept in arrays, and basenames are looked up by bisecting
+    the entries sorted by basename, so that the index does not hold a string
+    per entry and stays smaller than a compact listing of the paths.
+    Attributes:
+        sep (str): The path separator used by the indexed paths.
+        by_basename (array): The indexes of the entries, sorted by basename.
+        extensions (dict): Maps each lowercase extension to the indexes of the entries with that extension.
+        directories (dict): Maps each directory name to the trie nodes of the directories with that name.
+    Methods:
+        candidates(pattern): Returns the sorted indexes of the entries that could match
+            the normcase'd pattern, or None if the whole listing must be scanned.
+    """
+
+    def __init__(self, paths, sep=os.sep):
+        self.sep = sep
+        self.extensions = {}
+        self.directories = {}
+        self._paths = paths
+        self._sorted_directory_names = None
+        self._root = _DirNode()
+        nodes_by_path = {'': self._root}
+
+        def get_node(dir_path):
+            node = nodes_by_path.get(dir_path)
+            if node is None:
+                parent_path, _, name = dir_path.rpartition(sep)
+                parent = get_node(parent_path)
+                node = parent.children.get(name)
+                if node is None:
+                    node = _DirNode()
+                    parent.children[name] = node
+                    self.directories.setdefault(name, []).append(node)
+                nodes_by_path[dir_path] = node
+            return node
+
+        names = []
+        for position, path in enumerate(paths):
+            dir_path, _, name = path.rpartition(sep)
+            get_node(dir_path).entries.append(position)
+            names.append(name)
+            if '.' in name:
+                self.extensions.setdefault(name.rsplit('.', 1)[1].lower(), array('I')).append(position)
+        # Sorting is stable, the entries with the same basename stay in listing order
+        self.by_basename = array('I', sorted(range(len(names)), key=names.__getitem__))
+        self._compute_sizes()
+
+    def _basename(self, position):
+        '''Returns the basename of the entry at position'''
+        return self._paths[position].rpartition(self.sep)[2]
+
+    def _basename_range(self, prefix, exact=True):
+        '''
+        Returns the (start, end) slice of by_basename holding the entries whose basename is
+        prefix if exact is True, or starts with prefix otherwise.
+        '''
+        start = bisect_left(self.by_basename, prefix, key=self._basename)
+        if exact:
+            end = bisect_right(self.by_basename, prefix, start, key=self._basename)
+        else:
+            end = bisect_right(self.by_basename, prefix, start,
+                               key=lambda position: self._basename(position)[:len(prefix)])
+        return start, end
+
+    def _compute_sizes(self):
+        '''Stores the number of entries below each directory of the trie'''
+        stack = [(self._root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node.size = len(node.entries) + sum(child.size for child in node.children.values())
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    @staticmethod
+    def _subtree_entries(node, entries):
+        '''Adds the indexes of all entries below node to the entries set'''
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            entries.update(current.entries)
+            stack.extend(current.children.values())
+
+    def _prefix_directory_names(self, prefix):
+        '''Returns the directory names starting with prefix'''
+        if self._sorted_directory_names is None:
+            self._sorted_directory_names = sorted(self.directories)
+        names = self._sorted_directory_names
+        position = bisect_left(names, prefix)
+        matches = []
+        while position < len(names) and names[position].startswith(prefix):
+            matches.append(names[position])
+            position += 1
+        return matches
+
+    def _strategies(self, pattern):
+        '''
+        Yields (estimated_count, collect) for each usable lookup of the pattern,
+        collect being a callable returning the set of candidate indexes.
+        '''
+        components = split_pattern_components(pattern, self.sep)
+        last = components[-1]
+        has_parent = len(components) > 1
+
+        # Last component without wildcards: the basename must be identical
+        if has_parent and last and _is_literal(last):
+            start, end = self._basename_range(last)
+            yield end - start, lambda: set(self.by_basename[start:end])
+
+        # Literal basename prefix: a `*` may span separators, so the literal can
+        # also be the name of any directory above the matching entry
+        if has_parent and not _is_literal(last):
+            prefix = _literal_prefix(last)
+            if prefix:
+                start, end = self._basename_range(prefix, exact=False)
+                names = self._prefix_directory_names(prefix)
+                count = end - start + sum(node.size for name in names for node in self.directories[name])
+
+                def collect_prefix():
+                    entries = set(self.by_basename[start:end])
+                    for name in names:
+                        for node in self.directories[name]:
+                            self._subtree_entries(node, entries)
+                    return entries
+                yield count, collect_prefix
+
+        # Literal or bracketed extension, the tail of the glob stays in the basename
+        extensions = _extension_candidates(last)
+        if extensions:
+            lists = [self.extensions.get(extension, []) for extension in extensions]
+
+            def collect_extensions():
+                entries = set()
+                for extension_entries in lists:
+                    entries.update(extension_entries)
+                return entries
+            yield sum(len(entries) for entries in lists), collect_extensions
+
+        # Literal directory component enclosed by separators
+        for component in components[1:-1]:
+            if component and _is_literal(component):
+                nodes = self.directories.get(component, [])
+
+                def collect_directory(nodes=nodes):
+                    entries = set()
+                    for node in nodes:
+                        self._subtree_entries(node, entries)
+                    return entries
+                yield sum(node.size for node in nodes), collect_directory
+
+    def candidates(self, pattern):
+        '''
+        Returns the sorted indexes of the entries that could match the
+        normcase'd pattern, or None if no literal part of the pattern can be
+        used and the whole listing has to be scanned.
+        '''
+        best_count, best_collect = None, None
+        for count, collect in self._strategies(pattern):
+            if best_count is None or count < best_count:
+                best_count, best_collect = count, collect
+            if count == 0:
+                break
+        if best_collect is None:
+            return None
+        return sorted(best_collect())
+
+
+def match_patterns(patterns, keys, index=None, prefix=''):
+    """
+    Matches many glob patterns against a listing, scanning the listing at most once.
+    Patterns with a usable literal are resolved through the index. The remaining
+    patterns are compiled into one combined regex that is run once per listing
+    entry, and only the entries it accepts are tested against each pattern.
+    Args:
+        patterns (iterable): The glob patterns, as written in the artifacts `paths`.
+        keys (list): The normcase'd paths of the listing entries.
+        index (PathIndex): Optional index built over keys.
+        prefix (str): The normcase'd string prepended to each key before matching.
+    Returns:
+        dict: Maps each pattern to the sorted positions in keys of the entries it matches.
+    """
+    matches = {}
+    scanned = []
+    for pattern in patterns:
+        normalized = os.path.normcase(pattern)
+        pat = _compile_pattern(normalized)
+        candidates = index.candidates(normalized) if index is not None else None
+        if candidates is None:
+            matches[pattern] = []
+            scanned.append((pattern, pat, translate(normalized)))
+        else:
+            matches[pattern] = [position for position in candidates if pat(prefix + keys[position]) is not None]
+    if scanned:
+        combined = re.compile('|'.join(regex for _, _, regex in scanned)).match
+        for position, key in enumerate(keys):
+            value = prefix + key
+            if combined(value) is None:
+                continue
+            for pattern, pat, _ in scanned:
+                if pat(value) is not None:
+                    matches[pattern].append(position)
+    return matches
+
+
+class PatternFilter:
+    """
+    Tells whether a single normcase'd path matches any of a set of glob patterns,
+    with the same matching rules as match_patterns. Used to keep only the entries
+    that the selected artifacts can match while a listing is built.
+    Patterns ending with a literal basename or a literal extension are only tried
+    on the paths with that basename or extension, the other patterns are combined
+    in one regex tried on every path.
+    Attributes:
+        prefix (str): The normcase'd string prepended to each path before matching.
+        sep (str): The path separator used by the paths.
+    Methods:
+        __call__(key): Returns True if the normcase'd path key matches one of the patterns.
+    """
+
+    def __init__(self, patterns, prefix='', sep=os.sep):
+        self.prefix = prefix
+        self.sep = sep
+        self._by_basename = {}
+        self._by_extension = {}
+        scanned = []
+        for pattern in dict.fromkeys(patterns):
+            normalized = os.path.normcase(pattern)
+            components = split_pattern_components(normalized, sep)
+            last = components[-1]
+            extensions = _extension_candidates(last)
+            if len(components) > 1 and last and _is_literal(last):
+                self._by_basename.setdefault(last, []).append(_compile_pattern(normalized))
+            elif extensions:
+                for extension in extensions:
+                    self._by_extension.setdefault(extension, []).append(_compile_pattern(normalized))
+            else:
+                scanned.append(translate(normalized))
+        self._scanned = re.compile('|'.join(scanned)) if scanned else None
+
+    def __call__(self, key):
+        value = self.prefix + key
+        name = key.rpartition(self.sep)[2]
+        candidates = self._by_basename.get(name, [])
+        if '.' in name:
+            candidates = candidates + self._by_extension.get(name.rsplit('.', 1)[1].lower(), [])
+        if any(pat(value) is not None for pat in candidates):
+            return True
+        return self._scanned is not None and self._scanned.match(value) is not None
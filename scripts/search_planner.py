@@ -0,0 +1,230 @@
+"""
+Search planning for the artifacts selected for a run.
+
+Before any artifact runs, the `paths` globs of every selected plugin are
+collected and handed to the seeker at once, so the extraction listing is
+matched in a single pass instead of once per pattern. The per-plugin loop in
+crunch_artifacts then only extracts the files already planned for each pattern.
+
+While a plugin parses its files, a SearchPrefetcher can search the patterns of
+the next plugins on a background thread, so that the extraction of their files
+(copy, decompression, decryption) overlaps with the parsing instead of waiting
+for it. The prefetched results are kept in seeker.searched, where the plugin
+loop finds them.
+
+Classes:
+    SearchPlan: Ordered search patterns of the selected plugins and their matches.
+    SearchPrefetcher: Background searches of the patterns of the next plugins.
+
+Functions:
+    get_search_patterns: Returns the `paths` globs of a plugin as a list.
+"""
+
+import threading
+
+from time import perf_counter
+
+from scripts.ilapfuncs import logfunc
+from scripts.lavafuncs import lava_insert_sqlite_artifact_search_patterns
+
+
+def get_search_patterns(plugin):
+    '''Returns the list of `paths` globs of a plugin, or None if it uses _lava_artifacts.db as source'''
+    if isinstance(plugin.search, (list, tuple)):
+        return list(plugin.search)
+    if plugin.search is None:
+        return None
+    return [plugin.search]
+
+
+class SearchPlan:
+    """
+    Collects the search patterns of the selected plugins, in run order, and
+    resolves them against the seeker listing in a single pass.
+    Attributes:
+        plugin_patterns (dict): Maps each plugin name to a list of (artifact_search_pattern_id, pattern)
+            tuples, or to None for plugins using _lava_artifacts.db as source.
+        search_patterns (list): (artifact_search_pattern_id, module_name, artifact_name, pattern) tuples,
+            as stored in the _artifact_search_patterns LAVA table.
+        matches (dict): Maps each pattern to the names of the listing entries it matched.
+        lazy_plugins (set): Names of the plugins whose matched files are extracted on first read.
+        skipped_plugins (set): Names of the plugins whose output is copied from a previous run, their
+            matched files are not extracted.
+    Methods:
+        patterns(): Returns the unique search patterns, in the order plugins will run.
+        eager_patterns(plugins): Returns the unique search patterns of the plugins without lazy extraction.
+        input_size(plugin, seeker): Returns the total size of the files matched by the patterns of plugin.
+        extract(seeker, plugins): Lets the seeker extract the files of the eager patterns ahead of the plugins.
+        resolve(seeker): Matches all patterns against the seeker listing.
+        record_search_patterns(): Stores all search patterns into the LAVA database at once.
+    """
+
+    def __init__(self, plugins):
+        self.plugin_patterns = {}
+        self.search_patterns = []
+        self.matches = {}
+        self.lazy_plugins = set()
+        self.skipped_plugins = set()
+        artifact_search_pattern_id = 0
+        for plugin in plugins:
+            if plugin.artifact_info.get('lazy_extraction', False):
+                self.lazy_plugins.add(plugin.name)
+            patterns = get_search_patterns(plugin)
+            if patterns is None:
+                self.plugin_patterns[plugin.name] = None
+                continue
+            plugin_patterns = []
+            for pattern in patterns:
+                artifact_search_pattern_id += 1
+                plugin_patterns.append((artifact_search_pattern_id, pattern))
+                self.search_patterns.append(
+                    (artifact_search_pattern_id, plugin.module_name, plugin.name, pattern))
+            self.plugin_patterns[plugin.name] = plugin_patterns
+
+    def patterns(self):
+        '''Returns the unique search patterns, in the order plugins will run'''
+        return list(dict.fromkeys(pattern for _, _, _, pattern in self.search_patterns))
+
+    def eager_patterns(self, plugins=None):
+        '''Returns the unique search patterns of the plugins without lazy extraction, of all plugins or of plugins'''
+        plugin_names = self.plugin_patterns if plugins is None else [plugin.name for plugin in plugins]
+        return list(dict.fromkeys(pattern for plugin_name in plugin_names
+                                  if plugin_name not in self.lazy_plugins
+                                  and plugin_name not in self.skipped_plugins
+                                  for _, pattern in self.plugin_patterns.get(plugin_name) or ()))
+
+    def resolve(self, seeker):
+        '''Matches all patterns against the seeker listing in a single pass'''
+        patterns = self.patterns()
+        start = perf_counter()
+        self.matches = seeker.plan_searches(patterns)
+        if self.matches:
+            matched = sum(1 for pattern in patterns if self.matches.get(pattern))
+            logfunc(f'Search plan complete - {matched} of {len(patterns)} patterns matched files '
+                    f'({perf_counter() - start:.2f}s)')
+        return self.matches
+
+    def input_size(self, plugin, seeker):
+        '''Returns the total size in bytes of the files matched by the patterns of plugin, None if unknown'''
+        total = 0
+        for _, pattern in self.plugin_patterns.get(plugin.name) or ():
+            size = seeker.planned_size(pattern)
+            if size is None:
+                return None
+            total += size
+        return total
+
+    def extract(self, seeker, plugins=None):
+        '''Lets the seeker extract the files of the eager patterns in a single pass, where it supports it'''
+        seeker.extract_planned(self.eager_patterns(plugins))
+
+    def record_search_patterns(self):
+        '''Stores all search patterns into the _artifact_search_patterns LAVA table at once'''
+        lava_insert_sqlite_artifact_search_patterns(self.search_patterns)
+
+
+class SearchPrefetcher:
+    """
+    Searches the patterns of the plugins following the current one on a background thread.
+    The seeker searches hold its search_lock, so a plugin searching a pattern being prefetched
+    waits for it and then gets the cached result. Patterns of plugins with lazy extraction are
+    not prefetched, their files are only extracted when read, nor the patterns of the plugins
+    whose output is copied from a previous run.
+    Attributes:
+        depth (int): Number of plugins after the current one whose patterns are searched ahead.
+        bandwidth (float): Maximum average number of bytes per second written by the prefetch, or None.
+            With a bandwidth, the files matched by a pattern are registered by a lazy search and
+            extracted one by one, the prefetch waiting between them, without holding the search
+            lock, until the bytes written since its first search are back under bandwidth.
+        prefetched (int): Number of patterns searched ahead.
+        throttled_seconds (float): Time the prefetch waited to stay under bandwidth.
+    Methods:
+        start(): Starts the background thread.
+        advance(plugin_number): Sets the (1-based) number of the plugin now running.
+        close(): Stops the background thread once its current search is done.
+    """
+
+    def __init__(self, seeker, plugins, search_plan, depth, bandwidth=None):
+        self.seeker = seeker
+        self.depth = depth
+        self.bandwidth = bandwidth
+        self.prefetched = 0
+        self.throttled_seconds = 0
+        self._searches = [(plugin_number, pattern) for plugin_number, plugin in enumerate(plugins, start=1)
+                          if plugin.name not in search_plan.lazy_plugins
+                          and plugin.name not in search_plan.skipped_plugins
+                          for _, pattern in search_plan.plugin_patterns.get(plugin.name) or ()]
+        self._current = 0
+        self._closed = False
+        self._written = 0
+        self._start = None
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name='SearchPrefetcher', daemon=True)
+
+    def start(self):
+        '''Starts searching ahead on the background thread, if there is anything to prefetch'''
+        if self.depth > 0 and self._searches:
+            self._thread.start()
+
+    def advance(self, plugin_number):
+        '''Sets the number of the plugin now running, the prefetch moves on to the plugins that follow it'''
+        with self._condition:
+            self._current = plugin_number
+            self._condition.notify_all()
+
+    def close(self):
+        '''Stops the background thread, waiting for the search it is running'''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _next_search(self, position):
+        '''Waits until the search at position is within depth plugins of the current one, returns it or None'''
+        with self._condition:
+            while not self._closed and self._searches[position][0] > self._current + self.depth:
+                self._condition.wait()
+            if self._closed:
+                return None
+            plugin_number, pattern = self._searches[position]
+            return None if plugin_number <= self._current else pattern
+
+    def _throttle(self, bytes_written):
+        '''Waits until the bytes written since the first prefetch search fit in bandwidth'''
+        self._written += bytes_written
+        delay = self._written / self.bandwidth - (perf_counter() - self._start)
+        if delay > 0:
+            self.throttled_seconds += delay
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, delay)
+
+    def _extract_throttled(self, pattern):
+        '''Searches pattern lazily, then extracts its files one at a time, throttled between them'''
+        if self._start is None:
+            self._start = perf_counter()
+        for path in self.seeker.search(pattern, lazy=True):
+            if self._closed:
+                # The plugin loop extracts the remaining files when it searches the pattern
+                return
+            written = self.seeker.io_stats.get(path, (0, 0, 0))[1]
+            self.seeker.materialize(path)
+            self._throttle(self.seeker.io_stats.get(path, (0, 0, 0))[1] - written)
+
+    def _run(self):
+        for position in range(len(self._searches)):
+            if self._closed:
+                return
+            pattern = self._next_search(position)
+            # Skipped once the plugin loop reached the plugin, it searches the pattern itself
+            if pattern is None or pattern in self.seeker.searched:
+                continue
+            try:
+                if self.bandwidth:
+                    self._extract_throttled(pattern)
+                else:
+                    self.seeker.search(pattern)
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Not cached, the plugin loop searches the pattern again and reports the error
+                continue
+            self.prefetched += 1
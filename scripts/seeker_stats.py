@@ -0,0 +1,126 @@
+"""
+Extraction I/O statistics per search pattern and per artifact.
+
+The seekers record the bytes read, the bytes written and the time spent to
+extract each file to the data folder in their io_stats. Once all the artifacts
+have run (lazily extracted files are only written when an artifact reads them),
+these are summed over the files matched by each search pattern, and over all
+the files of each artifact, together with the time spent in the searches. A file
+matched by several patterns or artifacts is counted for each of them, its
+extraction cost being paid by whichever searched it first.
+
+The statistics are written to the _seeker_stats table of the LAVA database and
+to a sortable HTML page, to find the patterns dominating the extraction cost.
+The rows of each artifact are also stored with its checkpoint (see
+checkpoints.py), so that a resumed run reports the artifacts completed before
+it was interrupted, with the I/O of their files when they completed.
+
+Classes:
+    SeekerStats: Time spent in the searches of each artifact, and summary of the extraction I/O.
+"""
+
+import os
+
+from scripts.artifact_report import ArtifactHtmlReport
+from scripts.ilapfuncs import icons
+from scripts.lavafuncs import lava_insert_sqlite_seeker_stats
+
+SEEKER_STATS_CATEGORY = 'Processing Statistics'
+SEEKER_STATS_NAME = 'Seeker Stats'
+SEEKER_STATS_ICON = 'chart-bar'
+SEEKER_STATS_HEADERS = ('Module', 'Artifact', 'Search Pattern', 'Files', 'Bytes Read', 'Bytes Written',
+                        'Extraction Seconds', 'Search Seconds')
+
+# Default table script, ordered by bytes written
+seeker_stats_table_script = """
+    <script>
+        $(document).ready(function() {
+            $('.table').DataTable({
+                "aLengthMenu": [[ 15, 50, 100, -1 ], [ 15, 50, 100, "All" ]],
+                "order": [[ 5, "desc" ]],
+            });
+            $('.dataTables_length').addClass('bs-select');
+            $('#mySpinner').remove();
+        });
+    </script>
+"""
+
+
+class SeekerStats:
+    """
+    Time spent in the searches of each artifact, and summary of the extraction I/O of a seeker.
+    Attributes:
+        search_seconds (dict): Seconds spent searching, per (module name, artifact name, pattern).
+        restored_rows (list): The rows of the artifacts completed before the run was resumed.
+    Methods:
+        record_search(plugin, pattern, seconds): Adds the time of a search of plugin.
+        collect(seeker, plugin): Returns the statistics rows per pattern and per artifact, or of plugin.
+        write(seeker, report_folder): Writes the statistics to the LAVA database and to an HTML page.
+    """
+
+    def __init__(self, restored_rows=()):
+        self.search_seconds = {}
+        self.restored_rows = list(restored_rows)
+
+    def record_search(self, plugin, pattern, seconds):
+        '''Adds the seconds spent searching pattern for plugin'''
+        key = (plugin.module_name, plugin.name, pattern)
+        self.search_seconds[key] = self.search_seconds.get(key, 0) + seconds
+
+    @staticmethod
+    def _sum_io(seeker, paths):
+        '''Returns [file count, bytes read, bytes written, seconds] of the files among paths'''
+        totals = [0, 0, 0, 0]
+        for path in paths:
+            if path not in seeker.file_infos:
+                continue
+            totals[0] += 1
+            for index, value in enumerate(seeker.io_stats.get(path, ()), start=1):
+                totals[index] += value
+        return totals
+
+    def collect(self, seeker, plugin=None):
+        '''
+        Returns the (module name, artifact name, pattern, file count, bytes read, bytes written,
+        extraction seconds, search seconds) rows of each pattern searched, followed for each
+        artifact by the row of its totals, whose pattern is None. Only the rows of plugin if given.
+        '''
+        artifacts = {}
+        for (module_name, artifact_name, pattern), seconds in self.search_seconds.items():
+            if plugin is not None and (module_name, artifact_name) != (plugin.module_name, plugin.name):
+                continue
+            artifacts.setdefault((module_name, artifact_name), []).append((pattern, seconds))
+        rows = []
+        for (module_name, artifact_name), searches in artifacts.items():
+            artifact_paths = {}
+            for pattern, seconds in searches:
+                paths = seeker.searched.get(pattern, [])
+                artifact_paths.update(dict.fromkeys(paths))
+                rows.append((module_name, artifact_name, pattern, *self._sum_io(seeker, paths), seconds))
+            rows.append((module_name, artifact_name, None, *self._sum_io(seeker, artifact_paths),
+                         sum(seconds for _, seconds in searches)))
+        return rows
+
+    def write(self, seeker, report_folder):
+        '''
+        Writes the statistics to the _seeker_stats table of the LAVA database and to an HTML page
+        of report_folder, the category folder of the processing statistics, created if there are rows.
+        The rows restored from the checkpoints come first. Returns the rows.
+        '''
+        rows = self.restored_rows + self.collect(seeker)
+        lava_insert_sqlite_seeker_stats(rows)
+        if not rows:
+            return rows
+        os.makedirs(report_folder, exist_ok=True)
+        icons.setdefault(SEEKER_STATS_CATEGORY, {})[SEEKER_STATS_NAME] = SEEKER_STATS_ICON
+        html_rows = [(module_name, artifact_name, 'All patterns' if pattern is None else pattern,
+                      file_count, bytes_read, bytes_written, f'{extraction_seconds:.3f}', f'{search_seconds:.3f}')
+                     for (module_name, artifact_name, pattern, file_count, bytes_read, bytes_written,
+                          extraction_seconds, search_seconds) in rows]
+        report = ArtifactHtmlReport(SEEKER_STATS_NAME)
+        report.start_artifact_report(report_folder, SEEKER_STATS_NAME,
+                                     'Files extracted to the data folder, per search pattern and per artifact')
+        report.add_script(seeker_stats_table_script)
+        report.write_artifact_data_table(SEEKER_STATS_HEADERS, html_rows, '', write_location=False)
+        report.end_artifact_report()
+        return rows
@@ -0,0 +1,76 @@
+"""
+Source-affinity scheduling of the artifacts of a run.
+
+The artifacts are sorted by category, so the artifacts reading the same large
+database (knowledgeC.db, Photos.sqlite, healthdb_secure.sqlite) are spread
+over the run, each one reading it cold again. With --source_affinity, once
+the search plan has matched the search patterns of all artifacts against the
+listing, the artifacts sharing a source file run back to back, from the
+position of the first one, while the pages of the file read by the previous
+artifact are still in the page cache of the operating system. Each artifact
+still opens its own connection to the database.
+
+The shared source of an artifact is the file it matched that the most other
+artifacts matched. Artifacts are only moved earlier, never later, and
+artifacts depending on the output of other modules, or using
+_lava_artifacts.db as source, keep their position. Their reports are written
+under their category as before.
+
+Classes:
+    SourceAffinity: Groups the artifacts of a run by the source file they share.
+"""
+
+from collections import Counter, defaultdict
+
+from scripts.ilapfuncs import logfunc
+from scripts.plugin_runner import required_modules
+
+
+class SourceAffinity:
+    """
+    Groups the artifacts of a run by their shared source file, from the matches of a SearchPlan.
+    Attributes:
+        sources (dict): Maps the name of each grouped artifact to the listing entry name of its shared source.
+        groups (int): Number of groups of artifacts sharing a source.
+    Methods:
+        order(plugins): Returns plugins with the artifacts of each group run back to back.
+    """
+
+    def __init__(self, plugins, search_plan):
+        self.sources = {}
+        matched = {}
+        counts = Counter()
+        for plugin in plugins:
+            plugin_patterns = search_plan.plugin_patterns.get(plugin.name)
+            if not plugin_patterns or required_modules(plugin):
+                continue
+            names = set()
+            for _, pattern in plugin_patterns:
+                names.update(search_plan.matches.get(pattern) or ())
+            matched[plugin.name] = names
+            counts.update(names)
+        for plugin_name, names in matched.items():
+            shared = [name for name in names if counts[name] > 1]
+            if shared:
+                # The db before its -wal and -shm files, matched by the same artifacts
+                self.sources[plugin_name] = min(shared, key=lambda name: (-counts[name], name))
+        self.groups = len(set(self.sources.values()))
+
+    def order(self, plugins):
+        '''Returns the list of plugins where the artifacts sharing a source run from the position of the first one'''
+        groups = defaultdict(list)
+        for plugin in plugins:
+            source = self.sources.get(plugin.name)
+            if source is not None:
+                groups[source].append(plugin)
+        ordered = []
+        for plugin in plugins:
+            source = self.sources.get(plugin.name)
+            if source is None:
+                ordered.append(plugin)
+            elif source in groups:
+                ordered.extend(groups.pop(source))
+        if self.sources:
+            logfunc(f'Source affinity: {len(self.sources)} artifacts sharing {self.groups} source files '
+                    'run back to back')
+        return ordered
@@ -0,0 +1,157 @@
+"""
+Parallel extraction of the members of a ZIP archive.
+
+ZipFile.extract() reads and decompresses one member at a time through the
+single file handle of the ZipFile object, so the extraction of the files
+matched in a large ZIP runs on one core. ParallelZipExtractor reuses the member
+information parsed once by that ZipFile (reading the central directory of a
+full file system extraction takes seconds, it is not repeated per worker) and
+extracts batches of members on a pool of threads, each with its own handle on
+the archive. zlib releases the GIL while inflating, so deflated members are
+decompressed on several cores.
+
+Members that are encrypted or compressed with another method than deflate are
+extracted through the shared ZipFile.
+
+The members are written through an output_file callable, so that the seeker
+can write them through its content store and hash them.
+
+Classes:
+    ParallelZipExtractor: Extracts batches of ZIP members on a pool of threads.
+
+Functions:
+    default_extract_workers: Returns the default number of extraction threads.
+"""
+
+import os
+import struct
+import threading
+import zlib
+
+from concurrent.futures import ThreadPoolExecutor
+from shutil import copyfileobj
+from zipfile import BadZipFile, ZIP_DEFLATED, ZIP_STORED
+
+from scripts.content_store import open_output
+
+ZIP_READ_SIZE = 1024 * 1024
+# Same layout as zipfile.structFileHeader
+LOCAL_HEADER = struct.Struct('<4s2B4HL2L2H')
+LOCAL_HEADER_SIGNATURE = b'PK\003\004'
+LOCAL_HEADER_NAME_LENGTH = 10
+LOCAL_HEADER_EXTRA_LENGTH = 11
+
+
+def default_extract_workers():
+    '''Returns the default number of extraction threads, one per CPU (decompression is CPU bound)'''
+    return min(32, os.cpu_count() or 1)
+
+
+class ParallelZipExtractor:
+    """
+    Extracts members of an opened ZipFile on a pool of threads with independent file handles.
+    Attributes:
+        zip_file (ZipFile): The opened archive, its ZipInfo objects are shared by all the workers.
+        workers (int): Number of extraction threads.
+        output_file (callable): Opens the path a member is extracted to for writing.
+    Methods:
+        extract_file(info, path, date_time): Extracts the file member info to path and sets its times.
+        extract(items): Extracts a batch of (info, path, date_time) items, returns the failed ones.
+        close(): Stops the threads and closes their file handles.
+    """
+
+    def __init__(self, zip_file, workers=None, output_file=open_output):
+        self.zip_file = zip_file
+        self.workers = workers or default_extract_workers()
+        self.output_file = output_file
+        self._executor = None
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+
+    def _get_handle(self):
+        '''Returns the file handle of the archive owned by the current thread'''
+        handle = getattr(self._local, 'handle', None)
+        if handle is None:
+            handle = open(self.zip_file.filename, 'rb')  # pylint: disable=consider-using-with
+            self._local.handle = handle
+            with self._handles_lock:
+                self._handles.append(handle)
+        return handle
+
+    def _copy_member(self, info, output):
+        '''Writes the content of a stored or deflated member to output, checking its CRC'''
+        handle = self._get_handle()
+        handle.seek(info.header_offset)
+        header = handle.read(LOCAL_HEADER.size)
+        if len(header) != LOCAL_HEADER.size or header[:4] != LOCAL_HEADER_SIGNATURE:
+            raise BadZipFile(f'Bad magic number for file header of {info.filename}')
+        fields = LOCAL_HEADER.unpack(header)
+        handle.seek(fields[LOCAL_HEADER_NAME_LENGTH] + fields[LOCAL_HEADER_EXTRA_LENGTH], os.SEEK_CUR)
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS) if info.compress_type == ZIP_DEFLATED else None
+        remaining = info.compress_size
+        crc = 0
+        while remaining:
+            data = handle.read(min(remaining, ZIP_READ_SIZE))
+            if not data:
+                raise BadZipFile(f'Truncated data for file {info.filename}')
+            remaining -= len(data)
+            while data:
+                if decompressor:
+                    chunk = decompressor.decompress(data, ZIP_READ_SIZE)
+                    # Input after the end of the deflate stream is left in unconsumed_tail, never read it again
+                    data = b'' if decompressor.eof else decompressor.unconsumed_tail
+                else:
+                    chunk, data = data, b''
+                crc = zlib.crc32(chunk, crc)
+                output.write(chunk)
+        if decompressor:
+            chunk = decompressor.flush()
+            crc = zlib.crc32(chunk, crc)
+            output.write(chunk)
+        if crc != info.CRC:
+            raise BadZipFile(f'Bad CRC-32 for file {info.filename}')
+
+    def extract_file(self, info, path, date_time):
+        '''Extracts the file member info to path and sets its access and modification times to date_time'''
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.output_file(path) as output:
+            if info.compress_type in (ZIP_STORED, ZIP_DEFLATED) and not info.flag_bits & 0x1:
+                self._copy_member(info, output)
+            else:
+                with self.zip_file.open(info) as source:
+                    copyfileobj(source, output, ZIP_READ_SIZE)
+        os.utime(path, (date_time, date_time))
+
+    def _extract_item(self, item):
+        '''Extracts one (info, path, date_time) item, returns (item, exception) if it failed'''
+        try:
+            self.extract_file(*item)
+        except (OSError, BadZipFile, zlib.error) as ex:
+            return item, ex
+        return None
+
+    def extract(self, items):
+        '''
+        Extracts (info, path, date_time) items, in the order of their data in the archive,
+        on the pool of threads. Returns a list of (item, exception) for the items that failed.
+        '''
+        items = sorted(items, key=lambda item: item[0].header_offset)
+        if self.workers == 1 or len(items) < 2:
+            results = map(self._extract_item, items)
+        else:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers)
+            results = self._executor.map(self._extract_item, items)
+        return [result for result in results if result]
+
+    def close(self):
+        '''Stops the threads and closes their file handles'''
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._handles_lock:
+            for handle in self._handles:
+                handle.close()
+            self._handles = []
+        self._local = threading.local()
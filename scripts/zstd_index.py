@@ -0,0 +1,406 @@
+"""
+Random access to the decompressed content of tar.zst inputs.
+
+A zstd file is a sequence of independent frames, each of which can be
+decompressed on its own. Archives written by multi-threaded or seekable zstd
+compressors (pzstd, zstd --seekable, t2sz...) hold many small frames, so a
+member of a tar.zst can be read by decompressing its frame only, and the
+frames can be decompressed in parallel. ZstdFrameReader builds an index of the
+frames when the file is opened, from the seek table of the seekable format if
+there is one, else by walking the frame and block headers (without
+decompressing anything). Frames whose decompressed size is known and at most
+ZSTD_MAX_FRAME_BUFFER are decompressed whole, and while the file is read
+forward the next frames are decompressed ahead on a pool of threads, both
+decompression backends releasing the GIL. Other frames are decompressed as a stream, and
+restarted from their beginning on a backward seek, like a tar.gz read without
+checkpoints.
+
+Decompression uses the zstandard package if it is available, else the libzstd
+shared library through ctypes.
+
+Classes:
+    ZstdFrameReader: Seekable raw reader of a zstd file, indexed by frame.
+
+Functions:
+    zstd_available: Returns True if zstd files can be decompressed.
+    is_zstd_file: Returns True if a file is zstd compressed.
+    read_frame_index: Returns the (compressed offset, compressed size, decompressed size) of each frame.
+    open_zstd_index: Returns a seekable file object for a zstd file.
+"""
+
+import ctypes
+import ctypes.util
+import io
+import mmap
+import struct
+
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ZSTD_MAGIC = 0xFD2FB528
+ZSTD_SKIPPABLE_MAGIC = 0x184D2A50
+ZSTD_SKIPPABLE_MASK = 0xFFFFFFF0
+ZSTD_SEEK_TABLE_MAGIC = 0x184D2A5E
+ZSTD_SEEKABLE_MAGIC = 0x8F92EAB1
+ZSTD_SEEKABLE_FOOTER_SIZE = 9
+ZSTD_MAX_FRAME_BUFFER = 64 * 1024 * 1024
+ZSTD_READ_SIZE = 128 * 1024
+ZSTD_BUFFER_SIZE = 1024 * 1024
+
+
+class _InBuffer(ctypes.Structure):
+    _fields_ = [('src', ctypes.c_void_p), ('size', ctypes.c_size_t), ('pos', ctypes.c_size_t)]
+
+
+class _OutBuffer(ctypes.Structure):
+    _fields_ = [('dst', ctypes.c_void_p), ('size', ctypes.c_size_t), ('pos', ctypes.c_size_t)]
+
+
+def _load_libzstd():
+    '''Returns the libzstd shared library with the prototypes of the functions used, or None'''
+    name = ctypes.util.find_library('zstd')
+    if name is None:
+        return None
+    try:
+        lib = ctypes.CDLL(name)
+    except OSError:
+        return None
+    lib.ZSTD_decompress.restype = ctypes.c_size_t
+    lib.ZSTD_decompress.argtypes = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_char_p, ctypes.c_size_t)
+    lib.ZSTD_isError.restype = ctypes.c_uint
+    lib.ZSTD_isError.argtypes = (ctypes.c_size_t,)
+    lib.ZSTD_getErrorName.restype = ctypes.c_char_p
+    lib.ZSTD_getErrorName.argtypes = (ctypes.c_size_t,)
+    lib.ZSTD_createDCtx.restype = ctypes.c_void_p
+    lib.ZSTD_freeDCtx.argtypes = (ctypes.c_void_p,)
+    lib.ZSTD_decompressStream.restype = ctypes.c_size_t
+    lib.ZSTD_decompressStream.argtypes = (ctypes.c_void_p, ctypes.POINTER(_OutBuffer), ctypes.POINTER(_InBuffer))
+    return lib
+
+
+libzstd = _load_libzstd() if zstandard is None else None
+
+
+def zstd_available():
+    '''Returns True if the zstandard package or the libzstd library can decompress zstd files'''
+    return zstandard is not None or libzstd is not None
+
+
+def is_zstd_file(path):
+    '''Returns True if the file at path starts with a zstd frame or a skippable frame'''
+    with open(path, 'rb') as file:
+        header = file.read(4)
+    if len(header) < 4:
+        return False
+    magic = struct.unpack('<I', header)[0]
+    return magic == ZSTD_MAGIC or magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC
+
+
+def _check_libzstd(result):
+    '''Raises ValueError if result is a libzstd error code, else returns it'''
+    if libzstd.ZSTD_isError(result):
+        raise ValueError('zstd: ' + libzstd.ZSTD_getErrorName(result).decode('ascii', 'replace'))
+    return result
+
+
+def _decompress_frame(data, size):
+    '''Returns the content of the frame data, whose decompressed size is size'''
+    if zstandard is not None:
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+    output = ctypes.create_string_buffer(size)
+    count = _check_libzstd(libzstd.ZSTD_decompress(output, size, data, len(data)))
+    return output.raw[:count]
+
+
+class _FrameStream:
+    """Decompresses a single frame held in view, size bytes at a time"""
+
+    def __init__(self, view):
+        self._view = view
+        if zstandard is not None:
+            self._reader = zstandard.ZstdDecompressor().stream_reader(view, read_size=ZSTD_READ_SIZE)
+            return
+        self._reader = None
+        self._context = libzstd.ZSTD_createDCtx()
+        if not self._context:
+            raise MemoryError('zstd: could not create a decompression context')
+        self._input = b''
+        self._input_pos = 0
+        self._offset = 0
+        self._finished = False
+
+    def read(self, size):
+        '''Returns up to size decompressed bytes, an empty bytes object at the end of the frame'''
+        if self._reader is not None:
+            return self._reader.read(size)
+        output = ctypes.create_string_buffer(size)
+        out_buffer = _OutBuffer(ctypes.cast(output, ctypes.c_void_p), size, 0)
+        while not out_buffer.pos and not self._finished:
+            if self._input_pos == len(self._input):
+                self._input = bytes(self._view[self._offset:self._offset + ZSTD_READ_SIZE])
+                self._offset += len(self._input)
+                self._input_pos = 0
+                if not self._input:
+                    raise EOFError('Compressed file ended before the end-of-stream marker was reached')
+            in_buffer = _InBuffer(ctypes.cast(ctypes.c_char_p(self._input), ctypes.c_void_p),
+                                  len(self._input), self._input_pos)
+            result = _check_libzstd(libzstd.ZSTD_decompressStream(
+                self._context, ctypes.byref(out_buffer), ctypes.byref(in_buffer)))
+            self._input_pos = in_buffer.pos
+            self._finished = result == 0
+        return output.raw[:out_buffer.pos]
+
+    def close(self):
+        '''Frees the decompression context'''
+        self._view = None
+        if self._reader is not None:
+            self._reader.close()
+        elif self._context:
+            libzstd.ZSTD_freeDCtx(self._context)
+            self._context = None
+
+    def __del__(self):
+        self.close()
+
+
+def _read_seek_table(data):
+    '''Returns the frame index from the seek table of the seekable format at the end of data, or None'''
+    if len(data) < ZSTD_SEEKABLE_FOOTER_SIZE:
+        return None
+    frame_count, descriptor, magic = struct.unpack_from('<IBI', data, len(data) - ZSTD_SEEKABLE_FOOTER_SIZE)
+    if magic != ZSTD_SEEKABLE_MAGIC:
+        return None
+    entry_size = 12 if descriptor & 0x80 else 8
+    table_size = frame_count * entry_size + ZSTD_SEEKABLE_FOOTER_SIZE
+    table_start = len(data) - table_size - 8
+    if table_start < 0 or struct.unpack_from('<II', data, table_start) != (ZSTD_SEEK_TABLE_MAGIC, table_size):
+        return None
+    frames = []
+    compressed_offset = 0
+    for position in range(table_start + 8, table_start + 8 + frame_count * entry_size, entry_size):
+        compressed_size, size = struct.unpack_from('<II', data, position)
+        frames.append((compressed_offset, compressed_size, size))
+        compressed_offset += compressed_size
+    return frames if compressed_offset == table_start else None
+
+
+def _frame_header(data, offset):
+    '''Returns the (header size, content size or None, checksum flag) of the frame header at offset'''
+    descriptor = data[offset + 4]
+    size_flag = descriptor >> 6
+    single_segment = descriptor & 0x20
+    header_size = 5 + (0 if single_segment else 1) + (0, 1, 2, 4)[descriptor & 3]
+    size_field = (1 if single_segment else 0, 2, 4, 8)[size_flag]
+    content_size = None
+    if size_field:
+        content_size = int.from_bytes(data[offset + header_size:offset + header_size + size_field], 'little')
+        if size_field == 2:
+            content_size += 256
+    return header_size + size_field, content_size, descriptor & 4
+
+
+def _scan_frames(data):
+    '''Returns the frame index of data by walking the frame and block headers'''
+    frames = []
+    offset = 0
+    end = len(data)
+    while offset < end:
+        if end - offset < 8:
+            raise ValueError(f'Truncated zstd frame at offset {offset}')
+        magic = struct.unpack_from('<I', data, offset)[0]
+        if magic & ZSTD_SKIPPABLE_MASK == ZSTD_SKIPPABLE_MAGIC:
+            offset += 8 + struct.unpack_from('<I', data, offset + 4)[0]
+            continue
+        if magic != ZSTD_MAGIC:
+            raise ValueError(f'Not a zstd frame at offset {offset}')
+        header_size, content_size, checksum = _frame_header(data, offset)
+        position = offset + header_size
+        last_block = False
+        while not last_block:
+            if position + 3 > end:
+                raise ValueError(f'Truncated zstd frame at offset {offset}')
+            block_header = int.from_bytes(data[position:position + 3], 'little')
+            last_block = block_header & 1
+            # RLE blocks hold a single byte repeated block size times
+            position += 3 + (1 if (block_header >> 1) & 3 == 1 else block_header >> 3)
+        position += 4 if checksum else 0
+        frames.append((offset, position - offset, content_size))
+        offset = position
+    return frames
+
+
+def read_frame_index(data):
+    '''
+    Returns the (compressed offset, compressed size, decompressed size or None) of each
+    frame of the zstd content data (a bytes-like object, usually a memory map of the file).
+    '''
+    frames = _read_seek_table(data)
+    return frames if frames is not None else _scan_frames(data)
+
+
+class ZstdFrameReader(io.RawIOBase):
+    """
+    Seekable reader of the decompressed content of a zstd file, indexed by frame.
+    Attributes:
+        name (str): Path of the zstd file.
+        frames (list): (compressed offset, compressed size, decompressed size or None) of each frame,
+            the unknown sizes being set once the frame has been decompressed.
+        workers (int): Number of threads decompressing the next frames ahead of a forward read.
+    """
+
+    def __init__(self, path, workers=1):
+        super().__init__()
+        self.name = path
+        self.workers = workers
+        self._file = open(path, 'rb')  # pylint: disable=consider-using-with
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self._data = b''
+        self.frames = [list(frame) for frame in read_frame_index(self._data)]
+        self._starts = [0]
+        self._extend_starts()
+        self._executor = ThreadPoolExecutor(workers) if workers > 1 else None
+        self._prefetched = {}
+        self._frame = -1
+        self._sequential = 0
+        self._stream = None
+        self._output = b''
+        self._output_pos = 0
+        self._output_offset = 0
+
+    def _extend_starts(self):
+        '''Adds the decompressed offsets of the frames following the known ones'''
+        while len(self._starts) <= len(self.frames) and self.frames[len(self._starts) - 1][2] is not None:
+            self._starts.append(self._starts[-1] + self.frames[len(self._starts) - 1][2])
+
+    def _buffered(self, index):
+        '''Returns True if frame index is decompressed whole instead of as a stream'''
+        size = self.frames[index][2]
+        return size is not None and size <= ZSTD_MAX_FRAME_BUFFER
+
+    def _decompress(self, index):
+        '''Returns the content of the buffered frame index'''
+        compressed_offset, compressed_size, size = self.frames[index]
+        return _decompress_frame(self._data[compressed_offset:compressed_offset + compressed_size], size)
+
+    def _prefetch(self, index, depth):
+        '''Starts decompressing the depth buffered frames following index on the pool of threads'''
+        for stale in [key for key in self._prefetched if key <= index or key > index + depth]:
+            self._prefetched.pop(stale).cancel()
+        for next_index in range(index + 1, min(index + 1 + depth, len(self.frames))):
+            if next_index not in self._prefetched and self._buffered(next_index):
+                self._prefetched[next_index] = self._executor.submit(self._decompress, next_index)
+
+    def _open_frame(self, index):
+        '''Makes frame index the current frame, positioned at its start'''
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+        # Like a read-ahead, the frames decompressed ahead grow with the length of a forward read,
+        # a random read of one or two frames would waste them
+        self._sequential = self._sequential + 1 if index == self._frame + 1 else 0
+        self._frame = index
+        self._output_offset = self._starts[index]
+        self._output_pos = 0
+        if self._buffered(index):
+            future = self._prefetched.pop(index, None)
+            self._output = future.result() if future is not None else self._decompress(index)
+        else:
+            compressed_offset, compressed_size, _ = self.frames[index]
+            self._stream = _FrameStream(memoryview(self._data)[compressed_offset:compressed_offset + compressed_size])
+            self._output = b''
+        if self._executor is not None and self._sequential:
+            self._prefetch(index, min(self.workers, self._sequential))
+
+    def _decompress_next(self):
+        '''Replaces the output buffer with the next decompressed chunk, returns False at the end of the file'''
+        if self._stream is not None:
+            chunk = self._stream.read(ZSTD_BUFFER_SIZE)
+            if chunk:
+                self._output_offset += len(self._output)
+                self._output = chunk
+                self._output_pos = 0
+                return True
+            frame = self.frames[self._frame]
+            if frame[2] is None:
+                frame[2] = self._output_offset + len(self._output) - self._starts[self._frame]
+                self._extend_starts()
+        if self._frame + 1 >= len(self.frames):
+            return False
+        self._open_frame(self._frame + 1)
+        return True
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self._output_pos >= len(self._output):
+            if not self._decompress_next():
+                return 0
+        count = min(len(buffer), len(self._output) - self._output_pos)
+        buffer[:count] = self._output[self._output_pos:self._output_pos + count]
+        self._output_pos += count
+        return count
+
+    def tell(self):
+        return self._output_offset + self._output_pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.tell()
+        elif whence == io.SEEK_END:
+            while self._decompress_next():
+                pass
+            offset += self._output_offset + len(self._output)
+        if offset < 0:
+            raise ValueError(f'negative seek position {offset}')
+        if not self._output_offset <= offset <= self._output_offset + len(self._output):
+            index = bisect_right(self._starts, offset) - 1
+            if index >= len(self.frames):
+                index = len(self.frames) - 1
+            if index >= 0 and (offset < self._output_offset or index > self._frame):
+                self._open_frame(index)
+            while offset > self._output_offset + len(self._output):
+                if not self._decompress_next():
+                    break
+        self._output_pos = min(offset - self._output_offset, len(self._output))
+        return self.tell()
+
+    def close(self):
+        if not self.closed:
+            if self._stream is not None:
+                self._stream.close()
+                self._stream = None
+            if self._executor is not None:
+                for future in self._prefetched.values():
+                    future.cancel()
+                self._executor.shutdown(wait=True)
+            if isinstance(self._data, mmap.mmap):
+                try:
+                    self._data.close()
+                except BufferError:
+                    # Still referenced by a frame stream, unmapped once it is collected
+                    pass
+            self._file.close()
+        super().close()
+
+
+def open_zstd_index(path, workers=1):
+    '''
+    Returns a seekable binary file object reading the decompressed content of the zstd file at path.
+    The frames following the one being read are decompressed ahead by workers threads.
+    '''
+    if not zstd_available():
+        raise ValueError('Reading zstd files requires the zstandard package (pip install zstandard) '
+                         'or the libzstd library')
+    return io.BufferedReader(ZstdFrameReader(path, workers), ZSTD_BUFFER_SIZE)